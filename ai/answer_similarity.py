@@ -0,0 +1,256 @@
+"""
+유사 답안 탐지 모듈
+MinHash + LSH 로 같은 문제에 제출된 거의 같은 답안을 찾아 채점 결과를 재사용하고 베끼기 의심을 표시
+
+- 한국어는 띄어쓰기/조사 차이가 커서 단어 대신 공백·문장부호를 제거한 음절 3-gram 을 shingle 로 사용
+- 인덱스는 문제별(scope)로 분리되며, 처음 조회할 때 DB 의 최근 답안으로 채움
+- 조회는 밴드 버킷 조회 + 후보 서명 비교만 하므로 답안 수와 무관하게 1ms 미만
+
+환경 변수:
+    ANSWER_REUSE_THRESHOLD: 이 유사도 이상이면 기존 채점 재사용 (기본 0.9, 0 이면 재사용 안 함)
+    ANSWER_COPY_THRESHOLD: 이 유사도 이상이면 다른 학생 답안과 베끼기 의심 표시 (기본 0.8)
+"""
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Hashable, List, Optional, Set
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import EssayGrading, Feedback, Submission
+
+
+NUM_PERM = 128
+BANDS = 16            # 16 밴드 × 8 행 → 유사도 약 0.7 이상부터 후보로 잡힘
+SHINGLE_SIZE = 3
+MIN_SHINGLES = 8      # 이보다 짧은 답안은 우연히 겹치기 쉬워 비교하지 않음
+MAX_SCOPES = 512      # 메모리에 유지할 문제(scope) 수
+MAX_ENTRIES = 5000    # 문제당 보관할 답안 수
+WARM_LIMIT = 2000     # scope 생성 시 DB 에서 읽을 최근 답안 수
+
+_MERSENNE = np.uint64((1 << 31) - 1)
+_NORMALIZE = re.compile(r"[\s\W_]+", re.UNICODE)
+
+
+def _threshold(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def reuse_threshold() -> float:
+    return _threshold("ANSWER_REUSE_THRESHOLD", 0.9)
+
+
+def copy_threshold() -> float:
+    return _threshold("ANSWER_COPY_THRESHOLD", 0.8)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    """
+    공백/문장부호를 제거한 문자 n-gram 집합
+
+    Args:
+        text: 답안
+        size: n-gram 길이 (한글 음절 기준)
+
+    Returns:
+        shingle 집합
+    """
+    normalized = _NORMALIZE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """
+    (a·x + b) mod p 해시 NUM_PERM 개로 shingle 집합의 MinHash 서명 계산
+
+    shingle 해시는 프로세스마다 달라지는 hash() 대신 crc32 를 써서 재시작 후에도 서명이 같습니다.
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE), size=num_perm, dtype=np.uint64)
+
+    def signature(self, items: Set[str]) -> np.ndarray:
+        hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in items), dtype=np.uint64, count=len(items))
+        # a < 2^31, crc32 < 2^32 → 곱이 uint64 범위 안
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE
+        return permuted.min(axis=1).astype(np.uint32)
+
+
+_hasher = MinHasher()
+
+
+class LSHIndex:
+    """
+    MinHash 서명의 밴드별 버킷 인덱스 (스레드 안전)
+
+    Args:
+        bands: 밴드 수 (NUM_PERM 을 나누어떨어져야 함)
+        max_entries: 최대 답안 수 (초과 시 가장 오래된 답안부터 제거)
+    """
+
+    def __init__(self, bands: int = BANDS, max_entries: int = MAX_ENTRIES):
+        self.bands = bands
+        self.rows = _hasher.num_perm // bands
+        self.max_entries = max_entries
+        self._signatures: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self._payloads: Dict[Hashable, Any] = {}
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [defaultdict(set) for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key: Hashable, text: str, payload: Any = None) -> bool:
+        """
+        답안 추가
+
+        Returns:
+            너무 짧아 추가하지 않았으면 False
+        """
+        items = shingles(text)
+        if len(items) < MIN_SHINGLES:
+            return False
+        signature = _hasher.signature(items)
+        with self._lock:
+            if key in self._signatures:
+                self._remove(key)
+            self._signatures[key] = signature
+            self._payloads[key] = payload
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                bucket[band_key].add(key)
+            while len(self._signatures) > self.max_entries:
+                self._remove(next(iter(self._signatures)))
+        return True
+
+    def _remove(self, key: Hashable):
+        signature = self._signatures.pop(key)
+        self._payloads.pop(key, None)
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            members = bucket.get(band_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del bucket[band_key]
+
+    def query(self, text: str, threshold: float = 0.8, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        유사 답안 조회
+
+        Args:
+            text: 답안
+            threshold: 최소 추정 유사도 (Jaccard)
+            limit: 최대 결과 수
+
+        Returns:
+            [{"key", "similarity", "payload"}] - 유사도 내림차순
+        """
+        items = shingles(text)
+        if len(items) < MIN_SHINGLES:
+            return []
+        signature = _hasher.signature(items)
+        with self._lock:
+            candidates = set()
+            for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+                candidates |= bucket.get(band_key, set())
+            matches = []
+            for key in candidates:
+                similarity = float(np.mean(self._signatures[key] == signature))
+                if similarity >= threshold:
+                    matches.append({"key": key, "similarity": round(similarity, 3), "payload": self._payloads[key]})
+        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        return matches[:limit]
+
+
+# ==================== 문제별 인덱스 ====================
+
+_scopes: "OrderedDict[Hashable, LSHIndex]" = OrderedDict()
+_scopes_lock = threading.Lock()
+
+
+def _scope_index(scope: Hashable, warm) -> LSHIndex:
+    """scope 인덱스 조회 (없으면 생성 후 warm(index) 로 기존 답안 적재)"""
+    with _scopes_lock:
+        index = _scopes.get(scope)
+        if index is not None:
+            _scopes.move_to_end(scope)
+            return index
+        index = LSHIndex()
+        _scopes[scope] = index
+        while len(_scopes) > MAX_SCOPES:
+            _scopes.popitem(last=False)
+    warm(index)
+    return index
+
+
+def reset_indexes():
+    """모든 scope 인덱스 삭제 (테스트/DB 초기화 후)"""
+    with _scopes_lock:
+        _scopes.clear()
+
+
+def essay_index(db: Session, subject: str, question: str) -> LSHIndex:
+    """
+    서술형 채점(EssayGrading) 인덱스 - 과목 + 문제 본문 단위
+
+    payload: {"id": 채점 ID, "username": 학생}
+    """
+    def warm(index: LSHIndex):
+        rows = (
+            db.query(EssayGrading.id, EssayGrading.username, EssayGrading.student_answer)
+            .filter(EssayGrading.subject == subject, EssayGrading.question == question)
+            .order_by(EssayGrading.id.desc())
+            .limit(WARM_LIMIT)
+            .all()
+        )
+        for row in reversed(rows):
+            index.add(row.id, row.student_answer, {"id": row.id, "username": row.username})
+
+    return _scope_index(("essay", subject, question), warm)
+
+
+def submission_index(db: Session, question_id: int) -> LSHIndex:
+    """
+    답안 제출(Submission + Feedback) 인덱스 - 문제 ID 단위
+
+    payload: {"submission_id", "student_id"}
+    """
+    def warm(index: LSHIndex):
+        rows = (
+            db.query(Submission.id, Submission.student_id, Submission.answer_text)
+            .join(Feedback, Feedback.submission_id == Submission.id)
+            .filter(Submission.question_id == question_id)
+            .order_by(Submission.id.desc())
+            .limit(WARM_LIMIT)
+            .all()
+        )
+        for row in reversed(rows):
+            index.add(row.id, row.answer_text, {"submission_id": row.id, "student_id": row.student_id})
+
+    return _scope_index(("submission", question_id), warm)
+
+
+def best_match(index: LSHIndex, text: str) -> Optional[Dict[str, Any]]:
+    """복사 의심 기준 이상인 가장 유사한 답안 (없으면 None)"""
+    matches = index.query(text, threshold=min(copy_threshold(), reuse_threshold() or 1.0), limit=1)
+    return matches[0] if matches else None
@@ -0,0 +1,729 @@
+"""
+오프라인 일괄 채점 모듈 (Batch API)
+과제 전체를 밤사이 채점할 때처럼 즉시 응답이 필요 없는 경우, 채점 요청을 JSONL 파일로 모아
+OpenAI Batch API(completion_window=24h, 요금 약 50%)에 제출하고 결과를 Feedback / EssayGrading 에 일괄 저장
+
+단계 (진행 상태는 grading_batch_jobs 테이블에 저장되어, 중단되어도 같은 작업을 다시 실행하면 이어서 진행):
+1. preparing → prepared: 과제의 채점 대기 답안(Feedback 없는 Submission)을 로컬 판정하고 나머지는 요청 파일로 작성
+2. prepared → submitted: 파일 업로드 후 배치 생성 (이미 제출된 배치가 있으면 다시 만들지 않음)
+3. submitted → downloaded: 배치가 끝나면 결과 파일 다운로드
+4. downloaded → applied: 결과를 청크 단위로 저장 (이미 Feedback 이 있는 답안은 건너뜀)
+
+각 단계는 실행 전에 UPDATE ... WHERE status=<단계> 로 작업을 선점(처리 중 상태로 변경)하므로, 여러 요청이나
+프로세스가 같은 작업을 동시에 진행해도 한 단계는 한 곳에서만 실행됩니다. 처리 중 프로세스가 죽어 선점이
+CLAIM_TIMEOUT_SEC 이상 남아 있으면 다음 진행 때 원래 단계로 되돌립니다.
+
+실패한 요청의 답안은 Feedback 없이 남아 다음 작업에서 다시 채점됩니다.
+
+환경 변수:
+    GRADING_BATCH_BACKEND: openai | local (기본: LLM_BACKEND 가 fake/replay 면 local, 아니면 openai)
+    GRADING_BATCH_DIR: 요청/결과 파일 디렉토리 (기본 data/batches)
+    GRADING_BATCH_MODEL: 채점 모델 (기본 gpt-4o)
+    GRADING_BATCH_LOCAL_DELAY_SEC: local 백엔드가 배치를 완료 처리하기까지의 시간 (기본 0)
+    GRADING_BATCH_CLAIM_TIMEOUT_SEC: 처리 중 상태를 만료로 보고 되돌리기까지의 시간 (기본 1800)
+
+실행:
+    python -m ai.batch_grading run --assignment 3 --subject 국어
+    python -m ai.batch_grading resume      # 끝나지 않은 작업 모두 이어서 진행
+    python -m ai.batch_grading status
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, selectinload
+
+from models import EssayGrading, Feedback, GradingBatchJob, MasteryLevel, Question, Submission, User
+from ai.essay_grader import GRADING_CRITERIA, SYSTEM_PROMPT
+from ai.grading_pipeline import triage
+from ai.llm_telemetry import estimate_cost
+from ai.prompt_builder import PromptBuilder
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+BATCH_PRICE_RATIO = 0.5         # Batch API 요금 (동기 호출 대비)
+APPLY_CHUNK = 200               # 결과 저장 시 한 번에 커밋할 답안 수
+GRADED_BY_BATCH = "AI-batch"
+DEFAULT_MAX_SCORE = 100
+
+# 백엔드 배치 상태 중 더 이상 바뀌지 않는 상태 (expired 도 완료된 요청의 결과는 있음)
+TERMINAL_BATCH_STATUSES = {"completed", "expired", "failed", "cancelled"}
+FINISHED_JOB_STATUSES = {"applied", "failed"}
+# 단계 → 그 단계를 처리 중인 상태 (선점)
+CLAIMED_STATUSES = {"preparing": "writing", "prepared": "submitting", "submitted": "polling", "downloaded": "applying"}
+CLAIM_TIMEOUT_SEC = float(os.getenv("GRADING_BATCH_CLAIM_TIMEOUT_SEC", 30 * 60))
+
+GRADING_BATCH_RESULTS = REGISTRY.counter(
+    "grading_batch_results_total", "일괄 채점 결과 저장 수 (outcome: applied/skipped/failed)", ("outcome",))
+
+
+def _custom_id(submission_id: int) -> str:
+    return f"submission-{submission_id}"
+
+
+def _submission_id(custom_id: str) -> Optional[int]:
+    prefix, _, value = (custom_id or "").partition("-")
+    return int(value) if prefix == "submission" and value.isdigit() else None
+
+
+def _job_key(job: GradingBatchJob) -> str:
+    """배치 metadata 에 넣는 작업 키 (DB 를 새로 만들어 ID 가 겹쳐도 구분되도록 생성 시각 포함)"""
+    created = job.created_at.strftime("%Y%m%d%H%M%S") if job.created_at else ""
+    return f"grading-job-{job.id}-{created}"
+
+
+def _write_atomic(path: str, lines: Iterable[str]) -> int:
+    """임시 파일에 쓴 뒤 교체 (중간에 중단되어도 반쯤 쓴 파일이 남지 않음)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    count = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+            count += 1
+    os.replace(tmp, path)
+    return count
+
+
+def _read_jsonl(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# ==================== 배치 백엔드 ====================
+
+class OpenAIBatchBackend:
+    """OpenAI Batch API (files + batches)"""
+
+    name = "openai"
+
+    def _client(self):
+        from ai.llm_client import get_openai_client
+        return get_openai_client()
+
+    def submit(self, input_path: str, metadata: Dict[str, str]) -> str:
+        client = self._client()
+        with open(input_path, "rb") as f:
+            uploaded = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=COMPLETION_WINDOW,
+            metadata=metadata
+        )
+        return batch.id
+
+    def find(self, job_key: str) -> Optional[str]:
+        """제출 직후 중단된 경우를 위해 metadata 로 이미 만든 배치 조회"""
+        for batch in self._client().batches.list(limit=100):
+            if (batch.metadata or {}).get("job") == job_key and batch.status not in ("failed", "cancelled"):
+                return batch.id
+        return None
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        batch = self._client().batches.retrieve(batch_id)
+        counts = batch.request_counts
+        return {
+            "status": batch.status,
+            "output_file_id": batch.output_file_id,
+            "completed": counts.completed if counts else 0,
+            "failed": counts.failed if counts else 0,
+        }
+
+    def download(self, file_id: str, path: str):
+        content = self._client().files.content(file_id)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(content.read())
+        os.replace(tmp, path)
+
+
+class LocalBatchBackend:
+    """
+    로컬 스텁 백엔드 (테스트/오프라인용)
+
+    제출한 파일을 디렉토리에 보관하고, delay 초가 지난 뒤 상태를 조회하면 가짜 LLM 서버의 기본 응답으로
+    결과 파일을 만듭니다. 배치 상태도 파일로 저장되어 프로세스를 다시 시작해도 이어집니다.
+
+    Args:
+        directory: 배치 파일 디렉토리 (기본: {GRADING_BATCH_DIR}/local)
+        delay: 제출 후 완료까지 걸리는 시간(초) (기본: GRADING_BATCH_LOCAL_DELAY_SEC)
+        content_fn: 요청 본문 → 응답 내용 (기본: fake_llm_server.default_content)
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str = None, delay: float = None,
+                 content_fn: Callable[[Dict[str, Any]], str] = None):
+        self.directory = directory or os.path.join(batch_dir(), "local")
+        self.delay = float(os.getenv("GRADING_BATCH_LOCAL_DELAY_SEC", 0)) if delay is None else delay
+        self.content_fn = content_fn
+
+    def _meta_path(self, batch_id: str) -> str:
+        return os.path.join(self.directory, f"{batch_id}.json")
+
+    def _load(self, batch_id: str) -> Dict[str, Any]:
+        with open(self._meta_path(batch_id), encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, batch_id: str, meta: Dict[str, Any]):
+        _write_atomic(self._meta_path(batch_id), [json.dumps(meta, ensure_ascii=False)])
+
+    def submit(self, input_path: str, metadata: Dict[str, str]) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex[:16]}"
+        os.makedirs(self.directory, exist_ok=True)
+        shutil.copyfile(input_path, os.path.join(self.directory, f"{batch_id}.input.jsonl"))
+        self._save(batch_id, {"status": "in_progress", "created_at": time.time(), "metadata": metadata})
+        return batch_id
+
+    def find(self, job_key: str) -> Optional[str]:
+        if not os.path.isdir(self.directory):
+            return None
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                batch_id = name[:-len(".json")]
+                if self._load(batch_id).get("metadata", {}).get("job") == job_key:
+                    return batch_id
+        return None
+
+    def _complete(self, batch_id: str) -> int:
+        from ai.fake_llm_server import build_completion, default_content
+
+        content_fn = self.content_fn or default_content
+
+        def results():
+            for n, request in enumerate(_read_jsonl(os.path.join(self.directory, f"{batch_id}.input.jsonl"))):
+                body = request["body"]
+                yield json.dumps({
+                    "id": f"batch_req_{n}",
+                    "custom_id": request["custom_id"],
+                    "response": {"status_code": 200, "body": build_completion(body, content_fn(body))},
+                    "error": None,
+                }, ensure_ascii=False)
+
+        return _write_atomic(os.path.join(self.directory, f"{batch_id}.output.jsonl"), results())
+
+    def status(self, batch_id: str) -> Dict[str, Any]:
+        meta = self._load(batch_id)
+        if meta["status"] == "in_progress" and time.time() - meta["created_at"] >= self.delay:
+            meta.update(status="completed", completed=self._complete(batch_id))
+            self._save(batch_id, meta)
+        done = meta["status"] == "completed"
+        return {
+            "status": meta["status"],
+            "output_file_id": f"{batch_id}.output.jsonl" if done else None,
+            "completed": meta.get("completed", 0),
+            "failed": 0,
+        }
+
+    def download(self, file_id: str, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        shutil.copyfile(os.path.join(self.directory, file_id), f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+
+def batch_dir() -> str:
+    return os.getenv("GRADING_BATCH_DIR", os.path.join("data", "batches"))
+
+
+def default_backend_name() -> str:
+    default = "local" if os.getenv("LLM_BACKEND", "openai") in ("fake", "replay") else "openai"
+    return os.getenv("GRADING_BATCH_BACKEND", default)
+
+
+def get_backend(name: str = None):
+    """이름(openai / local)으로 배치 백엔드 생성"""
+    name = name or default_backend_name()
+    if name == "openai":
+        return OpenAIBatchBackend()
+    if name == "local":
+        return LocalBatchBackend()
+    raise ValueError(f"지원하지 않는 배치 백엔드: {name}")
+
+
+# ==================== 요청 파일 작성 ====================
+
+def _question_context(question: Question) -> Dict[str, Any]:
+    """문제별 채점 문맥 (채점 기준 본문, 만점 = 채점 기준 배점 합계)"""
+    rubrics = [r for r in question.rubrics if r.criteria_text]
+    max_score = sum(r.min_score or 0 for r in rubrics) or DEFAULT_MAX_SCORE
+    return {
+        "question": question.content or "",
+        "standard": question.standard_code or "",
+        "rubric": "\n".join(r.criteria_text for r in rubrics),
+        "max_score": max_score,
+    }
+
+
+BATCH_GRADING_FORMAT = """다음 형식의 JSON으로 작성해주세요 (점수는 0점부터 아래 만점 사이):
+{
+  "score": 점수,
+  "reason": "채점 근거 (각 기준별로 구체적으로)",
+  "feedback": "학생에게 줄 개선 피드백 (존댓말)",
+  "strengths": "답안의 장점",
+  "weaknesses": "답안의 부족한 점",
+  "missing_concepts": ["누락된 핵심 개념"],
+  "mastery_level": "PASS" | "PARTIAL" | "FAIL"
+}"""
+
+
+def grading_prompt(context: Dict[str, Any], answer: str) -> str:
+    """일괄 채점 프롬프트 (고정 지시문 → 문제별 문맥 → 학생 답안)"""
+    return (
+        PromptBuilder("batch_grading.grade")
+        .static("당신은 고등학교 국어 교사입니다. 다음 서술형 문제에 대한 학생의 답안을 채점하고 분석해주세요.")
+        .static(GRADING_CRITERIA, header="**평가 관점**:")
+        .static(BATCH_GRADING_FORMAT)
+        .dynamic(f"{context['max_score']}점", header="**만점**:")
+        .dynamic(context["question"], header="**문제**:")
+        .dynamic(context["standard"], header="**성취기준**:")
+        .dynamic(context["rubric"], header="**채점 기준(Rubric)**:")
+        .dynamic(answer, header="**학생 답안**:", keep=True)
+        .build()
+    )
+
+
+def _batch_request(submission_id: int, model: str, context: Dict[str, Any], answer: str) -> str:
+    return json.dumps({
+        "custom_id": _custom_id(submission_id),
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": grading_prompt(context, answer)}
+            ],
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"}
+        }
+    }, ensure_ascii=False)
+
+
+def _mastery(score_ratio: float) -> str:
+    if score_ratio >= 0.8:
+        return "PASS"
+    if score_ratio >= 0.5:
+        return "PARTIAL"
+    return "FAIL"
+
+
+def _save_result(db: Session, job: GradingBatchJob, row, question: str, result: Dict[str, Any],
+                 graded_by: str, analysis: Dict[str, Any]):
+    """채점 결과 1건을 Feedback + EssayGrading 으로 추가 (커밋은 호출 측에서)"""
+    db.add(Feedback(
+        submission_id=row.id,
+        mastery_level=MasteryLevel[result["mastery_level"]],
+        overall_comment=result["feedback"],
+        teacher_summary=json.dumps(analysis, ensure_ascii=False),
+        analysis_json=analysis,
+        misconceptions=[]
+    ))
+    db.add(EssayGrading(
+        username=row.username or str(row.student_id),
+        subject=job.subject,
+        question=question,
+        student_answer=row.answer_text,
+        model_answer="모범답안 없음",
+        score=result["score"],
+        grading_reason=result["reason"],
+        feedback=result["feedback"],
+        graded_by=graded_by
+    ))
+
+
+def _pending_rows(db: Session, assignment_id: int, submission_ids: List[int] = None):
+    """Feedback 이 없는 제출 답안 (학생 아이디 포함)"""
+    query = (
+        db.query(Submission.id, Submission.question_id, Submission.student_id, Submission.answer_text,
+                 User.username)
+        .join(Question, Question.id == Submission.question_id)
+        .outerjoin(User, User.id == Submission.student_id)
+        .outerjoin(Feedback, Feedback.submission_id == Submission.id)
+        .filter(Question.assignment_id == assignment_id, Feedback.id.is_(None))
+    )
+    if submission_ids is not None:
+        query = query.filter(Submission.id.in_(submission_ids))
+    return query.order_by(Submission.id)
+
+
+def prepare_job(db: Session, job: GradingBatchJob) -> GradingBatchJob:
+    """
+    채점 대기 답안을 로컬 판정하고 나머지를 배치 요청 파일로 작성 (preparing → prepared)
+
+    다시 실행하면 파일을 새로 작성하며, 이미 로컬 판정으로 저장된 답안은 대기 목록에서 빠집니다.
+    """
+    questions = (
+        db.query(Question)
+        .options(selectinload(Question.rubrics))
+        .filter(Question.assignment_id == job.assignment_id)
+        .all()
+    )
+    contexts = {q.id: _question_context(q) for q in questions}
+    local = []
+
+    def requests():
+        for row in _pending_rows(db, job.assignment_id).yield_per(500):
+            context = contexts[row.question_id]
+            signals: Dict[str, Any] = {}
+            verdict = triage("batch_grading", row.answer_text, question=context["question"],
+                             rubric=context["rubric"], signals=signals)
+            if verdict is not None:
+                local.append((row, verdict, signals))
+                continue
+            yield _batch_request(row.id, job.model, context, row.answer_text or "")
+
+    job.input_path = os.path.join(batch_dir(), f"job-{job.id}.input.jsonl")
+    job.request_count = _write_atomic(job.input_path, requests())
+
+    for row, verdict, signals in local:
+        context = contexts[row.question_id]
+        result = {
+            "score": round(verdict["score_ratio"] * context["max_score"], 2),
+            "reason": verdict["reason"],
+            "feedback": verdict["feedback"],
+            "mastery_level": verdict["mastery_level"],
+        }
+        analysis = {
+            "strengths": "",
+            "weaknesses": verdict["reason"],
+            "missing_concepts": [],
+            "mastery_level": verdict["mastery_level"],
+            "feedback_for_student": verdict["feedback"],
+            "triage": {"stage": verdict["stage"], "needs_review": verdict["needs_review"], **signals},
+        }
+        _save_result(db, job, row, context["question"], result, f"local:{verdict['stage']}", analysis)
+    job.local_count = (job.local_count or 0) + len(local)
+    job.status = "prepared" if job.request_count else "applied"
+    if not job.request_count:
+        job.completed_at = datetime.now()
+    db.commit()
+    logger.info("일괄 채점 요청 파일 작성: 작업 #%s, 요청 %d건, 로컬 판정 %d건",
+                job.id, job.request_count, len(local), extra={"job_id": job.id})
+    return job
+
+
+# ==================== 제출 / 상태 조회 / 결과 저장 ====================
+
+def submit_job(db: Session, job: GradingBatchJob, backend=None) -> GradingBatchJob:
+    """요청 파일 제출 (prepared → submitted), 제출 직후 중단된 경우 기존 배치를 찾아 이어서 사용"""
+    backend = backend or get_backend(job.backend)
+    key = _job_key(job)
+    batch_id = backend.find(key)
+    if batch_id is None:
+        batch_id = backend.submit(job.input_path, {"job": key, "assignment_id": str(job.assignment_id)})
+    job.batch_id = batch_id
+    job.batch_status = "validating"
+    job.status = "submitted"
+    db.commit()
+    logger.info("일괄 채점 배치 제출: 작업 #%s → %s", job.id, batch_id, extra={"job_id": job.id})
+    return job
+
+
+def poll_job(db: Session, job: GradingBatchJob, backend=None) -> GradingBatchJob:
+    """배치 상태 1회 조회, 끝났으면 결과 파일 다운로드 (submitted → downloaded / failed)"""
+    backend = backend or get_backend(job.backend)
+    info = backend.status(job.batch_id)
+    job.batch_status = info["status"]
+    if info["status"] in TERMINAL_BATCH_STATUSES:
+        if info.get("output_file_id"):
+            job.output_path = os.path.join(batch_dir(), f"job-{job.id}.output.jsonl")
+            backend.download(info["output_file_id"], job.output_path)
+            job.status = "downloaded"
+        else:
+            job.status = "failed"
+            job.error = f"배치가 결과 없이 종료됨 ({info['status']})"
+            job.completed_at = datetime.now()
+    db.commit()
+    return job
+
+
+def _parse_result(line: Dict[str, Any], max_score: float) -> Dict[str, Any]:
+    """배치 결과 1줄 → 채점 결과 (해석할 수 없으면 ValueError)"""
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        raise ValueError(line.get("error") or f"status {response.get('status_code')}")
+    body = response["body"]
+    result = json.loads(body["choices"][0]["message"]["content"])
+    score = min(max_score, max(0.0, float(result["score"])))
+    mastery = result.get("mastery_level")
+    if mastery not in ("PASS", "PARTIAL", "FAIL"):
+        mastery = _mastery(score / max_score)
+    usage = body.get("usage") or {}
+    return {
+        "score": score,
+        "reason": result.get("reason") or "채점 근거를 생성할 수 없습니다.",
+        "feedback": result.get("feedback") or "피드백을 생성할 수 없습니다.",
+        "mastery_level": mastery,
+        "analysis": {
+            "strengths": result.get("strengths", ""),
+            "weaknesses": result.get("weaknesses", ""),
+            "missing_concepts": result.get("missing_concepts") or [],
+            "mastery_level": mastery,
+            "feedback_for_student": result.get("feedback", ""),
+            "triage": {"stage": "llm", "needs_review": False},
+        },
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+    }
+
+
+def _chunks(items: Iterable[Dict[str, Any]], size: int) -> Iterable[List[Dict[str, Any]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def apply_results(db: Session, job: GradingBatchJob) -> GradingBatchJob:
+    """
+    결과 파일을 Feedback + EssayGrading 으로 저장 (downloaded → applied)
+
+    APPLY_CHUNK 건씩 커밋하며, 이미 Feedback 이 있는 답안은 건너뛰므로 중단 후 다시 실행해도 중복 저장되지 않습니다.
+    """
+    questions = (
+        db.query(Question)
+        .options(selectinload(Question.rubrics))
+        .filter(Question.assignment_id == job.assignment_id)
+        .all()
+    )
+    contexts = {q.id: _question_context(q) for q in questions}
+    failed = 0
+
+    for chunk in _chunks(_read_jsonl(job.output_path), APPLY_CHUNK):
+        by_id = {_submission_id(line.get("custom_id")): line for line in chunk}
+        by_id.pop(None, None)
+        rows = _pending_rows(db, job.assignment_id, list(by_id)).all()
+        applied = 0
+        for row in rows:
+            context = contexts[row.question_id]
+            try:
+                result = _parse_result(by_id[row.id], context["max_score"])
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("일괄 채점 결과 해석 실패 (답안 #%s): %s", row.id, e, extra={"job_id": job.id})
+                failed += 1
+                continue
+            result["analysis"]["batch_job_id"] = job.id
+            _save_result(db, job, row, context["question"], result, GRADED_BY_BATCH, result["analysis"])
+            job.prompt_tokens = (job.prompt_tokens or 0) + result["prompt_tokens"]
+            job.completion_tokens = (job.completion_tokens or 0) + result["completion_tokens"]
+            applied += 1
+        # 청크의 결과와 진행 수를 같은 트랜잭션으로 저장
+        job.applied_count = (job.applied_count or 0) + applied
+        db.commit()
+        GRADING_BATCH_RESULTS.inc(applied, outcome="applied")
+        GRADING_BATCH_RESULTS.inc(len(by_id) - len(rows), outcome="skipped")
+
+    GRADING_BATCH_RESULTS.inc(failed, outcome="failed")
+    job.failed_count = max(0, job.request_count - job.applied_count)
+    job.status = "applied"
+    job.completed_at = datetime.now()
+    db.commit()
+    logger.info("일괄 채점 결과 저장: 작업 #%s, 저장 %d건, 실패 %d건",
+                job.id, job.applied_count, job.failed_count, extra={"job_id": job.id})
+    return job
+
+
+# ==================== 작업 관리 ====================
+
+def create_job(db: Session, assignment_id: int, subject: str, model: str = None,
+               backend: str = None) -> GradingBatchJob:
+    """
+    과제 일괄 채점 작업 생성 (같은 과제의 끝나지 않은 작업이 있으면 그 작업 반환)
+
+    Args:
+        db: 데이터베이스 세션
+        assignment_id: 과제 ID
+        subject: 과목 (EssayGrading 에 기록)
+        model: 채점 모델 (기본: GRADING_BATCH_MODEL)
+        backend: openai / local (기본: GRADING_BATCH_BACKEND)
+
+    Returns:
+        작업 (preparing 상태, advance / run_job 으로 진행)
+    """
+    existing = (
+        db.query(GradingBatchJob)
+        .filter(GradingBatchJob.assignment_id == assignment_id,
+                GradingBatchJob.status.notin_(FINISHED_JOB_STATUSES))
+        .order_by(GradingBatchJob.id)
+        .first()
+    )
+    if existing is not None:
+        return existing
+    job = GradingBatchJob(
+        assignment_id=assignment_id,
+        subject=subject,
+        model=model or os.getenv("GRADING_BATCH_MODEL", "gpt-4o"),
+        backend=backend or default_backend_name(),
+        status="preparing",
+        input_path=""
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _set_status(db: Session, job: GradingBatchJob, current: str, new: str, **values) -> bool:
+    """상태가 current 일 때만 new 로 변경 (한 문장 UPDATE, 변경했으면 True)"""
+    changed = db.execute(
+        update(GradingBatchJob)
+        .where(GradingBatchJob.id == job.id, GradingBatchJob.status == current)
+        .values(status=new, **values)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    db.refresh(job)
+    return bool(changed)
+
+
+def _release_stale_claim(db: Session, job: GradingBatchJob) -> bool:
+    """처리 중 상태가 CLAIM_TIMEOUT_SEC 이상 지속되면 (처리하던 프로세스가 중단된 경우) 원래 단계로 되돌림"""
+    step = next((s for s, claimed in CLAIMED_STATUSES.items() if claimed == job.status), None)
+    if step is None or job.claimed_at is None:
+        return False
+    if (datetime.now() - job.claimed_at).total_seconds() < CLAIM_TIMEOUT_SEC:
+        return False
+    logger.warning("일괄 채점 작업 #%s 선점 만료 (%s → %s)", job.id, job.status, step, extra={"job_id": job.id})
+    return _set_status(db, job, job.status, step, claimed_at=None)
+
+
+def advance(db: Session, job: GradingBatchJob, backend=None) -> GradingBatchJob:
+    """
+    작업을 한 단계 진행 (대기 없이, submitted 상태에서는 상태를 한 번만 조회)
+
+    단계를 먼저 선점하므로 다른 요청/프로세스가 같은 단계를 처리 중이면 아무것도 하지 않고 현재 상태를 반환합니다.
+    단계 처리 중 예외가 나면 원래 단계로 되돌리고 error 만 기록하므로 다시 호출하면 같은 단계부터 재시도합니다.
+    """
+    steps = {
+        "preparing": prepare_job,
+        "prepared": lambda db, job: submit_job(db, job, backend),
+        "submitted": lambda db, job: poll_job(db, job, backend),
+        "downloaded": apply_results,
+    }
+    _release_stale_claim(db, job)
+    status = job.status
+    step = steps.get(status)
+    if step is None or not _set_status(db, job, status, CLAIMED_STATUSES[status], claimed_at=datetime.now()):
+        return job
+    try:
+        job = step(db, job)
+        if job.status == CLAIMED_STATUSES[status]:
+            # 진행할 것이 없었던 단계 (예: 배치가 아직 처리 중)
+            job.status = status
+        job.claimed_at = None
+        db.commit()
+        return job
+    except Exception as e:
+        db.rollback()
+        logger.exception("일괄 채점 작업 #%s 진행 실패 (%s)", job.id, status, extra={"job_id": job.id})
+        job.status = status
+        job.claimed_at = None
+        job.error = str(e)
+        db.commit()
+        raise
+
+
+def run_job(db: Session, job: GradingBatchJob, backend=None, poll_interval: float = 60,
+            timeout: float = None) -> GradingBatchJob:
+    """
+    작업이 끝날 때까지 진행 (배치 완료를 poll_interval 초 간격으로 확인)
+
+    Args:
+        timeout: 최대 대기 시간(초), 지나면 진행 중인 상태 그대로 반환 (나중에 resume 으로 이어서)
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while job.status not in FINISHED_JOB_STATUSES:
+        status = job.status
+        job = advance(db, job, backend)
+        # 배치가 아직 처리 중이거나 다른 프로세스가 단계를 처리 중이면 기다렸다가 다시 확인
+        if job.status == status and (status == "submitted" or status in CLAIMED_STATUSES.values()):
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                break
+            time.sleep(poll_interval)
+    return job
+
+
+def unfinished_jobs(db: Session) -> List[GradingBatchJob]:
+    return (
+        db.query(GradingBatchJob)
+        .filter(GradingBatchJob.status.notin_(FINISHED_JOB_STATUSES))
+        .order_by(GradingBatchJob.id)
+        .all()
+    )
+
+
+def job_summary(job: GradingBatchJob) -> Dict[str, Any]:
+    """작업 진행 상황 (추정 비용은 Batch API 요금 기준)"""
+    cost = estimate_cost(job.model or "", job.prompt_tokens or 0, job.completion_tokens or 0) * BATCH_PRICE_RATIO
+    return {
+        "id": job.id,
+        "assignment_id": job.assignment_id,
+        "status": job.status,
+        "batch_status": job.batch_status,
+        "backend": job.backend,
+        "requests": job.request_count,
+        "local": job.local_count,
+        "applied": job.applied_count,
+        "failed": job.failed_count,
+        "prompt_tokens": job.prompt_tokens,
+        "completion_tokens": job.completion_tokens,
+        "estimated_cost_usd": round(cost, 4),
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+    }
+
+
+def main():
+    from database import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="과제 일괄 채점 (Batch API)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="과제 일괄 채점 작업 생성 후 완료까지 진행")
+    run.add_argument("--assignment", type=int, required=True)
+    run.add_argument("--subject", default="국어")
+    run.add_argument("--model")
+    run.add_argument("--backend", choices=("openai", "local"))
+    run.add_argument("--poll-interval", type=float, default=60)
+    resume = sub.add_parser("resume", help="끝나지 않은 작업 이어서 진행")
+    resume.add_argument("--poll-interval", type=float, default=60)
+    sub.add_parser("status", help="작업 목록")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == "run":
+            jobs = [create_job(db, args.assignment, args.subject, args.model, args.backend)]
+        elif args.command == "resume":
+            jobs = unfinished_jobs(db)
+        else:
+            jobs = db.query(GradingBatchJob).order_by(GradingBatchJob.id.desc()).limit(20).all()
+        for job in jobs:
+            if args.command != "status":
+                job = run_job(db, job, poll_interval=args.poll_interval)
+            print(json.dumps(job_summary(job), ensure_ascii=False))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
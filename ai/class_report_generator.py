@@ -2,19 +2,19 @@
 학급 성취도 리포트 자동 생성
 단원별 성취도 차트 및 리딩 포인트 생성
 """
+import logging
 from typing import Dict, List, Any
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from models import ClassReport, Record
-from openai import OpenAI
-from config import settings
+from ai.llm_client import chat_completion
+from ai.llm_telemetry import track_llm_call
 from datetime import datetime
 import json
 import os
 from utils.pdf_utils import create_class_report_pdf
 
-
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
 
 
 def generate_class_report(
@@ -35,18 +35,18 @@ def generate_class_report(
     # 학급 전체 통계
     total_students = len(student_list)
     
-    # 학생별 평균 점수 계산
+    # 학생별 평균 점수 계산 (반 인원과 관계없이 쿼리 1번)
+    # Record 테이블의 score 사용 - Record에는 명시적 subject가 없으므로 모든 과목 평균으로 가정
+    averages = dict(
+        db.query(Record.username, func.avg(Record.score))
+        .filter(Record.username.in_(student_list))
+        .group_by(Record.username)
+        .all()
+    ) if student_list else {}
+
     student_scores = []
     for student in student_list:
-        # Record 테이블의 score 사용
-        avg_score = db.query(func.avg(Record.score)).filter(
-            and_(
-                Record.username == student,
-                # Record에는 명시적 subject가 없으므로 생략하거나 추후 보완
-                # 여기서는 모든 과목 평균으로 가정
-            )
-        ).scalar()
-        
+        avg_score = averages.get(student)
         if avg_score:
             student_scores.append({
                 "username": student,
@@ -112,7 +112,7 @@ def generate_class_report(
         new_report.pdf_path = pdf_path
         db.commit()
     except Exception as e:
-        print(f"PDF 생성 중 오류 발생: {e}")
+        logger.exception("학급 리포트 PDF 생성 중 오류 발생: %s", e)
     
     return {
         "report_id": new_report.id,
@@ -195,19 +195,22 @@ def generate_leading_points_with_gpt(
     이 데이터를 바탕으로 교사가 주목해야 할 **주요 지도 포인트**를 3-5개 작성해주세요.
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 교육 평가 및 지도 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.6
-        )
-        return response.choices[0].message.content
+    with track_llm_call("class_report.leading_points", "gpt-4o") as call:
+        try:
+            response = chat_completion(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "당신은 교육 평가 및 지도 전문가입니다."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.6
+            )
+            call.record_usage(response)
+            return response.choices[0].message.content
         
-    except Exception as e:
-        return "리딩 포인트를 생성할 수 없습니다."
+        except Exception as e:
+            call.mark_fallback(e)
+            return "리딩 포인트를 생성할 수 없습니다."
 
 
 def get_all_students(db: Session, subject: str) -> List[str]:
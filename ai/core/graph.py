@@ -1,9 +1,22 @@
+import logging
+import operator
 import os
-from typing import TypedDict, Annotated, List, Dict, Any
+import time
+from functools import wraps
+from typing import TypedDict, Annotated, List, Dict, Any, Literal
 from langgraph.graph import StateGraph, END
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
-import json
+from pydantic import BaseModel, Field
+from ai.llm_client import invoke_llm
+from ai.llm_telemetry import track_llm_call, get_http_client
+from ai.prompt_builder import PromptBuilder
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+GRAPH_NODE_DURATION = REGISTRY.histogram(
+    "grading_graph_node_duration_seconds", "채점 그래프 노드별 실행 시간", ("node",))
 
 # ==========================================
 # 1. State Definition
@@ -18,87 +31,199 @@ class GraphState(TypedDict):
     analysis_result: Dict[str, Any] # 분석 결과 (JSON)
     mastery_level: str              # PASS, PARTIAL, FAIL
     feedback_text: str              # 학생용 피드백
+    misconceptions: List[Dict[str, Any]]    # 오개념 (미충족/부분 충족일 때만)
+    recommendations: List[Dict[str, Any]]   # 추천 학습 활동
+    timings: Annotated[Dict[str, float], operator.or_]  # 노드별 실행 시간(ms), 병렬 분기 결과를 합침
+
+# ==========================================
+# 2. Output Schemas (strict JSON schema 구조화 출력)
+# ==========================================
+class AnalysisOutput(BaseModel):
+    strengths: str = Field(description="학생 답안의 장점")
+    weaknesses: str = Field(description="학생 답안의 부족한 점")
+    missing_concepts: List[str] = Field(description="누락된 핵심 개념")
+    logic_score: int = Field(description="논리성 점수 (0-10)")
+    content_score: int = Field(description="내용 점수 (0-10)")
+    mastery_level: Literal["PASS", "PARTIAL", "FAIL"] = Field(description="성취 수준")
+    feedback_for_student: str = Field(description="학생에게 줄 친절하고 구체적인 피드백 (존댓말)")
+
+
+class Misconception(BaseModel):
+    concept: str = Field(description="관련 개념")
+    description: str = Field(description="학생이 잘못 이해하고 있는 내용")
+    evidence: str = Field(description="오개념이 드러난 답안 속 구절")
+
+
+class MisconceptionOutput(BaseModel):
+    misconceptions: List[Misconception] = Field(description="답안에 드러난 오개념 (없으면 빈 목록)")
+
+
+class Recommendation(BaseModel):
+    title: str = Field(description="학습 활동 제목")
+    activity: str = Field(description="학생이 바로 할 수 있는 구체적인 학습 활동")
+    reason: str = Field(description="이 활동을 추천하는 이유")
+
+
+class RecommendationOutput(BaseModel):
+    recommendations: List[Recommendation] = Field(description="추천 학습 활동 2-3개")
+
+
+class StructuredOutputError(ValueError):
+    """구조화 출력을 받지 못함 (모델이 응답을 거부한 경우 등)"""
 
 # ==========================================
-# 2. Nodes
+# 3. Nodes
 # ==========================================
 
 # LLM 초기화
-llm = ChatOpenAI(model="gpt-4o", temperature=0)
+llm = ChatOpenAI(model="gpt-4o", temperature=0, max_retries=0, http_client=get_http_client())
+
+SYSTEM_PROMPT = "당신은 고등학교 국어 교사입니다."
+
+
+def _invoke_structured(site: str, schema: type, prompt: str, hedge: bool = False) -> BaseModel:
+    """
+    스키마에 맞는 구조화 출력으로 LLM 호출 (json_schema strict 모드라 JSON 파싱 실패가 없음)
+
+    Raises:
+        StructuredOutputError: 응답 거부 등으로 스키마에 맞는 출력이 없는 경우
+    """
+    structured = llm.with_structured_output(schema, method="json_schema", strict=True, include_raw=True)
+    with track_llm_call(site, "gpt-4o") as call:
+        response = invoke_llm(
+            structured,
+            [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=prompt)],
+            hedge=hedge
+        )
+        call.record_usage(response["raw"])
+        if response["parsed"] is None:
+            raise StructuredOutputError(
+                f"{site}: 구조화 출력 없음 ({response.get('parsing_error') or '응답 거부'})")
+        return response["parsed"]
+
 
+def timed(name: str):
+    """노드 실행 시간을 state["timings"] 와 grading_graph_node_duration_seconds 에 기록"""
+    def decorator(node):
+        @wraps(node)
+        def wrapper(state: GraphState):
+            start = time.perf_counter()
+            try:
+                update = node(state)
+            finally:
+                elapsed = time.perf_counter() - start
+                GRAPH_NODE_DURATION.observe(elapsed, node=name)
+            return {**update, "timings": {name: round(elapsed * 1000, 1)}}
+        return wrapper
+    return decorator
+
+
+def _answer_context(state: GraphState) -> str:
+    """분석 이후 분기 노드 공통: 문제/채점 기준/분석 요약/학생 답안"""
+    analysis = state["analysis_result"]
+    summary = f"성취 수준: {state['mastery_level']}\n부족한 점: {analysis.get('weaknesses', '')}"
+    if analysis.get("missing_concepts"):
+        summary += f"\n누락된 개념: {', '.join(analysis['missing_concepts'])}"
+    return summary
+
+
+@timed("analyze")
 def analyze_node(state: GraphState):
     """
     학생 답안을 분석하고 채점 기준에 따라 평가합니다.
     """
-    print("--- 🔍 ANALYZING SUBMISSION ---")
-    
-    prompt = f"""
-    당신은 고등학교 국어 교사입니다. 학생의 서술형 답안을 평가해주세요.
-    
-    [문제]
-    {state['question']}
-    
-    [성취기준]
-    {state['standard']}
-    
-    [채점 기준(Rubric)]
-    {state['rubric']}
-    
-    [학생 답안]
-    {state['student_answer']}
-    
-    다음 형식의 JSON으로만 응답하세요:
-    {{
-        "strengths": "학생 답안의 장점",
-        "weaknesses": "학생 답안의 부족한 점",
-        "missing_concepts": ["누락된 핵심 개념1", "누락된 핵심 개념2"],
-        "logic_score": 8,
-        "content_score": 7,
-        "mastery_level": "PASS" | "PARTIAL" | "FAIL",
-        "feedback_for_student": "학생에게 줄 친절하고 구체적인 피드백 (존댓말)"
-    }}
-    """
+    logger.debug("답안 분석 시작")
     
-    response = llm.invoke([SystemMessage(content="JSON 형식으로 응답하세요."), HumanMessage(content=prompt)])
+    # 지시문(고정) → 문제/성취기준/채점 기준(문항별) → 학생 답안 순서, 출력 형식은 스키마로 지정
+    prompt = (
+        PromptBuilder("graph.analyze")
+        .static("아래 문제, 성취기준, 채점 기준(Rubric)에 따라 학생의 서술형 답안을 평가해주세요.")
+        .dynamic(state['question'], header="[문제]")
+        .dynamic(state['standard'], header="[성취기준]")
+        .dynamic(state['rubric'], header="[채점 기준(Rubric)]")
+        .dynamic(state['student_answer'], header="[학생 답안]", keep=True)
+        .build()
+    )
     
-    try:
-        result = json.loads(response.content)
-    except:
-        # Fallback if JSON parsing fails
-        result = {
-            "strengths": "",
-            "weaknesses": "",
-            "missing_concepts": [],
-            "mastery_level": "PARTIAL",
-            "feedback_for_student": response.content
-        }
+    # 학생이 제출 후 기다리는 경로이므로 헤징 허용 (LLM_HEDGE_DELAY_SEC 설정 시)
+    result = _invoke_structured("graph.analyze", AnalysisOutput, prompt, hedge=True).model_dump()
         
     return {
         "analysis_result": result,
-        "mastery_level": result.get("mastery_level", "PARTIAL"),
-        "feedback_text": result.get("feedback_for_student", "")
+        "mastery_level": result["mastery_level"],
+        "feedback_text": result["feedback_for_student"]
     }
 
 
+@timed("misconceptions")
+def misconception_node(state: GraphState):
+    """
+    분석 결과를 바탕으로 답안에 드러난 오개념을 추출합니다. (실패하면 빈 목록)
+    """
+    prompt = (
+        PromptBuilder("graph.misconceptions")
+        .static("학생의 서술형 답안에서 개념을 잘못 이해하고 있는 부분(오개념)을 찾아주세요. "
+                "단순한 누락이나 표현 문제는 제외하고, 답안 속 구절을 근거로 드세요.")
+        .dynamic(state['question'], header="[문제]")
+        .dynamic(state['rubric'], header="[채점 기준(Rubric)]")
+        .dynamic(_answer_context(state), header="[분석 결과]")
+        .dynamic(state['student_answer'], header="[학생 답안]", keep=True)
+        .build()
+    )
+    try:
+        result = _invoke_structured("graph.misconceptions", MisconceptionOutput, prompt)
+    except Exception as e:
+        logger.warning("오개념 추출 실패: %s", e)
+        return {"misconceptions": []}
+    return {"misconceptions": [m.model_dump() for m in result.misconceptions]}
+
+
+@timed("recommend")
+def recommend_node(state: GraphState):
+    """
+    성취 수준에 맞는 다음 학습 활동을 추천합니다. (실패하면 빈 목록)
+    """
+    prompt = (
+        PromptBuilder("graph.recommend")
+        .static("학생의 답안 분석 결과를 보고 다음에 할 학습 활동을 추천해주세요. "
+                "미충족/부분 충족이면 부족한 개념을 보충하는 활동을, 충족이면 심화 활동을 추천하세요.")
+        .dynamic(state['question'], header="[문제]")
+        .dynamic(state['standard'], header="[성취기준]")
+        .dynamic(_answer_context(state), header="[분석 결과]")
+        .build()
+    )
+    try:
+        result = _invoke_structured("graph.recommend", RecommendationOutput, prompt)
+    except Exception as e:
+        logger.warning("학습 활동 추천 실패: %s", e)
+        return {"recommendations": []}
+    return {"recommendations": [r.model_dump() for r in result.recommendations]}
+
 
 # ==========================================
-# 3. Conditional Logic
+# 4. Conditional Logic
 # ==========================================
-def check_mastery(state: GraphState):
+def check_mastery(state: GraphState) -> List[str]:
+    """분석 이후 병렬로 실행할 분기 (충족이면 추천만, 아니면 오개념 추출 + 보충 학습 추천)"""
     if state["mastery_level"] == "PASS":
-        return "pass"
-    return "remedial"
+        return ["recommend"]
+    return ["misconceptions", "recommend"]
 
 # ==========================================
-# 4. Graph Construction
+# 5. Graph Construction
 # ==========================================
 workflow = StateGraph(GraphState)
 
 workflow.add_node("analyze", analyze_node)
+workflow.add_node("misconceptions", misconception_node)
+workflow.add_node("recommend", recommend_node)
 
 workflow.set_entry_point("analyze")
 
-workflow.add_edge("analyze", END)
+# 분석 후 분기 노드는 같은 단계에서 동시에 실행되므로 전체 지연은 가장 느린 분기 기준
+workflow.add_conditional_edges("analyze", check_mastery, ["misconceptions", "recommend"])
+workflow.add_edge("misconceptions", END)
+workflow.add_edge("recommend", END)
 
 # Compile
 app_graph = workflow.compile()
@@ -2,15 +2,48 @@
 서술형 자동 채점 모듈
 GPT-4 기반 서술형/논술형 답안 채점 및 피드백 생성
 """
-from typing import Dict, Any
+import logging
+import os
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from models import EssayGrading
-from openai import OpenAI
-from config import settings
+from ai.answer_similarity import LSHIndex, best_match, copy_threshold, essay_index, reuse_threshold
+from ai.grading_pipeline import triage
+from ai.llm_client import chat_completion
+from ai.llm_telemetry import approx_tokens, track_llm_call
+from ai.prompt_builder import PromptBuilder
 import json
 
+logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+FALLBACK_REASON = "자동 채점에 실패하여 기본 점수가 부여되었습니다."
+FALLBACK_FEEDBACK = "교사의 직접 채점이 필요합니다."
+GRADED_BY_REUSE = "AI-reuse"   # 유사 답안 채점 재사용 (교사 확인 필요)
+GRADED_BY_FALLBACK = "AI-fallback"   # GPT 채점 실패로 기본 점수 부여 (재사용하지 않음)
+
+SYSTEM_PROMPT = "당신은 공정하고 세심한 교육 평가 전문가입니다."
+GRADING_CRITERIA = """1. 내용의 정확성 (40%)
+2. 논리적 구성 (30%)
+3. 표현의 적절성 (20%)
+4. 창의성 및 심화 (10%)"""
+GRADING_FORMAT = """다음 형식의 JSON으로 채점 결과를 작성해주세요 (점수는 0점부터 아래 만점 사이):
+{
+  "score": 점수,
+  "reason": "채점 근거 (각 기준별로 어떻게 평가했는지 구체적으로)",
+  "feedback": "개선을 위한 피드백 (학생이 어떤 부분을 보완하면 좋을지)"
+}"""
+PACKED_GRADING_FORMAT = """다음 형식의 JSON으로 모든 답안의 채점 결과를 작성해주세요 (id 는 답안의 id 그대로, 점수는 0점부터 아래 만점 사이):
+{
+  "results": [
+    {"id": "A1", "score": 점수, "reason": "채점 근거 (각 기준별로 구체적으로)", "feedback": "개선을 위한 피드백"}
+  ]
+}"""
+
+# 여러 답안 묶음 채점: 한 요청에 넣을 답안 수는 입력/출력 토큰 예산 안에서 최대 GRADING_PACK_MAX 개
+PACK_MAX_ANSWERS = int(os.getenv("GRADING_PACK_MAX", 8))
+PACK_INPUT_TOKENS = int(os.getenv("GRADING_PACK_INPUT_TOKENS", 6000))    # 묶음 안 답안 합계
+PACK_OUTPUT_TOKENS = int(os.getenv("GRADING_PACK_OUTPUT_TOKENS", 4000))  # 응답 상한 (max_tokens)
+OUTPUT_TOKENS_PER_ANSWER = 350                                           # 답안 1개의 근거+피드백 예상 토큰
 
 
 def grade_essay(
@@ -35,16 +68,30 @@ def grade_essay(
         max_score: 만점
     
     Returns:
-        채점 결과
+        채점 결과 (triage_stage: 판정 단계 llm/length/language/keywords/duplicate,
+        유사 답안이 있으면 similar_grading_id / similarity / possible_copy 포함)
     """
-    # GPT-4를 사용하여 채점
-    grading_result = grade_with_gpt(
-        question=question,
-        student_answer=student_answer,
-        model_answer=model_answer,
-        max_score=max_score
+    # 로컬 판정(빈/짧은/주제 이탈/유사 답안)으로 끝나지 않은 답안만 GPT 채점
+    index = essay_index(db, subject, question)
+    signals: Dict[str, Any] = {}
+    verdict = triage(
+        "essay_grader", student_answer, question=question, model_answer=model_answer,
+        duplicate=lambda ctx: _reuse_similar_grading(db, index, ctx, max_score),
+        signals=signals
     )
-    
+
+    if verdict is None:
+        # GPT-4를 사용하여 채점
+        grading_result = grade_with_gpt(
+            question=question,
+            student_answer=student_answer,
+            model_answer=model_answer,
+            max_score=max_score
+        )
+        graded_by = _llm_graded_by(grading_result)
+    else:
+        grading_result, graded_by = _verdict_grading(verdict, max_score)
+
     # 데이터베이스에 저장
     new_grading = EssayGrading(
         username=username,
@@ -55,20 +102,90 @@ def grade_essay(
         score=grading_result["score"],
         grading_reason=grading_result["reason"],
         feedback=grading_result["feedback"],
-        graded_by="AI"
+        graded_by=graded_by
     )
     db.add(new_grading)
     db.commit()
     db.refresh(new_grading)
-    
-    return {
-        "id": new_grading.id,
-        "score": grading_result["score"],
+    index.add(new_grading.id, student_answer, {"id": new_grading.id, "username": username})
+
+    return _grading_result(new_grading, max_score, verdict, signals.get("similar"))
+
+
+def _llm_graded_by(grading_result: Dict[str, Any]) -> str:
+    """GPT 채점 결과의 graded_by (기본 점수로 대체된 결과는 AI-fallback)"""
+    return GRADED_BY_FALLBACK if is_fallback(grading_result.get("reason")) else "AI"
+
+
+def is_fallback(reason: Optional[str]) -> bool:
+    """기본 점수로 대체된 채점 근거인지 (재사용 안내가 앞에 붙은 경우 포함)"""
+    return FALLBACK_REASON in (reason or "")
+
+
+def _verdict_grading(verdict: Dict[str, Any], max_score: int) -> Tuple[Dict[str, Any], str]:
+    """로컬 판정 결과 → (채점 결과, graded_by)"""
+    grading_result = {
+        "score": round(verdict["score_ratio"] * max_score, 2),
+        "reason": verdict["reason"],
+        "feedback": verdict["feedback"]
+    }
+    graded_by = GRADED_BY_REUSE if verdict["stage"] == "duplicate" else f"local:{verdict['stage']}"
+    return grading_result, graded_by
+
+
+def _grading_result(grading: EssayGrading, max_score: int, verdict: Optional[Dict[str, Any]],
+                    match: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """저장된 채점 행 → API 응답 (유사 답안이 있으면 베끼기 의심 여부 포함)"""
+    result = {
+        "id": grading.id,
+        "score": grading.score,
         "max_score": max_score,
-        "percentage": round((grading_result["score"] / max_score) * 100, 2),
-        "reason": grading_result["reason"],
-        "feedback": grading_result["feedback"],
-        "graded_at": new_grading.created_at.isoformat()
+        "percentage": round((grading.score / max_score) * 100, 2),
+        "reason": grading.grading_reason,
+        "feedback": grading.feedback,
+        "graded_by": grading.graded_by,
+        "needs_review": bool(verdict and verdict["needs_review"]),
+        "triage_stage": verdict["stage"] if verdict else "llm",
+        "graded_at": grading.created_at.isoformat()
+    }
+    if match:
+        possible_copy = match["payload"]["username"] != grading.username and match["similarity"] >= copy_threshold()
+        result.update({
+            "similar_grading_id": match["payload"]["id"],
+            "similarity": match["similarity"],
+            "possible_copy": possible_copy
+        })
+        if possible_copy:
+            logger.info("유사 답안 감지: 채점 #%s ↔ #%s (%.2f)", grading.id, match["payload"]["id"],
+                        match["similarity"], extra={"subject": grading.subject})
+    return result
+
+
+def _reuse_similar_grading(db: Session, index: LSHIndex, ctx: Dict[str, Any], max_score: int):
+    """
+    채점 파이프라인 duplicate 단계: 거의 같은 답안의 채점 결과 재사용
+
+    유사 답안은 재사용 여부와 관계없이 ctx["signals"]["similar"] 에 기록합니다 (베끼기 의심 표시용).
+    """
+    match = best_match(index, ctx["answer"])
+    if match is None:
+        return None
+    ctx["signals"]["similar"] = match
+    if reuse_threshold() <= 0 or match["similarity"] < reuse_threshold():
+        return None
+
+    source = db.get(EssayGrading, match["payload"]["id"])
+    # 기본 점수로 대체된 채점은 재사용하지 않음 (이전 버전에서 저장된 재사용 행은 근거 문구로 확인)
+    if source is None or source.score is None or source.score > max_score \
+            or source.graded_by == GRADED_BY_FALLBACK or is_fallback(source.grading_reason):
+        return None
+    return {
+        "stage": "duplicate",
+        "score_ratio": source.score / max_score,
+        "reason": f"[유사 답안(채점 #{source.id}, 유사도 {match['similarity']:.2f}) 결과 재사용 - 교사 확인 필요]\n"
+                  f"{source.grading_reason}",
+        "feedback": source.feedback,
+        "needs_review": True
     }
 
 
@@ -90,59 +207,332 @@ def grade_with_gpt(
     Returns:
         채점 결과 (점수, 근거, 피드백)
     """
-    model_answer_section = f"\n**모범 답안**:\n{model_answer}" if model_answer else ""
-    
-    prompt = f"""
-당신은 고등학교 국어 교사입니다. 다음 서술형 문제에 대한 학생의 답안을 채점해주세요.
+    # 고정 부분(지시문, 채점 기준, 출력 형식)을 앞에 두어 프롬프트 캐시가 적용되도록
+    prompt = (
+        PromptBuilder("essay_grader.grade")
+        .static("당신은 고등학교 국어 교사입니다. 다음 서술형 문제에 대한 학생의 답안을 채점해주세요.")
+        .static(GRADING_CRITERIA, header="**채점 기준**:")
+        .static(GRADING_FORMAT)
+        .dynamic(f"{max_score}점", header="**만점**:")
+        .dynamic(question, header="**문제**:")
+        .dynamic(model_answer, header="**모범 답안**:")
+        .dynamic(student_answer, header="**학생 답안**:", keep=True)
+        .build()
+    )
 
-**문제**:
-{question}
-{model_answer_section}
+    with track_llm_call("essay_grader.grade", "gpt-4o") as call:
+        try:
+            response = chat_completion(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.3,  # 일관성을 위해 낮은 temperature
+                response_format={"type": "json_object"}
+            )
+            call.record_usage(response)
+        
+            result = json.loads(response.choices[0].message.content)
+        
+            return {
+                "score": min(max_score, max(0, result.get("score", 0))),
+                "reason": result.get("reason", "채점 근거를 생성할 수 없습니다."),
+                "feedback": result.get("feedback", "피드백을 생성할 수 없습니다.")
+            }
+        
+        except Exception as e:
+            logger.warning("채점 중 오류 발생, 기본 점수 사용: %s", e)
+            call.mark_fallback(e)
+            # 기본 채점 결과 반환
+            return _fallback_grading(max_score)
 
-**학생 답안**:
-{student_answer}
 
-**채점 기준**:
-1. 내용의 정확성 (40%)
-2. 논리적 구성 (30%)
-3. 표현의 적절성 (20%)
-4. 창의성 및 심화 (10%)
+def _fallback_grading(max_score: int) -> Dict[str, Any]:
+    return {"score": max_score // 2, "reason": FALLBACK_REASON, "feedback": FALLBACK_FEEDBACK}
 
-다음 형식의 JSON으로 채점 결과를 작성해주세요:
-{{
-  "score": 점수 (0-{max_score}),
-  "reason": "채점 근거 (각 기준별로 어떻게 평가했는지 구체적으로)",
-  "feedback": "개선을 위한 피드백 (학생이 어떤 부분을 보완하면 좋을지)"
-}}
-"""
-    
-    try:
-        response = client.chat.completions.create(
+
+# ==================== 여러 답안 묶음 채점 ====================
+
+class PackParseError(ValueError):
+    """묶음 채점 응답을 해석할 수 없음 (나누어 다시 요청)"""
+
+
+def pack_answers(
+    answers: List[str],
+    max_answers: int = None,
+    input_tokens: int = None,
+    output_tokens: int = None
+) -> List[List[int]]:
+    """
+    답안을 토큰 예산에 맞춰 묶음(인덱스 목록)으로 나눔
+
+    묶음 크기 K 는 출력 예산 / 답안당 출력 토큰, GRADING_PACK_MAX 중 작은 값이며,
+    긴 답안이 많으면 입력 예산 때문에 더 작아집니다.
+
+    Args:
+        answers: 학생 답안 목록
+        max_answers: 묶음당 최대 답안 수 (기본: GRADING_PACK_MAX)
+        input_tokens: 묶음 안 답안 합계 토큰 예산 (기본: GRADING_PACK_INPUT_TOKENS)
+        output_tokens: 묶음 응답 토큰 예산 (기본: GRADING_PACK_OUTPUT_TOKENS)
+
+    Returns:
+        [[0, 1, 2], [3, 4], ...]
+    """
+    max_answers = max_answers or PACK_MAX_ANSWERS
+    input_tokens = input_tokens or PACK_INPUT_TOKENS
+    output_tokens = output_tokens or PACK_OUTPUT_TOKENS
+    limit = max(1, min(max_answers, output_tokens // OUTPUT_TOKENS_PER_ANSWER))
+
+    packs, current, used = [], [], 0
+    for i, answer in enumerate(answers):
+        tokens = approx_tokens(answer)
+        if current and (len(current) >= limit or used + tokens > input_tokens):
+            packs.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _packed_prompt(question: str, model_answer: Optional[str], max_score: int, answers: List[str]) -> str:
+    """고정 부분을 앞에, 공통 문맥(문제/모범 답안)은 한 번만 넣고 답안은 id 를 붙여 나열"""
+    items = [
+        f'<answer id="A{n}">\n{answer.replace("</answer", "</ answer")}\n</answer>'
+        for n, answer in enumerate(answers, start=1)
+    ]
+    return (
+        PromptBuilder("essay_grader.grade_batch")
+        .static("당신은 고등학교 국어 교사입니다. 다음 서술형 문제에 대한 학생 답안들을 서로 비교하지 말고 "
+                "각각 독립적으로 채점해주세요.")
+        .static(GRADING_CRITERIA, header="**채점 기준**:")
+        .static(PACKED_GRADING_FORMAT)
+        .dynamic(f"{max_score}점", header="**만점**:")
+        .dynamic(question, header="**문제**:")
+        .dynamic(model_answer, header="**모범 답안**:")
+        # 예산을 넘으면 뒤쪽 답안이 통째로 빠지고, 빠진 답안은 응답에 없으므로 나누어 다시 요청됨
+        .items(items, header=f"**학생 답안 ({len(answers)}개)**:", bullet="")
+        .build()
+    )
+
+
+def _request_pack(question: str, model_answer: Optional[str], max_score: int,
+                  answers: List[str]) -> Dict[int, Dict[str, Any]]:
+    """
+    묶음 1건 요청
+
+    Returns:
+        {묶음 내 위치: 채점 결과} - 응답에 빠진 답안은 포함되지 않음
+
+    Raises:
+        PackParseError: 응답 JSON 을 해석할 수 없음
+    """
+    with track_llm_call("essay_grader.grade_batch", "gpt-4o") as call:
+        response = chat_completion(
             model="gpt-4o",
             messages=[
-                {"role": "system", "content": "당신은 공정하고 세심한 교육 평가 전문가입니다."},
-                {"role": "user", "content": prompt}
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": _packed_prompt(question, model_answer, max_score, answers)}
             ],
-            temperature=0.3,  # 일관성을 위해 낮은 temperature
+            temperature=0.3,
+            max_tokens=min(PACK_OUTPUT_TOKENS, OUTPUT_TOKENS_PER_ANSWER * len(answers) + 200),
             response_format={"type": "json_object"}
         )
-        
-        result = json.loads(response.choices[0].message.content)
-        
-        return {
-            "score": min(max_score, max(0, result.get("score", 0))),
-            "reason": result.get("reason", "채점 근거를 생성할 수 없습니다."),
-            "feedback": result.get("feedback", "피드백을 생성할 수 없습니다.")
-        }
-        
+        call.record_usage(response)
+
+        try:
+            items = json.loads(response.choices[0].message.content)["results"]
+        except (TypeError, KeyError, ValueError) as e:
+            raise PackParseError(str(e)) from e
+
+    graded = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            position = int(str(item["id"]).lstrip("A")) - 1
+            score = float(item["score"])
+        except (TypeError, KeyError, ValueError):
+            continue
+        if 0 <= position < len(answers) and position not in graded:
+            graded[position] = {
+                "score": min(max_score, max(0, score)),
+                "reason": item.get("reason") or "채점 근거를 생성할 수 없습니다.",
+                "feedback": item.get("feedback") or "피드백을 생성할 수 없습니다."
+            }
+    return graded
+
+
+def _grade_pack(question: str, model_answer: Optional[str], max_score: int, answers: List[str],
+                indices: List[int], results: List[Optional[Dict[str, Any]]], stats: Dict[str, int]):
+    """
+    묶음 채점 후 응답에서 빠졌거나 해석하지 못한 답안은 반으로 나누어 다시 요청 (1개가 되면 단건 채점)
+    """
+    if len(indices) == 1:
+        stats["requests"] += 1
+        results[indices[0]] = grade_with_gpt(question, answers[indices[0]], model_answer, max_score)
+        return
+
+    stats["requests"] += 1
+    try:
+        graded = _request_pack(question, model_answer, max_score, [answers[i] for i in indices])
+    except PackParseError as e:
+        logger.warning("묶음 채점 응답 해석 실패 (%d개), 나누어 재요청: %s", len(indices), e)
+        graded = {}
     except Exception as e:
-        print(f"채점 중 오류 발생: {e}")
-        # 기본 채점 결과 반환
-        return {
-            "score": max_score // 2,
-            "reason": "자동 채점에 실패하여 기본 점수가 부여되었습니다.",
-            "feedback": "교사의 직접 채점이 필요합니다."
-        }
+        # 연결 실패/서킷 차단 등은 나누어 보내도 같으므로 기본 점수 사용
+        logger.warning("묶음 채점 중 오류 발생 (%d개), 기본 점수 사용: %s", len(indices), e)
+        for i in indices:
+            results[i] = _fallback_grading(max_score)
+        stats["fallbacks"] += len(indices)
+        return
+
+    for position, grading in graded.items():
+        results[indices[position]] = grading
+    missing = [i for n, i in enumerate(indices) if n not in graded]
+    if missing:
+        stats["splits"] += 1
+        middle = max(1, len(missing) // 2)
+        for part in (missing[:middle], missing[middle:]):
+            if part:
+                _grade_pack(question, model_answer, max_score, answers, part, results, stats)
+
+
+def grade_batch_with_gpt(
+    question: str,
+    answers: List[str],
+    model_answer: str = None,
+    max_score: int = 100,
+    stats: Dict[str, int] = None
+) -> List[Dict[str, Any]]:
+    """
+    같은 문제의 여러 답안을 묶어서 채점 (공통 문맥은 묶음마다 한 번만 전송)
+
+    Args:
+        question: 문제
+        answers: 학생 답안 목록
+        model_answer: 모범 답안
+        max_score: 만점
+        stats: 요청 수/재분할 수/기본 점수 사용 수를 기록할 dict
+
+    Returns:
+        답안 순서대로 채점 결과 (점수, 근거, 피드백)
+    """
+    stats = stats if stats is not None else {}
+    for key in ("requests", "splits", "fallbacks"):
+        stats.setdefault(key, 0)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(answers)
+    for indices in pack_answers(answers):
+        _grade_pack(question, model_answer, max_score, answers, indices, results, stats)
+    return results
+
+
+def grade_essays_batch(
+    db: Session,
+    subject: str,
+    question: str,
+    submissions: List[Dict[str, str]],
+    model_answer: str = None,
+    max_score: int = 100
+) -> Dict[str, Any]:
+    """
+    같은 문제에 대한 여러 학생 답안 일괄 채점
+
+    각 답안은 먼저 채점 파이프라인(로컬 판정/유사 답안)을 거치고, 같은 요청 안의 거의 같은 답안은
+    한 번만 채점한 뒤 결과를 복사하며, 남은 답안만 묶음으로 GPT 채점합니다.
+
+    Args:
+        db: 데이터베이스 세션
+        subject: 과목
+        question: 문제
+        submissions: [{"username", "answer"}]
+        model_answer: 모범 답안 (선택)
+        max_score: 만점
+
+    Returns:
+        {"results": 제출 순서대로 채점 결과 (username 포함), "stats": 처리 통계}
+    """
+    index = essay_index(db, subject, question)
+    verdicts: List[Optional[Dict[str, Any]]] = []
+    matches: List[Optional[Dict[str, Any]]] = []
+    for sub in submissions:
+        signals: Dict[str, Any] = {}
+        verdicts.append(triage(
+            "essay_grader", sub["answer"], question=question, model_answer=model_answer,
+            duplicate=lambda ctx: _reuse_similar_grading(db, index, ctx, max_score),
+            signals=signals
+        ))
+        matches.append(signals.get("similar"))
+
+    # 요청 안의 거의 같은 답안은 먼저 나온 답안 하나만 채점
+    pending = LSHIndex()
+    aliases: Dict[int, Tuple[int, float]] = {}
+    to_grade: List[int] = []
+    for i, sub in enumerate(submissions):
+        if verdicts[i] is not None:
+            continue
+        similar = pending.query(sub["answer"], threshold=reuse_threshold(), limit=1) if reuse_threshold() > 0 else []
+        if similar:
+            aliases[i] = (similar[0]["key"], similar[0]["similarity"])
+        else:
+            pending.add(i, sub["answer"])
+            to_grade.append(i)
+
+    stats: Dict[str, int] = {}
+    graded = grade_batch_with_gpt(question, [submissions[i]["answer"] for i in to_grade],
+                                  model_answer, max_score, stats)
+    gradings: Dict[int, Tuple[Dict[str, Any], str]] = {i: (g, _llm_graded_by(g)) for i, g in zip(to_grade, graded)}
+    for i, (source, similarity) in aliases.items():
+        grading, graded_by = gradings[source]
+        if graded_by == GRADED_BY_FALLBACK:
+            # 기본 점수는 복사하지 않고 이 답안도 채점 실패로 기록 (교사 직접 채점 대상)
+            gradings[i] = (_fallback_grading(max_score), GRADED_BY_FALLBACK)
+            continue
+        gradings[i] = ({
+            **grading,
+            "reason": f"[같은 요청의 유사 답안({submissions[source]['username']}, 유사도 {similarity:.2f}) 결과 재사용 "
+                      f"- 교사 확인 필요]\n{grading['reason']}"
+        }, GRADED_BY_REUSE)
+        verdicts[i] = {"stage": "duplicate", "needs_review": True}
+    for i, verdict in enumerate(verdicts):
+        if i not in gradings:
+            gradings[i] = _verdict_grading(verdict, max_score)
+
+    rows = []
+    for i, sub in enumerate(submissions):
+        grading, graded_by = gradings[i]
+        rows.append(EssayGrading(
+            username=sub["username"],
+            subject=subject,
+            question=question,
+            student_answer=sub["answer"],
+            model_answer=model_answer or "모범답안 없음",
+            score=grading["score"],
+            grading_reason=grading["reason"],
+            feedback=grading["feedback"],
+            graded_by=graded_by
+        ))
+    db.add_all(rows)
+    db.commit()
+
+    results = []
+    for i, row in enumerate(rows):
+        db.refresh(row)
+        index.add(row.id, row.student_answer, {"id": row.id, "username": row.username})
+        match = matches[i]
+        if match is None and i in aliases:
+            source = rows[aliases[i][0]]
+            match = {"payload": {"id": source.id, "username": source.username}, "similarity": aliases[i][1]}
+        results.append({"username": row.username, **_grading_result(row, max_score, verdicts[i], match)})
+
+    stats.update({
+        "answers": len(submissions),
+        "local": sum(1 for i, v in enumerate(verdicts) if v is not None and i not in aliases),
+        "batch_duplicates": len(aliases),
+        "llm_answers": len(to_grade),
+    })
+    return {"results": results, "stats": stats}
 
 
 def get_grading_history(db: Session, username: str, subject: str = None, limit: int = 10) -> list:
@@ -0,0 +1,546 @@
+"""
+로컬 OpenAI 호환 가짜 LLM 서버
+네트워크/비용 없이 LLM 호출 경로(graph.analyze, grade_with_gpt, 에이전트, 성취기준 매칭)를 테스트·부하 측정하기 위한
+/v1/chat/completions 스텁
+
+모드:
+- stub: 요청 형식에 맞는 기본 응답 생성
+- record: 실제 OpenAI(upstream)로 요청을 전달하고 응답을 카세트(JSONL)에 저장
+- replay: 카세트에 저장된 응답을 재생 (없는 요청은 stub 응답, strict 이면 404)
+
+지연 모델: 첫 토큰까지 지연(TTFT, 로그정규 분포) + 출력 토큰 수 / 초당 토큰 수
+스트리밍(stream=true, SSE)과 stream_options.include_usage 를 지원합니다.
+테스트용으로 HTTP 오류(429/5xx, Retry-After)와 요청별 지연을 주입할 수 있습니다.
+
+앱에서 사용:
+    LLM_BACKEND=fake    uvicorn main:app      # 프로세스 내 stub 서버
+    LLM_BACKEND=replay  LLM_CASSETTE=benchmarks/cassettes/llm.jsonl uvicorn main:app
+    LLM_BACKEND=record  LLM_CASSETTE=... OPENAI_API_KEY=sk-... uvicorn main:app
+
+단독 실행:
+    python -m ai.fake_llm_server --port 8011 --mode stub --ttft-median-ms 600 --tokens-per-sec 60
+    OPENAI_BASE_URL=http://127.0.0.1:8011/v1 uvicorn main:app
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+from ai.llm_telemetry import approx_tokens
+
+logger = logging.getLogger(__name__)
+
+
+MODES = ("stub", "record", "replay")
+DEFAULT_UPSTREAM = "https://api.openai.com/v1"
+
+# response_format=json_object 요청에 돌려줄 기본 JSON (각 호출 지점이 읽는 키를 모두 포함,
+# json_schema 요청에는 스키마의 같은 이름 필드 값으로 사용)
+DEFAULT_JSON_CONTENT = {
+    "score": 7,
+    "reason": "내용이 정확하고 논리적으로 구성되어 있습니다.",
+    "feedback": "근거를 한 가지 더 제시하면 좋겠습니다.",
+    "strengths": "핵심 개념을 정확히 이해하고 있습니다.",
+    "weaknesses": "작품 속 근거 제시가 부족합니다.",
+    "missing_concepts": [],
+    "logic_score": 8,
+    "content_score": 7,
+    "mastery_level": "PASS",
+    "feedback_for_student": "잘 작성했어요. 작품 속 표현을 근거로 더 들어 보세요.",
+    "matched_code": "K-HS-?",
+    "summary": "학생들은 주로 작품의 주제와 표현법에 대해 질문했습니다.",
+    "common_topics": [],
+    "difficulty_areas": [],
+    "teaching_suggestions": [],
+    "common_mistakes": [],
+    "misconceptions": [],
+    "improvement_strategies": [],
+    "lesson_objectives": [],
+    "teaching_methods": [],
+    "materials": [],
+    "assessment_tips": [],
+}
+DEFAULT_TEXT_CONTENT = "로컬 테스트 응답입니다."
+
+# 여러 답안을 한 번에 채점하는 요청 (ai.essay_grader.grade_batch_with_gpt) 의 답안 id
+PACKED_ANSWER_ID = re.compile(r'<answer id="([^"]+)">')
+
+
+_JSON_TYPES = {"string": str, "integer": int, "number": (int, float), "boolean": bool, "array": list, "object": dict}
+
+
+def schema_example(schema: Dict[str, Any], defs: Dict[str, Any] = None, key: str = None) -> Any:
+    """
+    JSON 스키마에 맞는 예시 값 (response_format=json_schema 요청용)
+
+    DEFAULT_JSON_CONTENT 에 같은 이름·타입의 값이 있으면 그 값을, 없으면 타입별 기본값을 사용하고
+    배열은 항목 1개로 채웁니다.
+    """
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].rsplit("/", 1)[-1]]
+    if "anyOf" in schema:
+        schema = schema["anyOf"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = kind[0]
+
+    preset = DEFAULT_JSON_CONTENT.get(key)
+    if preset not in (None, [], {}) and isinstance(preset, _JSON_TYPES.get(kind, ())):
+        if not schema.get("enum") or preset in schema["enum"]:
+            return preset
+    if schema.get("enum"):
+        return schema["enum"][0]
+    if kind == "object":
+        return {name: schema_example(prop, defs, name) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [schema_example(schema.get("items", {}), defs)]
+    if kind in ("integer", "number"):
+        return 0
+    if kind == "boolean":
+        return False
+    return DEFAULT_TEXT_CONTENT
+
+
+def default_content(body: Dict[str, Any]) -> str:
+    """요청 형식에 맞는 기본 응답 내용"""
+    response_format = (body.get("response_format") or {}).get("type")
+    if response_format == "json_schema":
+        schema = body["response_format"].get("json_schema", {}).get("schema", {})
+        return json.dumps(schema_example(schema), ensure_ascii=False)
+    messages = body.get("messages") or []
+    wants_json = response_format == "json_object" or any(
+        "JSON" in str(m.get("content", "")) for m in messages if m.get("role") == "system"
+    )
+    if wants_json:
+        packed_ids = PACKED_ANSWER_ID.findall(str(messages[-1].get("content", ""))) if messages else []
+        if packed_ids:
+            results = [{"id": answer_id, "score": DEFAULT_JSON_CONTENT["score"],
+                        "reason": DEFAULT_JSON_CONTENT["reason"], "feedback": DEFAULT_JSON_CONTENT["feedback"]}
+                       for answer_id in packed_ids]
+            return json.dumps({"results": results}, ensure_ascii=False)
+        return json.dumps(DEFAULT_JSON_CONTENT, ensure_ascii=False)
+    return DEFAULT_TEXT_CONTENT
+
+
+def _usage(body: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_text = "".join(str(m.get("content", "")) for m in body.get("messages") or [])
+    prompt_tokens = approx_tokens(prompt_text)
+    completion_tokens = approx_tokens(content)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def build_completion(body: Dict[str, Any], content: str) -> Dict[str, Any]:
+    """OpenAI chat.completion 응답 객체"""
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:24]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": _usage(body, content),
+    }
+
+
+def request_key(body: Dict[str, Any]) -> str:
+    """카세트 조회 키: 응답에 영향을 주는 요청 필드의 해시"""
+    relevant = {
+        name: body.get(name)
+        for name in ("model", "messages", "response_format", "temperature", "tools", "tool_choice")
+    }
+    raw = json.dumps(relevant, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LatencyModel:
+    """
+    응답 지연 모델
+
+    Args:
+        ttft_median_ms: 첫 토큰까지 지연의 중앙값 (ms, 0이면 지연 없음)
+        ttft_sigma: 로그정규 분포 sigma (0이면 항상 중앙값)
+        tokens_per_sec: 초당 출력 토큰 수 (0이면 출력 시간 없음)
+        seed: 난수 시드 (같은 시드면 같은 지연 순서)
+    """
+
+    def __init__(self, ttft_median_ms: float = 0.0, ttft_sigma: float = 0.0,
+                 tokens_per_sec: float = 0.0, seed: int = None):
+        self.ttft_median_ms = ttft_median_ms
+        self.ttft_sigma = ttft_sigma
+        self.tokens_per_sec = tokens_per_sec
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def first_token_delay(self) -> float:
+        if self.ttft_median_ms <= 0:
+            return 0.0
+        if self.ttft_sigma <= 0:
+            return self.ttft_median_ms / 1000
+        with self._lock:
+            z = self._random.gauss(0, 1)
+        return self.ttft_median_ms * math.exp(self.ttft_sigma * z) / 1000
+
+    def token_delay(self, tokens: int) -> float:
+        if self.tokens_per_sec <= 0:
+            return 0.0
+        return tokens / self.tokens_per_sec
+
+
+class Cassette:
+    """요청 키 → 응답(chat.completion) JSONL 저장소"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry["response"]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: str, request: Dict[str, Any], response: Dict[str, Any]):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = response
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "request": request, "response": response},
+                                       ensure_ascii=False) + "\n")
+
+
+class FakeLLMServer:
+    """
+    OpenAI 호환 가짜 서버 (별도 스레드에서 동작)
+
+    Args:
+        host: 바인딩 주소
+        port: 포트 (0이면 임의의 빈 포트)
+        latency: 모든 응답에 적용할 고정 지연(초), latency_model 과 함께 쓰면 더해짐
+        content_fn: 요청 본문 → 응답 내용 함수 (기본: default_content)
+        mode: stub / record / replay
+        cassette_path: record/replay 카세트 경로 (JSONL)
+        upstream: record 모드에서 요청을 전달할 실제 API 주소
+        strict: replay 모드에서 카세트에 없는 요청을 404로 응답
+        latency_model: LatencyModel (TTFT + 토큰 출력 속도)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 content_fn: Callable[[Dict[str, Any]], str] = None, mode: str = "stub",
+                 cassette_path: str = None, upstream: str = DEFAULT_UPSTREAM, strict: bool = False,
+                 latency_model: LatencyModel = None):
+        if mode not in MODES:
+            raise ValueError(f"지원하지 않는 모드: {mode}")
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.content_fn = content_fn or default_content
+        self.mode = mode
+        self.cassette = Cassette(cassette_path) if mode != "stub" else None
+        self.upstream = upstream.rstrip("/")
+        self.strict = strict
+        self.latency_model = latency_model or LatencyModel()
+        self.requests: List[Dict[str, Any]] = []
+        self.stats = {"stub": 0, "replayed": 0, "recorded": 0, "missed": 0}
+        self._faults: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def inject_faults(self, *faults: Dict[str, Any]):
+        """
+        다음 요청들에 순서대로 적용할 장애 추가
+
+        각 항목: {"status": 429, "retry_after": 0.5, "delay": 1.0}
+            status 가 없으면 delay 만 적용하고 정상 응답
+        """
+        with self._lock:
+            self._faults.extend(faults)
+
+    def _next_fault(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._faults.pop(0) if self._faults else {}
+
+    def _record(self, body: Dict[str, Any]):
+        with self._lock:
+            self.requests.append(body)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._faults.clear()
+            self.requests.clear()
+
+    def resolve(self, body: Dict[str, Any], authorization: str = None) -> Optional[Dict[str, Any]]:
+        """요청에 대한 chat.completion 응답 (replay strict 모드에서 카세트에 없으면 None)"""
+        if self.mode == "stub":
+            self._count("stub")
+            return build_completion(body, self.content_fn(body))
+
+        key = request_key(body)
+        cached = self.cassette.get(key)
+        if cached is not None:
+            self._count("replayed")
+            return cached
+
+        if self.mode == "record":
+            response = self._forward(body, authorization)
+            self.cassette.put(key, body, response)
+            self._count("recorded")
+            return response
+
+        self._count("missed")
+        if self.strict:
+            return None
+        return build_completion(body, self.content_fn(body))
+
+    def _forward(self, body: Dict[str, Any], authorization: str = None) -> Dict[str, Any]:
+        """실제 API 호출 (스트리밍 요청도 비스트리밍으로 받아 저장)"""
+        import httpx
+
+        payload = {k: v for k, v in body.items() if k not in ("stream", "stream_options")}
+        headers = {"Authorization": authorization or f"Bearer {os.getenv('OPENAI_API_KEY', '')}"}
+        response = httpx.post(f"{self.upstream}/chat/completions", json=payload, headers=headers, timeout=120)
+        response.raise_for_status()
+        return response.json()
+
+    def start(self) -> "FakeLLMServer":
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _stream_chunks(completion: Dict[str, Any], pieces: int) -> List[Dict[str, Any]]:
+    """chat.completion 을 chat.completion.chunk 목록으로 분할"""
+    message = completion["choices"][0]["message"]
+    finish_reason = completion["choices"][0].get("finish_reason", "stop")
+    base = {"id": completion["id"], "object": "chat.completion.chunk",
+            "created": completion["created"], "model": completion["model"]}
+
+    def chunk(delta, finish=None):
+        return dict(base, choices=[{"index": 0, "delta": delta, "finish_reason": finish}])
+
+    chunks = [chunk({"role": "assistant", "content": ""})]
+    if message.get("tool_calls"):
+        tool_calls = [dict(call, index=i) for i, call in enumerate(message["tool_calls"])]
+        chunks.append(chunk({"tool_calls": tool_calls}))
+    content = message.get("content") or ""
+    if content:
+        size = max(1, math.ceil(len(content) / pieces))
+        for start in range(0, len(content), size):
+            chunks.append(chunk({"content": content[start:start + size]}))
+    chunks.append(chunk({}, finish_reason))
+    return chunks
+
+
+def _make_handler(server: FakeLLMServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_error(self, status: int, message: str, headers: Dict[str, str] = None):
+            error_type = "rate_limit_error" if status == 429 else (
+                "server_error" if status >= 500 else "invalid_request_error")
+            self._send_json(status, {"error": {"message": message, "type": error_type}}, headers)
+
+        def _send_stream(self, body: Dict[str, Any], completion: Dict[str, Any]):
+            """SSE 스트리밍 응답 (토큰 출력 속도만큼 나누어 전송)"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            usage = completion.get("usage") or {}
+            chunks = _stream_chunks(completion, pieces=8)
+            per_chunk = server.latency_model.token_delay(usage.get("completion_tokens", 0)) / max(1, len(chunks))
+            for chunk in chunks:
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if per_chunk:
+                    time.sleep(per_chunk)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                final = {"id": completion["id"], "object": "chat.completion.chunk",
+                         "created": completion["created"], "model": completion["model"],
+                         "choices": [], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(final)}\n\n".encode("utf-8"))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_error(404, "not found")
+                return
+
+            server._record(body)
+            fault = server._next_fault()
+            time.sleep(fault.get("delay", server.latency) + server.latency_model.first_token_delay())
+
+            status = fault.get("status")
+            if status:
+                headers = {"Retry-After": str(fault["retry_after"])} if "retry_after" in fault else None
+                self._send_error(status, fault.get("message", f"injected {status}"), headers)
+                return
+
+            try:
+                completion = server.resolve(body, self.headers.get("Authorization"))
+            except Exception as e:
+                self._send_error(502, f"upstream error: {e}")
+                return
+            if completion is None:
+                self._send_error(404, "replay cassette miss")
+                return
+
+            if body.get("stream"):
+                self._send_stream(body, completion)
+                return
+
+            usage = completion.get("usage") or {}
+            delay = server.latency_model.token_delay(usage.get("completion_tokens", 0))
+            if delay:
+                time.sleep(delay)
+            self._send_json(200, completion)
+
+    return Handler
+
+
+# ==================== 앱 연동 ====================
+
+_backend_server: Optional[FakeLLMServer] = None
+
+
+def latency_model_from_env() -> LatencyModel:
+    return LatencyModel(
+        ttft_median_ms=float(os.getenv("FAKE_LLM_TTFT_MEDIAN_MS", 0)),
+        ttft_sigma=float(os.getenv("FAKE_LLM_TTFT_SIGMA", 0)),
+        tokens_per_sec=float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", 0)),
+        seed=int(os.getenv("FAKE_LLM_SEED", 0)) or None,
+    )
+
+
+def configure_llm_backend() -> Optional[FakeLLMServer]:
+    """
+    LLM_BACKEND 설정에 따라 프로세스 내 가짜 서버를 띄우고 OPENAI_BASE_URL 을 지정
+
+    LLM 클라이언트가 생성되기 전(main.py 라우터 임포트 전)에 호출해야 합니다.
+
+    LLM_BACKEND:
+        openai (기본): 아무것도 하지 않음
+        fake: stub 모드
+        replay / record: LLM_CASSETTE 카세트 사용 (LLM_REPLAY_STRICT=1 이면 없는 요청 404)
+    """
+    global _backend_server
+    backend = os.getenv("LLM_BACKEND", "openai").lower()
+    if backend in ("", "openai") or _backend_server is not None:
+        return _backend_server
+
+    mode = "stub" if backend == "fake" else backend
+    upstream = os.getenv("LLM_UPSTREAM_URL") or os.getenv("OPENAI_BASE_URL") or DEFAULT_UPSTREAM
+    _backend_server = FakeLLMServer(
+        mode=mode,
+        cassette_path=os.getenv("LLM_CASSETTE", "benchmarks/cassettes/llm.jsonl"),
+        upstream=upstream,
+        strict=os.getenv("LLM_REPLAY_STRICT", "0") == "1",
+        latency_model=latency_model_from_env(),
+    ).start()
+
+    os.environ["OPENAI_BASE_URL"] = _backend_server.base_url
+    if mode != "record":
+        os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    logger.info("LLM 백엔드: %s (%s)", backend, _backend_server.base_url)
+    return _backend_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 호환 가짜 LLM 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--mode", choices=MODES, default="stub")
+    parser.add_argument("--cassette", default="benchmarks/cassettes/llm.jsonl")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+    parser.add_argument("--strict", action="store_true", help="replay 모드에서 카세트에 없는 요청은 404")
+    parser.add_argument("--ttft-median-ms", type=float, default=0.0)
+    parser.add_argument("--ttft-sigma", type=float, default=0.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeLLMServer(
+        host=args.host, port=args.port, mode=args.mode, cassette_path=args.cassette,
+        upstream=args.upstream, strict=args.strict,
+        latency_model=LatencyModel(args.ttft_median_ms, args.ttft_sigma, args.tokens_per_sec, args.seed),
+    ).start()
+    print(f"가짜 LLM 서버 실행 중: {server.base_url} (mode={args.mode})")
+    print(f"앱 실행: OPENAI_BASE_URL={server.base_url} uvicorn main:app")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
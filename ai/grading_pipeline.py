@@ -0,0 +1,276 @@
+"""
+단계별 채점 파이프라인
+GPT 채점(grade_with_gpt / app_graph) 앞에서 비용이 적은 로컬 검사부터 차례로 실행하고,
+로컬 단계에서 판정되지 않은 답안만 LLM 으로 넘깁니다.
+
+단계 (앞 단계일수록 저렴):
+    length   - 빈 답안 / 한두 단어 답안
+    language - 한글이 거의 없는 답안 (자모만 반복, 영문/기호 위주, 같은 글자 반복)
+    keywords - 채점 기준 핵심어가 하나도 없고 문제/기준/모범 답안과 내용어가 전혀 겹치지 않는 답안 (주제 이탈)
+               문제/기준 문장은 과제를 설명할 뿐 답안 어휘와 다르므로 모범 답안이 있을 때만 판정하며,
+               어휘만 보는 판정이라 항상 교사 확인 대상으로 표시
+    duplicate - 같은 문제의 거의 같은 답안 (호출 측에서 제공, ai.answer_similarity)
+
+단계별 처리 수/판정 수/소요 시간은 /metrics 의 grading_triage_total, grading_triage_duration_seconds 와
+stage_report() 로 확인합니다.
+
+환경 변수:
+    GRADING_TRIAGE: 0 이면 로컬 판정 단계(length/language/keywords)를 건너뜀 (기본 1)
+    TRIAGE_MIN_CHARS: 이보다 짧은 답안은 미달 처리 (공백·문장부호 제외 글자 수, 기본 10)
+    TRIAGE_MIN_HANGUL_RATIO: 글자 중 한글 음절 비율 하한 (기본 0.5)
+    TRIAGE_OFF_TOPIC_OVERLAP: 문제/기준 어휘와 겹치는 2-gram 비율이 이 값 이하이면 주제 이탈 (기본 0)
+    TRIAGE_MIN_TOPIC_GRAMS: 문제/기준/모범 답안의 2-gram 이 이보다 적으면 주제 이탈 판정을 하지 않음 (기본 30)
+"""
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.metrics import REGISTRY
+
+
+TRIAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+GRADING_TRIAGE = REGISTRY.counter(
+    "grading_triage_total", "채점 단계별 처리 수 (outcome: resolved/passed/escalated)", ("site", "stage", "outcome"))
+GRADING_TRIAGE_DURATION = REGISTRY.histogram(
+    "grading_triage_duration_seconds", "채점 단계별 소요 시간(초)", ("site", "stage"), buckets=TRIAGE_BUCKETS)
+
+LLM_STAGE = "llm"
+
+_QUOTED = re.compile(r"['\"‘’“”]([^'\"‘’“”]{2,20})['\"‘’“”]")
+_PARENTHESIZED = re.compile(r"\(([^()]{2,20})\)")
+_HANGUL_WORD = re.compile(r"[가-힣]{2,}")
+_SCORE_NOTE = re.compile(r"^\d+\s*점$")
+_PARTICLES = ("으로", "에서", "에게", "이다", "하는", "하게", "한다", "은", "는", "이", "가", "을", "를", "의", "에",
+              "와", "과", "로", "도")
+# 어미/조사에서 흔히 나오는 2-gram (주제 겹침 계산에서 제외)
+_STOP_GRAMS = {"니다", "습니", "입니", "합니", "한다", "있다", "하는", "에서", "으로", "하고", "이다", "것이", "있는",
+               "하여", "하면", "하시", "시오", "적으", "적인", "이라", "라는", "에게", "하게", "되어", "되는", "다는",
+               "었다", "였다", "어서", "해서"}
+_STOPWORDS = {"다음", "학생", "답안", "서술", "서술하시오", "설명하시오", "내외", "문제", "관련", "포함", "잘", "드러났는가",
+              "했는가", "있는가", "자연스러운가", "적절한가", "개념", "문장", "내용", "이것", "그것"}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def _compact(text: str) -> str:
+    """공백/문장부호 제거"""
+    return re.sub(r"[\s\W_]+", "", text or "")
+
+
+def content_grams(text: str) -> set:
+    """단어 안의 글자 2-gram (단어 경계를 넘는 2-gram 과 어미/조사 2-gram 제외)"""
+    grams = set()
+    for word in re.findall(r"\w+", (text or "").lower()):
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams - _STOP_GRAMS
+
+
+def strip_particle(word: str) -> str:
+    """단어 끝의 조사/어미 하나 제거 (남는 부분이 2글자 이상일 때만)"""
+    for particle in _PARTICLES:
+        if word.endswith(particle) and len(word) - len(particle) >= 2:
+            return word[:-len(particle)]
+    return word
+
+
+def rubric_keywords(rubric: str) -> List[str]:
+    """
+    채점 기준에서 핵심어 추출
+
+    따옴표/괄호로 표시된 용어('이별의 정한', (애이불비))를 우선 사용하고, 없으면 2음절 이상 한글 단어
+    (조사 제거, 일반 지시어 제외)를 사용합니다.
+
+    Returns:
+        공백을 제거한 핵심어 목록
+    """
+    rubric = rubric or ""
+    marked = [m for m in _QUOTED.findall(rubric) + _PARENTHESIZED.findall(rubric) if not _SCORE_NOTE.match(m.strip())]
+    if marked:
+        words = marked
+    else:
+        words = [strip_particle(w) for w in _HANGUL_WORD.findall(rubric)]
+        words = [w for w in words if w not in _STOPWORDS]
+    keywords = []
+    for word in words:
+        compact = _compact(word)
+        if compact and compact not in keywords:
+            keywords.append(compact)
+    return keywords
+
+
+def _verdict(stage: str, mastery: str, score_ratio: float, reason: str, feedback: str,
+             needs_review: bool = False) -> Dict[str, Any]:
+    return {
+        "stage": stage,
+        "mastery_level": mastery,
+        "score_ratio": score_ratio,
+        "reason": reason,
+        "feedback": feedback,
+        "needs_review": needs_review,
+    }
+
+
+# ==================== 로컬 판정 단계 ====================
+
+def check_length(ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """빈 답안 / 너무 짧은 답안"""
+    compact = ctx["compact"]
+    if not compact:
+        return _verdict("length", "FAIL", 0.0, "답안이 비어 있습니다.", "문제에 대한 답안을 작성해 주세요.")
+    min_chars = _env_float("TRIAGE_MIN_CHARS", 10)
+    if len(compact) < min_chars or len(ctx["answer"].split()) < 2:
+        # 핵심어만 적은 답안은 방향은 맞을 수 있으므로 교사 확인 대상으로
+        hit = any(k in compact for k in ctx["keywords"])
+        return _verdict(
+            "length", "FAIL", 0.0,
+            f"답안이 너무 짧습니다 ({len(compact)}자).",
+            "핵심 개념을 근거와 함께 문장으로 서술해 주세요.",
+            needs_review=hit
+        )
+    return None
+
+
+def check_language(ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """한글이 거의 없거나 같은 글자만 반복된 답안"""
+    compact = ctx["compact"]
+    letters = [ch for ch in compact if ch.isalpha()]
+    hangul = sum(1 for ch in letters if "가" <= ch <= "힣")
+    ratio = hangul / len(letters) if letters else 0.0
+    ctx["signals"]["hangul_ratio"] = round(ratio, 3)
+    if ratio < _env_float("TRIAGE_MIN_HANGUL_RATIO", 0.5):
+        latin = sum(1 for ch in letters if ch.isascii())
+        # 영어로 쓴 답안은 내용이 맞을 수 있으므로 교사 확인 대상으로
+        return _verdict(
+            "language", "FAIL", 0.0,
+            "한국어 문장으로 작성되지 않은 답안입니다.",
+            "답안을 한국어 문장으로 작성해 주세요.",
+            needs_review=latin > len(letters) / 2
+        )
+    if len(compact) >= 10 and len(set(compact)) / len(compact) < 0.2:
+        return _verdict("language", "FAIL", 0.0, "같은 글자가 반복된 답안입니다.", "문제에 맞는 답안을 작성해 주세요.")
+    return None
+
+
+def check_keywords(ctx: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """채점 기준 핵심어 포함 여부 + 문제 어휘와의 겹침 (주제 이탈 판정)"""
+    compact = ctx["compact"]
+    hits = [k for k in ctx["keywords"] if k in compact]
+    ctx["signals"]["keyword_hits"] = hits
+    ctx["signals"]["keyword_coverage"] = round(len(hits) / len(ctx["keywords"]), 3) if ctx["keywords"] else None
+
+    answer_grams = content_grams(ctx["answer"])
+    topic_grams = content_grams(" ".join(filter(None, (ctx["question"], ctx["rubric"], ctx["model_answer"]))))
+    overlap = len(answer_grams & topic_grams) / len(answer_grams) if answer_grams else 0.0
+    ctx["signals"]["topic_overlap"] = round(overlap, 3)
+
+    # 모범 답안이 없거나 어휘가 적으면 정상 답안도 겹침이 낮을 수 있으므로 측정값만 기록
+    if hits or not ctx["model_answer"] or len(topic_grams) < _env_float("TRIAGE_MIN_TOPIC_GRAMS", 30):
+        return None
+    if overlap <= _env_float("TRIAGE_OFF_TOPIC_OVERLAP", 0):
+        return _verdict(
+            "keywords", "FAIL", 0.0,
+            "문제 및 채점 기준과 관련된 내용이 거의 없습니다.",
+            "문제에서 묻는 내용을 다시 확인하고 핵심 개념을 중심으로 답해 주세요.",
+            needs_review=True
+        )
+    return None
+
+
+LOCAL_STAGES: List[Tuple[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]]] = [
+    ("length", check_length),
+    ("language", check_language),
+    ("keywords", check_keywords),
+]
+
+
+def triage(
+    site: str,
+    answer: str,
+    question: str = "",
+    rubric: str = "",
+    model_answer: str = None,
+    duplicate: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]] = None,
+    signals: Dict[str, Any] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    로컬 단계를 순서대로 실행해 LLM 없이 판정할 수 있으면 판정 결과 반환
+
+    Args:
+        site: 호출 지점 (메트릭 라벨, 예: essay_grader)
+        answer: 학생 답안
+        question: 문제
+        rubric: 채점 기준
+        model_answer: 모범 답안
+        duplicate: 유사 답안 단계 (ctx → 판정 또는 None), 로컬 판정 단계 뒤에 실행
+        signals: 단계별 측정값(핵심어 적중, 한글 비율 등)을 기록할 dict
+
+    Returns:
+        판정 결과 {"stage", "mastery_level", "score_ratio", "reason", "feedback", "needs_review"}
+        (duplicate 단계는 호출 측이 반환한 dict), LLM 채점이 필요하면 None
+    """
+    ctx = {
+        "answer": answer or "",
+        "compact": _compact(answer),
+        "question": question or "",
+        "rubric": rubric or "",
+        "model_answer": model_answer or "",
+        "keywords": rubric_keywords(rubric),
+        "signals": signals if signals is not None else {},
+    }
+
+    stages = list(LOCAL_STAGES) if os.getenv("GRADING_TRIAGE", "1") != "0" else []
+    if duplicate is not None:
+        stages.append(("duplicate", duplicate))
+
+    for stage, check in stages:
+        start = time.perf_counter()
+        verdict = check(ctx)
+        GRADING_TRIAGE_DURATION.observe(time.perf_counter() - start, site=site, stage=stage)
+        if verdict is not None:
+            GRADING_TRIAGE.inc(site=site, stage=stage, outcome="resolved")
+            verdict.setdefault("stage", stage)
+            return verdict
+        GRADING_TRIAGE.inc(site=site, stage=stage, outcome="passed")
+
+    GRADING_TRIAGE.inc(site=site, stage=LLM_STAGE, outcome="escalated")
+    return None
+
+
+def stage_report(site: str) -> Dict[str, Any]:
+    """
+    단계별 처리 수, 판정 비율, 평균 소요 시간
+
+    Returns:
+        {"total", "escalated", "llm_ratio", "stages": {단계: {"checked", "resolved", "hit_rate", "avg_ms"}}}
+    """
+    stages = {}
+    total = 0.0
+    for stage, _ in LOCAL_STAGES + [("duplicate", None)]:
+        resolved = GRADING_TRIAGE.value(site=site, stage=stage, outcome="resolved")
+        passed = GRADING_TRIAGE.value(site=site, stage=stage, outcome="passed")
+        checked = resolved + passed
+        if not checked:
+            continue
+        total += resolved
+        timing = GRADING_TRIAGE_DURATION.snapshot(site=site, stage=stage) or {"sum": 0.0, "count": 0}
+        stages[stage] = {
+            "checked": int(checked),
+            "resolved": int(resolved),
+            "hit_rate": round(resolved / checked, 3),
+            "avg_ms": round(timing["sum"] / timing["count"] * 1000, 4) if timing["count"] else 0.0,
+        }
+    escalated = GRADING_TRIAGE.value(site=site, stage=LLM_STAGE, outcome="escalated")
+    total += escalated
+    return {
+        "total": int(total),
+        "escalated": int(escalated),
+        "llm_ratio": round(escalated / total, 3) if total else 0.0,
+        "stages": stages,
+    }
@@ -0,0 +1,308 @@
+"""
+OpenAI 호출 복원력 계층
+일시적인 429/5xx 오류가 곧바로 대체 응답(기본 점수 등)으로 이어지지 않도록 재시도하고,
+제공자 장애 시에는 빠르게 로컬 대체 응답으로 전환
+
+- 재시도: 지수 백오프 + 전체 지터(full jitter), Retry-After / retry-after-ms 헤더 준수
+- 서킷 브레이커: 연속 실패가 임계치를 넘으면 일정 시간 호출을 차단하고 즉시 AIServiceError 발생
+  (각 호출 지점의 기존 except 블록이 로컬 대체 응답을 반환)
+- 헤징(선택): 응답이 LLM_HEDGE_DELAY_SEC 보다 늦으면 같은 요청을 한 번 더 보내 먼저 도착한 응답 사용
+  상태가 없는(멱등) 요청에만 사용하며, 늦게 도착한 응답의 토큰은 집계되지 않습니다.
+
+SDK 자체 재시도는 끄고(max_retries=0) 이 모듈에서만 재시도합니다.
+"""
+import contextvars
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, List, Optional, TypeVar
+
+from ai.llm_telemetry import current_llm_call, get_http_client
+from utils.exceptions import AIServiceError
+from utils.metrics import REGISTRY
+
+
+T = TypeVar("T")
+
+LLM_CIRCUIT_STATE = REGISTRY.gauge(
+    "llm_circuit_state", "서킷 브레이커 상태 (0=closed, 1=half_open, 2=open)", ("name",))
+LLM_CIRCUIT_REJECTIONS = REGISTRY.counter(
+    "llm_circuit_rejections_total", "서킷 브레이커가 차단한 호출 수", ("name",))
+LLM_HEDGED = REGISTRY.counter(
+    "llm_hedged_requests_total", "헤징으로 추가 전송한 요청 수 (won: 추가 요청이 먼저 응답)", ("won",))
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class RetryPolicy:
+    """
+    재시도 정책
+
+    Args:
+        max_attempts: 최초 호출 포함 최대 시도 횟수
+        base_delay: 백오프 기본 대기(초), 시도마다 2배
+        max_delay: 대기 상한(초), Retry-After 가 이보다 길면 재시도하지 않음
+    """
+
+    def __init__(self, max_attempts: int = None, base_delay: float = None, max_delay: float = None):
+        self.max_attempts = max_attempts or int(_env_float("LLM_MAX_ATTEMPTS", 4))
+        self.base_delay = _env_float("LLM_BACKOFF_BASE_SEC", 0.5) if base_delay is None else base_delay
+        self.max_delay = _env_float("LLM_BACKOFF_MAX_SEC", 20) if max_delay is None else max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """attempt 번째 실패 후 대기 시간 (full jitter)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+def is_retryable(error: Exception) -> bool:
+    """재시도할 만한 일시적 오류인지 (연결/타임아웃, 408, 409, 429, 5xx)"""
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """오류 응답의 Retry-After 대기 시간(초), 없으면 None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    연속 실패 기반 서킷 브레이커
+
+    closed → (연속 실패 failure_threshold 회) → open → (reset_timeout 경과) → half_open
+    half_open 에서는 시험 호출 1건만 허용하고, 성공하면 closed, 실패하면 다시 open 으로 전환합니다.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+    _STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(_env_float("LLM_BREAKER_THRESHOLD", 5))
+        self.reset_timeout = _env_float("LLM_BREAKER_RESET_SEC", 30) if reset_timeout is None else reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        LLM_CIRCUIT_STATE.set(0, name=name)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _set_state(self, state: str):
+        self._state = state
+        LLM_CIRCUIT_STATE.set(self._STATE_VALUE[state], name=self.name)
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._set_state(self.HALF_OPEN)
+            self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        """호출 허용 여부 (half_open 에서는 시험 호출 1건만 허용)"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+        LLM_CIRCUIT_REJECTIONS.inc(name=self.name)
+        return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            if self._state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def release(self):
+        """성공/실패로 보지 않는 호출 종료 (half_open 시험 호출 자리만 반납, 상태와 연속 실패 수는 유지)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._set_state(self.OPEN)
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self._set_state(self.CLOSED)
+
+
+openai_breaker = CircuitBreaker("openai")
+
+_hedge_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+def get_hedge_delay() -> float:
+    """헤징 지연(초), 0 이하이면 헤징하지 않음"""
+    return _env_float("LLM_HEDGE_DELAY_SEC", 0)
+
+
+def _hedged(fn: Callable[[], T], delay: float) -> T:
+    """delay 초 안에 응답이 없으면 같은 요청을 한 번 더 보내고 먼저 성공한 결과 반환"""
+    first = _hedge_pool.submit(contextvars.copy_context().run, fn)
+    done, _ = wait([first], timeout=delay)
+    if done:
+        return first.result()
+
+    second = _hedge_pool.submit(contextvars.copy_context().run, fn)
+    pending = {first, second}
+    errors: List[BaseException] = []
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                LLM_HEDGED.inc(won=str(future is second).lower())
+                return future.result()
+            errors.append(future.exception())
+    LLM_HEDGED.inc(won="false")
+    raise errors[0]
+
+
+def call_with_resilience(
+    fn: Callable[[], T],
+    hedge: bool = False,
+    breaker: CircuitBreaker = None,
+    policy: RetryPolicy = None
+) -> T:
+    """
+    재시도/서킷 브레이커/헤징을 적용하여 fn() 호출
+
+    Args:
+        fn: 실제 API 호출 (인자 없는 함수)
+        hedge: 헤징 사용 여부 (상태 없는 요청에만)
+        breaker: 서킷 브레이커 (기본: openai_breaker)
+        policy: 재시도 정책 (기본: 환경 변수 설정)
+
+    Raises:
+        AIServiceError: 서킷이 열려 있는 경우
+        Exception: 재시도할 수 없는 오류이거나 재시도를 모두 소진한 경우 마지막 오류
+    """
+    breaker = breaker or openai_breaker
+    policy = policy or RetryPolicy()
+    hedge_delay = get_hedge_delay() if hedge else 0
+
+    attempt = 0
+    while True:
+        attempt += 1
+        if not breaker.allow():
+            raise AIServiceError(f"AI 서비스 일시 차단 중 (circuit {breaker.name} open)")
+
+        try:
+            result = _hedged(fn, hedge_delay) if hedge_delay > 0 else fn()
+        except Exception as e:
+            if not is_retryable(e):
+                # 요청 자체의 문제(400 등)는 제공자 장애로도, 정상 응답으로도 보지 않음
+                breaker.release()
+                raise
+            breaker.record_failure()
+
+            wait_sec = policy.backoff(attempt)
+            retry_after = retry_after_seconds(e)
+            if retry_after is not None:
+                if retry_after > policy.max_delay:
+                    raise
+                wait_sec = max(wait_sec, retry_after)
+            if attempt >= policy.max_attempts or breaker.state == CircuitBreaker.OPEN:
+                raise
+
+            call = current_llm_call()
+            if call is not None:
+                call.retries += 1
+            time.sleep(wait_sec)
+            continue
+
+        breaker.record_success()
+        return result
+
+
+# ==================== 공용 클라이언트 ====================
+
+_openai_client = None
+_client_lock = threading.Lock()
+
+
+def get_openai_client():
+    """
+    공용 OpenAI 클라이언트 (SDK 재시도 비활성, 재시도는 call_with_resilience 에서)
+
+    OPENAI_API_KEY / OPENAI_BASE_URL 환경 변수를 사용하므로, LLM_BACKEND 로 띄운 가짜 서버도 그대로 사용합니다.
+    """
+    global _openai_client
+    if _openai_client is None:
+        with _client_lock:
+            if _openai_client is None:
+                from openai import OpenAI
+
+                _openai_client = OpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    base_url=os.getenv("OPENAI_BASE_URL") or None,
+                    http_client=get_http_client(),
+                    max_retries=0
+                )
+    return _openai_client
+
+
+def chat_completion(hedge: bool = False, **kwargs) -> Any:
+    """
+    chat.completions.create 호출 (재시도/서킷 브레이커 적용)
+
+    Args:
+        hedge: 헤징 사용 여부
+        **kwargs: chat.completions.create 인자
+    """
+    client = get_openai_client()
+    return call_with_resilience(lambda: client.chat.completions.create(**kwargs), hedge=hedge)
+
+
+def invoke_llm(llm, messages, hedge: bool = False) -> Any:
+    """LangChain ChatModel.invoke 호출 (재시도/서킷 브레이커 적용, llm 은 max_retries=0 권장)"""
+    return call_with_resilience(lambda: llm.invoke(messages), hedge=hedge)
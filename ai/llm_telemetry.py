@@ -0,0 +1,387 @@
+"""
+LLM 호출 계측 모듈
+호출 지점(site)·모델별 지연 시간, 토큰 사용량, 추정 비용, 재시도 횟수, 캐시 적중, 대체 응답(fallback) 사용 여부를 기록
+
+- 메트릭: utils.metrics 레지스트리 (/metrics)
+- 일별 요약: llm_usage_daily 테이블 (메모리에서 집계 후 백그라운드 스레드가 주기적으로 저장,
+  저장은 행 단위 증가 UPDATE 라 여러 워커가 동시에 저장해도 합계가 유지됨)
+
+사용 예:
+    with track_llm_call("essay_grader.grade", "gpt-4o") as call:
+        response = client.chat.completions.create(...)
+        call.record_usage(response)
+"""
+import atexit
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력)
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+FLUSH_INTERVAL_SEC = float(os.getenv("LLM_USAGE_FLUSH_SEC", 60))
+
+LLM_CALLS = REGISTRY.counter(
+    "llm_calls_total", "LLM 호출 수 (outcome: success/error/fallback)", ("site", "model", "outcome"))
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_call_duration_seconds", "LLM 호출 시간(초)", ("site", "model"))
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM 토큰 사용량 (kind: prompt/completion)", ("site", "model", "kind"))
+LLM_COST = REGISTRY.counter(
+    "llm_cost_usd_total", "LLM 추정 비용(USD)", ("site", "model"))
+LLM_RETRIES = REGISTRY.counter(
+    "llm_retries_total", "LLM 재시도 횟수", ("site", "model"))
+LLM_CACHE_HITS = REGISTRY.counter(
+    "llm_cache_hits_total", "LLM 호출 대신 캐시 결과를 사용한 횟수", ("site", "model"))
+
+
+def approx_tokens(text: str) -> int:
+    """대략적인 토큰 수 (한글은 글자당 약 1토큰, 그 외는 4글자당 1토큰)"""
+    hangul = sum(1 for ch in text if "가" <= ch <= "힣")
+    return hangul + max(0, len(text) - hangul) // 4 + 1
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """토큰 수로 비용(USD) 추정 (가격표에 없는 모델은 0)"""
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        # 날짜 접미사가 붙은 모델명 (gpt-4o-2024-08-06 등)
+        for name in sorted(MODEL_PRICING, key=len, reverse=True):
+            if model.startswith(name + "-"):
+                pricing = MODEL_PRICING[name]
+                break
+    if pricing is None:
+        return 0.0
+    return (prompt_tokens * pricing[0] + completion_tokens * pricing[1]) / 1_000_000
+
+
+class LLMCall:
+    """LLM 호출 1건의 계측 정보"""
+
+    def __init__(self, site: str, model: str):
+        self.site = site
+        self.model = model
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.retries = 0
+        self.cache_hit = False
+        self.fallback_used = False
+        self.error: Optional[str] = None
+        self.latency = 0.0
+
+    @property
+    def cost(self) -> float:
+        return estimate_cost(self.model, self.prompt_tokens, self.completion_tokens)
+
+    def record_usage(self, response: Any):
+        """
+        응답 객체에서 토큰 사용량 기록
+
+        OpenAI SDK 응답(usage.prompt_tokens)과 LangChain 메시지(usage_metadata)를 모두 지원합니다.
+        """
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+            return
+
+        metadata = getattr(response, "usage_metadata", None)
+        if metadata:
+            self.prompt_tokens += metadata.get("input_tokens", 0)
+            self.completion_tokens += metadata.get("output_tokens", 0)
+
+    def record_usage_metadata(self, usage_by_model: Dict[str, Dict[str, int]]):
+        """LangChain UsageMetadataCallbackHandler.usage_metadata 합산 (여러 번 호출하는 에이전트용)"""
+        for usage in usage_by_model.values():
+            self.prompt_tokens += usage.get("input_tokens", 0)
+            self.completion_tokens += usage.get("output_tokens", 0)
+
+    def mark_cache_hit(self):
+        self.cache_hit = True
+
+    def mark_fallback(self, error: Exception = None):
+        """예외를 처리하고 기본 응답을 대신 반환한 경우"""
+        self.fallback_used = True
+        if error is not None:
+            self.error = type(error).__name__
+
+    @property
+    def outcome(self) -> str:
+        if self.fallback_used:
+            return "fallback"
+        if self.error:
+            return "error"
+        return "success"
+
+
+_current_call: contextvars.ContextVar = contextvars.ContextVar("llm_call", default=None)
+
+
+def current_llm_call() -> Optional[LLMCall]:
+    """진행 중인 LLM 호출 계측 객체 (없으면 None)"""
+    return _current_call.get()
+
+
+@contextmanager
+def track_llm_call(site: str, model: str):
+    """
+    LLM 호출 계측 컨텍스트
+
+    Args:
+        site: 호출 지점 이름 (예: "essay_grader.grade")
+        model: 모델 이름
+
+    Yields:
+        LLMCall (record_usage / mark_fallback / mark_cache_hit 로 정보 추가)
+    """
+    call = LLMCall(site, model)
+    token = _current_call.set(call)
+    start = time.perf_counter()
+    try:
+        yield call
+    except Exception as e:
+        call.error = type(e).__name__
+        raise
+    finally:
+        call.latency = time.perf_counter() - start
+        _current_call.reset(token)
+        _record(call)
+
+
+def _record(call: LLMCall):
+    labels = {"site": call.site, "model": call.model}
+    LLM_CALLS.inc(outcome=call.outcome, **labels)
+    if not call.cache_hit:
+        LLM_LATENCY.observe(call.latency, **labels)
+    if call.prompt_tokens:
+        LLM_TOKENS.inc(call.prompt_tokens, kind="prompt", **labels)
+    if call.completion_tokens:
+        LLM_TOKENS.inc(call.completion_tokens, kind="completion", **labels)
+    cost = call.cost
+    if cost:
+        LLM_COST.inc(cost, **labels)
+    if call.retries:
+        LLM_RETRIES.inc(call.retries, **labels)
+    if call.cache_hit:
+        LLM_CACHE_HITS.inc(**labels)
+    _daily.add(call)
+
+
+# ==================== SDK 내부 재시도 집계 ====================
+
+def _retry_count(request) -> int:
+    try:
+        return int(request.headers.get("x-stainless-retry-count", "0") or 0)
+    except ValueError:
+        return 0
+
+
+def _on_request(request):
+    call = _current_call.get()
+    if call is not None:
+        call.retries = max(call.retries, _retry_count(request))
+
+
+async def _on_request_async(request):
+    _on_request(request)
+
+
+_http_clients: Dict[str, Any] = {}
+
+
+def get_http_client():
+    """OpenAI SDK 재시도 횟수를 LLMCall 에 기록하는 공유 httpx 클라이언트 (동기)"""
+    if "sync" not in _http_clients:
+        from openai import DefaultHttpxClient
+        _http_clients["sync"] = DefaultHttpxClient(event_hooks={"request": [_on_request]})
+    return _http_clients["sync"]
+
+
+def get_async_http_client():
+    """OpenAI SDK 재시도 횟수를 LLMCall 에 기록하는 공유 httpx 클라이언트 (비동기)"""
+    if "async" not in _http_clients:
+        from openai import DefaultAsyncHttpxClient
+        _http_clients["async"] = DefaultAsyncHttpxClient(event_hooks={"request": [_on_request_async]})
+    return _http_clients["async"]
+
+
+# ==================== 일별 요약 ====================
+
+USAGE_FIELDS = (
+    "calls", "errors", "fallbacks", "cache_hits", "retries",
+    "prompt_tokens", "completion_tokens", "cost_usd", "total_latency_ms"
+)
+
+
+class _DailyUsage:
+    """
+    (날짜, site, model) 별 사용량을 메모리에서 집계하고 백그라운드 스레드가 주기적으로 DB에 반영
+
+    요청 스레드는 메모리 집계만 하고, 저장 주기가 지나면 저장 스레드를 깨우기만 합니다.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[date, str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._ready_binds = set()
+        self._bind = None
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def set_bind(self, bind):
+        """주기 저장에 사용할 엔진 (기본: database.engine)"""
+        self._bind = bind
+
+    def add(self, call: LLMCall):
+        key = (date.today(), call.site, call.model)
+        with self._lock:
+            row = self._pending.setdefault(key, dict.fromkeys(USAGE_FIELDS, 0))
+            row["calls"] += 1
+            row["errors"] += 1 if call.error and not call.fallback_used else 0
+            row["fallbacks"] += 1 if call.fallback_used else 0
+            row["cache_hits"] += 1 if call.cache_hit else 0
+            row["retries"] += call.retries
+            row["prompt_tokens"] += call.prompt_tokens
+            row["completion_tokens"] += call.completion_tokens
+            row["cost_usd"] += call.cost
+            row["total_latency_ms"] += call.latency * 1000
+            due = time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SEC
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-usage-flush", daemon=True)
+                self._thread.start()
+
+        if due:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(FLUSH_INTERVAL_SEC)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self, bind=None):
+        """
+        집계된 사용량을 llm_usage_daily 테이블에 더함
+
+        Args:
+            bind: 저장할 엔진/커넥션 (기본: set_bind 로 지정한 엔진, 없으면 database.engine)
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        from sqlalchemy import update
+        from sqlalchemy.exc import IntegrityError
+        from sqlalchemy.orm import Session
+        from models import LLMUsageDaily
+
+        if bind is None:
+            if self._bind is None:
+                from database import engine
+                self._bind = engine
+            bind = self._bind
+
+        try:
+            if id(bind) not in self._ready_binds:
+                # 스크립트 등 main.py 의 create_all 을 거치지 않는 경우 대비
+                LLMUsageDaily.__table__.create(bind=bind, checkfirst=True)
+                self._ready_binds.add(id(bind))
+            with Session(bind=bind) as db:
+                for (day, site, model), values in pending.items():
+                    # 읽고 더해서 쓰지 않고 한 문장으로 증가 (동시에 저장하는 다른 워커의 값을 덮어쓰지 않음)
+                    increment = update(LLMUsageDaily).where(
+                        LLMUsageDaily.day == day,
+                        LLMUsageDaily.site == site,
+                        LLMUsageDaily.model == model
+                    ).values({field: getattr(LLMUsageDaily, field) + values[field] for field in USAGE_FIELDS})
+                    if db.execute(increment).rowcount:
+                        continue
+                    try:
+                        with db.begin_nested():
+                            db.add(LLMUsageDaily(day=day, site=site, model=model,
+                                                 **{field: values[field] for field in USAGE_FIELDS}))
+                    except IntegrityError:
+                        # 다른 워커가 같은 행을 먼저 만든 경우
+                        db.execute(increment)
+                db.commit()
+        except Exception as e:
+            logger.warning("LLM 사용량 저장 실패: %s", e)
+            # 다음 저장 때 다시 시도
+            with self._lock:
+                for key, values in pending.items():
+                    row = self._pending.setdefault(key, dict.fromkeys(USAGE_FIELDS, 0))
+                    for field in USAGE_FIELDS:
+                        row[field] += values[field]
+
+
+_daily = _DailyUsage()
+atexit.register(_daily.flush)
+
+
+def set_usage_bind(bind):
+    """일별 사용량을 주기적으로 저장할 엔진 지정 (테스트/스크립트용, 기본: database.engine)"""
+    _daily.set_bind(bind)
+
+
+def flush_usage(bind=None):
+    """메모리에 집계된 사용량을 즉시 저장 (bind: 저장할 엔진/커넥션, 기본: set_usage_bind 로 지정한 엔진)"""
+    _daily.flush(bind)
+
+
+def get_usage_summary(db, days: int = 7, site: str = None) -> List[Dict[str, Any]]:
+    """
+    최근 N일 LLM 사용량 일별 요약
+
+    Args:
+        db: 데이터베이스 세션
+        days: 조회 기간 (일)
+        site: 호출 지점 필터 (선택)
+
+    Returns:
+        (날짜, site, model) 별 사용량 리스트 (최신 날짜 우선)
+    """
+    from models import LLMUsageDaily
+
+    flush_usage(db.get_bind())
+    query = db.query(LLMUsageDaily).filter(LLMUsageDaily.day >= date.today() - timedelta(days=days - 1))
+    if site:
+        query = query.filter(LLMUsageDaily.site == site)
+    rows = query.order_by(LLMUsageDaily.day.desc(), LLMUsageDaily.site, LLMUsageDaily.model).all()
+
+    return [
+        {
+            "day": row.day.isoformat(),
+            "site": row.site,
+            "model": row.model,
+            "calls": row.calls,
+            "errors": row.errors,
+            "fallbacks": row.fallbacks,
+            "fallback_rate": round(row.fallbacks / row.calls, 3) if row.calls else 0.0,
+            "cache_hits": row.cache_hits,
+            "retries": row.retries,
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "cost_usd": round(row.cost_usd, 4),
+            "avg_latency_ms": round(row.total_latency_ms / row.calls, 1) if row.calls else 0.0,
+        }
+        for row in rows
+    ]
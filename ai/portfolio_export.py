@@ -0,0 +1,176 @@
+"""
+학급 포트폴리오 일괄 내보내기
+학생별 PDF를 여러 프로세스에서 병렬 렌더링하고, 완료되는 순서대로 ZIP 스트림으로 전송
+"""
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Any, List, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+MAX_TRACKED_EXPORTS = 50   # 진행 상황을 보관할 최근 내보내기 작업 수
+
+_exports: Dict[str, Dict[str, Any]] = {}
+_exports_lock = threading.Lock()
+
+
+def get_export_workers() -> int:
+    """PDF 렌더링 프로세스 수 (EXPORT_WORKERS 환경 변수, 기본값: CPU 코어 수)"""
+    configured = os.getenv("EXPORT_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    return os.cpu_count() or 1
+
+
+def create_export(total: int, label: str = "") -> str:
+    """
+    내보내기 작업 등록
+
+    Args:
+        total: 생성할 PDF 수
+        label: 작업 설명 (학급명 등)
+
+    Returns:
+        export_id
+    """
+    export_id = uuid.uuid4().hex
+    with _exports_lock:
+        if len(_exports) >= MAX_TRACKED_EXPORTS:
+            oldest = min(_exports, key=lambda k: _exports[k]["started_at"])
+            _exports.pop(oldest, None)
+        _exports[export_id] = {
+            "export_id": export_id,
+            "label": label,
+            "status": "running",
+            "total": total,
+            "completed": 0,
+            "failed": [],
+            "started_at": time.time(),
+            "finished_at": None,
+        }
+    return export_id
+
+
+def get_export_progress(export_id: str) -> Optional[Dict[str, Any]]:
+    """내보내기 진행 상황 조회 (없으면 None)"""
+    with _exports_lock:
+        job = _exports.get(export_id)
+        if not job:
+            return None
+        job = dict(job, failed=list(job["failed"]))
+
+    finished = job["finished_at"] or time.time()
+    job["elapsed_sec"] = round(finished - job["started_at"], 2)
+    job["percent"] = round(job["completed"] / job["total"] * 100, 1) if job["total"] else 100.0
+    return job
+
+
+def _update_export(export_id: str, **changes):
+    with _exports_lock:
+        job = _exports.get(export_id)
+        if not job:
+            return
+        if changes.pop("increment", False):
+            job["completed"] += 1
+        failed = changes.pop("failed_username", None)
+        if failed:
+            job["failed"].append(failed)
+        job.update(changes)
+
+
+def render_portfolio_pdf_bytes(portfolio_data: Dict[str, Any]) -> bytes:
+    """포트폴리오 PDF를 메모리에서 렌더링 (프로세스 풀 작업 함수)"""
+    from utils.pdf_utils import create_portfolio_pdf
+
+    buffer = io.BytesIO()
+    create_portfolio_pdf(portfolio_data, buffer)
+    return buffer.getvalue()
+
+
+class _ZipChunkBuffer:
+    """ZipFile이 쓰는 바이트를 모아 두었다가 청크 단위로 내보내는 비탐색(non-seekable) 버퍼"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_entry(name: str) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_STORED  # PDF는 이미 압축되어 있음
+    return info
+
+
+def iter_portfolio_zip(
+    portfolios: List[Dict[str, Any]],
+    export_id: str,
+    max_workers: int = None
+) -> Iterator[bytes]:
+    """
+    포트폴리오 PDF를 병렬 렌더링하며 ZIP 바이트 청크를 순차적으로 생성
+
+    Args:
+        portfolios: 학생별 포트폴리오 데이터 리스트
+        export_id: 진행 상황을 기록할 내보내기 작업 ID
+        max_workers: 렌더링 프로세스 수 (None이면 get_export_workers())
+
+    Yields:
+        ZIP 파일 바이트 청크 (PDF 1건 완료 시마다)
+    """
+    buffer = _ZipChunkBuffer()
+    workers = min(max_workers or get_export_workers(), max(1, len(portfolios)))
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        with zipfile.ZipFile(buffer, mode="w") as archive:
+            futures = {
+                executor.submit(render_portfolio_pdf_bytes, data): data["username"]
+                for data in portfolios
+            }
+            for future in as_completed(futures):
+                username = futures[future]
+                try:
+                    pdf_bytes = future.result()
+                except Exception as e:
+                    logger.warning("포트폴리오 PDF 생성 실패 (%s): %s", username, e)
+                    _update_export(export_id, increment=True, failed_username=username)
+                    continue
+
+                archive.writestr(_zip_entry(f"portfolio_{username}.pdf"), pdf_bytes)
+                _update_export(export_id, increment=True)
+                yield buffer.drain()
+
+            job = get_export_progress(export_id)
+            if job and job["failed"]:
+                archive.writestr(_zip_entry("errors.txt"), "\n".join(job["failed"]).encode("utf-8"))
+
+        yield buffer.drain()
+        _update_export(export_id, status="done", finished_at=time.time())
+    except GeneratorExit:
+        # 클라이언트 연결 종료: 남은 렌더링 작업 취소
+        _update_export(export_id, status="cancelled", finished_at=time.time())
+        raise
+    except Exception:
+        _update_export(export_id, status="failed", finished_at=time.time())
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
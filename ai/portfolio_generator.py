@@ -2,7 +2,8 @@
 E-포트폴리오 생성 모듈
 학생의 학습 기록을 수집하여 PDF 포트폴리오 생성
 """
-from typing import Dict, Any
+import logging
+from typing import Dict, Any, List
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from models import Portfolio, Record, AchievementRecord, EssayGrading
@@ -10,41 +11,36 @@ from datetime import datetime
 import json
 import os
 
+logger = logging.getLogger(__name__)
 
-def generate_portfolio_data(db: Session, username: str, subject: str = "국어") -> Dict[str, Any]:
+
+RECENT_RECORD_LIMIT = 10   # 주요 학습 기록 테이블 행 수
+TREND_POINT_LIMIT = 5       # 성취도 추이 포인트 수
+BULK_QUERY_CHUNK = 500      # IN 절 파라미터 분할 크기
+
+
+def _build_portfolio_payload(
+    username: str,
+    subject: str,
+    learning_stats,
+    achievements: List[Any],
+    recent_records: List[Any]
+) -> Dict[str, Any]:
     """
-    포트폴리오 데이터 생성
+    집계 결과로 포트폴리오 데이터 구성 (단건/학급 일괄 생성 공용)
+
+    Args:
+        username: 학생 사용자명
+        subject: 과목
+        learning_stats: (total_questions, avg_score, total_score) 집계 행
+        achievements: (standard_code, avg_score, count) 집계 행 리스트
+        recent_records: 최신순 Record 행 리스트 (최대 RECENT_RECORD_LIMIT건)
     """
-    # 학습 기록 통계 (Record 사용)
-    learning_stats = db.query(
-        func.count(Record.id).label('total_questions'),
-        func.avg(Record.score).label('avg_score'),
-        func.sum(Record.score).label('total_score')
-    ).filter(
-        and_(
-            Record.username == username,
-            # Record does not have explicit subject in my current schema, 
-            # assuming handled or we take all records for now.
-        )
-    ).first()
-    
-    # 성취기준별 점수
-    achievement_by_standard = db.query(
-        AchievementRecord.standard_code,
-        func.avg(AchievementRecord.score).label('avg_score'),
-        func.count(AchievementRecord.id).label('count')
-    ).filter(
-        and_(
-            AchievementRecord.username == username,
-            AchievementRecord.subject == subject
-        )
-    ).group_by(AchievementRecord.standard_code).all()
-    
     # 강점/약점 영역 분석
     strong_areas = []
     weak_areas = []
     
-    for achievement in achievement_by_standard:
+    for achievement in achievements:
         area_data = {
             "standard_code": achievement.standard_code,
             "average_score": round(achievement.avg_score, 2),
@@ -56,28 +52,6 @@ def generate_portfolio_data(db: Session, username: str, subject: str = "국어")
         elif achievement.avg_score < 60:
             weak_areas.append(area_data)
     
-    # 최근 서술형 채점 결과
-    recent_essays = db.query(EssayGrading).filter(
-        and_(
-            EssayGrading.username == username,
-            EssayGrading.subject == subject
-        )
-    ).order_by(EssayGrading.created_at.desc()).limit(5).all()
-    
-    essay_history = [
-        {
-            "question": e.question[:50] + "...",
-            "score": e.score,
-            "date": e.created_at.strftime("%Y-%m-%d")
-        }
-        for e in recent_essays
-    ]
-    
-    # 주요 학습 기록 (상세 테이블용)
-    recent_records = db.query(Record).filter(
-        Record.username == username
-    ).order_by(Record.created_at.desc()).limit(10).all()
-    
     learning_history = [
         {
             "date": r.created_at.strftime("%Y-%m-%d"),
@@ -88,14 +62,8 @@ def generate_portfolio_data(db: Session, username: str, subject: str = "국어")
         for r in recent_records
     ]
     
-    # 성취도 추이 데이터 (최근 5회분)
-    progress_records = db.query(Record).filter(
-        Record.username == username
-    ).order_by(Record.created_at.asc()).all()
-    
-    if len(progress_records) > 5:
-        progress_records = progress_records[-5:]
-        
+    # 성취도 추이 데이터 (최근 5회분, 오래된 순)
+    progress_records = list(reversed(recent_records[:TREND_POINT_LIMIT]))
     trend_data = [
         {"label": f"{i+1}주", "score": r.score} 
         for i, r in enumerate(progress_records)
@@ -103,19 +71,22 @@ def generate_portfolio_data(db: Session, username: str, subject: str = "국어")
     
     # 영역별 성취도 (레이더 차트용)
     area_scores = {}
-    for achievement in achievement_by_standard:
+    for achievement in achievements:
         # standard_code에서 영역 추출 (예: '문법', '문학', '독서')
         # 실제 데이터에 따라 파싱 로직 필요, 여기서는 예시로 매핑
         area_name = achievement.standard_code # 또는 매핑 테이블 사용
         area_scores[area_name] = round(achievement.avg_score, 2)
     
-    # 포트폴리오 데이터 구성
-    portfolio_data = {
+    total_questions = learning_stats.total_questions if learning_stats else 0
+    total_score = learning_stats.total_score if learning_stats else 0
+    avg_score = learning_stats.avg_score if learning_stats else 0
+    
+    return {
         "username": username,
         "subject": subject,
-        "total_questions": int(learning_stats.total_questions or 0),
-        "total_score": round(float(learning_stats.total_score or 0), 2),
-        "average_score": round(float(learning_stats.avg_score or 0), 2),
+        "total_questions": int(total_questions or 0),
+        "total_score": round(float(total_score or 0), 2),
+        "average_score": round(float(avg_score or 0), 2),
         "strong_areas": strong_areas,
         "weak_areas": weak_areas,
         "trend_data": trend_data,
@@ -123,6 +94,52 @@ def generate_portfolio_data(db: Session, username: str, subject: str = "국어")
         "learning_history": learning_history,
         "generated_at": datetime.now().isoformat()
     }
+
+
+def generate_portfolio_data(db: Session, username: str, subject: str = "국어") -> Dict[str, Any]:
+    """
+    포트폴리오 데이터 생성
+    """
+    # 학습 기록 통계 (Record 사용)
+    learning_stats = db.query(
+        func.count(Record.id).label('total_questions'),
+        func.avg(Record.score).label('avg_score'),
+        func.sum(Record.score).label('total_score')
+    ).filter(
+        and_(
+            Record.username == username,
+            # Record does not have explicit subject in my current schema, 
+            # assuming handled or we take all records for now.
+        )
+    ).first()
+    
+    # 성취기준별 점수
+    achievement_by_standard = db.query(
+        AchievementRecord.standard_code,
+        func.avg(AchievementRecord.score).label('avg_score'),
+        func.count(AchievementRecord.id).label('count')
+    ).filter(
+        and_(
+            AchievementRecord.username == username,
+            AchievementRecord.subject == subject
+        )
+    ).group_by(AchievementRecord.standard_code).all()
+    
+    # 주요 학습 기록 (상세 테이블 10건 + 성취도 추이 5건 공용, 최신순)
+    recent_records = db.query(Record).filter(
+        Record.username == username
+    ).order_by(Record.created_at.desc()).limit(RECENT_RECORD_LIMIT).all()
+    
+    portfolio_data = _build_portfolio_payload(
+        username=username,
+        subject=subject,
+        learning_stats=learning_stats,
+        achievements=achievement_by_standard,
+        recent_records=recent_records
+    )
+    strong_areas = portfolio_data["strong_areas"]
+    weak_areas = portfolio_data["weak_areas"]
+    trend_data = portfolio_data["trend_data"]
     
     # 데이터베이스에 저장/업데이트
     existing_portfolio = db.query(Portfolio).filter(
@@ -199,7 +216,7 @@ def generate_portfolio_pdf(db: Session, username: str, output_dir: str = "static
         from utils.pdf_utils import create_portfolio_pdf
         create_portfolio_pdf(portfolio_data, full_path)
     except Exception as e:
-        print(f"PDF Generation Error: {e}")
+        logger.exception("포트폴리오 PDF 생성 오류: %s", e)
         # Create dummy file if utils missing or failed
         with open(full_path, "w", encoding="utf-8") as f:
             f.write(f"PDF Generation failed: {str(e)}")
@@ -211,3 +228,88 @@ def generate_portfolio_pdf(db: Session, username: str, output_dir: str = "static
         db.commit()
     
     return web_path
+
+
+def _chunked(items: List[str], size: int = BULK_QUERY_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def generate_class_portfolio_data(
+    db: Session,
+    usernames: List[str],
+    subject: str = "국어"
+) -> List[Dict[str, Any]]:
+    """
+    학급 전체 포트폴리오 데이터 일괄 생성 (DB 저장 없음)
+
+    학생 수와 무관하게 집계 3종(학습 통계, 성취기준별 점수, 최근 기록)을
+    GROUP BY / 윈도 함수 쿼리로 한 번씩만 실행합니다.
+
+    Args:
+        db: 데이터베이스 세션
+        usernames: 학생 사용자명 리스트
+        subject: 과목
+
+    Returns:
+        학생별 포트폴리오 데이터 리스트 (usernames 순서 유지)
+    """
+    stats_by_user = {}
+    achievements_by_user = {name: [] for name in usernames}
+    records_by_user = {name: [] for name in usernames}
+
+    for chunk in _chunked(usernames):
+        # 1. 학습 기록 통계
+        stats_rows = db.query(
+            Record.username,
+            func.count(Record.id).label('total_questions'),
+            func.avg(Record.score).label('avg_score'),
+            func.sum(Record.score).label('total_score')
+        ).filter(Record.username.in_(chunk)).group_by(Record.username).all()
+        for row in stats_rows:
+            stats_by_user[row.username] = row
+
+        # 2. 성취기준별 점수
+        achievement_rows = db.query(
+            AchievementRecord.username,
+            AchievementRecord.standard_code,
+            func.avg(AchievementRecord.score).label('avg_score'),
+            func.count(AchievementRecord.id).label('count')
+        ).filter(
+            and_(
+                AchievementRecord.username.in_(chunk),
+                AchievementRecord.subject == subject
+            )
+        ).group_by(AchievementRecord.username, AchievementRecord.standard_code).all()
+        for row in achievement_rows:
+            achievements_by_user[row.username].append(row)
+
+        # 3. 학생별 최근 기록 N건 (ROW_NUMBER 윈도 함수)
+        row_number = func.row_number().over(
+            partition_by=Record.username,
+            order_by=(Record.created_at.desc(), Record.id.desc())
+        ).label('rn')
+        ranked = db.query(
+            Record.username,
+            Record.question,
+            Record.category,
+            Record.score,
+            Record.created_at,
+            row_number
+        ).filter(Record.username.in_(chunk)).subquery()
+        recent_rows = db.query(ranked).filter(
+            ranked.c.rn <= RECENT_RECORD_LIMIT
+        ).order_by(ranked.c.username, ranked.c.rn).all()
+        for row in recent_rows:
+            records_by_user[row.username].append(row)
+
+    return [
+        _build_portfolio_payload(
+            username=name,
+            subject=subject,
+            learning_stats=stats_by_user.get(name),
+            achievements=achievements_by_user[name],
+            recent_records=records_by_user[name]
+        )
+        for name in usernames
+    ]
@@ -0,0 +1,250 @@
+"""
+프롬프트 조립 모듈
+호출 지점별 프롬프트를 "고정 부분 → 요청마다 바뀌는 부분" 순서로 만들고, 바뀌는 부분을 토큰 예산 안으로 줄임
+
+- 고정 부분(역할, 지시문, 평가 관점, 출력 형식, 성취기준 목록)을 앞에 두어 같은 호출 지점의 요청끼리
+  앞부분이 같아지도록 합니다 (OpenAI 프롬프트 캐시는 1024 토큰 이상 같은 접두부에만 적용)
+- 고정 부분 뒤에 바뀌는 부분을 추가하면 ValueError (순서가 섞여 캐시가 깨지는 것을 방지)
+- 토큰 수는 approx_tokens 로 오프라인 추정하며, 예산을 넘으면 바뀌는 부분끼리 예산을 나누어
+  긴 글은 앞/뒤를 남기고 가운데를 생략하고, 목록은 항목별로 자른 뒤 뒤쪽 항목부터 생략
+- 채점하는 학생 답안처럼 잘리면 안 되는 부분은 keep=True 로 넣어 줄이지 않고, 그만큼 예산을 넘을 수 있음
+
+예:
+    prompt = (
+        PromptBuilder("essay_grader.grade")
+        .static("당신은 고등학교 국어 교사입니다. ...")
+        .static(GRADING_CRITERIA, header="**채점 기준**:")
+        .dynamic(question, header="**문제**:")
+        .dynamic(student_answer, header="**학생 답안**:", keep=True)
+        .build()
+    )
+
+환경 변수:
+    PROMPT_TOKEN_BUDGETS: 호출 지점별 예산 덮어쓰기 (예: "graph.analyze=2000,essay_grader.grade=3000")
+"""
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from ai.llm_telemetry import approx_tokens
+from utils.metrics import REGISTRY
+
+
+# 호출 지점별 프롬프트(사용자 메시지) 토큰 예산 - 고정 부분을 포함한 전체 기준
+DEFAULT_BUDGETS: Dict[str, int] = {
+    "essay_grader.grade": 3000,
+    "essay_grader.grade_batch": 9000,
+    "batch_grading.grade": 3000,
+    "graph.analyze": 3000,
+    "graph.misconceptions": 3000,
+    "graph.recommend": 2000,
+    "teacher_assistant.question_summary": 2500,
+    "teacher_assistant.wrong_patterns": 3000,
+    "standards_matcher.match": 4000,
+}
+DEFAULT_BUDGET = 4000
+MIN_SECTION_TOKENS = 50
+ELLIPSIS = " …(중략)… "
+HEAD_RATIO = 0.7              # 긴 글을 줄일 때 앞부분에 남길 비율 (결론이 뒤에 오는 답안을 위해 뒷부분도 남김)
+
+PROMPT_TOKENS = REGISTRY.histogram(
+    "llm_prompt_tokens_estimate", "프롬프트 추정 토큰 수", ("site",),
+    buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000))
+PROMPT_TRUNCATIONS = REGISTRY.counter(
+    "llm_prompt_truncations_total", "토큰 예산 때문에 줄인 프롬프트 수", ("site",))
+
+_BOUNDARY = re.compile(r"[\s.!?。…,]")
+
+
+def _env_budgets() -> Dict[str, int]:
+    budgets = {}
+    for item in os.getenv("PROMPT_TOKEN_BUDGETS", "").split(","):
+        site, _, value = item.partition("=")
+        if site.strip() and value.strip().isdigit():
+            budgets[site.strip()] = int(value)
+    return budgets
+
+
+def budget_for(site: str) -> int:
+    """호출 지점의 토큰 예산 (PROMPT_TOKEN_BUDGETS > DEFAULT_BUDGETS > DEFAULT_BUDGET)"""
+    return _env_budgets().get(site) or DEFAULT_BUDGETS.get(site, DEFAULT_BUDGET)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """
+    토큰 예산에 맞게 글 줄이기 (앞 70% / 뒤 30% 를 남기고 가운데 생략, 단어 경계에서 자름)
+
+    Args:
+        text: 원문
+        max_tokens: 최대 토큰 수
+
+    Returns:
+        줄인 글 (예산 안이면 원문 그대로)
+    """
+    text = text or ""
+    tokens = approx_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    budget = max(0, max_tokens - approx_tokens(ELLIPSIS))
+    keep = int(len(text) * budget / tokens)
+    while keep > 0:
+        head_len = int(keep * HEAD_RATIO)
+        head = text[:head_len]
+        tail = text[len(text) - (keep - head_len):]
+        # 단어 중간에서 자르지 않도록 경계까지 뒤로/앞으로 이동 (경계가 너무 멀면 그대로)
+        cut = max((m.start() for m in _BOUNDARY.finditer(head)), default=-1)
+        if cut >= head_len * 0.8:
+            head = head[:cut + 1]
+        match = _BOUNDARY.search(tail)
+        if match and match.end() <= len(tail) * 0.2:
+            tail = tail[match.end():]
+        result = f"{head.rstrip()}{ELLIPSIS}{tail.lstrip()}"
+        if approx_tokens(result) <= max_tokens:
+            return result
+        keep = int(keep * 0.9)
+    return ELLIPSIS.strip()
+
+
+def fit_items(items: List[str], max_tokens: int, item_tokens: int = None) -> Tuple[List[str], int]:
+    """
+    목록을 토큰 예산에 맞게 줄이기 (항목별 최대 item_tokens 로 자른 뒤, 앞에서부터 예산 안의 항목만)
+
+    Returns:
+        (남긴 항목, 생략한 항목 수)
+    """
+    kept, used = [], 0
+    for i, item in enumerate(items):
+        if item_tokens:
+            item = truncate_text(item, item_tokens)
+        cost = approx_tokens(item) + 1
+        if used + cost > max_tokens:
+            return kept, len(items) - i
+        kept.append(item)
+        used += cost
+    return kept, 0
+
+
+class _Section:
+    __slots__ = ("header", "text", "items", "item_tokens", "bullet", "min_tokens", "keep")
+
+    def __init__(self, header: Optional[str], text: str = None, items: List[str] = None,
+                 item_tokens: int = None, bullet: str = "- ", min_tokens: int = MIN_SECTION_TOKENS,
+                 keep: bool = False):
+        self.header = header
+        self.text = text
+        self.items = items
+        self.item_tokens = item_tokens
+        self.bullet = bullet
+        self.min_tokens = min_tokens
+        self.keep = keep
+
+    def natural_tokens(self) -> int:
+        if self.items is None:
+            return approx_tokens(self.text)
+        return sum(approx_tokens(truncate_text(i, self.item_tokens) if self.item_tokens else i) + 1
+                   for i in self.items)
+
+    def render(self, max_tokens: int = None) -> Tuple[str, bool]:
+        """본문 (max_tokens 가 있으면 그 안으로 줄임) 과 줄였는지 여부"""
+        if self.items is None:
+            body = self.text if max_tokens is None else truncate_text(self.text, max_tokens)
+            truncated = body != self.text
+        else:
+            kept, omitted = fit_items(self.items, max_tokens if max_tokens is not None else 10 ** 9,
+                                      self.item_tokens)
+            body = "\n".join(f"{self.bullet}{item}" for item in kept)
+            if omitted:
+                body += f"\n(외 {omitted}개 생략)"
+            truncated = bool(omitted) or any(k != i for k, i in zip(kept, self.items))
+        return (f"{self.header}\n{body}" if self.header else body), truncated
+
+
+class PromptBuilder:
+    """
+    고정 부분 → 바뀌는 부분 순서의 프롬프트 조립기
+
+    Args:
+        site: 호출 지점 (예산 조회 / 메트릭 라벨, track_llm_call 의 site 와 같은 이름)
+        budget: 토큰 예산 (기본: budget_for(site))
+    """
+
+    def __init__(self, site: str, budget: int = None):
+        self.site = site
+        self.budget = budget or budget_for(site)
+        self._static: List[str] = []
+        self._dynamic: List[_Section] = []
+        self.tokens = 0
+        self.truncated = False
+
+    def static(self, text: str, header: str = None) -> "PromptBuilder":
+        """고정 부분 추가 (요청과 관계없이 같은 내용, 줄이지 않음)"""
+        if self._dynamic:
+            raise ValueError("고정 부분은 바뀌는 부분보다 앞에 있어야 합니다.")
+        self._static.append(f"{header}\n{text}" if header else text)
+        return self
+
+    def dynamic(self, text: str, header: str = None, min_tokens: int = MIN_SECTION_TOKENS,
+                keep: bool = False) -> "PromptBuilder":
+        """
+        요청마다 바뀌는 글 추가 (예산을 넘으면 가운데를 생략, 비어 있으면 제목도 넣지 않음)
+
+        keep=True 이면 줄이지 않고 나머지 부분의 예산에서 먼저 뺌 (채점 대상 답안 등)
+        """
+        if text:
+            self._dynamic.append(_Section(header, text=text, min_tokens=min_tokens, keep=keep))
+        return self
+
+    def items(self, items: List[str], header: str = None, item_tokens: int = None, bullet: str = "- ",
+              min_tokens: int = MIN_SECTION_TOKENS) -> "PromptBuilder":
+        """요청마다 바뀌는 목록 추가 (항목별로 item_tokens 까지 자르고, 예산을 넘으면 뒤쪽 항목 생략)"""
+        self._dynamic.append(_Section(header, items=list(items), item_tokens=item_tokens, bullet=bullet,
+                                      min_tokens=min_tokens))
+        return self
+
+    def _allocate(self, available: int) -> List[Optional[int]]:
+        """
+        바뀌는 부분별 토큰 할당 (keep 부분은 전부, 작은 부분도 전부, 남은 예산은 큰 부분끼리 균등하게)
+
+        Returns:
+            부분별 최대 토큰 (None 이면 줄이지 않음)
+        """
+        needs = [s.natural_tokens() for s in self._dynamic]
+        if sum(needs) <= available:
+            return [None] * len(needs)
+        limits: List[Optional[int]] = [None] * len(needs)
+        remaining = []
+        for i, section in enumerate(self._dynamic):
+            if section.keep:
+                available -= needs[i]
+            else:
+                remaining.append(i)
+        while remaining:
+            share = max(0, available) // len(remaining)
+            small = [i for i in remaining if needs[i] <= share]
+            if not small:
+                for i in remaining:
+                    limits[i] = max(share, self._dynamic[i].min_tokens)
+                break
+            for i in small:
+                available -= needs[i]
+                remaining.remove(i)
+        return limits
+
+    def build(self) -> str:
+        static = "\n\n".join(self._static)
+        headers = sum(approx_tokens(s.header) for s in self._dynamic if s.header)
+        available = self.budget - approx_tokens(static) - headers - 2 * len(self._dynamic)
+
+        parts = [static] if static else []
+        self.truncated = False
+        for section, limit in zip(self._dynamic, self._allocate(available)):
+            text, truncated = section.render(limit)
+            parts.append(text)
+            self.truncated |= truncated
+        prompt = "\n\n".join(parts)
+
+        self.tokens = approx_tokens(prompt)
+        PROMPT_TOKENS.observe(self.tokens, site=self.site)
+        if self.truncated:
+            PROMPT_TRUNCATIONS.inc(site=self.site)
+        return prompt
@@ -0,0 +1,204 @@
+"""
+학생 질문 군집화 모듈
+교사 AI 비서 요약 전에 기간 내 질문을 로컬에서 묶어, GPT 에는 대표 질문과 질문 수만 보냄
+
+- 정규화: NFKC, 소문자, 문장부호 제거, 단어별 조사 제거, 질문 어미("뭐야", "알려줘" 등) 제거
+- 특징: 단어 + 단어 안의 글자 2-gram 을 DIM 차원으로 해싱한 L2 정규화 벡터
+- 군집: 정규화한 문장이 같으면 바로 같은 군집, 아니면 청크 단위로 기존 대표 벡터와 코사인 유사도를
+  한 번에 계산해 threshold 이상이면 가장 가까운 군집, 없으면 새 군집 (leader clustering)
+- 질문을 스트리밍으로 받아 청크 단위로 처리. 원문은 군집별 표현(최대 MAX_VARIANTS)에만 남기고,
+  정규화 문장 → 군집 기록은 MAX_KEYS 개까지만 두어 (넘으면 다시 나올 때 벡터화) 메모리는
+  max_clusters × MAX_VARIANTS + MAX_KEYS + chunk_size 이하
+
+환경 변수:
+    QUESTION_CLUSTER_THRESHOLD: 같은 군집으로 볼 코사인 유사도 (기본 0.7)
+"""
+import os
+import re
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ai.grading_pipeline import content_grams, strip_particle
+
+
+DIM = 1024
+CHUNK_SIZE = 512
+MAX_CLUSTERS = 500        # 넘으면 새 군집을 만들지 않고 가장 가까운 군집에 포함
+MAX_VARIANTS = 20         # 군집별로 표현(정규화 문장)별 개수를 셀 최대 수
+MAX_KEYS = 100_000        # 군집을 기억해 둘 정규화 문장 최대 수
+EXAMPLES = 2
+
+# 주제와 관계없는 질문 표현 (정규화 후 단어 단위로 제거)
+_QUESTION_WORDS = {
+    "뭐야", "뭐예요", "뭔가요", "뭐지", "뭐에요", "무엇", "무엇인가요", "무엇이야", "무엇인지", "뭔지",
+    "알려줘", "알려주세요", "알려줄래", "설명해줘", "설명해주세요", "궁금해요", "궁금해", "질문", "질문이요",
+    "어떻게", "왜", "있어", "있나요", "인가요", "이야", "좀", "혹시", "선생님", "쌤", "그럼", "그리고",
+}
+_WORD = re.compile(r"\w+")
+
+
+def _threshold() -> float:
+    try:
+        return float(os.getenv("QUESTION_CLUSTER_THRESHOLD", 0.7))
+    except ValueError:
+        return 0.7
+
+
+def normalize_question(text: str) -> str:
+    """
+    질문 정규화 (같은 뜻의 표현 차이 제거)
+
+    예: "진달래꽃의 주제가 뭐야?" / "진달래꽃 주제 알려줘" → "진달래꽃 주제"
+    """
+    words = _WORD.findall(unicodedata.normalize("NFKC", text or "").lower())
+    words = [strip_particle(w) for w in words if w not in _QUESTION_WORDS]
+    return " ".join(w for w in words if w not in _QUESTION_WORDS)
+
+
+def _features(key: str) -> List[str]:
+    return key.split() + sorted(content_grams(key))
+
+
+def vectorize(keys: List[str], dim: int = DIM) -> np.ndarray:
+    """정규화한 질문 목록 → 해싱한 특징 벡터 (행별 L2 정규화, 특징이 없으면 0 벡터)"""
+    rows, cols = [], []
+    for i, key in enumerate(keys):
+        for feature in _features(key):
+            rows.append(i)
+            cols.append(zlib.crc32(feature.encode("utf-8")) % dim)
+    matrix = np.zeros((len(keys), dim), dtype=np.float32)
+    np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+class QuestionClusterer:
+    """
+    질문 스트리밍 군집화
+
+    Args:
+        threshold: 같은 군집으로 볼 코사인 유사도 (기본: QUESTION_CLUSTER_THRESHOLD)
+        max_clusters: 최대 군집 수
+        chunk_size: 한 번에 벡터화/비교할 새 표현 수
+
+    예:
+        clusterer = QuestionClusterer()
+        for (text,) in db.query(Record.question).yield_per(1000):
+            clusterer.add(text)
+        clusterer.clusters()   # [{"text", "count", "examples"}] - 질문 수 내림차순
+    """
+
+    def __init__(self, threshold: float = None, max_clusters: int = MAX_CLUSTERS, chunk_size: int = CHUNK_SIZE):
+        self.threshold = _threshold() if threshold is None else threshold
+        self.max_clusters = max_clusters
+        self.chunk_size = chunk_size
+        self.total = 0
+        self._leaders = np.zeros((min(max_clusters, 64), DIM), dtype=np.float32)
+        self._counts: List[int] = []
+        self._variants: List[Counter] = []
+        self._raw: List[Dict[str, str]] = []         # 군집별 표현 → 처음 나온 원문
+        self._assigned: Dict[str, int] = {}          # 정규화 문장 → 군집 (최대 MAX_KEYS)
+        self._pending: Counter = Counter()           # 아직 군집에 넣지 않은 정규화 문장 → 개수
+        self._pending_raw: Dict[str, str] = {}       # 아직 군집에 넣지 않은 정규화 문장 → 원문
+
+    def add(self, text: str):
+        key = normalize_question(text)
+        if not key:
+            return
+        self.total += 1
+        cluster = self._assigned.get(key)
+        if cluster is not None:
+            self._count(cluster, key, 1, text.strip())
+            return
+        self._pending_raw.setdefault(key, text.strip())
+        self._pending[key] += 1
+        if len(self._pending) >= self.chunk_size:
+            self._flush()
+
+    def add_all(self, texts: Iterable[str]) -> "QuestionClusterer":
+        for text in texts:
+            self.add(text)
+        return self
+
+    def _count(self, cluster: int, key: str, amount: int, raw: str):
+        self._counts[cluster] += amount
+        variants = self._variants[cluster]
+        if key in variants or len(variants) < MAX_VARIANTS:
+            variants[key] += amount
+            self._raw[cluster].setdefault(key, raw)
+
+    def _new_cluster(self, vector: np.ndarray) -> int:
+        index = len(self._counts)
+        if index >= len(self._leaders):
+            grown = np.zeros((min(self.max_clusters, len(self._leaders) * 2), DIM), dtype=np.float32)
+            grown[:index] = self._leaders
+            self._leaders = grown
+        self._leaders[index] = vector
+        self._counts.append(0)
+        self._variants.append(Counter())
+        self._raw.append({})
+        return index
+
+    def _flush(self):
+        if not self._pending:
+            return
+        keys = list(self._pending)
+        vectors = vectorize(keys)
+        size = len(self._counts)
+        if size:
+            similarity = vectors @ self._leaders[:size].T
+            best = similarity.argmax(axis=1)
+            best_similarity = similarity[np.arange(len(keys)), best]
+
+        for i, key in enumerate(keys):
+            cluster = None
+            # 이 청크에서 새로 만든 군집까지 포함해 가장 가까운 군집
+            current = len(self._counts)
+            if current > size:
+                fresh = self._leaders[size:current] @ vectors[i]
+                j = int(fresh.argmax())
+                if fresh[j] >= self.threshold and (not size or fresh[j] > best_similarity[i]):
+                    cluster = size + j
+            if cluster is None and size and best_similarity[i] >= self.threshold:
+                cluster = int(best[i])
+            if cluster is None:
+                if current < self.max_clusters and vectors[i].any():
+                    cluster = self._new_cluster(vectors[i])
+                elif current:
+                    cluster = int((self._leaders[:current] @ vectors[i]).argmax())
+                else:
+                    cluster = self._new_cluster(vectors[i])
+            if len(self._assigned) < MAX_KEYS:
+                self._assigned[key] = cluster
+            self._count(cluster, key, self._pending[key], self._pending_raw[key])
+        self._pending.clear()
+        self._pending_raw.clear()
+
+    def clusters(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        군집 목록 (질문 수 내림차순)
+
+        Returns:
+            [{"text": 가장 많이 나온 표현의 원문, "count": 질문 수, "examples": 다른 표현 원문}]
+        """
+        self._flush()
+        result = []
+        for count, variants, raw in zip(self._counts, self._variants, self._raw):
+            common = [key for key, _ in variants.most_common(EXAMPLES + 1)]
+            result.append({
+                "text": raw[common[0]],
+                "count": count,
+                "examples": [raw[key] for key in common[1:]],
+            })
+        result.sort(key=lambda c: c["count"], reverse=True)
+        return result[:limit] if limit else result
+
+
+def cluster_questions(texts: Iterable[str], threshold: float = None) -> List[Dict[str, Any]]:
+    """질문 목록 군집화 (QuestionClusterer 간단 사용)"""
+    return QuestionClusterer(threshold).add_all(texts).clusters()
@@ -1,18 +1,31 @@
 import json
+import logging
 import os
 from typing import Dict, Any, List
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
+from ai.llm_client import invoke_llm
+from ai.llm_telemetry import track_llm_call, get_http_client
+from ai.prompt_builder import PromptBuilder
+
+logger = logging.getLogger(__name__)
 
 # 환경 변수 로드
 load_dotenv()
 
+UNMATCHED_STANDARD = {
+    "code": "K-HS-?",
+    "domain": "일반",
+    "desc": "관련 성취기준을 명확히 찾을 수 없습니다."
+}
+
+
 class StandardsMatcher:
     def __init__(self, standards_file: str = "achievement_standards.json"):
         self.standards_file = standards_file
         self.standards_data = self._load_standards()
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0)
+        self.llm = ChatOpenAI(model="gpt-4o", temperature=0, max_retries=0, http_client=get_http_client())
 
     def _load_standards(self) -> List[Dict[str, Any]]:
         try:
@@ -20,7 +33,7 @@ class StandardsMatcher:
                 data = json.load(f)
                 return data.get("standards", [])
         except Exception as e:
-            print(f"Error loading standards: {e}")
+            logger.warning("성취기준 파일 로드 실패 (%s): %s", self.standards_file, e)
             return []
 
     def match(self, question: str, essay: str) -> Dict[str, Any]:
@@ -31,81 +44,74 @@ class StandardsMatcher:
         self.standards_data = self._load_standards()
         
         text = f"{question} {essay}".lower()
-        print(f"--- [StandardsMatcher] Matching text: {text} ---")
-        print(f"--- [StandardsMatcher] Total standards loaded: {len(self.standards_data)} ---")
+        logger.debug("[StandardsMatcher] 매칭 요청 %d자, 성취기준 %d개", len(text), len(self.standards_data))
         
         # 1. 단순 키워드 매칭 (빠른 속도)
         for std in self.standards_data:
             keywords = std.get("keywords", [])
             for k in keywords:
                 if k.lower() in text:
-                    print(f"--- [StandardsMatcher] Keyword '{k}' matched standard: {std['code']} ---")
+                    logger.debug("[StandardsMatcher] 키워드 '%s' 매칭: %s", k, std['code'])
                     return std
 
         # 2. LLM 매칭 (정교함)
-        print("--- [StandardsMatcher] No keyword match. Trying LLM... ---")
+        logger.debug("[StandardsMatcher] 키워드 매칭 없음, LLM 매칭 시도")
         return self._match_with_llm(question, essay)
 
     def _match_with_llm(self, question: str, essay: str) -> Dict[str, Any]:
         """GPT-4o를 사용하여 가장 적합한 성취기준 코드 추출"""
         
-        # 성취기준 목록 요약
+        # 성취기준 목록은 모든 요청에 같으므로 지시문과 함께 앞에 두고, 질문/답안은 마지막에
         standards_summary = "\n".join([
             f"- [{s['code']}] {s['desc']}" 
             for s in self.standards_data
         ])
 
-        prompt = f"""
-        당신은 대한민국 고등학교 국어 교사입니다. 다음 학생의 답안 내용과 가장 관련이 깊은 '2022 개정 국어과 성취기준' 하나를 선택하세요.
-        
-        [학생이 보고 있는 질문/발문]
-        {question if question else '없음 (일반적인 문장 분석)'}
-        
-        [학생의 서술형 답안/텍스트]
-        {essay}
-        
-        [후보 성취기준 목록]
-        {standards_summary}
-        
-        가장 적절한 한 명의 성취기준 코드를 골라 아래 JSON 형식으로만 답하세요.
-        정확히 'matched_code' 필드만 포함해야 합니다.
-        
-        {{
-            "matched_code": "코드입력"
-        }}
-        
-        만약 관련성을 전혀 찾을 수 없다면 {{"matched_code": "K-HS-?"}}를 반환하세요.
-        """
+        prompt = (
+            PromptBuilder("standards_matcher.match")
+            .static("당신은 대한민국 고등학교 국어 교사입니다. 아래 학생의 답안 내용과 가장 관련이 깊은 "
+                    "'2022 개정 국어과 성취기준' 하나를 후보 목록에서 선택하세요.")
+            .static(standards_summary, header="[후보 성취기준 목록]")
+            .static('가장 적절한 하나의 성취기준 코드를 골라 아래 JSON 형식으로만 답하세요.\n'
+                    "정확히 'matched_code' 필드만 포함해야 합니다.\n\n"
+                    '{"matched_code": "코드입력"}\n\n'
+                    '만약 관련성을 전혀 찾을 수 없다면 {"matched_code": "K-HS-?"}를 반환하세요.')
+            .dynamic(question or "없음 (일반적인 문장 분석)", header="[학생이 보고 있는 질문/발문]")
+            .dynamic(essay, header="[학생의 서술형 답안/텍스트]", min_tokens=300)
+            .build()
+        )
 
-        try:
-            response = self.llm.invoke([
-                SystemMessage(content="교육과정 전문가로서 성취기준 코드를 정확히 매칭하세요. JSON 형식만 출력하세요."),
-                HumanMessage(content=prompt)
-            ])
+        with track_llm_call("standards_matcher.match", "gpt-4o") as call:
+            try:
+                response = invoke_llm(self.llm, [
+                    SystemMessage(content="교육과정 전문가로서 성취기준 코드를 정확히 매칭하세요. JSON 형식만 출력하세요."),
+                    HumanMessage(content=prompt)
+                ])
+                call.record_usage(response)
             
-            content = response.content.strip()
-            # 마크다운 제거
-            if content.startswith("```"):
-                content = content.split("```")[1]
-                if content.startswith("json"):
-                    content = content[4:].strip()
+                content = response.content.strip()
+                # 마크다운 제거
+                if content.startswith("```"):
+                    content = content.split("```")[1]
+                    if content.startswith("json"):
+                        content = content[4:].strip()
             
-            result = json.loads(content)
-            matched_code = result.get("matched_code")
-            print(f"--- [StandardsMatcher] LLM matched code: {matched_code} ---")
+                result = json.loads(content)
+                matched_code = result.get("matched_code")
+                logger.debug("[StandardsMatcher] LLM 매칭 코드: %s", matched_code)
 
-            # 코드에 해당하는 데이터 전체 반환
-            for std in self.standards_data:
-                if std["code"] == matched_code:
-                    return std
-        except Exception as e:
-            print(f"--- [StandardsMatcher] LLM Match Error: {str(e)} ---")
+                # 코드에 해당하는 데이터 전체 반환
+                for std in self.standards_data:
+                    if std["code"] == matched_code:
+                        return std
+                # "K-HS-?" 는 지시한 '관련 없음' 응답이므로 대체 응답이 아님, 목록에 없는 다른 코드만 대체 응답으로 집계
+                if matched_code != UNMATCHED_STANDARD["code"]:
+                    call.mark_fallback()
+            except Exception as e:
+                logger.warning("[StandardsMatcher] LLM 매칭 실패: %s", e)
+                call.mark_fallback(e)
 
-        return {
-            "code": "K-HS-?",
-            "domain": "일반",
-            "desc": "관련 성취기준을 명확히 찾을 수 없습니다."
-        }
+        return dict(UNMATCHED_STANDARD)
 
 # 싱글톤 인스턴스
 matcher = StandardsMatcher()
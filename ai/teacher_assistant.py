@@ -2,16 +2,27 @@
 교사 AI 비서 (Teacher-AI Agent)
 학생 질문 요약, 오답 유형 분석, 수업자료 조언 생성
 """
-from typing import Dict, List, Any
+import logging
+from typing import Dict, List, Any, Optional
+import numpy as np
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, func
 from models import Record, Submission, Feedback, MasteryLevel, Question
-from openai import OpenAI
-from config import settings
+from ai.llm_client import chat_completion
+from ai.llm_telemetry import track_llm_call
+from ai.prompt_builder import PromptBuilder, truncate_text
+from ai.question_clustering import QuestionClusterer
+from utils.cache import TTLCache, get_ttl_from_env
 import json
 
+logger = logging.getLogger(__name__)
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+
+WRONG_PATTERN_SAMPLE_SIZE = 30
+WRONG_LEVELS = (MasteryLevel.FAIL, MasteryLevel.PARTIAL)
+
+# 오답 패턴 분석 결과 캐시 - 키에 오답 워터마크가 있으므로 새 오답이 채점되면 자동으로 다시 분석
+_wrong_pattern_cache = TTLCache(get_ttl_from_env("WRONG_PATTERN_CACHE_TTL", 86400), maxsize=128)
 
 
 def summarize_student_questions(
@@ -34,31 +45,35 @@ def summarize_student_questions(
     """
     from datetime import datetime, timedelta
     
-    # 최근 N일간의 학생 질문 조회
+    # 최근 N일간의 학생 질문 조회 (질문 열만 나누어 읽으면서 비슷한 질문끼리 군집화)
     since_date = datetime.now() - timedelta(days=days)
     
-    questions = db.query(Record).filter(
+    rows = db.query(Record.question).filter(
         and_(
             Record.created_at >= since_date,
             Record.question != None
         )
-    ).all()
+    ).yield_per(1000)
     
-    if not questions:
+    clusterer = QuestionClusterer()
+    for (text,) in rows:
+        clusterer.add(text)
+    clusters = clusterer.clusters()
+    
+    if not clusters:
         return {
             "message": "분석할 질문이 없습니다.",
             "question_count": 0
         }
     
-    # 질문 텍스트 수집
-    question_texts = [q.question for q in questions if q.question]
-    
-    # GPT-4로 질문 요약 및 패턴 분석
-    summary = analyze_questions_with_gpt(question_texts, subject)
+    # GPT-4로 질문 요약 및 패턴 분석 (질문 유형별 대표 질문과 질문 수만 전달)
+    summary = analyze_questions_with_gpt(clusters, subject, clusterer.total)
     
     return {
         "period": f"최근 {days}일",
-        "question_count": len(question_texts),
+        "question_count": clusterer.total,
+        "cluster_count": len(clusters),
+        "top_questions": [{"question": c["text"], "count": c["count"]} for c in clusters[:10]],
         "summary": summary.get("summary", ""),
         "common_topics": summary.get("common_topics", []),
         "difficulty_areas": summary.get("difficulty_areas", []),
@@ -66,10 +81,69 @@ def summarize_student_questions(
     }
 
 
+def stratified_sample(strata: np.ndarray, keys: np.ndarray, size: int) -> np.ndarray:
+    """
+    층화 표본 추출 (층별로 최소 1개, 나머지는 층 크기에 비례, 같은 입력이면 항상 같은 표본)
+
+    층 수가 size 보다 많으면 큰 층부터 1개씩 뽑습니다. 층 안에서는 keys 의 해시 순서로 뽑고,
+    결과는 층을 번갈아 가며 정렬되므로 앞쪽만 잘라 써도 여러 층이 고르게 남습니다.
+
+    Args:
+        strata: 행별 층 번호 (0부터 연속된 정수)
+        keys: 행별 고유 키 (예: 제출 ID)
+        size: 표본 크기
+
+    Returns:
+        뽑은 행 인덱스
+    """
+    n = len(strata)
+    if n == 0 or size <= 0:
+        return np.zeros(0, dtype=np.intp)
+    counts = np.bincount(strata)
+    quota = np.zeros_like(counts)
+    occupied = np.flatnonzero(counts)
+    if size >= n:
+        quota = counts
+    elif size <= len(occupied):
+        quota[occupied[np.argsort(-counts[occupied], kind="stable")[:size]]] = 1
+    else:
+        # 최소 1개씩 뒤 남은 개수를 (층 크기 - 1) 에 비례해 나누고, 소수점 이하가 큰 층부터 1개씩 더
+        quota[occupied] = 1
+        spare = counts - quota
+        exact = spare * (size - len(occupied)) / spare.sum()
+        extra = np.floor(exact).astype(counts.dtype)
+        left = size - len(occupied) - int(extra.sum())
+        extra[np.argsort(-(exact - extra), kind="stable")[:left]] += 1
+        quota += extra
+
+    # 층 안 순서: 키 해시 (입력 순서와 무관하게 결정적)
+    hashed = keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    order = np.lexsort((hashed, strata))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank = np.arange(n) - starts[strata[order]]
+    keep = rank < quota[strata[order]]
+    chosen, chosen_rank = order[keep], rank[keep]
+    return chosen[np.lexsort((strata[chosen], chosen_rank))]
+
+
+def _wrong_answer_watermark(db: Session, question_ids: Optional[List[int]]) -> tuple:
+    """오답 워터마크 (오답 수, 마지막 피드백 ID, 마지막 수정 시각) - 새 오답이 채점되거나 재채점되면 바뀜"""
+    query = db.query(
+        func.count(Feedback.id), func.max(Feedback.id), func.max(Feedback.updated_at)
+    ).filter(Feedback.mastery_level.in_(WRONG_LEVELS))
+    if question_ids:
+        query = query.join(Submission, Submission.id == Feedback.submission_id).filter(
+            Submission.question_id.in_(question_ids))
+    count, last_id, last_update = query.one()
+    return count, last_id, str(last_update) if last_update else None
+
+
 def analyze_wrong_answer_patterns(
     db: Session,
     teacher_username: str,
-    subject: str = "국어"
+    subject: str = "국어",
+    question_ids: Optional[List[int]] = None,
+    sample_size: int = WRONG_PATTERN_SAMPLE_SIZE
 ) -> Dict[str, Any]:
     """
     오답 유형 분석
@@ -78,41 +152,77 @@ def analyze_wrong_answer_patterns(
         db: 데이터베이스 세션
         teacher_username: 교사 사용자명
         subject: 과목
+        question_ids: 분석할 문항 (기본: 전체 문항)
+        sample_size: GPT 에 보낼 오답 표본 수 (문항/성취기준별로 층화)
     
     Returns:
-        오답 패턴 분석 결과
+        오답 패턴 분석 결과 (오답이 새로 채점되기 전까지는 캐시된 결과)
     """
-    # 낮은 점수의 답안들 조회 (FAIL or PARTIAL)
-    wrong_submissions = db.query(Submission).join(Feedback).filter(
-        Feedback.mastery_level.in_([MasteryLevel.FAIL, MasteryLevel.PARTIAL])
-    ).limit(50).all()
-    
-    if not wrong_submissions:
+    question_ids = sorted(set(question_ids)) if question_ids else None
+    watermark = _wrong_answer_watermark(db, question_ids)
+    if not watermark[0]:
         return {
             "message": "분석할 오답이 없습니다.",
             "essay_count": 0
         }
+
+    cache_key = (teacher_username, subject, tuple(question_ids or ()), sample_size, watermark)
+    cached = _wrong_pattern_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # 낮은 점수의 답안들 조회 (FAIL or PARTIAL) - 문항/피드백을 한 번의 JOIN 으로
+    query = db.query(
+        Submission.id,
+        Submission.question_id,
+        Submission.answer_text,
+        Question.content,
+        Question.standard_code,
+        Feedback.mastery_level,
+        Feedback.overall_comment
+    ).join(
+        Feedback, Feedback.submission_id == Submission.id
+    ).outerjoin(
+        Question, Question.id == Submission.question_id
+    ).filter(
+        Feedback.mastery_level.in_(WRONG_LEVELS)
+    )
+    if question_ids:
+        query = query.filter(Submission.question_id.in_(question_ids))
+    rows = query.all()
     
+    # 문항 × 성취기준별로 층화 추출
+    strata_index: Dict[tuple, int] = {}
+    strata = np.array([strata_index.setdefault((row.standard_code, row.question_id), len(strata_index))
+                       for row in rows], dtype=np.intp)
+    picked = stratified_sample(strata, np.array([row.id for row in rows]), sample_size)
+
     # 오답 데이터 수집
     wrong_answers = []
-    for sub in wrong_submissions:
-        q_text = sub.question.content if sub.question else "질문 내용 없음"
+    for i in picked:
+        row = rows[i]
         wrong_answers.append({
-            "question": q_text,
-            "student_answer": sub.answer_text,
-            "score": sub.feedback.mastery_level if sub.feedback else "N/A",
-            "feedback": sub.feedback.overall_comment if sub.feedback else ""
+            "question": row.content or "질문 내용 없음",
+            "standard_code": row.standard_code,
+            "student_answer": row.answer_text,
+            "score": row.mastery_level.value if row.mastery_level else "N/A",
+            "feedback": row.overall_comment or ""
         })
     
     # GPT-4로 오답 패턴 분석
-    pattern_analysis = analyze_wrong_patterns_with_gpt(wrong_answers, subject)
+    pattern_analysis = analyze_wrong_patterns_with_gpt(wrong_answers, subject, total=len(rows))
     
-    return {
+    result = {
         "analyzed_count": len(wrong_answers),
+        "wrong_count": len(rows),
+        "question_count": len({row.question_id for row in rows}),
         "common_mistakes": pattern_analysis.get("common_mistakes", []),
         "misconceptions": pattern_analysis.get("misconceptions", []),
         "improvement_strategies": pattern_analysis.get("improvement_strategies", [])
     }
+    if pattern_analysis:
+        _wrong_pattern_cache.set(cache_key, result)
+    return result
 
 
 def generate_teaching_advice(
@@ -155,88 +265,114 @@ def generate_teaching_advice(
     }
 
 
-def analyze_questions_with_gpt(questions: List[str], subject: str) -> Dict[str, Any]:
-    """GPT-4를 사용한 질문 분석"""
-    if not questions:
-        return {}
-        
-    questions_text = "\n".join([f"- {q}" for q in questions[:30]])  # 최대 30개
-    
-    prompt = f"""
-    당신은 {subject} 교사입니다. 학생들이 최근에 한 질문들을 분석해주세요.
-    
-    **학생 질문 목록**:
-    {questions_text}
-    
-    다음 형식의 JSON으로 분석 결과를 작성해주세요:
-    {{
-      "summary": "전체 질문 요약 (2-3문장)",
-      "common_topics": ["자주 나온 주제1", "주제2", "주제3"],
-      "difficulty_areas": ["학생들이 어려워하는 영역1", "영역2"],
-      "teaching_suggestions": ["교수 제안사항1", "제안사항2", "제안사항3"]
-    }}
+def analyze_questions_with_gpt(clusters: List[Dict[str, Any]], subject: str, total: int = None) -> Dict[str, Any]:
+    """
+    GPT-4를 사용한 질문 분석
+
+    Args:
+        clusters: 질문 유형 목록 (QuestionClusterer.clusters(), 질문 수 내림차순)
+        subject: 과목
+        total: 전체 질문 수 (기본: 유형별 질문 수 합계)
     """
+    if not clusters:
+        return {}
+    total = total or sum(c["count"] for c in clusters)
+
+    # 유형별 대표 질문과 질문 수 (질문 수가 많은 유형부터, 넘치는 유형은 토큰 예산에서 생략)
+    questions = [f"{c['text']} (×{c['count']})" for c in clusters]
+    prompt = (
+        PromptBuilder("teacher_assistant.question_summary")
+        .static("당신은 교사입니다. 학생들이 최근에 한 질문들을 분석해주세요. "
+                "비슷한 질문은 유형으로 묶여 있으며, 질문 수가 많은 유형일수록 비중을 두어 분석해주세요.")
+        .static("""다음 형식의 JSON으로 분석 결과를 작성해주세요:
+{
+  "summary": "전체 질문 요약 (2-3문장)",
+  "common_topics": ["자주 나온 주제1", "주제2", "주제3"],
+  "difficulty_areas": ["학생들이 어려워하는 영역1", "영역2"],
+  "teaching_suggestions": ["교수 제안사항1", "제안사항2", "제안사항3"]
+}""")
+        .dynamic(subject, header="**과목**:")
+        .dynamic(f"전체 {total}개 질문, {len(clusters)}개 유형", header="**질문 수**:")
+        .items(questions, header="**학생 질문 유형 (대표 질문, 질문 수)**:", item_tokens=100)
+        .build()
+    )
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 교육 데이터 분석 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            response_format={"type": "json_object"}
-        )
+    with track_llm_call("teacher_assistant.question_summary", "gpt-4o") as call:
+        try:
+            response = chat_completion(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "당신은 교육 데이터 분석 전문가입니다."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.5,
+                response_format={"type": "json_object"}
+            )
+            call.record_usage(response)
         
-        return json.loads(response.choices[0].message.content)
+            return json.loads(response.choices[0].message.content)
         
-    except Exception as e:
-        print(f"질문 분석 중 오류: {e}")
-        return {}
+        except Exception as e:
+            logger.warning("질문 분석 중 오류: %s", e)
+            call.mark_fallback(e)
+            return {}
 
 
-def analyze_wrong_patterns_with_gpt(wrong_answers: List[Dict], subject: str) -> Dict[str, Any]:
-    """GPT-4를 사용한 오답 패턴 분석"""
+def analyze_wrong_patterns_with_gpt(wrong_answers: List[Dict], subject: str, total: int = None) -> Dict[str, Any]:
+    """
+    GPT-4를 사용한 오답 패턴 분석
+
+    Args:
+        wrong_answers: 오답 표본 (문항이 번갈아 나오는 순서)
+        subject: 과목
+        total: 전체 오답 수 (기본: 표본 수)
+    """
     if not wrong_answers:
         return {}
 
-    # 샘플 데이터만 전송 (토큰 제한)
-    sample_data = wrong_answers[:10]
-    answers_text = "\n\n".join([
-        f"질문: {a['question'][:100]}\n학생답안: {a['student_answer'][:200]}\n평가: {a['score']}"
-        for a in sample_data
-    ])
-    
-    prompt = f"""
-    당신은 {subject} 교사입니다. 학생들의 오답을 분석하여 공통 패턴을 찾아주세요.
-    
-    **오답 샘플**:
-    {answers_text}
-    
-    다음 형식의 JSON으로 분석 결과를 작성해주세요:
-    {{
-      "common_mistakes": ["흔한 실수1", "실수2"],
-      "misconceptions": ["오개념1", "오개념2"],
-      "improvement_strategies": ["개선 전략1", "전략2"]
-    }}
-    """
+    # 오답은 항목별로 질문/답안을 줄이고, 전체는 토큰 예산 안에서 앞쪽부터 포함
+    samples = [
+        f"질문: {truncate_text(a['question'] or '', 60)}\n"
+        + (f"성취기준: {a['standard_code']}\n" if a.get("standard_code") else "")
+        + f"학생답안: {truncate_text(a['student_answer'] or '', 150)}\n"
+        f"평가: {a['score']}"
+        for a in wrong_answers
+    ]
+    prompt = (
+        PromptBuilder("teacher_assistant.wrong_patterns")
+        .static("당신은 교사입니다. 학생들의 오답을 분석하여 공통 패턴을 찾아주세요.")
+        .static("""다음 형식의 JSON으로 분석 결과를 작성해주세요:
+{
+  "common_mistakes": ["흔한 실수1", "실수2"],
+  "misconceptions": ["오개념1", "오개념2"],
+  "improvement_strategies": ["개선 전략1", "전략2"]
+}""")
+        .dynamic(subject, header="**과목**:")
+        .dynamic(f"전체 오답 {total or len(wrong_answers)}개 중 문항별 표본 {len(wrong_answers)}개",
+                 header="**표본**:")
+        .items(samples, header="**오답 샘플**:", bullet="\n")
+        .build()
+    )
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 학습 평가 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5,
-            response_format={"type": "json_object"}
-        )
+    with track_llm_call("teacher_assistant.wrong_patterns", "gpt-4o") as call:
+        try:
+            response = chat_completion(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "당신은 학습 평가 전문가입니다."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.5,
+                response_format={"type": "json_object"}
+            )
+            call.record_usage(response)
         
-        return json.loads(response.choices[0].message.content)
+            return json.loads(response.choices[0].message.content)
         
-    except Exception as e:
-        print(f"오답 패턴 분석 중 오류: {e}")
-        return {}
+        except Exception as e:
+            logger.warning("오답 패턴 분석 중 오류: %s", e)
+            call.mark_fallback(e)
+            return {}
 
 
 def generate_advice_with_gpt(topic: str, subject: str, avg_score: float) -> Dict[str, Any]:
@@ -256,19 +392,22 @@ def generate_advice_with_gpt(topic: str, subject: str, avg_score: float) -> Dict
     }}
     """
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 교육과정 설계 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            response_format={"type": "json_object"}
-        )
+    with track_llm_call("teacher_assistant.teaching_advice", "gpt-4o") as call:
+        try:
+            response = chat_completion(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "당신은 교육과정 설계 전문가입니다."},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.7,
+                response_format={"type": "json_object"}
+            )
+            call.record_usage(response)
         
-        return json.loads(response.choices[0].message.content)
+            return json.loads(response.choices[0].message.content)
         
-    except Exception as e:
-        print(f"수업자료 조언 생성 중 오류: {e}")
-        return {}
+        except Exception as e:
+            logger.warning("수업자료 조언 생성 중 오류: %s", e)
+            call.mark_fallback(e)
+            return {}
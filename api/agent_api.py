@@ -1,3 +1,4 @@
+import logging
 import os
 import json
 import asyncio
@@ -9,9 +10,13 @@ from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import InMemorySaver
 from langchain_core.tools import tool
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from database import engine
 from sqlalchemy.orm import Session
 from models import Record
+from ai.llm_telemetry import track_llm_call, get_http_client, get_async_http_client
+
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -50,7 +55,10 @@ def study_feedback_tool(text: str) -> str:
 # ---------------------------
 # ✅ LangChain Agent 생성
 # ---------------------------
-model = ChatOpenAI(model="gpt-4o", temperature=0.7, streaming=True)
+model = ChatOpenAI(
+    model="gpt-4o", temperature=0.7, streaming=True, stream_usage=True,
+    http_client=get_http_client(), http_async_client=get_async_http_client()
+)
 memory = InMemorySaver()
 agent = create_react_agent(model=model, tools=[kor_curriculum_tool, study_feedback_tool], checkpointer=memory)
 
@@ -66,10 +74,14 @@ async def chat_with_agent(request: Request):
 
     async def event_stream():
         try:
-            result = await agent.ainvoke(
-                {"messages": [{"role": "user", "content": message}]},
-                {"configurable": {"thread_id": thread_id}},
-            )
+            # 에이전트 한 턴(도구 호출 포함 여러 번의 LLM 호출)을 1건으로 집계
+            with track_llm_call("agent.chat", "gpt-4o") as call:
+                usage = UsageMetadataCallbackHandler()
+                result = await agent.ainvoke(
+                    {"messages": [{"role": "user", "content": message}]},
+                    {"configurable": {"thread_id": thread_id}, "callbacks": [usage]},
+                )
+                call.record_usage_metadata(usage.usage_metadata)
             output = result["messages"][-1].content
             for ch in output:
                 yield f"data: {json.dumps({'token': ch})}\n\n"
@@ -89,7 +101,7 @@ async def chat_with_agent(request: Request):
                 db.commit()
                 db.close()
             except Exception as db_err:
-                print(f"채팅 기록 저장 오류: {db_err}")
+                logger.exception("채팅 기록 저장 오류: %s", db_err)
 
             yield f"data: {json.dumps({'done': True})}\n\n"
         except Exception as e:
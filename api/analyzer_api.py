@@ -1,3 +1,4 @@
+import logging
 from fastapi import APIRouter, Request
 from fastapi.responses import JSONResponse
 import json
@@ -7,6 +8,8 @@ from sqlalchemy.orm import Session
 from models import Record, AchievementRecord
 from ai.standards_matcher import matcher
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/student", tags=["Analyzer"])
 
 # ============================================
@@ -75,7 +78,7 @@ async def analyze(request: Request):
         db.commit()
         db.close()
     except Exception as db_err:
-        print(f"분석 기록 저장 오류: {db_err}")
+        logger.exception("분석 기록 저장 오류: %s", db_err)
 
     # 4️⃣ 결과 반환 (프론트엔드 접근 구조 통일)
     return JSONResponse({
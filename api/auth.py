@@ -1,9 +1,12 @@
 # api/auth.py
+import logging
 from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
 
+logger = logging.getLogger(__name__)
+
 # ✅ prefix 추가
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -54,7 +57,7 @@ async def register(request: Request, db: Session = Depends(get_db)):
             "role": role
         }
     except Exception as e:
-        print(f"회원가입 중 오류 발생: {e}")
+        logger.exception("회원가입 중 오류 발생: %s", e)
         return {"success": False, "message": "회원가입 처리 중 서버 오류가 발생했습니다."}
 
 
@@ -99,6 +102,6 @@ async def login(request: Request, db: Session = Depends(get_db)):
             "role": user.role
         }
     except Exception as e:
-        print(f"로그인 중 오류 발생: {e}")
+        logger.exception("로그인 중 오류 발생: %s", e)
         # 구체적인 오류 내용은 보안상 로그에만 남기고 사용자에게는 일반 메시지 전달
         return {"success": False, "message": "로그인 처리 중 서버 오류가 발생했습니다."}
@@ -2,12 +2,16 @@
 대시보드 API
 학생 성취도 대시보드 및 히트맵 데이터 제공
 """
+import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import engine
 from models import Base
 from ai.dashboard_analyzer import analyze_student_achievement, generate_heatmap_data
 from pydantic import BaseModel
+from utils.response_cache import cached_response
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
@@ -27,6 +31,7 @@ class DashboardRequest(BaseModel):
 
 
 @router.get("")
+@cached_response("dashboard", tags=["user:{username}"])
 def get_dashboard(username: str, subject: str = "국어", db: Session = Depends(get_db)):
     """
     학생 대시보드 기본 정보 조회 (GET 방식)
@@ -68,7 +73,7 @@ def get_dashboard(username: str, subject: str = "국어", db: Session = Depends(
         }
     except Exception as e:
         # 오류 발생 시 기본 데이터 반환
-        print(f"Dashboard Error: {str(e)}")
+        logger.exception("Dashboard Error: %s", e)
         return {
             "success": True,
             "username": username,
@@ -85,6 +90,7 @@ def get_dashboard(username: str, subject: str = "국어", db: Session = Depends(
 
 
 @router.post("/achievement")
+@cached_response("dashboard-achievement", tags=["user:{username}"])
 def get_achievement_dashboard(request: DashboardRequest, db: Session = Depends(get_db)):
     """
     학생 성취도 대시보드 데이터 조회
@@ -108,6 +114,7 @@ def get_achievement_dashboard(request: DashboardRequest, db: Session = Depends(g
 
 
 @router.post("/heatmap")
+@cached_response("dashboard-heatmap", tags=["user:{username}"])
 def get_heatmap(request: DashboardRequest, db: Session = Depends(get_db)):
     """
     강약점 히트맵 데이터 조회
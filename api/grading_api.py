@@ -6,10 +6,16 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import engine
 from models import Base
-from ai.essay_grader import grade_essay, get_grading_history, get_grading_detail
-from models import Record
+from ai.essay_grader import grade_essay, get_grading_detail
+from models import Record, EssayGrading
 from pydantic import BaseModel
 from typing import Optional
+import heapq
+from utils.exceptions import ValidationError
+from utils.pagination import (
+    clamp_limit, decode_cursor, encode_cursor,
+    keyset_before, raw_timestamp, timestamp_key
+)
 
 
 router = APIRouter(prefix="/api/grading", tags=["Grading"])
@@ -37,6 +43,11 @@ class GradingHistoryRequest(BaseModel):
     username: str
     subject: Optional[str] = None
     limit: int = 10
+    cursor: Optional[str] = None
+
+
+# 통합 이력에서 같은 시각의 행을 구분하는 소스 순위 (높을수록 먼저)
+SOURCE_RANK = {"grading": 1, "record": 0}
 
 
 @router.post("/essay")
@@ -66,52 +77,116 @@ def grade_essay_endpoint(request: GradeEssayRequest, db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail=f"채점 실패: {str(e)}")
 
 
+def _grading_page(db: Session, request: GradingHistoryRequest, cursor, size: int):
+    """채점 이력 한 페이지 (created_at, id 내림차순)"""
+    ts_raw = raw_timestamp(EssayGrading.created_at)
+    query = db.query(
+        EssayGrading.id,
+        EssayGrading.subject,
+        EssayGrading.question,
+        EssayGrading.score,
+        EssayGrading.created_at,
+        ts_raw.label("ts_raw")
+    ).filter(EssayGrading.username == request.username)
+
+    if request.subject:
+        query = query.filter(EssayGrading.subject == request.subject)
+    if cursor:
+        query = query.filter(keyset_before(
+            EssayGrading.created_at, EssayGrading.id, cursor,
+            rank=SOURCE_RANK["grading"], cursor_rank=SOURCE_RANK[cursor["src"]]
+        ))
+
+    rows = query.order_by(ts_raw.desc(), EssayGrading.id.desc()).limit(size).all()
+    for g in rows:
+        question = g.question or ""
+        yield (timestamp_key(g.ts_raw), SOURCE_RANK["grading"], g.id), {
+            "id": g.id,
+            "type": "grading",
+            "title": f"[{g.subject}] 서술형 채점",
+            "content": question[:100] + "..." if len(question) > 100 else question,
+            "score": g.score,
+            "time": g.created_at.isoformat() if g.created_at else None
+        }
+
+
+def _record_page(db: Session, request: GradingHistoryRequest, cursor, size: int):
+    """채팅/분석 기록 한 페이지 (created_at, id 내림차순)"""
+    ts_raw = raw_timestamp(Record.created_at)
+    query = db.query(
+        Record.id,
+        Record.question,
+        Record.category,
+        Record.score,
+        Record.created_at,
+        ts_raw.label("ts_raw")
+    ).filter(Record.username == request.username)
+
+    if cursor:
+        query = query.filter(keyset_before(
+            Record.created_at, Record.id, cursor,
+            rank=SOURCE_RANK["record"], cursor_rank=SOURCE_RANK[cursor["src"]]
+        ))
+
+    rows = query.order_by(ts_raw.desc(), Record.id.desc()).limit(size).all()
+    for r in rows:
+        yield (timestamp_key(r.ts_raw), SOURCE_RANK["record"], r.id), {
+            "id": r.id,
+            "type": "chat" if r.category == "AI 채팅" else "analysis",
+            "title": f"[{r.category}] 활동",
+            "content": r.question,
+            "score": r.score,
+            "time": r.created_at.isoformat() if r.created_at else "2025-01-01T00:00:00"
+        }
+
+
 @router.post("/history")
 def get_history(request: GradingHistoryRequest, db: Session = Depends(get_db)):
     """
-    채점 및 활동 통합 이력 조회
+    채점 및 활동 통합 이력 조회 (커서 페이지네이션)
+
+    EssayGrading / Record 를 각각 인덱스 순서로 limit+1 건만 읽고 created_at 기준
+    k-way 병합하므로, 첫 페이지와 500번째 페이지의 비용이 같습니다.
+    다음 페이지는 응답의 next_cursor 를 cursor 로 전달하여 조회합니다.
     """
     try:
-        # 1. 채점 이력 가져오기
-        gradings = get_grading_history(
-            db=db,
-            username=request.username,
-            subject=request.subject,
-            limit=request.limit
+        cursor = decode_cursor(request.cursor)
+        if cursor and cursor.get("src") not in SOURCE_RANK:
+            raise ValidationError("잘못된 커서 값입니다.")
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+    try:
+        size = clamp_limit(request.limit)
+
+        # 각 소스에서 limit+1 건씩 읽어 (시각, 순위, id) 내림차순으로 병합
+        merged = heapq.merge(
+            _grading_page(db, request, cursor, size + 1),
+            _record_page(db, request, cursor, size + 1),
+            key=lambda item: item[0],
+            reverse=True
         )
-        
-        # 2. 채팅 및 분석 기록 가져오기 (Record 테이블)
-        records = db.query(Record).filter(
-            Record.username == request.username
-        ).order_by(Record.created_at.desc()).limit(request.limit).all()
-        
-        # 3. 데이터 통합
-        combined = []
-        for g in gradings:
-            combined.append({
-                "id": g["id"],
-                "type": "grading",
-                "title": f"[{g['subject']}] 서술형 채점",
-                "content": g["question"],
-                "score": g["score"],
-                "time": g["created_at"]
-            })
-            
-        for r in records:
-            time_val = r.created_at.isoformat() if r.created_at else "2025-01-01T00:00:00"
-            combined.append({
-                "id": r.id,
-                "type": "chat" if r.category == "AI 채팅" else "analysis",
-                "title": f"[{r.category}] 활동",
-                "content": r.question,
-                "score": r.score,
-                "time": time_val
-            })
-            
-        # 최신순 정렬
-        combined.sort(key=lambda x: x["time"], reverse=True)
-        
-        return {"success": True, "data": combined[:request.limit]}
+
+        page = []
+        has_more = False
+        for key, item in merged:
+            if len(page) == size:
+                has_more = True
+                break
+            page.append((key, item))
+
+        next_cursor = None
+        if has_more:
+            (ts, rank, row_id), item = page[-1]
+            src = "grading" if item["type"] == "grading" else "record"
+            next_cursor = encode_cursor({"ts": ts, "src": src, "id": row_id})
+
+        return {
+            "success": True,
+            "data": [item for _, item in page],
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"이력 조회 실패: {str(e)}")
 
@@ -2,15 +2,25 @@
 포트폴리오 API
 E-포트폴리오 생성 및 PDF 다운로드
 """
+import logging
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from database import engine
-from models import Base
-from ai.portfolio_generator import generate_portfolio_data, get_portfolio, generate_portfolio_pdf
+from models import Base, Class, ClassMember, User
+from ai.portfolio_generator import (
+    generate_portfolio_data,
+    get_portfolio,
+    generate_portfolio_pdf,
+    generate_class_portfolio_data
+)
+from ai.portfolio_export import create_export, get_export_progress, iter_portfolio_zip
 from pydantic import BaseModel
+from typing import Optional, List
 import os
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter(prefix="/api/portfolio", tags=["Portfolio"])
 
@@ -34,28 +44,25 @@ def get_portfolio_data(request: PortfolioRequest, db: Session = Depends(get_db))
     포트폴리오 데이터 조회 (없으면 생성)
     """
     try:
-        print(f"DEBUG: [Portfolio] Request received for user: {request.username}")
+        logger.debug("[Portfolio] 요청: %s", request.username)
         
         # 기존 포트폴리오 조회
         portfolio = get_portfolio(db=db, username=request.username)
-        print(f"DEBUG: [Portfolio] Existing portfolio found: {bool(portfolio)}")
+        logger.debug("[Portfolio] 저장된 포트폴리오 있음: %s", bool(portfolio))
         
         if not portfolio:
             # 없으면 생성
-            print(f"DEBUG: [Portfolio] Generating new data for {request.username}...")
+            logger.debug("[Portfolio] 새로 생성: %s", request.username)
             portfolio = generate_portfolio_data(
                 db=db,
                 username=request.username,
                 subject=request.subject
             )
-            print("DEBUG: [Portfolio] Generation complete.")
+            logger.debug("[Portfolio] 생성 완료")
         
-        print("DEBUG: [Portfolio] Returning response.")
         return {"success": True, "data": portfolio}
     except Exception as e:
-        print(f"ERROR: [Portfolio] Failed to get/generate data: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("[Portfolio] 포트폴리오 조회/생성 실패 (%s)", request.username)
         raise HTTPException(status_code=500, detail=f"포트폴리오 조회 실패: {str(e)}")
 
 
@@ -126,3 +133,80 @@ def download_pdf(username: str, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF 다운로드 실패: {str(e)}")
+
+
+class ClassExportRequest(BaseModel):
+    teacher_username: str
+    class_id: Optional[int] = None
+    class_name: Optional[str] = None
+    subject: str = "국어"
+    student_list: Optional[List[str]] = None
+
+
+def _resolve_class_students(db: Session, request: ClassExportRequest) -> List[str]:
+    """내보내기 대상 학생 목록 (student_list > class_id > 교사+학급명 순)"""
+    if request.student_list:
+        return list(dict.fromkeys(request.student_list))
+
+    query = db.query(User.username).join(
+        ClassMember, ClassMember.student_id == User.id
+    ).join(Class, Class.id == ClassMember.class_id)
+
+    if request.class_id is not None:
+        query = query.filter(Class.id == request.class_id)
+    elif request.class_name:
+        query = query.filter(
+            Class.name == request.class_name,
+            Class.teacher_id.in_(
+                db.query(User.id).filter(User.username == request.teacher_username)
+            )
+        )
+    else:
+        return []
+
+    rows = query.order_by(User.username).all()
+    return list(dict.fromkeys(r.username for r in rows if r.username))
+
+
+@router.post("/class-export")
+def export_class_portfolios(request: ClassExportRequest, db: Session = Depends(get_db)):
+    """
+    학급 전체 포트폴리오 PDF 일괄 내보내기 (ZIP 스트리밍)
+
+    학생 데이터는 묶음 쿼리로 한 번에 조회하고, PDF는 CPU 코어 수만큼 병렬 렌더링합니다.
+    응답 헤더 X-Export-Id 값으로 /class-export/{export_id}/progress 에서 진행률을 조회할 수 있습니다.
+    """
+    usernames = _resolve_class_students(db, request)
+    if not usernames:
+        raise HTTPException(status_code=404, detail="내보낼 학생이 없습니다.")
+
+    try:
+        portfolios = generate_class_portfolio_data(
+            db=db,
+            usernames=usernames,
+            subject=request.subject
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"포트폴리오 데이터 조회 실패: {str(e)}")
+
+    label = request.class_name or (f"class_{request.class_id}" if request.class_id else "students")
+    export_id = create_export(total=len(portfolios), label=label)
+    filename = f"portfolios_{export_id[:8]}.zip"
+
+    return StreamingResponse(
+        iter_portfolio_zip(portfolios, export_id),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Export-Id": export_id
+        }
+    )
+
+
+@router.get("/class-export/{export_id}/progress")
+def get_class_export_progress(export_id: str):
+    """학급 포트폴리오 일괄 내보내기 진행 상황 조회"""
+    progress = get_export_progress(export_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="내보내기 작업을 찾을 수 없습니다.")
+    return {"success": True, "data": progress}
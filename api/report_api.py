@@ -1,27 +1,110 @@
 # api/report_api.py
+import logging
+import threading
+from typing import Optional
+
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy import bindparam, column, event, func, inspect, select, table
 from database import get_db
+from models import Base
+from utils.response_cache import cached_response
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def _has_table_and_cols(db: Session, table: str, cols: list[str]) -> bool:
-    # sqlite 전용: PRAGMA로 컬럼 조사
-    try:
-        rows = db.execute(text(f"PRAGMA table_info({table})")).fetchall()
-        have = {r[1] for r in rows}  # 0:cid, 1:name, 2:type ...
-        return all(c in have for c in cols)
-    except Exception:
-        return False
+# 요약에 사용할 수 있는 스키마 (우선순위 순)
+# 1) 최신 스키마: records(username, score, reply, category, created_at)
+# 2) 예전 스키마: learning_records(student_name, score, feedback, created_at)
+SUMMARY_SCHEMAS = [
+    {
+        "table": "records",
+        "user": "username",
+        "feedback": "reply",
+        "category": "category",
+    },
+    {
+        "table": "learning_records",
+        "user": "student_name",
+        "feedback": "feedback",
+        "category": None,
+    },
+]
+
+# 엔진별 감지 결과 캐시 {engine: (avg 쿼리, 피드백 쿼리) 또는 None}
+_summary_queries = {}
+_summary_lock = threading.Lock()
+
+
+def _build_summary_queries(schema: dict):
+    """감지된 스키마에 맞는 요약 쿼리 생성 (방언 독립적인 Core 표현식)"""
+    columns = [schema["user"], "score", schema["feedback"], "created_at"]
+    if schema["category"]:
+        columns.append(schema["category"])
+    t = table(schema["table"], *[column(c) for c in columns])
+    user = t.c[schema["user"]]
+
+    avg_query = select(func.avg(t.c.score)).where(
+        user == bindparam("u"),
+        t.c.score.isnot(None),
+        t.c.score > 0
+    )
+
+    feedback_query = select(t.c[schema["feedback"]]).where(user == bindparam("u"))
+    if schema["category"]:
+        feedback_query = feedback_query.where(t.c[schema["category"]].like("서술형-%"))
+    # created_at 원본 컬럼으로 정렬해야 (username, created_at) 인덱스를 사용할 수 있음
+    feedback_query = feedback_query.order_by(t.c.created_at.desc()).limit(3)
+
+    return avg_query, feedback_query
+
+
+def _detect_summary_queries(bind):
+    """SQLAlchemy Inspector 로 사용 가능한 스키마를 찾아 쿼리 생성 (없으면 None)"""
+    inspector = inspect(bind)
+    for schema in SUMMARY_SCHEMAS:
+        if not inspector.has_table(schema["table"]):
+            continue
+        have = {c["name"] for c in inspector.get_columns(schema["table"])}
+        needed = {schema["user"], "score", schema["feedback"], "created_at"}
+        if schema["category"]:
+            needed.add(schema["category"])
+        if needed <= have:
+            return _build_summary_queries(schema)
+    return None
+
+
+def get_summary_queries(bind) -> Optional[tuple]:
+    """엔진별로 한 번만 스키마를 감지하고 결과를 재사용"""
+    engine = getattr(bind, "engine", bind)
+    if engine in _summary_queries:
+        return _summary_queries[engine]
+
+    with _summary_lock:
+        if engine not in _summary_queries:
+            _summary_queries[engine] = _detect_summary_queries(engine)
+        return _summary_queries[engine]
+
+
+def refresh_summary_schema(*args, **kwargs):
+    """스키마 변경(테이블 생성/마이그레이션) 후 감지 결과 초기화"""
+    with _summary_lock:
+        _summary_queries.clear()
+
+
+# create_all 로 테이블이 새로 만들어지면 다시 감지
+event.listen(Base.metadata, "after_create", refresh_summary_schema)
+
 
 @router.get("/report/summary")
+@cached_response("report-summary", tags=["user:{username}"])
 def report_summary(
     username: str = Query(..., min_length=1),
     db: Session = Depends(get_db)
 ):
     """
-    학생 성취 요약(테이블/컬럼 자동 감지):
+    학생 성취 요약(테이블/컬럼 자동 감지, 감지 결과는 엔진별 캐시):
     - percent: 평균 점수(정수, 0~100)
     - feedback: 최근 3건 피드백
     """
@@ -29,47 +112,23 @@ def report_summary(
     feedback: list[str] = []
 
     try:
-        # 1) 최신 스키마: records(username, score, reply, category, created_at)
-        if _has_table_and_cols(db, "records",
-                               ["username", "score", "reply", "category", "created_at"]):
-            avg_row = db.execute(text("""
-                SELECT AVG(score) FROM records
-                WHERE username=:u AND score IS NOT NULL AND score > 0
-            """), {"u": username}).fetchone()
-            percent = int(float(avg_row[0] or 0))
-
-            fb_rows = db.execute(text("""
-                SELECT reply FROM records
-                WHERE username=:u AND category LIKE '서술형-%'
-                ORDER BY datetime(created_at) DESC
-                LIMIT 3
-            """), {"u": username}).fetchall()
-            feedback = [r[0] for r in fb_rows if r and r[0]]
+        queries = get_summary_queries(db.get_bind())
+
+        if queries:
+            avg_query, feedback_query = queries
+            avg_value = db.execute(avg_query, {"u": username}).scalar()
+            percent = int(float(avg_value or 0))
 
-        # 2) 예전 스키마: learning_records(student_name, score, feedback, created_at)
-        elif _has_table_and_cols(db, "learning_records",
-                                 ["student_name", "score", "feedback", "created_at"]):
-            avg_row = db.execute(text("""
-                SELECT AVG(score) FROM learning_records
-                WHERE student_name=:u AND score IS NOT NULL AND score > 0
-            """), {"u": username}).fetchone()
-            percent = int(float(avg_row[0] or 0))
-
-            fb_rows = db.execute(text("""
-                SELECT feedback FROM learning_records
-                WHERE student_name=:u
-                ORDER BY datetime(created_at) DESC
-                LIMIT 3
-            """), {"u": username}).fetchall()
+            fb_rows = db.execute(feedback_query, {"u": username}).fetchall()
             feedback = [r[0] for r in fb_rows if r and r[0]]
 
-        # 3) 어떤 것도 없으면 기본값
+        # 어떤 것도 없으면 기본값
         else:
             percent, feedback = 0, []
 
     except Exception as e:
         # 실패해도 API 자체는 터지지 않도록
-        print("[report_summary] error:", e)
+        logger.exception("[report_summary] error: %s", e)
         percent, feedback = 0, []
 
     return {"success": True, "username": username, "percent": percent, "feedback": feedback}
@@ -1,16 +1,48 @@
 # api/student_api.py
+import logging
 from fastapi import APIRouter, Request, Depends, HTTPException
 from fastapi.responses import JSONResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from datetime import datetime
+from typing import Optional
 import json
 
 from database import get_db
 from models import User, Submission, Feedback, MasteryLevel, Question, Record
+from ai.answer_similarity import LSHIndex, best_match, copy_threshold, reuse_threshold, submission_index
 from ai.core.graph import app_graph
+from ai.grading_pipeline import triage
+from utils.exceptions import ValidationError
+from utils.pagination import (
+    clamp_limit, decode_cursor, encode_cursor,
+    keyset_before, raw_timestamp, timestamp_key
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/student", tags=["Student"])
 
+
+def _reuse_similar_submission(db: Session, index: LSHIndex, ctx: dict):
+    """채점 파이프라인 duplicate 단계: 거의 같은 답안의 분석 결과(Feedback) 재사용"""
+    match = best_match(index, ctx["answer"])
+    if match is None:
+        return None
+    ctx["signals"]["similar"] = match
+    if reuse_threshold() <= 0 or match["similarity"] < reuse_threshold():
+        return None
+
+    source = (
+        db.query(Feedback)
+        .filter(Feedback.submission_id == match["payload"]["submission_id"])
+        .order_by(Feedback.id.desc())
+        .first()
+    )
+    if source is None:
+        return None
+    return {"stage": "duplicate", "feedback_row": source, "needs_review": True}
+
 @router.post("/submit")
 async def submit_answer(request: Request, db: Session = Depends(get_db)):
     """
@@ -38,17 +70,59 @@ async def submit_answer(request: Request, db: Session = Depends(get_db)):
         "student_answer": answer_text,
         "analysis_result": {},
         "mastery_level": "FAIL",
-        "feedback_text": ""
+        "feedback_text": "",
+        "misconceptions": [],
+        "recommendations": []
     }
 
+    # 로컬 판정(빈/짧은/주제 이탈/유사 답안)으로 끝나지 않은 답안만 Graph(LLM) 실행
+    index = submission_index(db, question_id)
+    signals = {}
+    verdict = triage(
+        "student.submit", answer_text, question=f"{question_content}\n{standard_content}", rubric=rubric_content,
+        duplicate=lambda ctx: _reuse_similar_submission(db, index, ctx),
+        signals=signals
+    )
+
     try:
-        # LangGraph 실행
-        final_state = await app_graph.ainvoke(inputs)
-        
-        analysis = final_state.get("analysis_result", {})
-        mastery = final_state.get("mastery_level", "FAIL")
-        feedback_text = final_state.get("feedback_text", "피드백을 생성하지 못했습니다.")
-        recommendations = final_state.get("recommendations", [])
+        misconceptions, recommendations = [], []
+        if verdict is None:
+            # LangGraph 실행 (분석 → 오개념 추출/학습 추천 병렬 분기)
+            final_state = await app_graph.ainvoke(inputs)
+
+            analysis = final_state.get("analysis_result", {})
+            mastery = final_state.get("mastery_level", "FAIL")
+            feedback_text = final_state.get("feedback_text", "피드백을 생성하지 못했습니다.")
+            misconceptions = final_state.get("misconceptions", [])
+            recommendations = final_state.get("recommendations", [])
+            analysis["timings"] = final_state.get("timings", {})
+            # Feedback 에 추천 컬럼이 없으므로 분석 결과에 함께 저장 (유사 답안 재사용 시 복사)
+            analysis["recommendations"] = recommendations
+        elif verdict["stage"] == "duplicate":
+            source = verdict["feedback_row"]
+            analysis = dict(source.analysis_json or {})
+            analysis.pop("timings", None)
+            mastery = source.mastery_level.name if source.mastery_level else "FAIL"
+            feedback_text = source.overall_comment
+            misconceptions = list(source.misconceptions or [])
+            recommendations = list(analysis.get("recommendations") or [])
+        else:
+            analysis = {
+                "strengths": "",
+                "weaknesses": verdict["reason"],
+                "missing_concepts": [],
+                "mastery_level": verdict["mastery_level"],
+                "feedback_for_student": verdict["feedback"]
+            }
+            mastery = verdict["mastery_level"]
+            feedback_text = verdict["feedback"]
+
+        match = signals.pop("similar", None)
+        analysis["triage"] = {
+            "stage": verdict["stage"] if verdict else "llm",
+            "needs_review": bool(verdict and verdict["needs_review"]),
+            **signals
+        }
 
         # 3. DB 저장
         # - User 조회 (없으면 임시 생성)
@@ -59,6 +133,15 @@ async def submit_answer(request: Request, db: Session = Depends(get_db)):
             db.commit()
             db.refresh(user)
 
+        if match:
+            analysis["similar_answer"] = {
+                "submission_id": match["payload"]["submission_id"],
+                "similarity": match["similarity"],
+                "reused": bool(verdict and verdict["stage"] == "duplicate"),
+                "possible_copy": match["payload"]["student_id"] != user.id
+                                 and match["similarity"] >= copy_threshold()
+            }
+
         # - Submission 저장
         submission = Submission(
             question_id=question_id,
@@ -69,15 +152,16 @@ async def submit_answer(request: Request, db: Session = Depends(get_db)):
         db.add(submission)
         db.commit()
         db.refresh(submission)
+        index.add(submission.id, answer_text, {"submission_id": submission.id, "student_id": user.id})
 
         # - Feedback 저장
         feedback_rec = Feedback(
             submission_id=submission.id,
-            mastery_level=MasteryLevel(mastery) if mastery in ["PASS", "PARTIAL", "FAIL"] else MasteryLevel.FAIL,
+            mastery_level=MasteryLevel[mastery] if mastery in ["PASS", "PARTIAL", "FAIL"] else MasteryLevel.FAIL,
             overall_comment=feedback_text,
             teacher_summary=json.dumps(analysis, ensure_ascii=False),
             analysis_json=analysis,
-            misconceptions=[] # TODO: 추출 로직 추가
+            misconceptions=misconceptions
         )
         db.add(feedback_rec)
         db.commit()
@@ -89,35 +173,86 @@ async def submit_answer(request: Request, db: Session = Depends(get_db)):
             "success": True,
             "feedback": feedback_text,
             "analysis": analysis,
+            "misconceptions": misconceptions,
             "recommendations": recommendations
         })
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("답안 제출 처리 실패 (%s)", username)
         return JSONResponse({"success": False, "msg": f"AI 분석 중 오류 발생: {str(e)}"}, status_code=500)
 
+# 이력 목록에서 답안 전문 대신 보여줄 미리보기 길이
+ANSWER_PREVIEW_LENGTH = 100
+
+
 @router.get("/history")
-async def get_history(username: str, db: Session = Depends(get_db)):
-    """학생의 제출 이력 조회"""
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        return {"history": []}
-    
-    submissions = db.query(Submission).filter(Submission.student_id == user.id).order_by(Submission.submitted_at.desc()).all()
-    
+async def get_history(
+    username: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    include_answer: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    학생의 제출 이력 조회 (커서 페이지네이션)
+
+    제출/피드백을 한 번의 조인 쿼리로 필요한 컬럼만 조회합니다.
+    답안은 기본적으로 앞부분 미리보기만 반환하며, include_answer=true 이면 전문을 반환합니다.
+    다음 페이지는 응답의 next_cursor 를 cursor 로 전달하여 조회합니다.
+    """
+    try:
+        position = decode_cursor(cursor)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+
+    size = clamp_limit(limit, default=20)
+    if include_answer:
+        answer_column = Submission.answer_text
+    else:
+        # 한 글자 더 가져와 잘렸는지 판단 (LENGTH 는 MySQL 에서 바이트 수라 한글 답안에 쓸 수 없음)
+        answer_column = func.substr(Submission.answer_text, 1, ANSWER_PREVIEW_LENGTH + 1)
+    ts_raw = raw_timestamp(Submission.submitted_at)
+
+    query = db.query(
+        Submission.id,
+        Submission.question_id,
+        answer_column.label("answer"),
+        Submission.submitted_at,
+        ts_raw.label("ts_raw"),
+        Feedback.overall_comment,
+        Feedback.mastery_level
+    ).join(
+        User, User.id == Submission.student_id
+    ).outerjoin(
+        Feedback, Feedback.submission_id == Submission.id
+    ).filter(User.username == username)
+
+    if position:
+        query = query.filter(keyset_before(Submission.submitted_at, Submission.id, position))
+
+    rows = query.order_by(ts_raw.desc(), Submission.id.desc()).limit(size + 1).all()
+    has_more = len(rows) > size
+    rows = rows[:size]
+
     result = []
-    for sub in submissions:
-        fb = sub.feedback
+    for row in rows:
+        answer = row.answer or ""
+        truncated = not include_answer and len(answer) > ANSWER_PREVIEW_LENGTH
         result.append({
-            "id": sub.id,
-            "question_id": sub.question_id,
-            "answer": sub.answer_text,
-            "submitted_at": sub.submitted_at.isoformat(),
-            "feedback": fb.overall_comment if fb else None,
-            "mastery": fb.mastery_level if fb else None
+            "id": row.id,
+            "question_id": row.question_id,
+            "answer": answer[:ANSWER_PREVIEW_LENGTH] if truncated else row.answer,
+            "answer_truncated": truncated,
+            "submitted_at": row.submitted_at.isoformat() if row.submitted_at else None,
+            "feedback": row.overall_comment,
+            "mastery": row.mastery_level
         })
-    
-    return {"history": result}
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor({"ts": timestamp_key(last.ts_raw), "id": last.id})
+
+    return {"history": result, "next_cursor": next_cursor, "has_more": has_more}
 
 
@@ -2,6 +2,7 @@
 교사용 API
 학생 관리, 성취도 분석, AI 비서, 학급 리포트, 문항 관리 등
 """
+import logging
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import engine
@@ -19,6 +20,9 @@ from ai.class_report_generator import generate_class_report, get_class_report
 from ai.essay_grader import grade_essay
 from ai.class_report_generator import generate_class_report, get_class_report
 from ai.essay_grader import grade_essay
+from utils.response_cache import cached_response, TEACHER_DASHBOARD_TAG
+
+logger = logging.getLogger(__name__)
 
 
 router = APIRouter(prefix="/api/teacher", tags=["Teacher"])
@@ -44,6 +48,7 @@ class QuestionSummaryRequest(BaseModel):
 class WrongAnswerAnalysisRequest(BaseModel):
     teacher_username: str
     subject: str = "국어"
+    question_ids: Optional[List[int]] = None
 
 
 class TeachingAdviceRequest(BaseModel):
@@ -74,7 +79,8 @@ def analyze_wrong_answers(request: WrongAnswerAnalysisRequest, db: Session = Dep
         result = analyze_wrong_answer_patterns(
             db=db,
             teacher_username=request.teacher_username,
-            subject=request.subject
+            subject=request.subject,
+            question_ids=request.question_ids
         )
         return {"success": True, "data": result}
     except Exception as e:
@@ -123,6 +129,34 @@ def create_class_report(request: ClassReportRequest, db: Session = Depends(get_d
         raise HTTPException(status_code=500, detail=f"리포트 생성 실패: {str(e)}")
 
 
+@router.get("/class-report/list")
+@cached_response("class-report-list", tags=["class-reports:{teacher_username}"])
+def list_class_reports(teacher_username: str = "teacher1", db: Session = Depends(get_db)):
+    """학급 리포트 목록 조회"""
+    try:
+        from models import ClassReport
+        reports = db.query(ClassReport).filter(
+            ClassReport.teacher_username == teacher_username
+        ).order_by(ClassReport.created_at.desc()).all()
+        
+        return {
+            "success": True, 
+            "data": [
+                {
+                    "id": r.id,
+                    "class_name": r.class_name,
+                    "subject": r.subject,
+                    "report_type": r.report_type,
+                    "total_students": r.total_students,
+                    "average_score": r.average_score,
+                    "created_at": r.created_at.isoformat()
+                } for r in reports
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"리포트 목록 조회 실패: {str(e)}")
+
+
 @router.get("/class-report/{report_id}")
 def get_report(report_id: int, db: Session = Depends(get_db)):
     """학급 리포트 조회"""
@@ -150,35 +184,41 @@ def download_report(report_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"다운로드 정보 조회 실패: {str(e)}")
 
 
-@router.get("/class-report/list")
-def list_class_reports(teacher_username: str = "teacher1", db: Session = Depends(get_db)):
-    """학급 리포트 목록 조회"""
+# ==================== LLM 사용량 ====================
+
+@router.get("/llm-usage")
+def get_llm_usage(days: int = 7, site: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    LLM 호출 일별 요약 (호출 지점·모델별 호출 수, 실패/대체 응답 비율, 토큰, 추정 비용, 평균 지연)
+
+    Args:
+        days: 조회 기간 (일, 최대 90)
+        site: 호출 지점 필터 (예: essay_grader.grade)
+    """
+    from ai.llm_telemetry import get_usage_summary
+
     try:
-        from models import ClassReport
-        reports = db.query(ClassReport).filter(
-            ClassReport.teacher_username == teacher_username
-        ).order_by(ClassReport.created_at.desc()).all()
-        
-        return {
-            "success": True, 
-            "data": [
-                {
-                    "id": r.id,
-                    "class_name": r.class_name,
-                    "subject": r.subject,
-                    "report_type": r.report_type,
-                    "total_students": r.total_students,
-                    "average_score": r.average_score,
-                    "created_at": r.created_at.isoformat()
-                } for r in reports
-            ]
-        }
+        days = min(max(days, 1), 90)
+        return {"success": True, "data": get_usage_summary(db, days=days, site=site)}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"리포트 목록 조회 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"LLM 사용량 조회 실패: {str(e)}")
 
 
 # ==================== 자동 채점 ====================
 
+@router.get("/grading/triage-stats")
+def get_triage_stats():
+    """
+    채점 파이프라인 단계별 처리 현황 (프로세스 시작 이후 누적)
+
+    호출 지점(essay_grader / student.submit)별로 로컬 단계(length/language/keywords/duplicate)의
+    처리 수, 판정 비율, 평균 소요 시간과 LLM 으로 넘어간 비율을 반환합니다.
+    """
+    from ai.grading_pipeline import stage_report
+
+    return {"success": True, "data": {site: stage_report(site) for site in ("essay_grader", "student.submit")}}
+
+
 class AutoGradeRequest(BaseModel):
     username: str
     subject: str
@@ -206,89 +246,202 @@ def auto_grade(request: AutoGradeRequest, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"자동 채점 실패: {str(e)}")
 
 
+MAX_BATCH_SUBMISSIONS = 200
+
+
+class BatchSubmission(BaseModel):
+    username: str
+    answer: str
+
+
+class BatchGradeRequest(BaseModel):
+    teacher_username: Optional[str] = None
+    subject: str
+    question: str
+    model_answer: Optional[str] = None
+    max_score: int = 100
+    submissions: List[BatchSubmission]
+
+
+@router.post("/grading/batch")
+def batch_grade(request: BatchGradeRequest, db: Session = Depends(get_db)):
+    """
+    같은 문제에 대한 여러 학생 답안 일괄 채점
+
+    로컬 판정/유사 답안 재사용 후 남은 답안만 여러 개씩 묶어 GPT 에 한 번에 채점을 요청합니다.
+    """
+    from ai.essay_grader import grade_essays_batch
+
+    if not request.submissions:
+        raise HTTPException(status_code=400, detail="채점할 답안이 없습니다.")
+    if len(request.submissions) > MAX_BATCH_SUBMISSIONS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {MAX_BATCH_SUBMISSIONS}개까지 채점할 수 있습니다.")
+
+    try:
+        graded = grade_essays_batch(
+            db=db,
+            subject=request.subject,
+            question=request.question,
+            submissions=[{"username": s.username, "answer": s.answer} for s in request.submissions],
+            model_answer=request.model_answer or None,
+            max_score=request.max_score
+        )
+        results = [{"student": r["username"], **r} for r in graded["results"]]
+        return {"success": True, "results": results, "stats": graded["stats"]}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"일괄 채점 실패: {str(e)}")
+
+
+class BulkGradeRequest(BaseModel):
+    assignment_id: int
+    subject: str = "국어"
+    model: Optional[str] = None
+
+
+@router.post("/grading/bulk")
+def start_bulk_grading(request: BulkGradeRequest, db: Session = Depends(get_db)):
+    """
+    과제 전체 오프라인 일괄 채점 시작 (Batch API, 결과는 최대 24시간 후)
+
+    채점 대기 답안을 요청 파일로 만들어 제출까지 진행하고 작업 상태를 반환합니다.
+    같은 과제의 끝나지 않은 작업이 있으면 새로 만들지 않고 그 작업을 이어서 진행합니다.
+    """
+    from models import Assignment
+    from ai.batch_grading import advance, create_job, job_summary
+
+    if db.get(Assignment, request.assignment_id) is None:
+        raise HTTPException(status_code=404, detail="과제를 찾을 수 없습니다.")
+    try:
+        job = create_job(db, request.assignment_id, request.subject, request.model)
+        for _ in range(2):  # preparing → prepared → submitted
+            if job.status not in ("preparing", "prepared"):
+                break
+            job = advance(db, job)
+        return {"success": True, "data": job_summary(job)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"일괄 채점 시작 실패: {str(e)}")
+
+
+@router.get("/grading/bulk/{job_id}")
+def get_bulk_grading(job_id: int, db: Session = Depends(get_db)):
+    """일괄 채점 작업 상태 조회 (조회만 하며 작업을 진행하지 않음)"""
+    from models import GradingBatchJob
+    from ai.batch_grading import job_summary
+
+    job = db.get(GradingBatchJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return {"success": True, "data": job_summary(job)}
+
+
+@router.post("/grading/bulk/{job_id}/advance")
+def advance_bulk_grading(job_id: int, db: Session = Depends(get_db)):
+    """
+    일괄 채점 작업 한 단계 진행 (배치 완료 확인 → 결과 저장)
+
+    단계는 선점 후 실행되므로 동시에 여러 번 호출해도 같은 결과가 중복 저장되지 않으며,
+    다른 요청이 처리 중이면 현재 상태만 반환합니다.
+    """
+    from models import GradingBatchJob
+    from ai.batch_grading import advance, job_summary
+
+    job = db.get(GradingBatchJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    try:
+        job = advance(db, job)
+        return {"success": True, "data": job_summary(job)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"일괄 채점 진행 실패: {str(e)}")
+
+
 # ==================== 대시보드 통계 ====================
 
+def _time_ago(value) -> str:
+    """경과 시간 표시 (예: 10분 전, 1시간 전)"""
+    from datetime import datetime
+
+    diff = datetime.now() - value
+    if diff.days > 0:
+        return f"{diff.days}일 전"
+    elif diff.seconds >= 3600:
+        return f"{diff.seconds // 3600}시간 전"
+    return f"{diff.seconds // 60}분 전"
+
+
 @router.get("/dashboard-stats")
+@cached_response("teacher-dashboard-stats", tags=[TEACHER_DASHBOARD_TAG])
 def get_dashboard_stats(teacher_username: str = "teacher1", db: Session = Depends(get_db)):
-    """교사 대시보드용 통계 데이터"""
+    """
+    교사 대시보드용 통계 데이터
+
+    학급 수와 관계없이 고정된 4개 쿼리(교사 조회, 최근 질문, 채점 대기, 학급별 평균)로 집계합니다.
+    """
     try:
         from models import Record, Submission, Feedback, Class, ClassMember, AchievementRecord, User
         from sqlalchemy import func
-        from datetime import datetime
         
         # 1. 최근 학생 질문 (최근 5건)
-        recent_questions = db.query(Record).filter(
+        recent_questions = db.query(
+            Record.username, Record.category, Record.question, Record.created_at
+        ).filter(
             Record.question != None
         ).order_by(Record.created_at.desc()).limit(5).all()
         
         questions_data = []
         for q in recent_questions:
-            # 시간 포맷팅 (예: 10분 전, 1시간 전)
-            diff = datetime.now() - q.created_at
-            if diff.days > 0:
-                time_str = f"{diff.days}일 전"
-            elif diff.seconds >= 3600:
-                time_str = f"{diff.seconds // 3600}시간 전"
-            else:
-                time_str = f"{diff.seconds // 60}분 전"
-
             questions_data.append({
                 "student": q.username, # 실제로는 User 테이블 조인해서 이름 가져오면 더 좋음
                 "subject": q.category, # category를 과목/주제로 활용
                 "question": q.question,
-                "time": time_str
+                "time": _time_ago(q.created_at)
             })
 
-        # 2. 채점 대기 (Feedback이 없는 Submission)
-        pending_subs = db.query(Submission).outerjoin(Feedback).filter(
+        # 2. 채점 대기 (Feedback이 없는 Submission, 학생 이름은 조인으로 함께 조회)
+        pending_subs = db.query(
+            Submission.student_id, Submission.submitted_at,
+            User.id.label("user_id"), User.name
+        ).outerjoin(
+            Feedback, Feedback.submission_id == Submission.id
+        ).outerjoin(
+            User, User.id == Submission.student_id
+        ).filter(
             Feedback.id == None
         ).order_by(Submission.submitted_at.desc()).limit(5).all()
         
         pending_data = []
         for sub in pending_subs:
-            # 학생 이름 조회
-            student_name = sub.student.name if sub.student else sub.student_id
-            
-            diff = datetime.now() - sub.submitted_at
-            if diff.days > 0:
-                time_str = f"{diff.days}일 전"
-            elif diff.seconds >= 3600:
-                time_str = f"{diff.seconds // 3600}시간 전"
-            else:
-                time_str = f"{diff.seconds // 60}분 전"
-            
+            student_name = sub.name if sub.user_id is not None else sub.student_id
             pending_data.append({
                 "student": student_name,
                 "subject": "서술형", # Submission에 subject 필드가 없어서 고정하거나 question에서 유추
-                "submitted": time_str
+                "submitted": _time_ago(sub.submitted_at)
             })
 
-        # 3. 학급별 성취도 (Class -> Student -> AchievementRecord)
+        # 3. 학급별 성취도 (Class -> ClassMember -> User -> AchievementRecord, 한 번의 GROUP BY)
         # 교사가 담당하는 반 조회
-        teacher = db.query(User).filter(User.username == teacher_username).first()
+        teacher = db.query(User.id).filter(User.username == teacher_username).first()
         teacher_id = teacher.id if teacher else 1
-        
-        classes = db.query(Class).filter(Class.teacher_id == teacher_id).all()
-        
-        class_labels = []
-        class_scores = []
-        
-        for cls in classes:
-            # 해당 반의 학생들 조회
-            students = db.query(User).join(ClassMember).filter(ClassMember.class_id == cls.id).all()
-            student_names = [s.username for s in students]
-            
-            if not student_names:
-                avg_score = 0
-            else:
-                # 학생들의 성취도 평균 계산
-                score_res = db.query(func.avg(AchievementRecord.score)).filter(
-                    AchievementRecord.username.in_(student_names)
-                ).scalar()
-                avg_score = round(score_res, 1) if score_res else 0
-            
-            class_labels.append(cls.name)
-            class_scores.append(avg_score)
+
+        members = db.query(
+            ClassMember.class_id, User.username
+        ).join(
+            User, User.id == ClassMember.student_id
+        ).distinct().subquery()
+
+        class_rows = db.query(
+            Class.name,
+            func.avg(AchievementRecord.score).label("avg_score")
+        ).outerjoin(
+            members, members.c.class_id == Class.id
+        ).outerjoin(
+            AchievementRecord, AchievementRecord.username == members.c.username
+        ).filter(
+            Class.teacher_id == teacher_id
+        ).group_by(Class.id, Class.name).order_by(Class.id).all()
+
+        class_labels = [row.name for row in class_rows]
+        class_scores = [round(row.avg_score, 1) if row.avg_score else 0 for row in class_rows]
             
         # 만약 데이터가 없으면 더미 데이터 (시각화 확인용)
         if not class_labels:
@@ -306,7 +459,7 @@ def get_dashboard_stats(teacher_username: str = "teacher1", db: Session = Depend
         }
 
     except Exception as e:
-        print(f"대시보드 통계 오류: {e}")
+        logger.exception("대시보드 통계 오류: %s", e)
         return {
             "success": False, 
             "message": str(e),
@@ -0,0 +1,330 @@
+"""
+분석 함수 마이크로벤치마크
+고정된 가상 DB(1k / 100k / 1M 행)에서 대시보드/히트맵/포트폴리오/학급 리포트/질문 요약 함수의
+실행 시간과 쿼리 수를 측정합니다. GPT 호출과 PDF 생성은 고정 응답으로 대체합니다.
+
+데이터 크기가 커져도 쿼리 수는 같아야 합니다. 크기에 따라 쿼리 수가 늘어나면(N+1) 종료 코드 1 로 끝납니다.
+학급 리포트는 가장 작은 크기에서 반 인원(--class-sizes)도 바꿔 가며 측정해 학생별 쿼리(N+1)를 잡습니다.
+분석 함수는 생성 데이터에 있는 과목(영역)으로 호출합니다 (기본값 "국어" 로는 성취도 행이 조회되지 않음).
+--check 로 기준선 JSON 과 비교하면 쿼리 수 증가나 tolerance 이상의 시간 증가도 회귀로 봅니다.
+
+DB 는 BENCH_DB_DIR(기본: 임시 디렉토리)에 크기/시드/날짜별로 한 번만 생성해 재사용합니다.
+
+실행:
+    python -m benchmarks.bench_analytics
+    python -m benchmarks.bench_analytics --tiers 1k,100k --repeat 5 --output benchmarks/analytics_baseline.json
+    python -m benchmarks.bench_analytics --tiers 1k --class-sizes 10,30,120
+    python -m benchmarks.bench_analytics --check benchmarks/analytics_baseline.json
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+from unittest import mock
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from utils.metrics import track_queries
+
+
+DEFAULT_TIERS = "1k,100k,1M"
+DEFAULT_CLASS_SIZES = "10,30,120"
+ROWS_PER_STUDENT = 100   # days=60, records_per_day=1.0 일 때 학생 1명당 대략적인 행 수
+ACTIVITY_DAYS = 60
+CLASS_SIZE = 30          # 크기별 측정의 반 인원 (반 인원에 따른 쿼리 수는 class_sizes 로 따로 측정)
+DB_VERSION = 2           # 생성 데이터 형식이 바뀌면 올려 이전에 만든 DB 를 재사용하지 않도록
+
+
+def parse_size(text: str) -> int:
+    """"1k" → 1000, "1M" → 1000000"""
+    text = text.strip()
+    units = {"k": 1_000, "K": 1_000, "m": 1_000_000, "M": 1_000_000}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def build_database(rows: int, seed: int = 42, directory: str = None, class_size: int = CLASS_SIZE) -> str:
+    """
+    약 rows 행 규모의 가상 DB 파일 생성 (반 인원 class_size, 이미 있으면 재사용)
+
+    Returns:
+        SQLite 파일 경로
+    """
+    import seed_db
+
+    directory = directory or os.getenv("BENCH_DB_DIR") or os.path.join(tempfile.gettempdir(), "sungchibot-bench")
+    os.makedirs(directory, exist_ok=True)
+    end_date = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    path = os.path.join(directory, f"analytics-v{DB_VERSION}-{rows}-c{class_size}-s{seed}-{end_date:%Y%m%d}.db")
+    if os.path.exists(path):
+        return path
+
+    students = max(class_size, rows // ROWS_PER_STUDENT)
+    records_per_day = min(1.0, rows / (students * ROWS_PER_STUDENT))
+    bind = create_engine(f"sqlite:///{path}.tmp")
+    try:
+        seed_db.generate(
+            bind,
+            classes_per_school=math.ceil(students / class_size),
+            class_size=class_size,
+            days=ACTIVITY_DAYS,
+            records_per_day=records_per_day,
+            seed=seed,
+            end_date=end_date,
+            verbose=False,
+        )
+    finally:
+        bind.dispose()
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+# ==================== 측정 대상 ====================
+
+def _stub_leading_points(**kwargs) -> str:
+    return "1. 문학 영역 보충 지도\n2. 서술형 답안 구조화 연습"
+
+
+def _stub_question_summary(clusters, subject, total=None) -> Dict[str, Any]:
+    return {"summary": "요약", "common_topics": [], "difficulty_areas": [], "teaching_suggestions": []}
+
+
+def _stub_wrong_patterns(wrong_answers, subject, total=None) -> Dict[str, Any]:
+    return {"common_mistakes": ["근거 부족"], "misconceptions": [], "improvement_strategies": []}
+
+
+def _dashboard(db: Session, ctx: Dict[str, Any]):
+    from ai.dashboard_analyzer import analyze_student_achievement
+    return analyze_student_achievement(db, ctx["username"], ctx["subject"])
+
+
+def _heatmap(db: Session, ctx: Dict[str, Any]):
+    from ai.dashboard_analyzer import generate_heatmap_data
+    return generate_heatmap_data(db, ctx["username"], ctx["subject"])
+
+
+def _portfolio(db: Session, ctx: Dict[str, Any]):
+    from ai.portfolio_generator import generate_portfolio_data
+    return generate_portfolio_data(db, ctx["username"], ctx["subject"])
+
+
+def _class_report(db: Session, ctx: Dict[str, Any]):
+    from ai.class_report_generator import generate_class_report
+    with mock.patch("ai.class_report_generator.generate_leading_points_with_gpt", _stub_leading_points), \
+            mock.patch("ai.class_report_generator.create_class_report_pdf", lambda data, path: None):
+        return generate_class_report(db, "teacher1", ctx["class_name"], ctx["subject"], student_list=ctx["roster"])
+
+
+def _question_summary(db: Session, ctx: Dict[str, Any]):
+    from ai.teacher_assistant import summarize_student_questions
+    with mock.patch("ai.teacher_assistant.analyze_questions_with_gpt", _stub_question_summary):
+        return summarize_student_questions(db, "teacher1")
+
+
+def _wrong_patterns(db: Session, ctx: Dict[str, Any]):
+    from ai.teacher_assistant import _wrong_pattern_cache, analyze_wrong_answer_patterns
+    _wrong_pattern_cache.invalidate()   # 캐시 없이 조회 + 표본 추출 전체를 측정
+    with mock.patch("ai.teacher_assistant.analyze_wrong_patterns_with_gpt", _stub_wrong_patterns):
+        return analyze_wrong_answer_patterns(db, "teacher1")
+
+
+CASES: Dict[str, Callable[[Session, Dict[str, Any]], Any]] = {
+    "analyze_student_achievement": _dashboard,
+    "generate_heatmap_data": _heatmap,
+    "generate_portfolio_data": _portfolio,
+    "generate_class_report": _class_report,
+    "summarize_student_questions": _question_summary,
+    "analyze_wrong_answer_patterns": _wrong_patterns,
+}
+
+
+def _context(bind) -> Dict[str, Any]:
+    """측정에 사용할 학생/반/과목 (첫 번째 반, 그 반의 첫 학생, 그 학생의 성취도 기록이 가장 많은 과목)"""
+    from models import AchievementRecord, Class, ClassMember, User
+    from seed_db import SUBJECTS
+
+    with bind.connect() as conn:
+        class_id, class_name = conn.execute(select(Class.id, Class.name).order_by(Class.id).limit(1)).one()
+        roster = list(conn.execute(
+            select(User.username).join(ClassMember, ClassMember.student_id == User.id)
+            .where(ClassMember.class_id == class_id).order_by(User.id)
+        ).scalars())
+        subject = conn.execute(
+            select(AchievementRecord.subject).where(AchievementRecord.username == roster[0])
+            .group_by(AchievementRecord.subject)
+            .order_by(func.count().desc(), AchievementRecord.subject).limit(1)
+        ).scalar()
+    return {"username": roster[0], "class_name": class_name, "roster": roster, "subject": subject or SUBJECTS[0]}
+
+
+def measure(bind, name: str, ctx: Dict[str, Any], repeat: int = 5) -> Dict[str, Any]:
+    """
+    함수 1개 측정 (워밍업 1회 후 repeat 회)
+
+    Returns:
+        {"median_ms", "min_ms", "queries"} - queries 는 마지막 실행의 쿼리 수
+    """
+    fn = CASES[name]
+    samples, queries = [], 0
+    for i in range(repeat + 1):
+        with Session(bind=bind) as db:
+            with track_queries() as stats:
+                start = time.perf_counter()
+                fn(db, ctx)
+                elapsed = (time.perf_counter() - start) * 1000
+        if i > 0:
+            samples.append(elapsed)
+            queries = stats.count
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3), "queries": queries}
+
+
+def _open(rows: int, seed: int, directory: str, class_size: int, verbose: bool):
+    """DB 생성/재사용 후 (엔진, 실제 행 수)"""
+    from models import Base
+
+    start = time.perf_counter()
+    path = build_database(rows, seed, directory, class_size)
+    bind = create_engine(f"sqlite:///{path}")
+    with bind.connect() as conn:
+        actual = sum(
+            conn.exec_driver_sql(f"SELECT COUNT(*) FROM {table.name}").scalar()
+            for table in Base.metadata.sorted_tables
+        )
+    if verbose:
+        print(f"[db] {rows:,} rows target, class {class_size} → {actual:,} rows "
+              f"({time.perf_counter() - start:.1f}s) {path}")
+    return bind, actual
+
+
+def run(tiers: List[int], repeat: int = 5, seed: int = 42, cases: List[str] = None,
+        directory: str = None, verbose: bool = True, class_sizes: List[int] = None) -> Dict[str, Any]:
+    """
+    크기별 DB 에서 모든 함수 측정, class_sizes 가 있으면 가장 작은 크기에서 반 인원별 학급 리포트도 측정
+
+    Returns:
+        {"tiers": {행 수: {"rows": 실제 행 수, "cases": {함수: 측정값}}},
+         "class_sizes": {반 인원: generate_class_report 측정값}}
+    """
+    results: Dict[str, Any] = {"tiers": {}, "class_sizes": {}}
+    for rows in tiers:
+        bind, actual = _open(rows, seed, directory, CLASS_SIZE, verbose)
+        try:
+            ctx = _context(bind)
+            tier = {"rows": actual, "cases": {}}
+            for name in cases or CASES:
+                tier["cases"][name] = measure(bind, name, ctx, repeat)
+            results["tiers"][str(rows)] = tier
+        finally:
+            bind.dispose()
+
+    for size in class_sizes or []:
+        bind, _ = _open(min(tiers), seed, directory, size, verbose)
+        try:
+            results["class_sizes"][str(size)] = measure(bind, "generate_class_report", _context(bind), repeat)
+        finally:
+            bind.dispose()
+    return results
+
+
+def find_query_growth(results: Dict[str, Any]) -> List[str]:
+    """데이터 크기(또는 반 인원)에 따라 쿼리 수가 늘어난 함수 목록"""
+    problems = []
+    sizes = list(results.get("class_sizes", {}).items())
+    for size, current in sizes[1:]:
+        if current["queries"] > sizes[0][1]["queries"]:
+            problems.append(f"generate_class_report: 쿼리 수 {sizes[0][1]['queries']} → {current['queries']} "
+                            f"(반 인원 {sizes[0][0]} → {size})")
+
+    tiers = list(results["tiers"].values())
+    if len(tiers) < 2:
+        return problems
+    for name, base in tiers[0]["cases"].items():
+        for tier in tiers[1:]:
+            current = tier["cases"].get(name)
+            if current and current["queries"] > base["queries"]:
+                problems.append(f"{name}: 쿼리 수 {base['queries']} → {current['queries']} "
+                                f"({tiers[0]['rows']:,} → {tier['rows']:,} rows)")
+    return problems
+
+
+def check(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """기준선 대비 회귀 목록 (쿼리 수 증가, 중앙값 시간이 tolerance 비율 이상 증가)"""
+    problems = []
+    for rows, tier in results["tiers"].items():
+        base_tier = baseline.get("tiers", {}).get(rows)
+        if not base_tier:
+            continue
+        for name, current in tier["cases"].items():
+            base = base_tier["cases"].get(name)
+            if not base:
+                continue
+            if current["queries"] > base["queries"]:
+                problems.append(f"{name}@{rows}: 쿼리 수 {current['queries']} > 기준 {base['queries']}")
+            if current["median_ms"] > base["median_ms"] * (1 + tolerance):
+                problems.append(f"{name}@{rows}: {current['median_ms']:.2f}ms > 기준 {base['median_ms']:.2f}ms "
+                                f"(+{tolerance:.0%})")
+    return problems
+
+
+def print_table(results: Dict[str, Any]):
+    tiers = list(results["tiers"])
+    header = f"{'function':>28} | " + " | ".join(f"{parse_size(t):>10,} rows (q)" for t in tiers)
+    print(header)
+    print("-" * len(header))
+    names = list(next(iter(results["tiers"].values()))["cases"]) if tiers else []
+    for name in names:
+        cells = []
+        for t in tiers:
+            case = results["tiers"][t]["cases"][name]
+            cells.append(f"{case['median_ms']:>10.2f}ms ({case['queries']:>3})")
+        print(f"{name:>28} | " + " | ".join(f"{c:>20}" for c in cells))
+
+    for size, case in results.get("class_sizes", {}).items():
+        print(f"{'generate_class_report':>28} | 반 인원 {size:>4}: {case['median_ms']:>10.2f}ms ({case['queries']:>3})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분석 함수 마이크로벤치마크 (시간 + 쿼리 수)")
+    parser.add_argument("--tiers", default=DEFAULT_TIERS, help=f"DB 크기 목록 (기본: {DEFAULT_TIERS})")
+    parser.add_argument("--class-sizes", default=DEFAULT_CLASS_SIZES,
+                        help=f"학급 리포트를 측정할 반 인원 목록 (기본: {DEFAULT_CLASS_SIZES}, 빈 값이면 생략)")
+    parser.add_argument("--repeat", type=int, default=5, help="함수별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cases", help="측정할 함수 (쉼표 구분, 기본: 전체)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (기준선)")
+    parser.add_argument("--check", help="비교할 기준선 JSON 경로")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="허용 시간 증가 비율")
+    args = parser.parse_args()
+
+    tiers = [parse_size(t) for t in args.tiers.split(",") if t]
+    cases = [c for c in args.cases.split(",") if c] if args.cases else None
+    class_sizes = [int(c) for c in args.class_sizes.split(",") if c]
+    results = run(tiers, args.repeat, args.seed, cases, class_sizes=class_sizes)
+    print_table(results)
+
+    problems = find_query_growth(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"[saved] {args.output}")
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            problems += check(results, json.load(f), args.tolerance)
+
+    for problem in problems:
+        print(f"[REGRESSION] {problem}")
+    if problems:
+        sys.exit(1)
+    print("[OK] 쿼리 수가 데이터 크기/반 인원과 무관함")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+로깅 오버헤드 벤치마크
+요청 처리 스레드에서 로그 1건을 남기는 데 걸리는 시간을 비교합니다.
+
+- print: 기존 방식 (stdout 으로 답안 전문 출력)
+- sync: 기존 setup_logging (콘솔 + RotatingFileHandler 3개를 호출 스레드에서 직접 기록)
+- queue: 현재 setup_logging (QueueHandler → 백그라운드 QueueListener, JSON 파일 로그)
+- debug-off: INFO 레벨에서 logger.debug 호출 (레벨 확인만)
+
+실행:
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --records 20000 --threads 1,8,32
+"""
+import argparse
+import contextlib
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Dict, List
+
+import logging_config
+
+
+ESSAY = "화자는 떠나는 임에게 진달래꽃을 뿌리며 슬픔을 절제하는 애이불비의 태도를 보입니다. " * 4
+
+
+def _legacy_setup(log_dir: str, stream) -> logging.Logger:
+    """변경 전 setup_logging 과 같은 구성 (동기 핸들러)"""
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(logging.INFO)
+    console = logging.StreamHandler(stream)
+    handlers = [
+        console,
+        RotatingFileHandler(os.path.join(log_dir, 'app.log'), maxBytes=10*1024*1024, backupCount=5, encoding='utf-8'),
+        RotatingFileHandler(os.path.join(log_dir, 'error.log'), maxBytes=10*1024*1024, backupCount=5,
+                            encoding='utf-8'),
+    ]
+    handlers[2].setLevel(logging.ERROR)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+    return root
+
+
+def _teardown():
+    logging_config.shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        handler.close()
+    root.handlers.clear()
+
+
+def _run_threads(emit: Callable[[int], None], records: int, threads: int) -> List[float]:
+    """threads 개 스레드가 나누어 emit 호출, 호출별 소요 시간(µs) 목록"""
+    samples: List[List[float]] = [[] for _ in range(threads)]
+    per_thread = records // threads
+
+    def worker(index: int):
+        local = samples[index]
+        for i in range(per_thread):
+            start = time.perf_counter()
+            emit(i)
+            local.append((time.perf_counter() - start) * 1_000_000)
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return [s for chunk in samples for s in chunk]
+
+
+def run_case(name: str, records: int, threads: int) -> Dict[str, float]:
+    logger = logging.getLogger("bench.request")
+    sink = open(os.devnull, "w", encoding="utf-8")
+    log_dir = tempfile.mkdtemp(prefix="sungchibot-logbench-")
+    drain = 0.0
+    try:
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            if name == "print":
+                samples = _run_threads(lambda i: print(f"--- [StandardsMatcher] Matching text: {ESSAY} ---"),
+                                       records, threads)
+            elif name == "sync":
+                _legacy_setup(log_dir, sink)
+                samples = _run_threads(lambda i: logger.info("분석 기록 저장 %d", i), records, threads)
+            elif name == "queue":
+                logging_config.setup_logging("INFO", log_dir, queue_size=records + 10)
+                samples = _run_threads(lambda i: logger.info("분석 기록 저장 %d", i), records, threads)
+                start = time.perf_counter()
+                logging_config.shutdown_logging()
+                drain = time.perf_counter() - start
+            elif name == "debug-off":
+                logging_config.setup_logging("INFO", log_dir)
+                samples = _run_threads(lambda i: logger.debug("매칭 요청 %d자", len(ESSAY)), records, threads)
+            else:
+                raise ValueError(name)
+    finally:
+        _teardown()
+        sink.close()
+
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p99_us": samples[int(len(samples) * 0.99) - 1],
+        "drain_ms": drain * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로깅 오버헤드 벤치마크")
+    parser.add_argument("--records", type=int, default=20000, help="스레드 전체 로그 건수")
+    parser.add_argument("--threads", default="1,8,32", help="동시 스레드 수 목록")
+    parser.add_argument("--cases", default="print,sync,queue,debug-off")
+    args = parser.parse_args()
+
+    print(f"{'case':>10} | {'threads':>7} | {'mean(µs)':>9} | {'p50(µs)':>8} | {'p99(µs)':>8} | {'drain(ms)':>9}")
+    print("-" * 67)
+    for threads in [int(t) for t in args.threads.split(",") if t]:
+        for name in args.cases.split(","):
+            r = run_case(name, args.records, threads)
+            print(f"{name:>10} | {threads:>7} | {r['mean_us']:>9.2f} | {r['p50_us']:>8.2f} | "
+                  f"{r['p99_us']:>8.2f} | {r['drain_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+묶음 채점 벤치마크
+같은 문제의 답안 N개를 1개씩 채점(grade_with_gpt)할 때와 묶어서 채점(grade_batch_with_gpt)할 때의
+소요 시간, LLM 요청 수, 토큰 수, 추정 비용을 비교합니다.
+
+가짜 LLM 서버(ai.fake_llm_server)에 TTFT + 토큰 출력 속도 지연 모델을 적용해 실행하므로 네트워크/비용이 없습니다.
+토큰 수는 서버의 근사치(approx_tokens)이며, 가짜 응답의 근거/피드백이 실제보다 짧아 출력 토큰 비중은 과소 추정됩니다.
+기본 점수(AI-fallback)로 채점된 답안이 하나라도 있으면 모델을 호출하지 않은 측정이므로 종료 코드 1로 끝납니다.
+
+실행:
+    python -m benchmarks.bench_packing
+    python -m benchmarks.bench_packing --answers 40 --pack-max 4,8,16 --ttft-ms 600 --tokens-per-sec 60
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from ai.fake_llm_server import DEFAULT_JSON_CONTENT, PACKED_ANSWER_ID, FakeLLMServer, LatencyModel, default_content
+
+
+QUESTION = "김소월의 시 '진달래꽃'에 나타난 화자의 태도를 '이별의 정한'과 관련지어 서술하시오."
+MODEL_ANSWER = "화자는 떠나는 임을 원망하지 않고 진달래꽃을 뿌려 주며, 이별의 슬픔을 겉으로 드러내지 않는 애이불비의 태도를 보인다."
+ANSWER_TEMPLATES = [
+    "화자는 떠나는 임에게 진달래꽃을 뿌려 주며 슬픔을 절제하는 애이불비의 태도를 보입니다. {n}번째 근거로 '죽어도 아니 눈물 흘리우리다'를 들 수 있습니다.",
+    "임이 떠나도 눈물을 흘리지 않겠다는 반어적 표현으로 오히려 이별의 정한을 강조합니다. 특히 {n}연의 표현이 인상적입니다.",
+    "화자는 임을 원망하지 않고 축복하며 보내는 희생적인 사랑을 보여 주며, 이는 전통적인 이별의 정한과 이어집니다 ({n}).",
+]
+
+
+def _answers(count: int):
+    return [ANSWER_TEMPLATES[i % len(ANSWER_TEMPLATES)].format(n=i + 1) for i in range(count)]
+
+
+def _grading_content(body) -> str:
+    """단건/묶음 모두 채점 필드(score/reason/feedback)만 응답해 출력 토큰을 같은 기준으로 비교"""
+    if PACKED_ANSWER_ID.search(str(body["messages"][-1].get("content", ""))):
+        return default_content(body)
+    return json.dumps({k: DEFAULT_JSON_CONTENT[k] for k in ("score", "reason", "feedback")}, ensure_ascii=False)
+
+
+def _usage_snapshot(site: str) -> Dict[str, float]:
+    from ai.llm_telemetry import LLM_CALLS, LLM_COST, LLM_TOKENS
+
+    labels = {"site": site, "model": "gpt-4o"}
+    return {
+        "requests": sum(LLM_CALLS.value(outcome=o, **labels) for o in ("success", "error", "fallback")),
+        "prompt": LLM_TOKENS.value(kind="prompt", **labels),
+        "completion": LLM_TOKENS.value(kind="completion", **labels),
+        "cost": LLM_COST.value(**labels),
+    }
+
+
+def run_case(site: str, grade: Callable[[], List[Dict[str, Any]]]) -> Dict[str, float]:
+    from ai.essay_grader import is_fallback
+
+    before = _usage_snapshot(site)
+    start = time.perf_counter()
+    results = grade()
+    elapsed = time.perf_counter() - start
+    after = _usage_snapshot(site)
+    fallbacks = sum(1 for r in results if is_fallback(r.get("reason")))
+    return {"seconds": elapsed, "fallbacks": fallbacks, **{k: after[k] - before[k] for k in after}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="묶음 채점 벤치마크")
+    parser.add_argument("--answers", type=int, default=24, help="채점할 답안 수")
+    parser.add_argument("--pack-max", default="4,8", help="비교할 묶음 최대 크기 목록")
+    parser.add_argument("--ttft-ms", type=float, default=300, help="첫 토큰까지 지연 중앙값(ms)")
+    parser.add_argument("--tokens-per-sec", type=float, default=200, help="초당 출력 토큰 수")
+    args = parser.parse_args()
+
+    latency = LatencyModel(ttft_median_ms=args.ttft_ms, tokens_per_sec=args.tokens_per_sec, seed=1)
+    with FakeLLMServer(latency_model=latency, content_fn=_grading_content) as server:
+        # LLM 클라이언트가 처음 생성되기 전에 가짜 서버 주소 지정
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+        import ai.essay_grader as essay_grader
+
+        answers = _answers(args.answers)
+        rows = [("single", run_case("essay_grader.grade", lambda: [
+            essay_grader.grade_with_gpt(QUESTION, a, MODEL_ANSWER, 100) for a in answers]))]
+        for pack_max in [int(p) for p in args.pack_max.split(",") if p]:
+            essay_grader.PACK_MAX_ANSWERS = pack_max
+            rows.append((f"packed-{pack_max}", run_case("essay_grader.grade_batch", lambda: (
+                essay_grader.grade_batch_with_gpt(QUESTION, answers, MODEL_ANSWER, 100)))))
+
+    print(f"answers={args.answers} ttft={args.ttft_ms:.0f}ms tokens/s={args.tokens_per_sec:.0f}")
+    print(f"{'case':>10} | {'wall(s)':>7} | {'requests':>8} | {'prompt tok':>10} | {'compl tok':>9} | "
+          f"{'cost($)':>8} | {'fallback':>8}")
+    print("-" * 80)
+    for name, r in rows:
+        print(f"{name:>10} | {r['seconds']:>7.2f} | {r['requests']:>8.0f} | {r['prompt']:>10.0f} | "
+              f"{r['completion']:>9.0f} | {r['cost']:>8.4f} | {r['fallbacks']:>8}")
+
+    if any(r["fallbacks"] for _, r in rows):
+        print("기본 점수(AI-fallback)로 채점된 답안이 있어 위 수치는 모델 호출 결과가 아닙니다.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+학급 리포트 PDF 레이아웃 마이크로벤치마크
+학생 수(30 → 500)에 따른 PDF 1건당 생성 시간을 측정
+
+실행:
+    python -m benchmarks.bench_pdf_layout
+    python -m benchmarks.bench_pdf_layout --sizes 30,100,500 --repeat 5
+"""
+import argparse
+import io
+import random
+import statistics
+import time
+
+from utils import pdf_styles, pdf_utils
+
+
+def make_report_data(student_count: int, seed: int = 42) -> dict:
+    """벤치마크용 학급 리포트 데이터 생성"""
+    rng = random.Random(seed)
+    return {
+        "class_name": "벤치마크반",
+        "subject": "국어",
+        "total_students": student_count,
+        "average_score": 72.5,
+        "leading_points": "1. 문학 영역 보충 지도\n2. 서술형 답안 구조화 연습\n3. 어휘력 향상 활동",
+        "student_scores": [
+            {"username": f"student{i + 1}", "average_score": round(rng.uniform(30, 100), 2)}
+            for i in range(student_count)
+        ],
+    }
+
+
+def _timed(fn, repeat: int) -> float:
+    """repeat회 실행한 중앙값 (ms)"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _clear_style_cache():
+    pdf_styles._sample_styles.cache_clear()
+    pdf_styles.get_class_report_styles.cache_clear()
+
+
+class _PrerenderedChart:
+    """레이아웃 시간만 측정하기 위해 분포 차트를 미리 렌더링한 PNG로 대체"""
+
+    def __init__(self, student_scores):
+        self.image = pdf_utils.create_distribution_chart(student_scores)
+
+    def __call__(self, student_scores):
+        return self.image
+
+
+def run(sizes, repeat: int):
+    print(f"{'students':>8} | {'total(ms)':>10} | {'chart(ms)':>10} | {'layout(ms)':>10} | {'layout cold styles(ms)':>22}")
+    print("-" * 73)
+
+    # 폰트/스타일 워밍업 (서버 기동 후 상태와 동일하게)
+    pdf_utils.create_class_report_pdf(make_report_data(5), io.BytesIO())
+
+    results = []
+    original_chart = pdf_utils.create_distribution_chart
+    for n in sizes:
+        data = make_report_data(n)
+
+        total = _timed(lambda: pdf_utils.create_class_report_pdf(data, io.BytesIO()), repeat)
+        chart = _timed(lambda: original_chart(data["student_scores"]), repeat)
+
+        def cold():
+            _clear_style_cache()
+            pdf_utils.create_class_report_pdf(data, io.BytesIO())
+
+        pdf_utils.create_distribution_chart = _PrerenderedChart(data["student_scores"])
+        try:
+            layout = _timed(lambda: pdf_utils.create_class_report_pdf(data, io.BytesIO()), repeat)
+            layout_cold = _timed(cold, repeat)
+        finally:
+            pdf_utils.create_distribution_chart = original_chart
+
+        results.append({
+            "students": n,
+            "total_ms": total,
+            "chart_ms": chart,
+            "layout_ms": layout,
+            "layout_cold_styles_ms": layout_cold,
+        })
+        print(f"{n:>8} | {total:>10.1f} | {chart:>10.1f} | {layout:>10.1f} | {layout_cold:>22.1f}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="학급 리포트 PDF 레이아웃 벤치마크")
+    parser.add_argument("--sizes", default="30,60,120,250,500", help="학생 수 목록 (쉼표 구분)")
+    parser.add_argument("--repeat", type=int, default=3, help="크기별 반복 횟수")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    run(sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
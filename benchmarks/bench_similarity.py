@@ -0,0 +1,77 @@
+"""
+유사 답안 인덱스 벤치마크
+한 문제에 N 개 답안이 쌓인 LSH 인덱스에서 답안 추가/조회 지연 시간과 재사용 비율을 측정합니다.
+
+가상 답안은 문장 조각을 무작위로 조합해 만들고, 일정 비율은 기존 답안의 띄어쓰기/어미만 바꾼 사본으로 만듭니다.
+
+실행:
+    python -m benchmarks.bench_similarity
+    python -m benchmarks.bench_similarity --answers 5000 --copy-ratio 0.3
+"""
+import argparse
+import random
+import statistics
+import time
+
+from ai.answer_similarity import LSHIndex
+
+
+FRAGMENTS = [
+    "화자는 떠나는 임에게 진달래꽃을 뿌리며", "이별의 슬픔을 절제하는", "애이불비의 태도를 보인다",
+    "반어적 표현을 통해", "임을 붙잡고 싶은 마음을 역설적으로 드러낸다", "전통적인 3음보 율격을 사용하여",
+    "이별의 정한이라는 전통적 정서를 계승한다", "희생적인 사랑의 자세가 나타난다", "수미상관 구조로 안정감을 준다",
+    "영변의 약산이라는 구체적 지명을 사용해", "사뿐히 즈려밟고 가시옵소서라는 표현에서", "슬픔을 속으로 삭이는",
+    "임의 뜻을 존중하려는 태도가 드러나며", "죽어도 아니 눈물 흘리오리다는", "시적 화자의 내면 갈등을 보여준다",
+]
+
+
+def make_answer(rng: random.Random) -> str:
+    return ", ".join(rng.sample(FRAGMENTS, rng.randint(3, 6))) + "."
+
+
+def perturb(answer: str, rng: random.Random) -> str:
+    """띄어쓰기/문장부호/어미 일부만 바꾼 사본"""
+    text = answer.replace(", ", " ", rng.randint(0, 3))
+    if rng.random() < 0.5:
+        text = text.replace("보인다", "보입니다")
+    return text.rstrip(".")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="유사 답안 인덱스 벤치마크")
+    parser.add_argument("--answers", type=int, default=2000)
+    parser.add_argument("--copy-ratio", type=float, default=0.2, help="기존 답안 사본 비율")
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = LSHIndex(max_entries=args.answers)
+    answers, add_ms, query_ms = [], [], []
+    reused = 0
+
+    for i in range(args.answers):
+        if answers and rng.random() < args.copy_ratio:
+            answer = perturb(rng.choice(answers), rng)
+        else:
+            answer = make_answer(rng)
+
+        start = time.perf_counter()
+        matches = index.query(answer, threshold=args.threshold, limit=1)
+        query_ms.append((time.perf_counter() - start) * 1000)
+        reused += bool(matches)
+
+        start = time.perf_counter()
+        index.add(i, answer)
+        add_ms.append((time.perf_counter() - start) * 1000)
+        answers.append(answer)
+
+    for name, samples in (("query", query_ms), ("add", add_ms)):
+        samples.sort()
+        print(f"{name:>6}: p50 {statistics.median(samples):.3f}ms  p99 {samples[int(len(samples) * 0.99) - 1]:.3f}ms  "
+              f"max {samples[-1]:.3f}ms")
+    print(f"reuse: {reused}/{args.answers} ({reused / args.answers:.1%}) GPT 채점 호출 절감")
+
+
+if __name__ == "__main__":
+    main()
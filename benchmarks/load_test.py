@@ -0,0 +1,400 @@
+"""
+주요 사용자 흐름 부하 테스트
+가상 학교 데이터를 적재한 별도 DB와 가짜 LLM 서버(ai/fake_llm_server.py)를 사용해
+채팅/답안 분석/답안 제출/대시보드/포트폴리오/학급 리포트 요청을 섞어 보내고
+경로별 p50/p95/p99 지연과 처리량을 JSON 기준선으로 저장합니다.
+앱은 httpx ASGITransport 로 프로세스 내에서 호출하므로 서버를 따로 띄울 필요가 없습니다.
+
+실행:
+    python -m benchmarks.load_test --students 2000 --days 60 --requests 2000 --output benchmarks/baseline.json
+    python -m benchmarks.load_test --check benchmarks/baseline.json --tolerance 0.25
+
+--check 모드는 경로별 p95 가 기준선보다 tolerance 이상 느려지거나 오류율이 높아지면 종료 코드 1 로 끝납니다.
+
+조회 응답 캐시(RESPONSE_CACHE_TTL)는 기본으로 끄고 실행해 대시보드 등이 실제 조회를 측정하도록 합니다.
+--response-cache-ttl 로 켜면 캐시 적중/미적중 수를 따로 보고합니다.
+LLM 호출이 대체 응답(fallback)으로 끝난 경우가 있으면 모델 호출 경로를 측정하지 못한 것이므로 종료 코드 1 로 끝납니다.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+
+DEFAULT_MIX = "chat=2,analyze=2,submit=2,dashboard=6,portfolio=3,class_report=1"
+
+# 벤치마크 리포트 id 시작값 (static/reports/class_report_<id>.pdf 가 기존 파일과 겹치지 않도록)
+REPORT_ID_BASE = 1_000_000
+
+QUESTIONS = [
+    "진달래꽃의 주제가 뭐야?",
+    "은유법과 직유법의 차이점 알려줘",
+    "비판적 읽기가 왜 중요해?",
+    "설명문의 특징이 궁금해",
+    "관동별곡 해석 좀 도와줘",
+    "단어의 형성 방법 알려줘",
+    "음운 변동 현상이 헷갈려",
+]
+ANSWERS = [
+    "화자는 떠나는 임에게 진달래꽃을 뿌리며 슬픔을 절제하는 애이불비의 태도를 보입니다.",
+    "이별의 정한을 체념과 인종의 자세로 극복하려는 화자의 태도가 드러납니다.",
+    "임이 떠나도 눈물을 흘리지 않겠다는 반어적 표현으로 슬픔을 강조합니다.",
+]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """nearest-rank 백분위수 (samples 는 정렬된 목록)"""
+    if not samples:
+        return 0.0
+    rank = max(1, min(len(samples), int(round(q / 100 * len(samples) + 0.5))))
+    return samples[rank - 1]
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    """"chat=2,dashboard=6" → {"chat": 2, "dashboard": 6}"""
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise ValueError(f"알 수 없는 시나리오: {name}")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+# ==================== 데이터 적재 ====================
+
+CLASS_SIZE = 30
+
+
+def seed_school(engine, students: int, days: int, records_per_day: float, seed: int = 42) -> Dict[str, Any]:
+    """
+    seed_db.generate 로 가상 학교 적재 후 벤치마크 리포트 id 예약
+
+    Returns:
+        벤치마크 시나리오가 사용할 사용자/반 정보
+    """
+    import seed_db
+    from models import ClassReport
+
+    school = seed_db.generate(
+        engine,
+        classes_per_school=max(1, -(-students // CLASS_SIZE)),
+        class_size=CLASS_SIZE,
+        days=days,
+        records_per_day=records_per_day,
+        seed=seed,
+        verbose=False,
+    )
+    with engine.begin() as conn:
+        conn.execute(ClassReport.__table__.insert(), [{
+            "id": REPORT_ID_BASE, "teacher_username": "benchmark", "class_name": "-",
+            "subject": "-", "report_type": "placeholder"
+        }])
+    return school
+
+
+# ==================== 시나리오 ====================
+
+async def _chat(client, rng, school):
+    username = rng.choice(school["usernames"])
+    response = await client.post("/api/agent/chat", json={
+        "message": rng.choice(QUESTIONS), "thread_id": f"{username}-{rng.randint(1, 3)}"})
+    if b'"error"' in response.content:
+        return 500
+    return response.status_code
+
+
+async def _analyze(client, rng, school):
+    response = await client.post("/api/student/analyze", json={
+        "username": rng.choice(school["usernames"]), "question": rng.choice(QUESTIONS),
+        "essay": rng.choice(ANSWERS)})
+    return response.status_code
+
+
+async def _submit(client, rng, school):
+    response = await client.post("/api/student/submit", json={
+        "username": rng.choice(school["usernames"]), "question_id": 1, "answer_text": rng.choice(ANSWERS)})
+    return response.status_code
+
+
+async def _dashboard(client, rng, school):
+    response = await client.get("/api/dashboard", params={"username": rng.choice(school["usernames"])})
+    return response.status_code
+
+
+async def _portfolio(client, rng, school):
+    response = await client.post("/api/portfolio/data", json={"username": rng.choice(school["usernames"])})
+    return response.status_code
+
+
+async def _class_report(client, rng, school):
+    class_name = rng.choice(list(school["rosters"]))
+    response = await client.post("/api/teacher/class-report/generate", json={
+        "teacher_username": "teacher1", "class_name": class_name,
+        "student_list": school["rosters"][class_name]})
+    return response.status_code
+
+
+SCENARIOS: Dict[str, Callable] = {
+    "chat": _chat,
+    "analyze": _analyze,
+    "submit": _submit,
+    "dashboard": _dashboard,
+    "portfolio": _portfolio,
+    "class_report": _class_report,
+}
+
+
+async def drive(app, school, mix: Dict[str, int], total_requests: int, concurrency: int,
+                seed: int = 42) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """
+    가중치 mix 에 따라 요청을 보내고 경로별 지연(ms)/오류 수 수집
+
+    Returns:
+        (경로별 지연 목록, 경로별 오류 수, 전체 소요 시간(초))
+    """
+    import httpx
+
+    rng = random.Random(seed)
+    names = list(mix)
+    plan = rng.choices(names, weights=[mix[n] for n in names], k=total_requests)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, name in enumerate(plan):
+        queue.put_nowait((index, name))
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+
+    async def worker(client):
+        while True:
+            try:
+                index, name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            request_rng = random.Random(seed * 1_000_003 + index)
+            start = time.perf_counter()
+            try:
+                status = await SCENARIOS[name](client, request_rng, school)
+            except Exception as e:
+                print(f"[{name}] 요청 실패: {e}")
+                status = 599
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors[name] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    """경로별 p50/p95/p99(ms), 처리량(req/s), 오류율"""
+    routes = {}
+    for name, samples in latencies.items():
+        samples = sorted(samples)
+        routes[name] = {
+            "requests": len(samples),
+            "errors": errors.get(name, 0),
+            "error_rate": round(errors.get(name, 0) / len(samples), 4) if samples else 0.0,
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+            "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        }
+    total = sum(len(s) for s in latencies.values())
+    return {
+        "routes": routes,
+        "total": {
+            "requests": total,
+            "errors": sum(errors.values()),
+            "elapsed_sec": round(elapsed, 2),
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        },
+    }
+
+
+def check(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """기준선 대비 회귀 목록 (p95 가 tolerance 비율 이상 증가, 또는 오류율 증가)"""
+    problems = []
+    for name, current in result["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if not base or not current["requests"]:
+            continue
+        limit = base["p95_ms"] * (1 + tolerance)
+        if current["p95_ms"] > limit:
+            problems.append(f"{name}: p95 {current['p95_ms']:.1f}ms > 기준 {base['p95_ms']:.1f}ms (+{tolerance:.0%})")
+        if current["error_rate"] > base["error_rate"] + 0.01:
+            problems.append(f"{name}: 오류율 {current['error_rate']:.2%} > 기준 {base['error_rate']:.2%}")
+    return problems
+
+
+def print_table(result: Dict[str, Any]):
+    print(f"{'route':>13} | {'req':>6} | {'err':>4} | {'p50(ms)':>9} | {'p95(ms)':>9} | {'p99(ms)':>9} | {'rps':>7}")
+    print("-" * 75)
+    for name, r in result["routes"].items():
+        print(f"{name:>13} | {r['requests']:>6} | {r['errors']:>4} | {r['p50_ms']:>9.1f} | "
+              f"{r['p95_ms']:>9.1f} | {r['p99_ms']:>9.1f} | {r['throughput_rps']:>7.1f}")
+    total = result["total"]
+    print(f"total {total['requests']} requests in {total['elapsed_sec']}s ({total['throughput_rps']} req/s)")
+    if "llm" in result:
+        print(f"llm calls {result['llm']['calls']} (fallback {result['llm']['fallbacks']})")
+    if "response_cache" in result:
+        cache = result["response_cache"]
+        print(f"response cache ttl={cache['ttl']}s hits {cache['hits']} / misses {cache['misses']}")
+
+
+def run(args) -> Dict[str, Any]:
+    # 앱 임포트 전에 벤치마크 전용 DB/LLM 백엔드 지정
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="sungchibot-bench-"), "bench.db")
+    fresh = not os.path.exists(db_path)
+    os.environ["DB_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    os.environ.setdefault("FAKE_LLM_TTFT_MEDIAN_MS", str(args.ttft_median_ms))
+    os.environ.setdefault("FAKE_LLM_TTFT_SIGMA", str(args.ttft_sigma))
+    os.environ.setdefault("FAKE_LLM_TOKENS_PER_SEC", str(args.tokens_per_sec))
+    os.environ.setdefault("FAKE_LLM_SEED", str(args.seed))
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+    # 답안 종류가 적어 유사 답안 재사용이 켜져 있으면 채점 경로가 거의 측정되지 않음
+    os.environ.setdefault("ANSWER_REUSE_THRESHOLD", "0")
+    os.environ["RESPONSE_CACHE_TTL"] = str(args.response_cache_ttl)
+
+    from main import app
+    from database import engine
+    from ai.llm_telemetry import LLM_CALLS
+    from utils.response_cache import RESPONSE_CACHE_LOOKUPS
+
+    print(f"[db] {db_path}")
+
+    if fresh:
+        start = time.perf_counter()
+        school = seed_school(engine, args.students, args.days, args.records_per_day, seed=args.seed)
+        rows = sum(school["counts"].values())
+        print(f"[seed] {len(school['usernames'])} students, {rows:,} rows: {time.perf_counter() - start:.1f}s")
+    else:
+        school = _load_school(engine)
+
+    mix = parse_mix(args.mix)
+    before = {"llm_calls": LLM_CALLS.total(), "llm_fallbacks": LLM_CALLS.total(outcome="fallback"),
+              "cache_hits": RESPONSE_CACHE_LOOKUPS.total(result="hit"),
+              "cache_misses": RESPONSE_CACHE_LOOKUPS.total(result="miss")}
+    try:
+        latencies, errors, elapsed = asyncio.run(drive(app, school, mix, args.requests, args.concurrency, args.seed))
+    finally:
+        _remove_report_files(engine)
+    result = summarize(latencies, errors, elapsed)
+    result["llm"] = {
+        "calls": int(LLM_CALLS.total() - before["llm_calls"]),
+        "fallbacks": int(LLM_CALLS.total(outcome="fallback") - before["llm_fallbacks"]),
+    }
+    result["response_cache"] = {
+        "ttl": args.response_cache_ttl,
+        "hits": int(RESPONSE_CACHE_LOOKUPS.total(result="hit") - before["cache_hits"]),
+        "misses": int(RESPONSE_CACHE_LOOKUPS.total(result="miss") - before["cache_misses"]),
+    }
+    result["config"] = {
+        "students": args.students,
+        "days": args.days,
+        "records_per_day": args.records_per_day,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "seed": args.seed,
+        "response_cache_ttl": args.response_cache_ttl,
+        "llm": {"ttft_median_ms": args.ttft_median_ms, "ttft_sigma": args.ttft_sigma,
+                "tokens_per_sec": args.tokens_per_sec},
+        "python": platform.python_version(),
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    return result
+
+
+def _remove_report_files(engine):
+    """벤치마크 중 생성된 학급 리포트 PDF 삭제"""
+    from sqlalchemy import select
+    from models import ClassReport
+
+    with engine.connect() as conn:
+        paths = conn.execute(
+            select(ClassReport.pdf_path).where(ClassReport.id > REPORT_ID_BASE, ClassReport.pdf_path.is_not(None))
+        ).scalars().all()
+    for path in paths:
+        full_path = path.lstrip("/")
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+
+def _load_school(engine) -> Dict[str, Any]:
+    """이미 적재된 DB(--db)에서 학생/반 목록 조회"""
+    from sqlalchemy import select
+    from models import Class, ClassMember, User, UserRole
+
+    with engine.connect() as conn:
+        usernames = list(conn.execute(select(User.username).where(User.role == UserRole.STUDENT)).scalars())
+        rows = conn.execute(
+            select(Class.name, User.username)
+            .join(ClassMember, ClassMember.class_id == Class.id)
+            .join(User, User.id == ClassMember.student_id)
+        ).all()
+    rosters: Dict[str, List[str]] = {}
+    for class_name, username in rows:
+        rosters.setdefault(class_name, []).append(username)
+    return {"usernames": usernames, "rosters": rosters}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주요 사용자 흐름 부하 테스트")
+    parser.add_argument("--students", type=int, default=2000, help="학생 수")
+    parser.add_argument("--days", type=int, default=60, help="활동 기간(일)")
+    parser.add_argument("--records-per-day", type=float, default=1.0, help="학생 1명의 하루 평균 활동 수")
+    parser.add_argument("--requests", type=int, default=1000, help="총 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"시나리오 가중치 (기본: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="재사용할 SQLite 파일 경로 (없으면 새로 생성 후 적재)")
+    parser.add_argument("--ttft-median-ms", type=float, default=300.0, help="가짜 LLM 첫 토큰 지연 중앙값")
+    parser.add_argument("--ttft-sigma", type=float, default=0.4)
+    parser.add_argument("--tokens-per-sec", type=float, default=80.0, help="가짜 LLM 출력 토큰 속도")
+    parser.add_argument("--response-cache-ttl", type=float, default=0,
+                        help="조회 응답 캐시 TTL(초), 기본 0 (캐시 없이 측정)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로 (기준선)")
+    parser.add_argument("--check", help="비교할 기준선 JSON 경로")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="허용 p95 증가 비율")
+    args = parser.parse_args()
+
+    result = run(args)
+    print_table(result)
+
+    if result["llm"]["fallbacks"]:
+        print(f"[ERROR] LLM 호출 {result['llm']['fallbacks']}건이 대체 응답으로 끝나 모델 호출 경로를 측정하지 못했습니다.")
+        sys.exit(1)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"[saved] {args.output}")
+
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems = check(result, baseline, args.tolerance)
+        for problem in problems:
+            print(f"[REGRESSION] {problem}")
+        if problems:
+            sys.exit(1)
+        print("[OK] 기준선 대비 회귀 없음")
+
+
+if __name__ == "__main__":
+    main()
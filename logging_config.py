@@ -1,78 +1,188 @@
 """
 로깅 설정 모듈
+
+요청 처리 스레드는 레코드를 큐에 넣기만 하고(QueueHandler), 파일/콘솔 기록은
+백그라운드 QueueListener 스레드가 담당하므로 디스크 I/O 가 요청 지연에 더해지지 않습니다.
+
+- 파일 로그(app.log / error.log / api.log)는 JSON 한 줄 형식 (request_id 포함)
+- 콘솔 로그는 LOG_FORMAT=text(기본) 또는 json
+- 큐가 가득 차면(LOG_QUEUE_SIZE) 요청을 막지 않고 레코드를 버리고 log_records_dropped_total 에 집계
+- 비활성화된 레벨(예: INFO 설정에서 logger.debug)은 레벨 확인만 하고 바로 반환
 """
+import atexit
+import contextvars
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
 
 
-def setup_logging(log_level: str = "INFO", log_dir: str = "logs"):
-    """로깅 설정 초기화"""
-    
-    # 로그 디렉토리 생성
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    
-    # 로그 레벨 설정
-    level = getattr(logging, log_level.upper(), logging.INFO)
-    
-    # 루트 로거 설정
-    logger = logging.getLogger()
-    logger.setLevel(level)
-    
-    # 기존 핸들러 제거 (중복 방지)
-    logger.handlers.clear()
-    
-    # 포맷 설정
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # 콘솔 핸들러
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # 파일 핸들러 (일반 로그)
-    file_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'app.log'),
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    file_handler.setLevel(level)
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
-    
-    # 에러 로그 파일 핸들러
-    error_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'error.log'),
-        maxBytes=10*1024*1024,  # 10MB
-        backupCount=5,
-        encoding='utf-8'
-    )
-    error_handler.setLevel(logging.ERROR)
-    error_handler.setFormatter(formatter)
-    logger.addHandler(error_handler)
-    
-    # API 요청 로그 파일 핸들러
-    api_handler = RotatingFileHandler(
-        os.path.join(log_dir, 'api.log'),
+# HTTP 요청 로그 전용 로거 (api.* 모듈 로거와 구분, MetricsMiddleware 가 요청마다 1줄 기록)
+ACCESS_LOGGER = "api.access"
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 요청 id (MetricsMiddleware 가 요청마다 설정, 요청 밖에서는 "-")
+request_id_var: contextvars.ContextVar = contextvars.ContextVar("request_id", default="-")
+
+_listener: Optional[QueueListener] = None
+_dropped = 0
+
+
+def get_request_id() -> str:
+    return request_id_var.get()
+
+
+def dropped_records() -> int:
+    """큐가 가득 차서 버려진 레코드 수"""
+    return _dropped
+
+
+class RequestIdFilter(logging.Filter):
+    """레코드에 현재 요청 id 기록 (로그를 남긴 스레드에서 실행되어야 하므로 QueueHandler 에 부착)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON 한 줄 형식 (extra 로 넘긴 필드도 포함)"""
+
+    _RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in self._RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """기존 텍스트 형식 + 요청 id"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        request_id = getattr(record, "request_id", "-")
+        return text if request_id == "-" else f"{text} [rid={request_id}]"
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """큐가 가득 차면 기다리지 않고 버림, 예외 정보는 문자열로 미리 변환"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 메시지/예외를 호출 스레드에서 문자열로 만들어 두고, 포맷팅(JSON/텍스트)은 리스너에서
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped += 1
+
+
+def _rotating(path: str, level: int, formatter: logging.Formatter) -> RotatingFileHandler:
+    handler = RotatingFileHandler(
+        path,
         maxBytes=10*1024*1024,  # 10MB
         backupCount=5,
         encoding='utf-8'
     )
-    api_handler.setLevel(logging.INFO)
-    api_handler.setFormatter(formatter)
-    
-    # API 로거 생성
-    api_logger = logging.getLogger('api')
-    api_logger.addHandler(api_handler)
-    api_logger.setLevel(logging.INFO)
-    
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    return handler
+
+
+def setup_logging(log_level: str = "INFO", log_dir: str = "logs", console_format: str = None,
+                  queue_size: int = None):
+    """
+    로깅 설정 초기화 (여러 번 호출해도 리스너는 하나만 유지)
+
+    Args:
+        log_level: 루트 로그 레벨
+        log_dir: 로그 파일 디렉토리
+        console_format: 콘솔 형식 text / json (기본: LOG_FORMAT 환경 변수, 없으면 text)
+        queue_size: 로그 큐 크기 (기본: LOG_QUEUE_SIZE 환경 변수, 없으면 10000)
+    """
+    global _listener
+
+    os.makedirs(log_dir, exist_ok=True)
+    level = getattr(logging, log_level.upper(), logging.INFO)
+    console_format = (console_format or os.getenv("LOG_FORMAT", "text")).lower()
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+    shutdown_logging()
+
+    json_formatter = JsonFormatter()
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(level)
+    console_handler.setFormatter(
+        json_formatter if console_format == "json" else TextFormatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+
+    # API 요청 로그는 요청 로거 레코드만 별도 파일에 (api.* 모듈의 경고/예외는 app.log / error.log)
+    api_handler = _rotating(os.path.join(log_dir, 'api.log'), logging.INFO, json_formatter)
+    api_handler.addFilter(logging.Filter(ACCESS_LOGGER))
+
+    handlers = [
+        console_handler,
+        _rotating(os.path.join(log_dir, 'app.log'), level, json_formatter),
+        _rotating(os.path.join(log_dir, 'error.log'), logging.ERROR, json_formatter),
+        api_handler,
+    ]
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    # 루트 로거 설정 (기존 핸들러 제거 - 중복 방지)
+    logger = logging.getLogger()
+    logger.setLevel(level)
+    logger.handlers.clear()
+    logger.addHandler(queue_handler)
+
+    # 요청 로거만 루트 레벨과 무관하게 요청 로그(INFO)를 남김 (api.* 모듈 로거는 루트 레벨을 따름)
+    access_logger = logging.getLogger(ACCESS_LOGGER)
+    access_logger.handlers.clear()
+    access_logger.setLevel(logging.INFO)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
     logging.info("로깅 시스템 초기화 완료")
-    
+
     return logger
+
+
+def shutdown_logging():
+    """큐에 남은 레코드를 모두 기록하고 리스너 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -1,6 +1,6 @@
 import os
 from fastapi import FastAPI, Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -9,12 +9,27 @@ from dotenv import load_dotenv
 # ==================== 환경 변수 로드 ====================
 load_dotenv()
 
+# ==================== 로깅 설정 ====================
+from logging_config import setup_logging
+
+setup_logging(log_level=os.getenv("LOG_LEVEL", "INFO"), log_dir=os.getenv("LOG_DIR", "logs"))
+
+# ==================== LLM 백엔드 (LLM_BACKEND=fake|replay|record) ====================
+# LLM 클라이언트가 생성되는 라우터 임포트보다 먼저 OPENAI_BASE_URL 을 지정
+from ai.fake_llm_server import configure_llm_backend
+
+configure_llm_backend()
+
 # ==================== DB 초기화 ====================
 from database import engine
-from models import Base
+from models import Base, ensure_feedback_unique, ensure_indexes
 
 # (개발 환경에서만)
 Base.metadata.create_all(bind=engine)
+# 기존 테이블에 나중에 추가된 인덱스 (create_all 은 만들지 않음)
+ensure_indexes(engine)
+# 답안당 피드백 1개 (중복 정리 후 고유 인덱스)
+ensure_feedback_unique(engine)
 
 # ==================== 라우터 임포트 ====================
 from api.auth import router as auth_router
@@ -47,6 +62,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ==================== 샘플링 프로파일러 (PROFILE_TOKEN / PROFILE_CONTINUOUS_HZ) ====================
+# MetricsMiddleware 안쪽에서 실행되도록 먼저 등록 (요청 id 사용)
+from utils.profiler import ProfilingMiddleware, start_continuous_profiler
+
+app.add_middleware(ProfilingMiddleware)
+start_continuous_profiler()
+
+# ==================== 요청 계측 (/metrics) ====================
+from utils.metrics import MetricsMiddleware, render_metrics
+
+app.add_middleware(MetricsMiddleware)
+
 # ==================== 정적 파일 & 템플릿 설정 ====================
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
@@ -146,6 +173,12 @@ def health_check():
     return {"status": "healthy", "message": "Server is running"}
 
 
+@app.get("/metrics", tags=["System"], include_in_schema=False)
+def metrics():
+    """Prometheus 텍스트 형식 메트릭 (라우트별 지연 시간, 상태 코드, DB 쿼리 수)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ==================== 서버 실행 ====================
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Boolean, JSON, Enum
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Boolean, JSON, Enum, Index, Date, UniqueConstraint
+from sqlalchemy import delete, inspect, select
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -106,10 +107,15 @@ class Submission(Base):
     student = relationship("User", back_populates="submissions")
     feedback = relationship("Feedback", uselist=False, back_populates="submission")
 
+    # 학생별 최신순 제출 이력 조회 (키셋 페이지네이션)
+    __table_args__ = (
+        Index("ix_submissions_student_id_submitted_at", "student_id", "submitted_at"),
+    )
+
 class Feedback(Base):
     __tablename__ = "feedbacks"
     id = Column(Integer, primary_key=True, index=True)
-    submission_id = Column(Integer, ForeignKey("submissions.id"))
+    submission_id = Column(Integer, ForeignKey("submissions.id"), index=True, unique=True)  # 답안당 피드백 1개
     mastery_level = Column(Enum(MasteryLevel), default=MasteryLevel.FAIL)
     overall_comment = Column(Text) # 학생에게 보여줄 종합 코멘트
     teacher_summary = Column(Text) # 교사에게 보여줄 요약
@@ -145,6 +151,11 @@ class Record(Base):
     score = Column(Float, default=0.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # 사용자별 최신순 이력 조회 (키셋 페이지네이션)
+    __table_args__ = (
+        Index("ix_records_username_created_at", "username", "created_at"),
+    )
+
 class ClassReport(Base):
     __tablename__ = "class_reports"
     id = Column(Integer, primary_key=True, index=True)
@@ -175,6 +186,11 @@ class EssayGrading(Base):
     graded_by = Column(String(50))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # 사용자별 최신순 이력 조회 (키셋 페이지네이션)
+    __table_args__ = (
+        Index("ix_essay_gradings_username_created_at", "username", "created_at"),
+    )
+
 
 
 class AchievementRecord(Base):
@@ -203,3 +219,94 @@ class Portfolio(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+
+class LLMUsageDaily(Base):
+    """LLM 호출 지점·모델별 일일 사용량 요약"""
+    __tablename__ = "llm_usage_daily"
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    site = Column(String(100), nullable=False)
+    model = Column(String(50), nullable=False)
+    calls = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    fallbacks = Column(Integer, default=0)
+    cache_hits = Column(Integer, default=0)
+    retries = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
+    total_latency_ms = Column(Float, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "site", "model", name="uq_llm_usage_daily_day_site_model"),
+    )
+
+
+class GradingBatchJob(Base):
+    """오프라인 일괄 채점 작업 (Batch API) - 단계별 진행 상태를 저장해 중단 후 이어서 실행"""
+    __tablename__ = "grading_batch_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), index=True)
+    subject = Column(String(50))
+    model = Column(String(50))
+    backend = Column(String(20))
+    status = Column(String(20), default="prepared")  # preparing, prepared, submitted, downloaded, applied, failed
+                                                     # (단계 처리 중: writing, submitting, polling, applying)
+    batch_id = Column(String(100), nullable=True)     # 백엔드 배치 ID
+    batch_status = Column(String(20), nullable=True)  # 백엔드가 알려준 마지막 상태
+    input_path = Column(String(500))
+    output_path = Column(String(500), nullable=True)
+    request_count = Column(Integer, default=0)
+    local_count = Column(Integer, default=0)          # 로컬 판정으로 바로 저장한 답안 수
+    applied_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    claimed_at = Column(DateTime(timezone=True), nullable=True)    # 처리 중 상태로 선점한 시각
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+
+def ensure_indexes(bind):
+    """
+    이미 있는 테이블에 모델에 선언된 인덱스 중 없는 것을 생성 (create_all 다음에 호출)
+
+    create_all 은 기존 테이블에 새 인덱스를 추가하지 않으므로, 키셋 페이지네이션용 복합 인덱스 등이
+    운영 DB 에 빠지지 않도록 시작 시 확인합니다. 고유 인덱스는 중복 행 정리가 먼저 필요하므로 제외합니다 (ensure_feedback_unique).
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if not index.unique:
+                index.create(bind, checkfirst=True)
+
+
+def ensure_feedback_unique(bind):
+    """
+    답안당 피드백 1개 고유 인덱스(ix_feedbacks_submission_id)를 기존 DB 에도 생성
+
+    이미 중복된 피드백이 있으면 답안별로 가장 최근(id 가 가장 큰) 피드백만 남기고 지운 뒤 만듭니다.
+    (답안 재사용 등도 가장 최근 피드백을 사용)
+
+    Returns:
+        지운 중복 피드백 수
+    """
+    index = next(ix for ix in Feedback.__table__.indexes if ix.unique)
+    if index.name in {ix["name"] for ix in inspect(bind).get_indexes(Feedback.__tablename__)}:
+        return 0
+
+    with bind.begin() as conn:
+        latest = (
+            select(func.max(Feedback.id))
+            .where(Feedback.submission_id.isnot(None))
+            .group_by(Feedback.submission_id)
+        )
+        # MySQL 은 같은 테이블을 조회하는 하위 쿼리로 DELETE 할 수 없으므로 id 를 먼저 조회
+        stale = conn.execute(
+            select(Feedback.id).where(Feedback.submission_id.isnot(None), Feedback.id.notin_(latest))
+        ).scalars().all()
+        if stale:
+            conn.execute(delete(Feedback).where(Feedback.id.in_(stale)))
+        index.create(conn)
+    return len(stale)
@@ -1,140 +1,356 @@
 """
 데이터베이스 시드 데이터 생성 스크립트
-초기 사용자, 학습 기록, 성취도 데이터 등을 생성합니다.
+학교/반/학생 수, 활동 기간, 점수 분포를 지정해 가상 학습 데이터를 생성합니다.
+같은 시드와 기준일(--end-date)이면 항상 같은 데이터가 만들어집니다.
+
+Core executemany 로 배치 단위 삽입하므로 수천만 행도 수 분 안에 적재할 수 있습니다.
+(SQLite 는 적재 중 synchronous/journal 을 끄고 적재합니다)
+
+실행:
+    python seed_db.py                                   # 데모용 (교사 1명, 3개 반, 학생 21명)
+    python seed_db.py --schools 5 --classes 30 --class-size 30 --days 180 --records-per-day 2
+    python seed_db.py --distribution bimodal --score-mean 65 --score-std 15 --seed 7 --end-date 2025-06-30
 """
-from sqlalchemy.orm import Session
-from database import engine, get_db
+import argparse
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+
+from database import engine
 from models import (
-    Base, User, UserRole, Class, ClassMember, Record, 
-    Question, Submission, Feedback, MasteryLevel, 
-    AchievementRecord, EssayGrading,
-    ClassReport
+    Base, UserRole, MasteryLevel, User, Class, ClassMember, Question, Record,
+    Submission, Feedback, AchievementRecord, EssayGrading
 )
-from datetime import datetime, timedelta
-import random
-import os
 
-# DB 테이블 생성 (기존 데이터 초기화)
-try:
-    Base.metadata.drop_all(bind=engine)
-    print("[INFO] Existing tables dropped.")
-except Exception as e:
-    print(f"[WARN] Could not drop tables: {e}")
 
-Base.metadata.create_all(bind=engine)
+DEMO_NAMES = ["김철수", "이영희", "박민수", "정수민", "최지우", "강동원", "송혜교", "현빈", "손예진", "유재석",
+              "박보검", "김유정", "차은우", "아이유", "bts", "봉준호", "손흥민", "김연아", "페이커", "뉴진스"]
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN_SYLLABLES = "민서지현준우예은도윤하수아연재영진혁소유채원태희"
+
+SUBJECTS = ["문학", "독서", "화법", "작문", "문법"]
+# 영역별 성취기준 코드 (ai/standards_engine.py 와 같은 K-HS-n 형식, 대시보드 히트맵이 이 코드로 조회)
+STANDARD_CODES = {
+    "문학": ["K-HS-1", "K-HS-2", "K-HS-3", "K-HS-4"],
+    "독서": ["K-HS-5", "K-HS-6"],
+    "화법": ["K-HS-7"],
+    "작문": ["K-HS-5", "K-HS-6"],
+    "문법": ["K-HS-5"],
+}
+CHAT_QUESTIONS = [
+    "진달래꽃의 주제가 뭐야?",
+    "은유법과 직유법의 차이점 알려줘",
+    "비판적 읽기가 왜 중요해?",
+    "설명문의 특징이 궁금해",
+    "관동별곡 해석 좀 도와줘",
+    "단어의 형성 방법 알려줘",
+    "음운 변동 현상이 헷갈려",
+]
+ESSAY_QUESTION = "다음은 김소월의 시 '진달래꽃'의 일부이다. 이 시에 나타난 화자의 태도를 '이별의 정한'과 관련지어 200자 내외로 서술하시오."
+ESSAY_ANSWERS = [
+    "화자는 떠나는 임에게 진달래꽃을 뿌리며 슬픔을 절제하는 애이불비의 태도를 보입니다.",
+    "이별의 정한을 체념과 인종의 자세로 극복하려는 화자의 태도가 드러납니다.",
+    "임이 떠나도 눈물을 흘리지 않겠다는 반어적 표현으로 슬픔을 강조합니다.",
+    "진달래꽃은 화자의 사랑과 희생을 상징하며 이별의 아픔을 드러냅니다.",
+]
+DISTRIBUTIONS = ("normal", "bimodal", "uniform", "skewed")
+
+
+def score_sampler(rng: random.Random, distribution: str, mean: float, std: float):
+    """학생 기본 실력(0~100) 샘플러"""
+    def clamp(value: float) -> float:
+        return min(100.0, max(0.0, value))
+
+    if distribution == "normal":
+        return lambda: clamp(rng.gauss(mean, std))
+    if distribution == "bimodal":
+        # 상위권/하위권 두 집단 (평균 ± std)
+        return lambda: clamp(rng.gauss(mean + std if rng.random() < 0.5 else mean - std, std / 2))
+    if distribution == "uniform":
+        return lambda: clamp(rng.uniform(mean - std * math.sqrt(3), mean + std * math.sqrt(3)))
+    if distribution == "skewed":
+        # 고득점 쪽으로 치우친 분포 (beta), mean/std 는 무시하고 평균 약 75
+        return lambda: 100 * rng.betavariate(5, 1.7)
+    raise ValueError(f"지원하지 않는 분포: {distribution}")
+
+
+def poisson(rng: random.Random, lam: float) -> int:
+    """포아송 난수 (Knuth, 작은 lam 용)"""
+    if lam <= 0:
+        return 0
+    limit, k, p = math.exp(-lam), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def student_name(rng: random.Random, index: int) -> str:
+    if index < len(DEMO_NAMES):
+        return DEMO_NAMES[index]
+    return rng.choice(SURNAMES) + rng.choice(GIVEN_SYLLABLES) + rng.choice(GIVEN_SYLLABLES)
+
+
+class BulkWriter:
+    """
+    테이블별 행 버퍼, batch_size 마다 Core executemany 로 삽입
+
+    Args:
+        conn: DB 연결 (flush 마다 commit)
+        batch_size: 한 번에 삽입할 행 수
+    """
+
+    def __init__(self, conn, batch_size: int):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.buffers: Dict[Any, List[Dict[str, Any]]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, table, row: Dict[str, Any]):
+        buffer = self.buffers.setdefault(table, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # 외래 키 순서를 지키도록 처음 등록된 순서(부모 테이블 먼저)대로 모두 비움
+        for table, rows in self.buffers.items():
+            if rows:
+                self.conn.execute(table.insert(), rows)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+                self.buffers[table] = []
+        self.conn.commit()
+
 
-def seed_data():
-    db = Session(bind=engine)
+def _fast_sqlite_load(bind):
+    """SQLite 적재 중 fsync/롤백 저널 생략 (적재 후 연결을 닫으면 원래대로)"""
+    if bind.dialect.name != "sqlite":
+        return None
+
+    def set_pragmas(dbapi_conn, _):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA journal_mode=MEMORY")
+        cursor.close()
+
+    return set_pragmas
+
+
+def generate(
+    bind=None,
+    schools: int = 1,
+    classes_per_school: int = 3,
+    class_size: int = 7,
+    days: int = 30,
+    records_per_day: float = 0.5,
+    submission_ratio: float = 0.2,
+    grading_ratio: float = 0.1,
+    distribution: str = "normal",
+    score_mean: float = 70.0,
+    score_std: float = 12.0,
+    seed: int = 42,
+    end_date: datetime = None,
+    batch_size: int = 20_000,
+    reset: bool = True,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    가상 학습 데이터 생성 및 적재
+
+    Args:
+        bind: 대상 엔진 (기본: database.engine)
+        schools: 학교 수 (학교마다 교사 1명이 모든 반 담당)
+        classes_per_school: 학교당 반 수
+        class_size: 반 인원
+        days: 활동 기간(일), end_date 이전 days 일 동안 기록 생성
+        records_per_day: 학생 1명의 하루 평균 활동 수 (포아송)
+        submission_ratio: 활동 중 서술형 답안 제출(Submission + Feedback) 비율
+        grading_ratio: 활동 중 AI 채점(EssayGrading) 비율
+        distribution: 학생 실력 분포 (normal / bimodal / uniform / skewed)
+        score_mean: 점수 평균
+        score_std: 점수 표준편차
+        seed: 난수 시드
+        end_date: 기록 기준일 (기본: 오늘 0시)
+        batch_size: 한 번에 삽입할 행 수
+        reset: 기존 테이블 삭제 후 재생성 여부
+        verbose: 진행 상황 출력 여부
+
+    Returns:
+        {"usernames": [...], "rosters": {반 이름: [학생 아이디]}, "counts": {테이블: 행 수}, "elapsed_sec": ...}
+    """
+    bind = bind or engine
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"지원하지 않는 분포: {distribution}")
+    rng = random.Random(seed)
+    sample_ability = score_sampler(rng, distribution, score_mean, score_std)
+    end_date = end_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    start_time = time.perf_counter()
+
+    if reset:
+        Base.metadata.drop_all(bind=bind)
+    Base.metadata.create_all(bind=bind)
+
+    pragma_hook = _fast_sqlite_load(bind)
+    if pragma_hook:
+        event.listen(bind, "connect", pragma_hook)
+        bind.dispose()
+
+    users, classes, members = User.__table__, Class.__table__, ClassMember.__table__
+
+    usernames: List[str] = []
+    rosters: Dict[str, List[str]] = {}
+    ids = {"submission": 0}
+    joined_at = end_date - timedelta(days=days + 1)
     try:
-        print("[INFO] DB Seeding Started...")
-
-        # 1. 교사 생성
-        teacher = db.query(User).filter(User.username == "teacher1").first()
-        if not teacher:
-            teacher = User(
-                username="teacher1",
-                password_hash="1234", # 비밀번호 설정
-                name="김선생",
-                role=UserRole.TEACHER,
-                email="teacher@school.com"
-            )
-            db.add(teacher)
-            db.commit()
-            print("[OK] Teacher account created (ID: teacher1 / PW: 1234)")
-        else:
-            print("[INFO] Teacher account 'teacher1' already exists.")
-        
-        # 2. 반 생성
-        classes = ["1학년 1반", "1학년 2반", "1학년 3반"]
-        class_objs = []
-        for c_name in classes:
-            cls = Class(name=c_name, teacher_id=teacher.id, grade=1, year=2024)
-            db.add(cls)
-            class_objs.append(cls)
-        db.commit()
-        
-        # 3. 학생 및 성취도 데이터 생성
-        korean_names = ["김철수", "이영희", "박민수", "정수민", "최지우", "강동원", "송혜교", "현빈", "손예진", "유재석",
-                        "박보검", "김유정", "차은우", "아이유", "bts", "봉준호", "손흥민", "김연아", "페이커", "뉴진스"]
-        
-        students = []
-        for i, name in enumerate(korean_names):
-            username = f"student{i+1}"
-            existing_student = db.query(User).filter(User.username == username).first()
-            if existing_student:
-                students.append(existing_student)
-                continue
-
-            student = User(
-                username=username,
-                password_hash="1234", # 비밀번호 설정
-                name=name,
-                role=UserRole.STUDENT
-            )
-            db.add(student)
-            db.commit()
-            db.refresh(student)
-            
-            # 반 배정
-            cls = class_objs[i % len(class_objs)]
-            member = ClassMember(class_id=cls.id, student_id=student.id)
-            db.add(member)
-            
-            students.append(student)
-
-            # 성취도 기록 (AchievementRecord) -> 차트용
-            subjects = ["문학", "독서", "화법", "작문", "문법"]
-            for subj in subjects:
-                # 랜덤으로 0~100점
-                base_score = random.randint(50, 90)
-                score = min(100, base_score + random.randint(-10, 10))
-                
-                record = AchievementRecord(
-                    username=student.username,
-                    subject=subj,
-                    standard_code=f"K-HS-{subj[:2]}01",
-                    score=score,
-                    created_at=datetime.now() - timedelta(days=random.randint(1, 30))
-                )
-                db.add(record)
-        
-        db.commit()
-        print(f"[OK] Created {len(students)} students and achievement records")
-
-        # 4. 최근 질문 (Record) -> 대시보드 '최근 학생 질문'
-        questions = [
-            "진달래꽃의 주제가 뭐야?",
-            "은유법과 직유법의 차이점 알려줘",
-            "비판적 읽기가 왜 중요해?",
-            "설명문의 특징이 궁금해",
-            "관동별곡 해석 좀 도와줘",
-            "단어의 형성 방법 알려줘",
-            "음운 변동 현상이 헷갈려"
-        ]
-        
-        for _ in range(15):
-            stu = random.choice(students)
-            q_text = random.choice(questions)
-            rec = Record(
-                username=stu.username,
-                question=q_text,
-                reply="AI 답변입니다...",
-                category="질문",
-                created_at=datetime.now() - timedelta(minutes=random.randint(5, 300))
-            )
-            db.add(rec)
-        db.commit()
-        print("[OK] Created recent questions")
-        
-        print("[SUCCESS] All seed data created successfully!")
-
-    except Exception as e:
-        print(f"[ERROR] {e}")
-        import traceback
-        traceback.print_exc()
-        db.rollback()
+        with bind.connect() as conn:
+            writer = BulkWriter(conn, batch_size)
+            writer.add(Question.__table__, {"id": 1, "content": ESSAY_QUESTION, "question_type": "essay",
+                                            "difficulty": "medium", "standard_code": "K-HS-문학01"})
+
+            user_id, class_id, student_index = 0, 0, 0
+            for school in range(schools):
+                user_id += 1
+                teacher_id = user_id
+                writer.add(users, {
+                    "id": teacher_id, "username": f"teacher{school + 1}", "password_hash": "1234",
+                    "name": "김선생" if school == 0 else f"교사{school + 1}", "role": UserRole.TEACHER,
+                    "email": f"teacher{school + 1}@school.com", "created_at": joined_at
+                })
+                for c in range(classes_per_school):
+                    class_id += 1
+                    grade = c * 3 // max(1, classes_per_school) + 1
+                    class_name = f"{grade}학년 {c + 1}반"
+                    if schools > 1:
+                        class_name = f"{school + 1}고 {class_name}"
+                    writer.add(classes, {"id": class_id, "teacher_id": teacher_id, "name": class_name,
+                                         "grade": grade, "year": end_date.year, "created_at": joined_at})
+                    roster = rosters.setdefault(class_name, [])
+
+                    for _ in range(class_size):
+                        user_id += 1
+                        student_index += 1
+                        username = f"student{student_index}"
+                        usernames.append(username)
+                        roster.append(username)
+                        writer.add(users, {
+                            "id": user_id, "username": username, "password_hash": "1234",
+                            "name": student_name(rng, student_index - 1), "role": UserRole.STUDENT, "email": None,
+                            "created_at": joined_at
+                        })
+                        writer.add(members, {"class_id": class_id, "student_id": user_id, "joined_at": joined_at})
+                        _add_activity(writer, rng, ids, username, user_id, sample_ability(), days,
+                                      records_per_day, submission_ratio, grading_ratio, end_date)
+
+                if verbose:
+                    print(f"[INFO] school {school + 1}/{schools}: {student_index:,} students")
+
+            writer.flush()
     finally:
-        db.close()
+        if pragma_hook:
+            event.remove(bind, "connect", pragma_hook)
+            bind.dispose()
+
+    elapsed = time.perf_counter() - start_time
+    if verbose:
+        total = sum(writer.counts.values())
+        print(f"[SUCCESS] {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+        for name, count in writer.counts.items():
+            print(f"  {name}: {count:,}")
+    return {"usernames": usernames, "rosters": rosters, "counts": dict(writer.counts), "elapsed_sec": elapsed}
+
+
+def _add_activity(writer: BulkWriter, rng: random.Random, ids: Dict[str, int], username: str, user_id: int,
+                  ability: float, days: int, records_per_day: float, submission_ratio: float,
+                  grading_ratio: float, end_date: datetime):
+    """학생 1명의 활동 기록 생성 (기간 동안 실력이 조금씩 향상)"""
+    subject_bias = {subject: rng.gauss(0, 6) for subject in SUBJECTS}
+
+    for day in range(days, 0, -1):
+        for _ in range(poisson(rng, records_per_day)):
+            created_at = end_date - timedelta(days=day) + timedelta(seconds=rng.randint(8 * 3600, 23 * 3600))
+            growth = (days - day) / max(1, days) * 5
+            subject = rng.choice(SUBJECTS)
+            score = round(min(100.0, max(0.0, rng.gauss(ability + subject_bias[subject] + growth, 8))), 1)
+            kind = rng.random()
+
+            if kind < submission_ratio:
+                ids["submission"] += 1
+                answer = rng.choice(ESSAY_ANSWERS)
+                mastery = MasteryLevel.PASS if score >= 80 else (
+                    MasteryLevel.PARTIAL if score >= 50 else MasteryLevel.FAIL)
+                writer.add(Submission.__table__, {
+                    "id": ids["submission"], "question_id": 1, "student_id": user_id,
+                    "answer_text": answer, "submitted_at": created_at, "retry_count": 0
+                })
+                writer.add(Feedback.__table__, {
+                    "submission_id": ids["submission"], "mastery_level": mastery,
+                    "overall_comment": "작품 속 근거를 들어 화자의 태도를 설명해 보세요.",
+                    "teacher_summary": "", "analysis_json": {"score": score}, "misconceptions": [],
+                    "created_at": created_at
+                })
+            elif kind < submission_ratio + grading_ratio:
+                writer.add(EssayGrading.__table__, {
+                    "username": username, "subject": "국어", "question": ESSAY_QUESTION,
+                    "student_answer": rng.choice(ESSAY_ANSWERS), "model_answer": None,
+                    "score": round(score / 10, 1), "grading_reason": "자동 생성 데이터",
+                    "feedback": "근거를 한 가지 더 제시하면 좋겠습니다.", "graded_by": "seed",
+                    "created_at": created_at
+                })
+            elif kind < 0.7:
+                writer.add(Record.__table__, {
+                    "username": username, "question": rng.choice(CHAT_QUESTIONS), "reply": "AI 답변입니다...",
+                    "category": f"분석-{subject}", "score": score, "created_at": created_at
+                })
+                writer.add(AchievementRecord.__table__, {
+                    "username": username, "subject": subject,
+                    "standard_code": rng.choice(STANDARD_CODES[subject]), "score": score,
+                    "created_at": created_at
+                })
+            else:
+                writer.add(Record.__table__, {
+                    "username": username, "question": rng.choice(CHAT_QUESTIONS), "reply": "AI 답변입니다...",
+                    "category": "AI 채팅", "score": 0.0, "created_at": created_at
+                })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가상 학습 데이터 생성")
+    parser.add_argument("--schools", type=int, default=1, help="학교 수")
+    parser.add_argument("--classes", type=int, default=3, help="학교당 반 수")
+    parser.add_argument("--class-size", type=int, default=7, help="반 인원")
+    parser.add_argument("--days", type=int, default=30, help="활동 기간(일)")
+    parser.add_argument("--records-per-day", type=float, default=0.5, help="학생 1명의 하루 평균 활동 수")
+    parser.add_argument("--submission-ratio", type=float, default=0.2, help="활동 중 답안 제출 비율")
+    parser.add_argument("--grading-ratio", type=float, default=0.1, help="활동 중 AI 채점 비율")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="normal", help="학생 실력 분포")
+    parser.add_argument("--score-mean", type=float, default=70.0)
+    parser.add_argument("--score-std", type=float, default=12.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", help="기록 기준일 YYYY-MM-DD (기본: 오늘)")
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    args = parser.parse_args()
+
+    generate(
+        schools=args.schools,
+        classes_per_school=args.classes,
+        class_size=args.class_size,
+        days=args.days,
+        records_per_day=args.records_per_day,
+        submission_ratio=args.submission_ratio,
+        grading_ratio=args.grading_ratio,
+        distribution=args.distribution,
+        score_mean=args.score_mean,
+        score_std=args.score_std,
+        seed=args.seed,
+        end_date=datetime.strptime(args.end_date, "%Y-%m-%d") if args.end_date else None,
+        batch_size=args.batch_size,
+    )
+    print("[OK] Demo accounts: teacher1 / 1234, student1 / 1234")
+
 
 if __name__ == "__main__":
-    seed_data()
+    main()
@@ -6,6 +6,7 @@ from sqlalchemy.orm import sessionmaker
 
 from main import app
 from database import Base, get_db
+from ai.llm_telemetry import flush_usage, set_usage_bind
 
 # 테스트용 SQLite 메모리 DB 설정
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -19,13 +20,15 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 
 @pytest.fixture(scope="session")
 def db():
-    # 테이블 생성
+    # 테이블 생성 (LLM 일별 사용량도 테스트 DB에 저장)
     Base.metadata.create_all(bind=engine)
+    set_usage_bind(engine)
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
+        flush_usage()
         Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture(scope="module")
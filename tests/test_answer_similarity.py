@@ -0,0 +1,57 @@
+from unittest import mock
+
+import pytest
+
+from main import app
+from api.grading_api import get_db as grading_get_db
+from ai.answer_similarity import LSHIndex, reset_indexes
+
+
+ANSWER = "화자는 떠나는 임에게 진달래꽃을 뿌려 주겠다고 말하며, 이별의 슬픔을 겉으로 드러내지 않고 절제하는 애이불비의 태도를 보인다."
+# 띄어쓰기·문장부호만 바꾸고 조사 하나를 바꾼 답안
+NEAR_COPY = "화자는 떠나는 임에게 진달래꽃을 뿌려주겠다고 말하며 이별의 슬픔을 겉으로 드러내지 않고 절제하는 애이불비의 태도를 보인다"
+DIFFERENT = "이 시는 반어적 표현을 통해 임을 붙잡고 싶은 마음을 역설적으로 드러내며, 전통적 율격인 3음보를 사용한다."
+
+
+def test_lsh_index_finds_near_duplicates():
+    index = LSHIndex()
+    assert index.add(1, ANSWER, {"id": 1})
+    assert index.add(2, DIFFERENT, {"id": 2})
+    assert not index.add(3, "짧은 답")
+
+    matches = index.query(NEAR_COPY, threshold=0.8)
+    assert [m["key"] for m in matches] == [1]
+    assert matches[0]["similarity"] >= 0.9
+
+    assert index.query("전혀 관련 없는 내용의 답안으로 수학 문제의 풀이 과정을 설명합니다.", threshold=0.5) == []
+
+
+@pytest.fixture
+def grading_client(client, db):
+    app.dependency_overrides[grading_get_db] = lambda: db
+    reset_indexes()
+    yield client
+    app.dependency_overrides.pop(grading_get_db, None)
+    reset_indexes()
+
+
+def test_grade_essay_reuses_near_duplicate(grading_client):
+    """거의 같은 답안은 GPT 호출 없이 기존 채점을 재사용하고 베끼기 의심으로 표시"""
+    graded = {"score": 85, "reason": "핵심 개념을 정확히 서술함", "feedback": "근거를 보강하세요."}
+    payload = {"subject": "국어", "question": "진달래꽃 화자의 태도를 서술하시오.", "max_score": 100}
+
+    with mock.patch("ai.essay_grader.grade_with_gpt", return_value=graded) as grade:
+        first = grading_client.post("/api/grading/essay", json={**payload, "username": "copy_a",
+                                                                "student_answer": ANSWER}).json()["data"]
+        second = grading_client.post("/api/grading/essay", json={**payload, "username": "copy_b",
+                                                                 "student_answer": NEAR_COPY}).json()["data"]
+        third = grading_client.post("/api/grading/essay", json={**payload, "username": "copy_c",
+                                                                "student_answer": DIFFERENT}).json()["data"]
+
+    assert grade.call_count == 2
+    assert first["graded_by"] == "AI" and "similar_grading_id" not in first
+    assert second["graded_by"] == "AI-reuse"
+    assert second["score"] == 85 and second["needs_review"] is True
+    assert second["similar_grading_id"] == first["id"]
+    assert second["possible_copy"] is True
+    assert third["graded_by"] == "AI" and "similar_grading_id" not in third
@@ -0,0 +1,139 @@
+import pytest
+
+from main import app
+from api.teacher_api import get_db as teacher_get_db
+from ai.batch_grading import advance, apply_results, create_job, run_job
+from models import Assignment, EssayGrading, Feedback, Question, Rubric, Submission, User
+
+
+ANSWER = "화자는 떠나는 임에게 진달래꽃을 뿌려 주며 이별의 슬픔을 절제하는 애이불비의 태도를 보인다."
+
+
+@pytest.fixture
+def assignment(db, tmp_path, monkeypatch):
+    monkeypatch.setenv("GRADING_BATCH_DIR", str(tmp_path))
+    monkeypatch.setenv("GRADING_BATCH_BACKEND", "local")
+
+    assignment = Assignment(title="진달래꽃 서술형")
+    db.add(assignment)
+    db.flush()
+    question = Question(assignment_id=assignment.id, content="'진달래꽃'에 나타난 화자의 태도를 서술하시오.")
+    db.add(question)
+    db.flush()
+    db.add(Rubric(question_id=question.id, criteria_text="화자의 태도(애이불비)가 드러났는가?", min_score=10))
+    answers = [ANSWER, ANSWER.replace("보인다", "드러낸다"), "몰라요"]
+    for i, answer in enumerate(answers):
+        user = User(username=f"batch_student{assignment.id}_{i}", name=f"학생{i}")
+        db.add(user)
+        db.flush()
+        db.add(Submission(question_id=question.id, student_id=user.id, answer_text=answer))
+    db.commit()
+    return assignment
+
+
+def _feedbacks(db, assignment):
+    return (
+        db.query(Feedback)
+        .join(Submission, Submission.id == Feedback.submission_id)
+        .join(Question, Question.id == Submission.question_id)
+        .filter(Question.assignment_id == assignment.id)
+        .all()
+    )
+
+
+def test_run_job_applies_results(db, assignment):
+    job = run_job(db, create_job(db, assignment.id, "국어"), poll_interval=0)
+
+    assert job.status == "applied"
+    assert (job.request_count, job.local_count, job.applied_count, job.failed_count) == (2, 1, 2, 0)
+    assert len(_feedbacks(db, assignment)) == 3
+
+    gradings = db.query(EssayGrading).filter(EssayGrading.username.like(f"batch_student{assignment.id}_%")).all()
+    assert sorted(g.graded_by for g in gradings) == ["AI-batch", "AI-batch", "local:length"]
+    # 만점은 채점 기준 배점 합계
+    assert all(g.score <= 10 for g in gradings)
+
+
+def test_job_resumes_and_applies_once(db, assignment):
+    """제출 후 중단되어도 같은 작업을 이어서 진행하고, 결과를 다시 저장해도 중복되지 않음"""
+    job = create_job(db, assignment.id, "국어")
+    job = advance(db, advance(db, job))
+    assert job.status == "submitted" and job.batch_id
+
+    # 같은 과제로 다시 시작하면 새 작업이 아니라 진행 중인 작업
+    assert create_job(db, assignment.id, "국어").id == job.id
+
+    job = run_job(db, job, poll_interval=0)
+    assert job.status == "applied"
+
+    job.status = "downloaded"
+    job.applied_count = 0
+    apply_results(db, job)
+    assert job.applied_count == 0
+    assert len(_feedbacks(db, assignment)) == 3
+
+
+def test_claimed_step_runs_once(db, assignment):
+    """다른 곳에서 선점한 단계는 실행하지 않고, 선점이 만료되면 원래 단계부터 다시 진행"""
+    from datetime import datetime, timedelta
+
+    job = create_job(db, assignment.id, "국어")
+    while job.status != "downloaded":
+        job = advance(db, job)
+
+    job.status, job.claimed_at = "applying", datetime.now()
+    db.commit()
+    assert advance(db, job).status == "applying"
+    assert len(_feedbacks(db, assignment)) == 1
+
+    job.claimed_at = datetime.now() - timedelta(hours=1)
+    db.commit()
+    assert advance(db, job).status == "applied"
+    assert len(_feedbacks(db, assignment)) == 3
+
+
+def test_bulk_grading_endpoints(client, db, assignment):
+    app.dependency_overrides[teacher_get_db] = lambda: db
+    try:
+        response = client.post("/api/teacher/grading/bulk", json={"assignment_id": assignment.id})
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["status"] == "submitted" and data["requests"] == 2
+
+        # 조회는 작업을 진행하지 않음
+        assert client.get(f"/api/teacher/grading/bulk/{data['id']}").json()["data"]["status"] == "submitted"
+        for _ in range(3):
+            data = client.post(f"/api/teacher/grading/bulk/{data['id']}/advance").json()["data"]
+        assert data["status"] == "applied" and data["applied"] == 2
+
+        assert client.post("/api/teacher/grading/bulk", json={"assignment_id": 999999}).status_code == 404
+    finally:
+        app.dependency_overrides.pop(teacher_get_db, None)
+
+
+def test_feedback_unique_index_added_to_existing_db(tmp_path):
+    """고유 인덱스 없이 만든 DB: 중복 피드백은 최근 것만 남기고 인덱스 생성, 이후 중복 저장 불가"""
+    from sqlalchemy import create_engine, inspect
+    from sqlalchemy.exc import IntegrityError
+    from sqlalchemy.orm import Session
+    from models import Base, ensure_feedback_unique
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_feedbacks_submission_id")
+    with Session(engine) as session:
+        session.add_all([Feedback(submission_id=1, overall_comment="첫 채점"),
+                         Feedback(submission_id=1, overall_comment="중복 채점"),
+                         Feedback(submission_id=2, overall_comment="다른 답안")])
+        session.commit()
+
+    assert ensure_feedback_unique(engine) == 1
+    assert ensure_feedback_unique(engine) == 0
+    assert "ix_feedbacks_submission_id" in {i["name"] for i in inspect(engine).get_indexes("feedbacks")}
+    with Session(engine) as session:
+        assert [f.overall_comment for f in session.query(Feedback).filter_by(submission_id=1)] == ["중복 채점"]
+        session.add(Feedback(submission_id=2, overall_comment="또 채점"))
+        with pytest.raises(IntegrityError):
+            session.commit()
+    engine.dispose()
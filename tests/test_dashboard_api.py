@@ -0,0 +1,45 @@
+import pytest
+
+from main import app
+import api.dashboard_api as dashboard_api
+from models import AchievementRecord
+
+
+@pytest.fixture(autouse=True)
+def dashboard_db(client, db):
+    """dashboard_api 전용 get_db도 테스트 DB로 교체"""
+    app.dependency_overrides[dashboard_api.get_db] = lambda: db
+    yield
+    app.dependency_overrides.pop(dashboard_api.get_db, None)
+
+
+def test_dashboard_cache_invalidated_on_write(client, db, monkeypatch):
+    """대시보드 응답 캐시: 반복 조회는 캐시 사용, 성취 기록 저장 시 무효화"""
+    calls = []
+    original = dashboard_api.analyze_student_achievement
+
+    def counting_analyze(**kwargs):
+        calls.append(kwargs["username"])
+        return original(**kwargs)
+
+    monkeypatch.setattr(dashboard_api, "analyze_student_achievement", counting_analyze)
+
+    db.add(AchievementRecord(username="cache_student", subject="국어", standard_code="K-HS-1", score=60))
+    db.commit()
+
+    first = client.get("/api/dashboard?username=cache_student").json()
+    second = client.get("/api/dashboard?username=cache_student").json()
+    assert first == second
+    assert len(calls) == 1
+
+    # 다른 학생의 기록은 이 학생 캐시에 영향 없음
+    db.add(AchievementRecord(username="other_student", subject="국어", standard_code="K-HS-1", score=10))
+    db.commit()
+    client.get("/api/dashboard?username=cache_student")
+    assert len(calls) == 1
+
+    db.add(AchievementRecord(username="cache_student", subject="국어", standard_code="K-HS-1", score=100))
+    db.commit()
+    third = client.get("/api/dashboard?username=cache_student").json()
+    assert len(calls) == 2
+    assert third["achievement_scores"]["K-HS-1"] == 80
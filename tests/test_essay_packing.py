@@ -0,0 +1,133 @@
+import json
+import re
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from main import app
+from api.teacher_api import get_db as teacher_get_db
+from ai.answer_similarity import reset_indexes
+from ai.essay_grader import grade_batch_with_gpt, pack_answers
+
+
+QUESTION = "김소월의 시 '진달래꽃'에 나타난 화자의 태도를 서술하시오."
+ANSWERS = [
+    "화자는 떠나는 임에게 진달래꽃을 뿌려 주며 이별의 슬픔을 절제하는 애이불비의 태도를 보인다.",
+    "임이 떠나도 눈물을 흘리지 않겠다는 반어적 표현으로 오히려 슬픔을 강조하고 있다.",
+    "화자는 임을 원망하지 않고 축복하며 보내 주는 희생적인 사랑을 보여 준다고 생각합니다.",
+]
+
+
+def _response(payload):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps(payload, ensure_ascii=False)))],
+        usage=None
+    )
+
+
+def _packed_reply(drop_last=False):
+    """묶음 프롬프트의 답안 id 마다 점수를 주는 가짜 응답 (drop_last 면 묶음의 마지막 답안을 빠뜨림)"""
+    def reply(**kwargs):
+        ids = re.findall(r'<answer id="([^"]+)">', kwargs["messages"][-1]["content"])
+        if drop_last and len(ids) > 1:
+            ids = ids[:-1]
+        return _response({"results": [{"id": i, "score": 80, "reason": "근거", "feedback": "피드백"} for i in ids]})
+    return reply
+
+
+def test_pack_answers_respects_budgets():
+    assert pack_answers(["가" * 10] * 5, max_answers=2) == [[0, 1], [2, 3], [4]]
+    # 출력 예산이 답안 2개분이면 max_answers 보다 작게 묶음
+    assert pack_answers(["가" * 10] * 3, max_answers=8, output_tokens=700) == [[0, 1], [2]]
+    # 입력 예산을 넘는 긴 답안은 혼자 묶음
+    assert pack_answers(["가" * 10, "가" * 500, "가" * 10], input_tokens=300) == [[0], [1], [2]]
+
+
+def test_grade_batch_packs_answers_into_one_request():
+    stats = {}
+    with mock.patch("ai.essay_grader.chat_completion", side_effect=_packed_reply()) as completion:
+        results = grade_batch_with_gpt(QUESTION, ANSWERS, max_score=100, stats=stats)
+
+    assert completion.call_count == 1
+    assert [r["score"] for r in results] == [80, 80, 80]
+    assert stats == {"requests": 1, "splits": 0, "fallbacks": 0}
+
+
+def test_grade_batch_retries_missing_answers():
+    """응답에서 빠진 답안만 다시 요청 (1개 남으면 단건 채점)"""
+    single = _response({"score": 60, "reason": "단건", "feedback": "단건"})
+    with mock.patch("ai.essay_grader.chat_completion", side_effect=[
+        _packed_reply(drop_last=True)(messages=[{"content": '<answer id="A1"><answer id="A2"><answer id="A3">'}]),
+        single,
+    ]) as completion:
+        stats = {}
+        results = grade_batch_with_gpt(QUESTION, ANSWERS, max_score=100, stats=stats)
+
+    assert completion.call_count == 2
+    assert [r["score"] for r in results] == [80, 80, 60]
+    assert stats["splits"] == 1
+
+
+def test_grade_batch_falls_back_on_api_error():
+    with mock.patch("ai.essay_grader.chat_completion", side_effect=ConnectionError("down")) as completion:
+        results = grade_batch_with_gpt(QUESTION, ANSWERS, max_score=10)
+
+    assert completion.call_count == 1
+    assert [r["score"] for r in results] == [5, 5, 5]
+
+
+@pytest.fixture
+def teacher_client(client, db):
+    app.dependency_overrides[teacher_get_db] = lambda: db
+    reset_indexes()
+    yield client
+    app.dependency_overrides.pop(teacher_get_db, None)
+    reset_indexes()
+
+
+def test_batch_grading_endpoint(teacher_client):
+    """짧은 답안은 로컬 판정, 같은 요청 안의 복사 답안은 한 번만 채점"""
+    submissions = [{"username": f"pack_student{i}", "answer": a} for i, a in enumerate(ANSWERS)]
+    submissions += [
+        {"username": "pack_copy", "answer": ANSWERS[0].replace(" ", "  ")},
+        {"username": "pack_short", "answer": "몰라요"},
+    ]
+    with mock.patch("ai.essay_grader.chat_completion", side_effect=_packed_reply()) as completion:
+        response = teacher_client.post("/api/teacher/grading/batch", json={
+            "teacher_username": "teacher1", "subject": "국어", "question": QUESTION + " (묶음 채점)",
+            "max_score": 100, "submissions": submissions})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert completion.call_count == 1
+    assert [r["student"] for r in body["results"]] == [s["username"] for s in submissions]
+    copy, short = body["results"][3], body["results"][4]
+    assert copy["graded_by"] == "AI-reuse" and copy["possible_copy"] is True
+    assert short["triage_stage"] == "length" and short["score"] == 0
+    assert body["stats"]["llm_answers"] == 3 and body["stats"]["batch_duplicates"] == 1
+
+
+def test_batch_grading_endpoint_rejects_empty(teacher_client):
+    response = teacher_client.post("/api/teacher/grading/batch", json={
+        "subject": "국어", "question": QUESTION, "submissions": []})
+    assert response.status_code == 400
+
+
+def test_fallback_grades_are_not_reused(teacher_client, db):
+    """묶음 채점이 기본 점수로 대체되면 같은 요청의 유사 답안도, 이후 유사 답안도 그 점수를 재사용하지 않음"""
+    from ai.essay_grader import grade_essays_batch
+
+    question = QUESTION + " (기본 점수)"
+    submissions = [{"username": "fallback_a", "answer": ANSWERS[0]},
+                   {"username": "fallback_b", "answer": ANSWERS[0].replace(" ", "  ")}]
+    with mock.patch("ai.essay_grader.chat_completion", side_effect=ConnectionError("down")):
+        results = grade_essays_batch(db, "국어", question, submissions, max_score=10)["results"]
+    assert [r["graded_by"] for r in results] == ["AI-fallback", "AI-fallback"]
+
+    graded = _response({"score": 8, "reason": "근거", "feedback": "피드백"})
+    with mock.patch("ai.essay_grader.chat_completion", return_value=graded) as completion:
+        later = grade_essays_batch(db, "국어", question, [{"username": "fallback_c", "answer": ANSWERS[0]}],
+                                   max_score=10)["results"][0]
+    assert completion.call_count == 1
+    assert later["graded_by"] == "AI" and later["score"] == 8
@@ -0,0 +1,50 @@
+import time
+
+import pytest
+from openai import NotFoundError, OpenAI
+
+from ai.fake_llm_server import FakeLLMServer, LatencyModel
+
+
+MESSAGES = [{"role": "user", "content": "진달래꽃의 주제는?"}]
+
+
+def _client(server: FakeLLMServer) -> OpenAI:
+    return OpenAI(base_url=server.base_url, api_key="sk-fake", max_retries=0)
+
+
+def test_record_then_replay_offline(tmp_path):
+    """record 모드로 저장한 응답을 upstream 없이 replay 모드에서 그대로 재생"""
+    cassette = str(tmp_path / "llm.jsonl")
+
+    with FakeLLMServer(content_fn=lambda body: "녹음된 응답") as upstream:
+        with FakeLLMServer(mode="record", cassette_path=cassette, upstream=upstream.base_url) as recorder:
+            recorded = _client(recorder).chat.completions.create(model="gpt-4o", messages=MESSAGES)
+            _client(recorder).chat.completions.create(model="gpt-4o", messages=MESSAGES)
+            assert recorder.stats["recorded"] == 1
+            assert recorder.stats["replayed"] == 1
+        assert len(upstream.requests) == 1
+
+    with FakeLLMServer(mode="replay", cassette_path=cassette, strict=True) as replayer:
+        client = _client(replayer)
+        replayed = client.chat.completions.create(model="gpt-4o", messages=MESSAGES)
+        assert replayed.choices[0].message.content == "녹음된 응답"
+        assert replayed.id == recorded.id
+
+        chunks = list(client.chat.completions.create(
+            model="gpt-4o", messages=MESSAGES, stream=True, stream_options={"include_usage": True}))
+        assert "".join(c.choices[0].delta.content or "" for c in chunks if c.choices) == "녹음된 응답"
+        assert chunks[-1].usage.completion_tokens == recorded.usage.completion_tokens
+
+        missing = [{"role": "user", "content": "카세트에 없는 질문"}]
+        with pytest.raises(NotFoundError):
+            client.chat.completions.create(model="gpt-4o", messages=missing)
+
+
+def test_latency_model_applies_token_rate():
+    """출력 토큰 수 / 초당 토큰 수 만큼 응답이 지연됨"""
+    model = LatencyModel(ttft_median_ms=50, tokens_per_sec=100)
+    with FakeLLMServer(content_fn=lambda body: "가" * 20, latency_model=model) as server:
+        start = time.perf_counter()
+        _client(server).chat.completions.create(model="gpt-4o", messages=MESSAGES)
+        assert time.perf_counter() - start >= 0.05 + 21 / 100
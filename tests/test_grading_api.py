@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from main import app
+from api.grading_api import get_db as grading_get_db
+from models import Base, Record, EssayGrading, ensure_indexes
+
+
+@pytest.fixture(autouse=True)
+def grading_db(client, db):
+    """grading_api 전용 get_db도 테스트 DB로 교체"""
+    app.dependency_overrides[grading_get_db] = lambda: db
+    yield
+    app.dependency_overrides.pop(grading_get_db, None)
+
+
+def test_history_cursor_pagination(client, db):
+    """채점/활동 통합 이력 커서 페이지네이션 테스트 (중복·누락 없이 최신순)"""
+    base = datetime(2025, 3, 1, 9, 0, 0)
+    for i in range(7):
+        # 일부 행은 같은 시각을 공유하여 동률 처리까지 확인
+        ts = base + timedelta(minutes=i // 2)
+        db.add(EssayGrading(username="history_student", subject="국어", question=f"문항 {i}",
+                            score=80, created_at=ts))
+        db.add(Record(username="history_student", question=f"질문 {i}", category="AI 채팅",
+                      score=0, created_at=ts))
+    db.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        response = client.post("/api/grading/history", json={
+            "username": "history_student",
+            "limit": 4,
+            "cursor": cursor
+        })
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["data"]) <= 4
+        seen.extend(body["data"])
+        if not body["has_more"]:
+            break
+        cursor = body["next_cursor"]
+
+    assert len(seen) == 14
+    assert len({(item["type"], item["id"]) for item in seen}) == 14
+    times = [item["time"] for item in seen]
+    assert times == sorted(times, reverse=True)
+
+
+def test_history_invalid_cursor(client):
+    """잘못된 커서는 400 반환"""
+    response = client.post("/api/grading/history", json={
+        "username": "history_student",
+        "cursor": "not-a-cursor"
+    })
+    assert response.status_code == 400
+
+
+def test_history_indexes_created_on_existing_tables(tmp_path):
+    """인덱스 추가 전에 만든 DB 에도 시작 시 이력 조회용 복합 인덱스 생성"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_records_username_created_at")
+        conn.exec_driver_sql("DROP INDEX ix_essay_gradings_username_created_at")
+
+    ensure_indexes(engine)
+    ensure_indexes(engine)   # 두 번 호출해도 오류 없음
+
+    inspector = inspect(engine)
+    assert "ix_records_username_created_at" in {i["name"] for i in inspector.get_indexes("records")}
+    assert "ix_essay_gradings_username_created_at" in {
+        i["name"] for i in inspector.get_indexes("essay_gradings")}
+    engine.dispose()
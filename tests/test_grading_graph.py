@@ -0,0 +1,71 @@
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+from langchain_openai import ChatOpenAI
+
+from ai.core import graph
+from ai.fake_llm_server import DEFAULT_JSON_CONTENT, FakeLLMServer, LatencyModel
+from models import Feedback, Submission
+
+
+ANSWER = "임이 떠나도 눈물을 흘리지 않겠다는 반어적 표현으로 이별의 정한과 애이불비의 태도를 드러낸다."
+INPUTS = {"question": "'진달래꽃' 화자의 태도를 서술하시오.", "standard": "문학 작품을 감상한다.",
+          "rubric": "화자의 태도(애이불비)가 드러났는가?", "student_answer": ANSWER}
+
+
+@pytest.fixture
+def fake_llm():
+    """json_schema 요청에 스키마에 맞는 응답을 0.2초 뒤 돌려주는 가짜 서버로 그래프 LLM 교체"""
+    with FakeLLMServer(latency_model=LatencyModel(ttft_median_ms=200)) as server:
+        llm = ChatOpenAI(model="gpt-4o", temperature=0, max_retries=0, base_url=server.base_url, api_key="sk-fake")
+        with mock.patch.object(graph, "llm", llm), \
+                mock.patch.dict(DEFAULT_JSON_CONTENT, {"mastery_level": "PARTIAL"}):
+            yield server
+
+
+def test_branches_run_in_parallel(fake_llm):
+    start = time.perf_counter()
+    state = asyncio.run(graph.app_graph.ainvoke(INPUTS))
+    elapsed = time.perf_counter() - start
+
+    assert state["mastery_level"] == "PARTIAL"
+    assert state["misconceptions"][0].keys() == {"concept", "description", "evidence"}
+    assert state["recommendations"][0].keys() == {"title", "activity", "reason"}
+    assert set(state["timings"]) == {"analyze", "misconceptions", "recommend"}
+    # 분석 + 가장 느린 분기 (세 노드 합계보다 짧음)
+    assert elapsed < sum(state["timings"].values()) / 1000
+    assert all(r["response_format"]["type"] == "json_schema" for r in fake_llm.requests)
+
+
+def test_pass_skips_misconceptions(fake_llm):
+    with mock.patch.dict(DEFAULT_JSON_CONTENT, {"mastery_level": "PASS"}):
+        state = asyncio.run(graph.app_graph.ainvoke(INPUTS))
+    assert "misconceptions" not in state["timings"] and state["recommendations"]
+
+
+def test_submit_stores_misconceptions(client, db, fake_llm):
+    response = client.post("/api/student/submit", json={
+        "username": "graph_user", "question_id": 9050, "answer_text": ANSWER})
+
+    data = response.json()
+    assert data["success"] and data["misconceptions"] and data["recommendations"]
+    assert data["analysis"]["triage"]["stage"] == "llm"
+    feedback = (
+        db.query(Feedback).join(Submission, Submission.id == Feedback.submission_id)
+        .filter(Submission.question_id == 9050).one()
+    )
+    assert feedback.misconceptions == data["misconceptions"]
+
+
+def test_reused_feedback_keeps_recommendations(client, db, fake_llm, monkeypatch):
+    """유사 답안 재사용(duplicate 단계)도 원래 채점의 추천 학습 활동을 그대로 반환"""
+    monkeypatch.setenv("ANSWER_REUSE_THRESHOLD", "0.9")
+    first = client.post("/api/student/submit", json={
+        "username": "graph_reuse_a", "question_id": 9051, "answer_text": ANSWER}).json()
+    second = client.post("/api/student/submit", json={
+        "username": "graph_reuse_b", "question_id": 9051, "answer_text": ANSWER}).json()
+
+    assert second["analysis"]["triage"]["stage"] == "duplicate"
+    assert first["recommendations"] and second["recommendations"] == first["recommendations"]
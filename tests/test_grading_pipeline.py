@@ -0,0 +1,47 @@
+from unittest import mock
+
+from ai.grading_pipeline import rubric_keywords, stage_report, triage
+
+
+QUESTION = "김소월의 시 '진달래꽃'에 나타난 화자의 태도를 '이별의 정한'과 관련지어 서술하시오. 문학 작품에 드러난 작가의 개성을 이해하고 작품을 감상한다."
+MODEL_ANSWER = "화자는 떠나는 임을 원망하지 않고 진달래꽃을 뿌려 주며, 이별의 슬픔을 겉으로 드러내지 않는 애이불비의 태도를 보인다."
+RUBRIC = "1. 화자의 태도(애이불비)가 잘 드러났는가? (5점)\n2. '이별의 정한' 개념을 포함했는가? (3점)"
+
+
+def test_rubric_keywords():
+    assert rubric_keywords(RUBRIC) == ["이별의정한", "애이불비"]
+
+
+def test_triage_stages():
+    """빈/짧은/한글 아닌/주제 이탈 답안만 로컬 판정, 나머지는 LLM 으로"""
+    def stage(answer):
+        verdict = triage("test", answer, QUESTION, RUBRIC, MODEL_ANSWER)
+        return verdict and verdict["stage"]
+
+    assert stage("   ") == "length"
+    assert stage("애이불비") == "length"
+    assert stage("The speaker hides her sadness when her lover leaves.") == "language"
+    assert stage("ㅋㅋㅋㅋㅋㅋㅋㅋㅋㅋㅋㅋ") == "length"
+    assert stage("이차방정식의 근의 공식을 이용하면 판별식으로 실근의 개수를 알 수 있습니다.") == "keywords"
+    assert stage("임이 떠나도 눈물을 흘리지 않겠다는 반어적 표현으로 슬픔을 강조합니다.") is None
+    assert stage("진달래꽃은 이별의 정한을 애이불비의 태도로 승화시킨 작품입니다.") is None
+
+    report = stage_report("test")
+    assert report["total"] == 7 and report["escalated"] == 2
+    assert report["stages"]["length"]["resolved"] == 3
+    assert report["stages"]["keywords"] == {**report["stages"]["keywords"], "checked": 3, "resolved": 1}
+
+    # 모범 답안이 없으면 주제 이탈은 판정하지 않음
+    assert triage("test", "이차방정식의 근의 공식을 이용하면 판별식으로 실근의 개수를 알 수 있습니다.", QUESTION, RUBRIC) is None
+
+
+def test_submit_skips_llm_for_trivial_answer(client):
+    with mock.patch("api.student_api.app_graph.ainvoke") as ainvoke:
+        response = client.post("/api/student/submit", json={
+            "username": "triage_user", "question_id": 7, "answer_text": "몰라요"})
+
+    assert response.status_code == 200
+    ainvoke.assert_not_called()
+    analysis = response.json()["analysis"]
+    assert analysis["mastery_level"] == "FAIL"
+    assert analysis["triage"]["stage"] == "length"
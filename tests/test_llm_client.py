@@ -0,0 +1,128 @@
+import time
+
+import pytest
+from openai import OpenAI, BadRequestError
+
+import ai.llm_client as llm_client
+from ai.fake_llm_server import FakeLLMServer
+from ai.llm_client import CircuitBreaker, chat_completion
+from ai.llm_telemetry import track_llm_call
+from utils.exceptions import AIServiceError
+
+
+MESSAGES = [{"role": "user", "content": "진달래꽃의 주제는?"}]
+
+
+@pytest.fixture(scope="module")
+def fake_server():
+    with FakeLLMServer() as server:
+        yield server
+
+
+@pytest.fixture(autouse=True)
+def fake_client(fake_server, monkeypatch):
+    """공용 OpenAI 클라이언트를 가짜 서버로 교체하고 대기 시간을 짧게 설정"""
+    fake_server.reset()
+    monkeypatch.setattr(llm_client, "_openai_client",
+                        OpenAI(base_url=fake_server.base_url, api_key="sk-fake", max_retries=0))
+    monkeypatch.setattr(llm_client, "openai_breaker", CircuitBreaker("test", failure_threshold=3, reset_timeout=0.3))
+    monkeypatch.setenv("LLM_BACKOFF_BASE_SEC", "0.01")
+    monkeypatch.setenv("LLM_MAX_ATTEMPTS", "4")
+
+
+def test_retry_respects_retry_after(fake_server):
+    """429/503 후 재시도하여 성공, Retry-After 만큼 대기"""
+    fake_server.inject_faults({"status": 429, "retry_after": 0.2}, {"status": 503})
+
+    start = time.perf_counter()
+    with track_llm_call("test.retry", "gpt-4o") as call:
+        response = chat_completion(model="gpt-4o", messages=MESSAGES)
+    elapsed = time.perf_counter() - start
+
+    assert response.choices[0].message.content
+    assert len(fake_server.requests) == 3
+    assert call.retries == 2
+    assert elapsed >= 0.2
+
+
+def test_client_error_not_retried(fake_server):
+    """400 은 재시도하지 않음"""
+    fake_server.inject_faults({"status": 400})
+    with pytest.raises(BadRequestError):
+        chat_completion(model="gpt-4o", messages=MESSAGES)
+    assert len(fake_server.requests) == 1
+
+
+def test_client_error_does_not_reset_breaker(fake_server):
+    """400 은 연속 실패 수를 초기화하지 않고, half_open 을 닫지도 않음"""
+    breaker = llm_client.openai_breaker
+    fake_server.inject_faults({"status": 500}, {"status": 500}, {"status": 400}, {"status": 500})
+    with pytest.raises(BadRequestError):
+        chat_completion(model="gpt-4o", messages=MESSAGES)
+    with pytest.raises(Exception):
+        chat_completion(model="gpt-4o", messages=MESSAGES)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.35)
+    fake_server.inject_faults({"status": 400})
+    with pytest.raises(BadRequestError):
+        chat_completion(model="gpt-4o", messages=MESSAGES)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert chat_completion(model="gpt-4o", messages=MESSAGES).choices
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_fails_fast_and_recovers(fake_server):
+    """연속 5xx 로 서킷이 열리면 서버 호출 없이 즉시 실패, reset_timeout 후 복구"""
+    fake_server.inject_faults(*[{"status": 500}] * 3)
+    with pytest.raises(Exception):
+        chat_completion(model="gpt-4o", messages=MESSAGES)
+    assert llm_client.openai_breaker.state == CircuitBreaker.OPEN
+    sent = len(fake_server.requests)
+
+    with pytest.raises(AIServiceError):
+        chat_completion(model="gpt-4o", messages=MESSAGES)
+    assert len(fake_server.requests) == sent
+
+    time.sleep(0.35)
+    assert chat_completion(model="gpt-4o", messages=MESSAGES).choices
+    assert llm_client.openai_breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_request_beats_slow_response(fake_server, monkeypatch):
+    """첫 요청이 느리면 헤징 요청의 응답을 먼저 사용"""
+    monkeypatch.setenv("LLM_HEDGE_DELAY_SEC", "0.05")
+    fake_server.inject_faults({"delay": 0.8})
+
+    start = time.perf_counter()
+    response = chat_completion(hedge=True, model="gpt-4o", messages=MESSAGES)
+    assert response.choices
+    assert time.perf_counter() - start < 0.6
+    assert len(fake_server.requests) == 2
+
+    # 늦게 끝나는 첫 요청이 테스트 종료 후 로그를 남기지 않도록 대기
+    time.sleep(max(0.0, 0.9 - (time.perf_counter() - start)))
+
+
+def test_grading_survives_transient_error(fake_server):
+    """일시적 503 이 기본 점수(대체 응답)로 이어지지 않음"""
+    from ai.essay_grader import grade_with_gpt
+
+    fake_server.inject_faults({"status": 503})
+    result = grade_with_gpt("진달래꽃의 주제를 서술하시오.", "이별의 정한을 노래한 시입니다.", max_score=10)
+    assert result["score"] == 7
+    assert "기본 점수" not in result["reason"]
+
+
+def test_default_client_uses_env(fake_server, monkeypatch):
+    """교체하지 않은 공용 클라이언트도 OPENAI_BASE_URL 의 서버로 채점 (대체 응답 아님)"""
+    from ai.essay_grader import grade_with_gpt
+
+    monkeypatch.setattr(llm_client, "_openai_client", None)
+    monkeypatch.setenv("OPENAI_BASE_URL", fake_server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-fake")
+
+    result = grade_with_gpt("진달래꽃의 주제를 서술하시오.", "이별의 정한을 노래한 시입니다.", max_score=10)
+    assert llm_client.get_openai_client().base_url.host == "127.0.0.1"
+    assert len(fake_server.requests) == 1
+    assert result["score"] == 7 and "기본 점수" not in result["reason"]
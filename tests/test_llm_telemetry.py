@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from main import app
+from api.teacher_api import get_db as teacher_get_db
+from ai.llm_telemetry import flush_usage, track_llm_call, LLM_CALLS, LLM_TOKENS
+from models import LLMUsageDaily
+
+
+def test_track_llm_call_usage_and_fallback(client, db):
+    """LLM 호출 계측: 토큰/비용 기록, 대체 응답 집계, 일별 요약 조회"""
+    response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=1200, completion_tokens=300))
+
+    with track_llm_call("test.site", "gpt-4o") as call:
+        call.record_usage(response)
+    assert call.cost == pytest.approx((1200 * 2.5 + 300 * 10) / 1_000_000)
+
+    with track_llm_call("test.site", "gpt-4o") as call:
+        try:
+            raise TimeoutError("upstream timeout")
+        except TimeoutError as e:
+            call.mark_fallback(e)
+
+    assert LLM_CALLS.value(site="test.site", model="gpt-4o", outcome="success") >= 1
+    assert LLM_CALLS.value(site="test.site", model="gpt-4o", outcome="fallback") >= 1
+    assert LLM_TOKENS.value(site="test.site", model="gpt-4o", kind="prompt") >= 1200
+
+    app.dependency_overrides[teacher_get_db] = lambda: db
+    try:
+        response = client.get("/api/teacher/llm-usage?site=test.site")
+    finally:
+        app.dependency_overrides.pop(teacher_get_db, None)
+    assert response.status_code == 200
+    rows = response.json()["data"]
+    assert rows and rows[0]["calls"] >= 2
+    assert rows[0]["fallbacks"] >= 1
+    assert 0 < rows[0]["fallback_rate"] < 1
+
+
+def test_flush_increments_existing_row(db):
+    """저장은 기존 행에 더하는 증가 UPDATE (다른 워커가 저장한 값을 덮어쓰지 않음)"""
+    for _ in range(2):
+        with track_llm_call("test.flush", "gpt-4o"):
+            pass
+        flush_usage(db.get_bind())
+
+    row = db.query(LLMUsageDaily).filter(LLMUsageDaily.site == "test.flush").one()
+    db.refresh(row)
+    assert row.calls == 2
+
+
+def test_matcher_no_match_answer_is_not_fallback(monkeypatch):
+    """성취기준 매칭: 모델의 '관련 없음'(K-HS-?) 응답은 성공, 목록에 없는 코드는 대체 응답으로 집계"""
+    from ai import standards_matcher
+
+    labels = {"site": "standards_matcher.match", "model": "gpt-4o"}
+    for code, outcome in (("K-HS-?", "success"), ("K-HS-999", "fallback")):
+        reply = SimpleNamespace(content=f'{{"matched_code": "{code}"}}', usage_metadata=None)
+        monkeypatch.setattr(standards_matcher, "invoke_llm", lambda llm, messages: reply)
+        before = LLM_CALLS.value(outcome=outcome, **labels)
+        assert standards_matcher.matcher._match_with_llm("질문", "답안")["code"] == "K-HS-?"
+        assert LLM_CALLS.value(outcome=outcome, **labels) == before + 1
@@ -0,0 +1,63 @@
+import json
+import logging
+import os
+
+from logging_config import request_id_var, setup_logging, shutdown_logging
+
+
+def test_request_id_header(client):
+    """요청 id: 클라이언트가 보낸 X-Request-ID 를 그대로 돌려주고, 없으면 새로 발급"""
+    response = client.get("/api/student/history?username=log_user", headers={"X-Request-ID": "abc123"})
+    assert response.headers["x-request-id"] == "abc123"
+
+    response = client.get("/api/student/history?username=log_user")
+    assert len(response.headers["x-request-id"]) == 16
+
+
+def test_json_file_log(tmp_path):
+    """파일 로그는 JSON 한 줄 (요청 id, extra 필드, 예외 포함)"""
+    setup_logging("INFO", str(tmp_path))
+    token = request_id_var.set("rid-1")
+    try:
+        logger = logging.getLogger("test.logging")
+        logger.debug("비활성 레벨")
+        logger.info("저장 %d건", 3, extra={"route": "/api/test"})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("처리 실패")
+    finally:
+        request_id_var.reset(token)
+        shutdown_logging()
+
+    with open(tmp_path / "app.log", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    saved = next(r for r in records if r["logger"] == "test.logging" and r["level"] == "INFO")
+    assert saved["message"] == "저장 3건"
+    assert saved["request_id"] == "rid-1"
+    assert saved["route"] == "/api/test"
+    assert not any(r["message"] == "비활성 레벨" for r in records)
+
+    with open(tmp_path / "error.log", encoding="utf-8") as f:
+        error = json.loads(f.readline())
+    assert "ValueError: boom" in error["exc_info"]
+
+    setup_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_DIR", "logs"))
+
+
+def test_api_log_only_has_request_log(tmp_path):
+    """api.log 에는 요청 로그만, api.* 모듈 로거는 루트 레벨을 따름"""
+    setup_logging("DEBUG", str(tmp_path))
+    try:
+        module_logger = logging.getLogger("api.portfolio_api")
+        assert module_logger.isEnabledFor(logging.DEBUG)
+        module_logger.warning("모듈 경고")
+        logging.getLogger("api.access").info("GET /api/test 200")
+    finally:
+        shutdown_logging()
+
+    with open(tmp_path / "api.log", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["message"] for r in records] == ["GET /api/test 200"]
+
+    setup_logging(os.getenv("LOG_LEVEL", "INFO"), os.getenv("LOG_DIR", "logs"))
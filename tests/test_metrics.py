@@ -0,0 +1,33 @@
+from utils.metrics import HTTP_REQUESTS, DB_QUERIES_PER_REQUEST
+
+
+def test_metrics_endpoint(client):
+    """요청 계측: 라우트 템플릿 라벨, 상태 코드, 요청당 DB 쿼리 수 기록"""
+    before = HTTP_REQUESTS.value(method="GET", route="/api/student/history", status="200")
+
+    response = client.get("/api/student/history?username=metrics_user")
+    assert response.status_code == 200
+
+    assert HTTP_REQUESTS.value(method="GET", route="/api/student/history", status="200") == before + 1
+    assert DB_QUERIES_PER_REQUEST.snapshot(route="/api/student/history")["sum"] >= 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/student/history",le="+Inf"}' in body
+    assert "# TYPE http_requests_in_progress gauge" in body
+    assert 'db_queries_total{route="/api/student/history"}' in body
+
+
+def test_counter_total_sums_matching_labels():
+    """Counter.total: 지정한 라벨만 맞추고 나머지 라벨은 합산"""
+    from utils.metrics import Counter
+
+    counter = Counter("test_total", "테스트", ("site", "outcome"))
+    counter.inc(site="a", outcome="success")
+    counter.inc(2, site="b", outcome="fallback")
+    counter.inc(site="a", outcome="fallback")
+    assert counter.total() == 4
+    assert counter.total(outcome="fallback") == 3
+    assert counter.total(site="a", outcome="fallback") == 1
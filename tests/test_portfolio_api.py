@@ -0,0 +1,62 @@
+import io
+import zipfile
+
+import pytest
+
+from main import app
+from api.portfolio_api import get_db as portfolio_get_db
+from models import User, UserRole, Class, ClassMember, Record, AchievementRecord
+
+
+@pytest.fixture(autouse=True)
+def portfolio_db(client, db):
+    """portfolio_api 전용 get_db도 테스트 DB로 교체"""
+    app.dependency_overrides[portfolio_get_db] = lambda: db
+    yield
+    app.dependency_overrides.pop(portfolio_get_db, None)
+
+
+def test_class_portfolio_export(client, db):
+    """학급 포트폴리오 일괄 내보내기 (ZIP 스트리밍 + 진행률) 테스트"""
+    teacher = User(username="export_teacher", name="교사", role=UserRole.TEACHER)
+    db.add(teacher)
+    db.commit()
+
+    cls = Class(name="내보내기반", teacher_id=teacher.id, grade=1, year=2025)
+    db.add(cls)
+    db.commit()
+
+    for i in range(3):
+        student = User(username=f"export_student{i}", name=f"학생{i}", role=UserRole.STUDENT)
+        db.add(student)
+        db.commit()
+        db.add(ClassMember(class_id=cls.id, student_id=student.id))
+        db.add(Record(username=student.username, question="진달래꽃의 주제", category="질문", score=70 + i))
+        db.add(AchievementRecord(username=student.username, subject="국어", standard_code="K-HS-1", score=85))
+    db.commit()
+
+    response = client.post("/api/portfolio/class-export", json={
+        "teacher_username": "export_teacher",
+        "class_name": "내보내기반"
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    names = sorted(archive.namelist())
+    assert names == [f"portfolio_export_student{i}.pdf" for i in range(3)]
+    assert archive.read(names[0]).startswith(b"%PDF")
+
+    export_id = response.headers["x-export-id"]
+    progress = client.get(f"/api/portfolio/class-export/{export_id}/progress").json()["data"]
+    assert progress["status"] == "done"
+    assert progress["completed"] == 3
+
+
+def test_class_portfolio_export_empty_class(client):
+    """대상 학생이 없으면 404"""
+    response = client.post("/api/portfolio/class-export", json={
+        "teacher_username": "nobody",
+        "class_name": "없는반"
+    })
+    assert response.status_code == 404
@@ -0,0 +1,53 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.profiler import ProfilingMiddleware, SamplingProfiler, read_collapsed, summarize
+
+
+def _busy_loop(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def _app(tmp_path) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, token="secret", directory=str(tmp_path), interval=0.001)
+
+    @app.get("/slow")
+    def slow():
+        _busy_loop(0.1)
+        return {"ok": True}
+
+    return app
+
+
+def test_profile_only_with_token(tmp_path):
+    """토큰이 일치하는 요청만 프로파일을 저장하고, 스택에 엔드포인트 함수가 잡힘"""
+    with TestClient(_app(tmp_path)) as client:
+        response = client.get("/slow")
+        assert "x-profile-file" not in response.headers
+
+        response = client.get("/slow", headers={"X-Profile": "wrong"})
+        assert "x-profile-file" not in response.headers
+        assert list(tmp_path.iterdir()) == []
+
+        response = client.get("/slow?__profile=secret")
+        assert response.status_code == 200
+        path = response.headers["x-profile-file"]
+
+    stacks = read_collapsed(path)
+    assert sum(stacks.values()) > 10
+    assert any("_busy_loop" in row["frame"] for row in summarize(stacks, top=5))
+
+
+def test_sampling_profiler_collects_stacks(tmp_path):
+    profiler = SamplingProfiler(interval=0.001).start()
+    _busy_loop(0.05)
+    profiler.stop()
+
+    assert profiler.samples > 0
+    path = profiler.write(str(tmp_path / "out.folded"))
+    assert any("_busy_loop" in stack for stack in read_collapsed(path))
@@ -0,0 +1,67 @@
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from ai.llm_telemetry import approx_tokens
+from ai.prompt_builder import PromptBuilder, fit_items, truncate_text
+
+
+ANSWER = "화자는 떠나는 임에게 진달래꽃을 뿌려 주며 이별의 슬픔을 절제하는 애이불비의 태도를 보인다. "
+
+
+def test_truncate_text_keeps_head_and_tail():
+    text = "서론입니다. " + ANSWER * 50 + "결론입니다."
+    short = truncate_text(text, 200)
+    assert approx_tokens(short) <= 200
+    assert short.startswith("서론입니다.") and short.endswith("결론입니다.")
+    assert "(중략)" in short
+    assert truncate_text("짧은 글", 200) == "짧은 글"
+
+
+def test_fit_items_drops_trailing_items():
+    kept, omitted = fit_items([ANSWER] * 10, 150, item_tokens=20)
+    assert 0 < len(kept) < 10 and omitted == 10 - len(kept)
+    assert all(approx_tokens(k) <= 20 for k in kept)
+
+
+def test_builder_enforces_order_and_budget():
+    with pytest.raises(ValueError):
+        PromptBuilder("test").dynamic("답안").static("지시문")
+
+    builder = (
+        PromptBuilder("test", budget=400)
+        .static("지시문입니다.")
+        .dynamic("짧은 문제", header="[문제]")
+        .dynamic(ANSWER * 30, header="[학생 답안]")
+    )
+    prompt = builder.build()
+    assert builder.truncated and builder.tokens <= 400
+    # 작은 부분은 줄이지 않고 남은 예산을 큰 부분에
+    assert "[문제]\n짧은 문제" in prompt
+
+    builder = (
+        PromptBuilder("test", budget=400)
+        .dynamic(ANSWER * 30, header="[문제]")
+        .dynamic(ANSWER * 10, header="[학생 답안]", keep=True)
+    )
+    prompt = builder.build()
+    assert builder.truncated and prompt.endswith("[학생 답안]\n" + ANSWER * 10)
+
+
+def test_grading_prompts_share_static_prefix():
+    """답안/문제가 달라도 지시문·채점 기준·출력 형식으로 시작하는 같은 접두부"""
+    from ai.essay_grader import GRADING_FORMAT, grade_with_gpt
+
+    response = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"score": 5})))], usage=None)
+    with mock.patch("ai.essay_grader.chat_completion", return_value=response) as completion:
+        grade_with_gpt("문제 1", "짧은 답안입니다.", max_score=10)
+        grade_with_gpt("다른 문제", ANSWER * 200, model_answer="모범 답안", max_score=100)
+
+    first, second = (c.kwargs["messages"][-1]["content"] for c in completion.call_args_list)
+    prefix = first[:first.index(GRADING_FORMAT) + len(GRADING_FORMAT)]
+    assert second.startswith(prefix)
+    # 예산을 넘는 답안도 채점 대상이므로 줄이지 않음
+    assert (ANSWER * 200).strip() in second and "(중략)" not in second
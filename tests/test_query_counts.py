@@ -0,0 +1,29 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_analytics import _context, _dashboard, _heatmap, build_database, find_query_growth, run
+
+
+def test_analytics_query_counts_do_not_grow_with_data(tmp_path):
+    """분석 함수의 쿼리 수가 데이터 크기/반 인원과 무관함 (N+1 회귀 방지)"""
+    results = run([300, 6000], repeat=1, directory=str(tmp_path), verbose=False, class_sizes=[5, 30])
+
+    assert find_query_growth(results) == []
+    for tier in results["tiers"].values():
+        assert tier["cases"]["analyze_student_achievement"]["queries"] <= 2
+        assert tier["cases"]["summarize_student_questions"]["queries"] == 1
+        assert tier["cases"]["analyze_wrong_answer_patterns"]["queries"] == 2
+    sizes = results["class_sizes"]
+    assert sizes["5"]["queries"] == sizes["30"]["queries"]
+
+
+def test_benchmark_context_matches_seeded_rows(tmp_path):
+    """벤치마크가 생성 데이터의 과목/성취기준으로 호출해 실제 행을 집계함"""
+    bind = create_engine(f"sqlite:///{build_database(6000, directory=str(tmp_path))}")
+    try:
+        ctx = _context(bind)
+        with Session(bind=bind) as db:
+            assert _dashboard(db, ctx)["achievement_by_standard"]
+            assert any(h["recent_attempts"] for h in _heatmap(db, ctx)["heatmap"])
+    finally:
+        bind.dispose()
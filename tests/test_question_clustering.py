@@ -0,0 +1,41 @@
+from ai.question_clustering import QuestionClusterer, cluster_questions, normalize_question
+
+
+def test_normalize_removes_particles_and_question_endings():
+    assert normalize_question("진달래꽃의 주제가 뭐야?") == normalize_question("진달래꽃 주제 알려줘") == "진달래꽃 주제"
+
+
+def test_similar_questions_share_cluster():
+    clusters = cluster_questions([
+        "진달래꽃의 주제가 뭐야?",
+        "진달래꽃 주제 알려줘",
+        "진달래꽃 주제는 무엇인가요",
+        "시조의 형식은 무엇인가요?",
+        "시조 형식이 뭐예요",
+        "광합성이란?",
+    ])
+    assert [c["count"] for c in clusters] == [3, 2, 1]
+    assert clusters[0]["text"] == "진달래꽃의 주제가 뭐야?"
+
+
+def test_clusters_are_bounded_across_chunks():
+    """청크를 넘겨도 같은 질문은 같은 군집, 군집 수는 max_clusters 이하"""
+    clusterer = QuestionClusterer(max_clusters=5, chunk_size=4)
+    clusterer.add_all(f"질문 주제 {i}번 설명해줘" for i in range(30))
+    clusterer.add_all(["진달래꽃 주제 알려줘"] * 3)
+    clusters = clusterer.clusters()
+    assert clusterer.total == 33 and sum(c["count"] for c in clusters) == 33
+    assert len(clusters) <= 5
+
+
+def test_memory_is_bounded_by_variants_and_max_keys(monkeypatch):
+    """원문은 군집별 표현에만, 정규화 문장 → 군집 기록은 MAX_KEYS 개까지만"""
+    monkeypatch.setattr("ai.question_clustering.MAX_KEYS", 10)
+    monkeypatch.setattr("ai.question_clustering.MAX_VARIANTS", 3)
+    clusterer = QuestionClusterer(max_clusters=2, chunk_size=4)
+    clusterer.add_all(f"질문 주제 {i}번 설명해줘" for i in range(40))
+    clusterer.add_all(["질문 주제 39번 설명해줘"] * 2)
+    clusters = clusterer.clusters()
+    assert len(clusterer._assigned) <= 10
+    assert all(len(raw) <= 3 for raw in clusterer._raw)
+    assert sum(c["count"] for c in clusters) == 42
@@ -1,6 +1,9 @@
 import pytest
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
+from api.student_api import ANSWER_PREVIEW_LENGTH
+
 def test_submit_answer_success(client):
     """학생 답안 제출 및 AI 분석 테스트"""
     # 1. 로그인/계정 생성을 위한 환경 (register 호출 생략 가능, submit-api 내부에서 자동 생성 로직 있음)
@@ -39,3 +42,74 @@ def test_get_history(client):
     assert "history" in data
     assert len(data["history"]) > 0
     assert data["history"][0]["answer"] == "테스트 답안입니다."
+
+
+def test_get_history_pagination(client, db):
+    """제출 이력 커서 페이지네이션 및 답안 미리보기 테스트"""
+    from models import User, UserRole, Submission, Feedback, MasteryLevel
+
+    user = User(username="history_paging_user", name="학생", role=UserRole.STUDENT)
+    db.add(user)
+    db.commit()
+
+    base = datetime(2025, 3, 1, 9, 0, 0)
+    for i in range(5):
+        sub = Submission(question_id=1, student_id=user.id, answer_text="가" * 300,
+                         submitted_at=base + timedelta(minutes=i))
+        db.add(sub)
+        db.commit()
+        db.add(Feedback(submission_id=sub.id, mastery_level=MasteryLevel.PASS, overall_comment=f"피드백 {i}"))
+    db.commit()
+
+    response = client.get("/api/student/history?username=history_paging_user&limit=3")
+    assert response.status_code == 200
+    first = response.json()
+    assert first["has_more"] is True
+    assert len(first["history"]) == 3
+    assert first["history"][0]["feedback"] == "피드백 4"
+    assert first["history"][0]["answer_truncated"] is True
+    assert len(first["history"][0]["answer"]) == ANSWER_PREVIEW_LENGTH
+
+    response = client.get("/api/student/history", params={
+        "username": "history_paging_user",
+        "limit": 3,
+        "cursor": first["next_cursor"],
+        "include_answer": True
+    })
+    second = response.json()
+    assert second["has_more"] is False
+    assert [h["feedback"] for h in second["history"]] == ["피드백 1", "피드백 0"]
+    assert second["history"][0]["answer"] == "가" * 300
+    assert second["history"][0]["answer_truncated"] is False
+
+
+def test_history_preview_of_exact_length_is_not_truncated(client, db):
+    """미리보기 길이와 같은 한글 답안은 잘리지 않은 것으로 표시 (바이트 수가 아닌 글자 수 기준)"""
+    from models import User, UserRole, Submission
+
+    user = User(username="history_exact_user", name="학생", role=UserRole.STUDENT)
+    db.add(user)
+    db.commit()
+    db.add(Submission(question_id=1, student_id=user.id, answer_text="가" * ANSWER_PREVIEW_LENGTH,
+                      submitted_at=datetime(2025, 3, 1, 9, 0, 0)))
+    db.commit()
+
+    item = client.get("/api/student/history?username=history_exact_user").json()["history"][0]
+    assert item["answer"] == "가" * ANSWER_PREVIEW_LENGTH
+    assert item["answer_truncated"] is False
+
+
+def test_submission_history_index_created_on_existing_table(tmp_path):
+    """인덱스 추가 전에 만든 DB 에도 시작 시(ensure_indexes) 제출 이력용 복합 인덱스 생성"""
+    from sqlalchemy import create_engine, inspect
+    from models import Base, ensure_indexes
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_submissions_student_id_submitted_at")
+
+    ensure_indexes(engine)
+    assert "ix_submissions_student_id_submitted_at" in {
+        i["name"] for i in inspect(engine).get_indexes("submissions")}
+    engine.dispose()
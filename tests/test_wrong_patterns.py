@@ -0,0 +1,54 @@
+from unittest import mock
+
+import numpy as np
+
+from ai.teacher_assistant import analyze_wrong_answer_patterns, stratified_sample
+from models import Feedback, MasteryLevel, Question, Submission
+
+
+PATTERNS = {"common_mistakes": ["근거 부족"], "misconceptions": [], "improvement_strategies": []}
+
+
+def _fail(db, question, answer):
+    submission = Submission(question_id=question.id, answer_text=answer)
+    db.add(submission)
+    db.flush()
+    db.add(Feedback(submission_id=submission.id, mastery_level=MasteryLevel.FAIL, overall_comment="근거를 드세요."))
+
+
+def test_stratified_sample_covers_small_strata():
+    strata = np.array([0] * 50 + [1] * 5 + [2] + [3] * 20)
+    keys = np.arange(len(strata))
+    picked = stratified_sample(strata, keys, 10)
+    assert np.bincount(strata[picked], minlength=4).tolist() == [5, 1, 1, 3]
+    # 입력 순서와 무관하게 같은 표본
+    shuffled = np.random.default_rng(0).permutation(len(strata))
+    again = shuffled[stratified_sample(strata[shuffled], keys[shuffled], 10)]
+    assert sorted(again) == sorted(picked)
+
+
+def test_wrong_patterns_sample_all_questions_and_reuse_cache(db):
+    common = Question(content="진달래꽃 화자의 태도", standard_code="10국05-01")
+    rare = Question(content="시조의 형식", standard_code="10국05-02")
+    db.add_all([common, rare])
+    db.flush()
+    for i in range(40):
+        _fail(db, common, f"오답 {i}")
+    _fail(db, rare, "3장 6구")
+    db.commit()
+    question_ids = [common.id, rare.id]
+
+    with mock.patch("ai.teacher_assistant.analyze_wrong_patterns_with_gpt", return_value=PATTERNS) as gpt:
+        result = analyze_wrong_answer_patterns(db, "teacher1", question_ids=question_ids, sample_size=10)
+        assert (result["analyzed_count"], result["wrong_count"], result["question_count"]) == (10, 41, 2)
+        samples = gpt.call_args.args[0]
+        assert {s["standard_code"] for s in samples} == {"10국05-01", "10국05-02"}
+
+        # 새 오답이 없으면 캐시, 새 오답이 채점되면 다시 분석
+        assert analyze_wrong_answer_patterns(db, "teacher1", question_ids=question_ids, sample_size=10) == result
+        assert gpt.call_count == 1
+        _fail(db, rare, "모름")
+        db.commit()
+        assert analyze_wrong_answer_patterns(db, "teacher1", question_ids=question_ids,
+                                             sample_size=10)["wrong_count"] == 42
+        assert gpt.call_count == 2
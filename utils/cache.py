@@ -0,0 +1,83 @@
+"""
+프로세스 내 캐시 유틸리티
+짧은 TTL로 자주 조회되는 집계 결과를 재사용
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+def get_ttl_from_env(name: str, default: float = 0) -> float:
+    """환경 변수에서 TTL(초) 읽기 (0 이하이면 캐시 비활성)"""
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class TTLCache:
+    """
+    만료 시간이 있는 스레드 안전 LRU 캐시
+
+    Args:
+        ttl: 항목 유지 시간(초), 0 이하이면 저장하지 않음
+        maxsize: 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 제거)
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """캐시 조회 (없거나 만료되었으면 None)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                self._data.pop(key, None)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float = None):
+        """캐시 저장 (ttl 지정 시 해당 항목만 다른 유지 시간 적용)"""
+        ttl = self.ttl if ttl is None else ttl
+        if not self.enabled or ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """캐시에 있으면 반환, 없으면 factory() 결과를 저장 후 반환"""
+        if not self.enabled:
+            return factory()
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable = None):
+        """특정 항목(또는 전체) 삭제"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
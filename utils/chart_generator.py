@@ -5,21 +5,13 @@
 import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')  # GUI 없이 사용
-from matplotlib import font_manager, rc
 import numpy as np
 from typing import Dict, List, Any
-import os
+from utils.font_manager import apply_plt_font
 
 
-# 한글 폰트 설정
-try:
-    font_path = "C:/Windows/Fonts/malgun.ttf"
-    if os.path.exists(font_path):
-        font_name = font_manager.FontProperties(fname=font_path).get_name()
-        rc('font', family=font_name)
-    plt.rcParams['axes.unicode_minus'] = False
-except:
-    pass
+# 한글 폰트 설정 (프로세스당 1회)
+apply_plt_font()
 
 
 def create_achievement_bar_chart(
@@ -0,0 +1,173 @@
+"""
+한글 폰트 관리 모듈
+프로세스당 한 번만 한글 TTF를 탐색하여 ReportLab / Matplotlib에 등록
+
+탐색 순서:
+1. 환경 변수 KOREAN_FONT_PATH (폰트 파일 경로 직접 지정)
+2. 환경 변수 FONT_SEARCH_PATH (os.pathsep 구분 디렉토리 목록)
+3. 프로젝트 번들 폰트 디렉토리 (static/fonts)
+4. OS별 시스템 폰트 디렉토리 (Windows / macOS / Linux)
+"""
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+ROOT = Path(__file__).resolve().parents[1]
+BUNDLED_FONT_DIR = ROOT / "static" / "fonts"
+
+# 우선순위 순 한글 TTF 파일명 (ReportLab은 TrueType 윤곽선 TTF만 지원)
+FONT_CANDIDATES = [
+    "malgun.ttf",
+    "NanumGothic.ttf",
+    "NanumBarunGothic.ttf",
+    "NotoSansKR-Regular.ttf",
+    "AppleGothic.ttf",
+    "UnDotum.ttf",
+]
+
+SYSTEM_FONT_DIRS = [
+    "C:/Windows/Fonts",
+    "/usr/share/fonts/truetype/nanum",
+    "/usr/share/fonts/truetype/noto",
+    "/usr/share/fonts/truetype/unfonts-core",
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    os.path.expanduser("~/.fonts"),
+    os.path.expanduser("~/.local/share/fonts"),
+    "/Library/Fonts",
+    "/System/Library/Fonts/Supplemental",
+]
+
+FALLBACK_PDF_FONT = "Helvetica"
+
+_lock = threading.Lock()
+_pdf_font_name: Optional[str] = None
+_plt_configured = False
+
+
+def get_font_search_path() -> List[str]:
+    """설정 및 OS 기본값을 반영한 폰트 탐색 디렉토리 목록"""
+    dirs = []
+    env_dirs = os.getenv("FONT_SEARCH_PATH", "")
+    dirs.extend(d for d in env_dirs.split(os.pathsep) if d)
+    dirs.append(str(BUNDLED_FONT_DIR))
+    dirs.extend(SYSTEM_FONT_DIRS)
+    return dirs
+
+
+def _find_in_dir(directory: str) -> Optional[str]:
+    """디렉토리(하위 포함)에서 우선순위가 가장 높은 후보 폰트 파일 검색"""
+    if not os.path.isdir(directory):
+        return None
+
+    found = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name in FONT_CANDIDATES and name not in found:
+                found[name] = os.path.join(root, name)
+
+    for name in FONT_CANDIDATES:
+        if name in found:
+            return found[name]
+    return None
+
+
+@lru_cache(maxsize=1)
+def find_korean_font() -> Optional[str]:
+    """
+    한글 TTF 폰트 경로 탐색 (결과는 프로세스 내 캐시)
+
+    Returns:
+        폰트 파일 경로 (없으면 None)
+    """
+    explicit = os.getenv("KOREAN_FONT_PATH")
+    if explicit and os.path.isfile(explicit):
+        return explicit
+
+    for directory in get_font_search_path():
+        path = _find_in_dir(directory)
+        if path:
+            return path
+    return None
+
+
+def register_pdf_font() -> str:
+    """
+    ReportLab에 한글 폰트를 등록하고 폰트 이름 반환 (최초 1회만 파싱)
+
+    TTF는 등록 시 한 번만 파싱되며, 문서에는 실제 사용된 글리프만
+    서브셋으로 임베딩되므로 PDF마다 전체 폰트를 다시 읽지 않습니다.
+
+    Returns:
+        등록된 폰트 이름 (실패 시 Helvetica)
+    """
+    global _pdf_font_name
+    if _pdf_font_name is not None:
+        return _pdf_font_name
+
+    with _lock:
+        if _pdf_font_name is not None:
+            return _pdf_font_name
+
+        font_name = FALLBACK_PDF_FONT
+        font_path = find_korean_font()
+        if font_path:
+            try:
+                from reportlab.pdfbase import pdfmetrics
+                from reportlab.pdfbase.ttfonts import TTFont
+
+                name = Path(font_path).stem
+                pdfmetrics.registerFont(TTFont(name, font_path))
+                font_name = name
+            except Exception as e:
+                logger.warning("한글 폰트 등록 실패 (%s): %s", font_path, e)
+
+        _pdf_font_name = font_name
+        return _pdf_font_name
+
+
+@lru_cache(maxsize=1)
+def get_plt_font_properties():
+    """
+    Matplotlib용 한글 FontProperties (캐시)
+
+    Returns:
+        FontProperties 객체 (폰트가 없으면 None)
+    """
+    font_path = find_korean_font()
+    if not font_path:
+        return None
+
+    from matplotlib import font_manager
+
+    try:
+        font_manager.fontManager.addfont(font_path)
+        return font_manager.FontProperties(fname=font_path)
+    except Exception as e:
+        logger.warning("Matplotlib 한글 폰트 로드 실패 (%s): %s", font_path, e)
+        return None
+
+
+def apply_plt_font():
+    """Matplotlib rcParams에 한글 폰트 적용 (최초 1회만 수행)"""
+    global _plt_configured
+    if _plt_configured:
+        return
+
+    with _lock:
+        if _plt_configured:
+            return
+
+        import matplotlib
+
+        props = get_plt_font_properties()
+        if props is not None:
+            matplotlib.rcParams["font.family"] = props.get_name()
+        matplotlib.rcParams["axes.unicode_minus"] = False
+        _plt_configured = True
@@ -0,0 +1,355 @@
+"""
+요청/DB 계측 모듈
+라우트별 지연 시간 히스토그램, 처리 중 요청 수, 상태 코드, 요청당 DB 쿼리 수/시간을 수집하여
+Prometheus 텍스트 형식(/metrics)으로 노출
+
+외부 라이브러리 없이 최소한의 Counter / Gauge / Histogram 만 구현합니다.
+"""
+import bisect
+import contextlib
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from logging_config import ACCESS_LOGGER, dropped_records, request_id_var
+
+
+# 기본 버킷(초): LLM 호출이 포함된 라우트를 위해 30/60초 구간까지 포함
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+UNMATCHED_ROUTE = "<unmatched>"
+
+access_logger = logging.getLogger(ACCESS_LOGGER)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def total(self, **labels) -> float:
+        """지정한 라벨이 일치하는 값의 합 (지정하지 않은 라벨은 모두 합산)"""
+        wanted = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self._lock:
+            return sum(v for key, v in self._values.items() if all(key[i] == value for i, value in wanted))
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """증감 가능한 게이지"""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램"""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # {labels: [버킷별 개수..., 합계, 전체 개수]}
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self, **labels) -> Optional[Dict[str, float]]:
+        """테스트/벤치마크용: 합계와 개수"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return None
+            return {"sum": state[-2], "count": state[-1]}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {_format_value(state[-1])}")
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{plain} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{plain} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """메트릭 등록 및 Prometheus 텍스트 출력"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP 요청 수", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간(초)", ("method", "route"))
+HTTP_IN_PROGRESS = REGISTRY.gauge(
+    "http_requests_in_progress", "처리 중인 HTTP 요청 수", ("method",))
+DB_QUERIES = REGISTRY.counter(
+    "db_queries_total", "DB 쿼리 수", ("route",))
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "db_query_duration_seconds", "요청당 DB 쿼리 총 실행 시간(초)", ("route",))
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "db_queries_per_request", "요청당 DB 쿼리 수", ("route",), buckets=QUERY_COUNT_BUCKETS)
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "로그 큐가 가득 차서 버려진 레코드 수")
+
+
+# ==================== SQLAlchemy 쿼리 계측 ====================
+
+class QueryStats:
+    """한 요청 동안 실행된 쿼리 수/시간"""
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+_query_stats: contextvars.ContextVar = contextvars.ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """현재 요청의 쿼리 통계 (요청 밖이면 None)"""
+    return _query_stats.get()
+
+
+@contextlib.contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    블록 안에서 실행된 쿼리 수/시간 집계 (install_query_hooks 필요)
+
+    예:
+        with track_queries() as stats:
+            analyze_student_achievement(db, "student1")
+        print(stats.count)
+    """
+    install_query_hooks()
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_time")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+
+_query_hooks_installed = False
+
+
+def install_query_hooks():
+    """모든 Engine 의 커서 실행 이벤트에 쿼리 계측 등록 (1회)"""
+    global _query_hooks_installed
+    if _query_hooks_installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _query_hooks_installed = True
+
+
+# ==================== ASGI 미들웨어 ====================
+
+def _route_label(scope) -> str:
+    """라우트 템플릿 경로 (/api/grading/detail/{grading_id}) - 경로 값별로 라벨이 늘어나지 않도록"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    return path or UNMATCHED_ROUTE
+
+
+def _request_id(scope) -> str:
+    """X-Request-ID 헤더 값 (없거나 너무 길면 새로 생성)"""
+    for name, value in scope.get("headers") or ():
+        if name == b"x-request-id" and 0 < len(value) <= 64:
+            return value.decode("latin-1")
+    return uuid.uuid4().hex[:16]
+
+
+class MetricsMiddleware:
+    """
+    요청별 지연 시간/상태 코드/처리 중 요청 수/DB 쿼리 통계를 기록하는 ASGI 미들웨어
+
+    요청 id 는 X-Request-ID 헤더 값(없으면 새로 생성)을 로그 레코드와 응답 헤더에 사용합니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        install_query_hooks()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "")
+        status = {"code": 500}
+        request_id = _request_id(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        request_token = request_id_var.set(request_id)
+        HTTP_IN_PROGRESS.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_PROGRESS.dec(method=method)
+            _query_stats.reset(token)
+
+            route = _route_label(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=status["code"])
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            DB_QUERIES.inc(stats.count, route=route)
+            DB_QUERY_DURATION.observe(stats.duration, route=route)
+            DB_QUERIES_PER_REQUEST.observe(stats.count, route=route)
+            access_logger.info(
+                "%s %s %s %.1fms queries=%d db=%.1fms",
+                method, scope.get("path", ""), status["code"], elapsed * 1000,
+                stats.count, stats.duration * 1000,
+                extra={"route": route, "status": status["code"], "duration_ms": round(elapsed * 1000, 1),
+                       "queries": stats.count}
+            )
+            request_id_var.reset(request_token)
+
+
+def render_metrics() -> str:
+    """Prometheus 텍스트 형식 출력"""
+    dropped = dropped_records() - LOG_RECORDS_DROPPED.value()
+    if dropped > 0:
+        LOG_RECORDS_DROPPED.inc(dropped)
+    return REGISTRY.render()
@@ -0,0 +1,85 @@
+"""
+키셋(커서) 페이지네이션 유틸리티
+(created_at, id) 기준 내림차순 목록을 OFFSET 없이 페이지 단위로 조회
+"""
+import base64
+import json
+from typing import Any, Dict, Optional
+
+from sqlalchemy import String, and_, false, or_, true, type_coerce
+
+from utils.exceptions import ValidationError
+
+
+MAX_PAGE_SIZE = 100
+
+
+def clamp_limit(limit: int, default: int = 10) -> int:
+    """페이지 크기를 1 ~ MAX_PAGE_SIZE 범위로 제한"""
+    if not limit or limit < 1:
+        return default
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """커서 데이터를 불투명(opaque) 문자열로 인코딩"""
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    커서 문자열 디코딩
+
+    Raises:
+        ValidationError: 커서 형식이 올바르지 않은 경우
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValidationError("잘못된 커서 값입니다.")
+    if not isinstance(payload, dict) or "ts" not in payload or "id" not in payload:
+        raise ValidationError("잘못된 커서 값입니다.")
+    return payload
+
+
+def raw_timestamp(column):
+    """
+    타임스탬프 컬럼을 DB 저장 형식 그대로 다루는 표현식
+
+    SQLite에서는 server_default(CURRENT_TIMESTAMP)와 파이썬 datetime의 저장 형식이
+    달라(마이크로초 유무) datetime으로 바인딩하면 같은 시각끼리 비교가 어긋납니다.
+    SQL 함수 없이 타입만 바꾸므로 인덱스는 그대로 사용됩니다.
+    """
+    return type_coerce(column, String)
+
+
+def timestamp_key(value) -> str:
+    """raw_timestamp()로 읽은 값을 정렬/커서용 문자열로 변환"""
+    return "" if value is None else str(value)
+
+
+def keyset_before(ts_column, id_column, cursor: Dict[str, Any], rank: int = 0, cursor_rank: int = 0):
+    """
+    (created_at, rank, id) 내림차순에서 커서 이후 행만 남기는 조건
+
+    여러 테이블을 병합하는 목록은 같은 시각의 행을 rank(소스 순위)로 구분합니다.
+
+    Args:
+        ts_column: 타임스탬프 컬럼
+        id_column: PK 컬럼
+        cursor: decode_cursor() 결과 (ts, id)
+        rank: 이 테이블의 소스 순위
+        cursor_rank: 커서가 가리키는 행의 소스 순위
+    """
+    ts = raw_timestamp(ts_column)
+    if rank < cursor_rank:
+        same_ts = true()
+    elif rank == cursor_rank:
+        same_ts = id_column < cursor["id"]
+    else:
+        same_ts = false()
+    return or_(ts < cursor["ts"], and_(ts == cursor["ts"], same_ts))
@@ -0,0 +1,323 @@
+"""
+PDF 스타일 레지스트리
+ParagraphStyle / TableStyle / 문서 템플릿 설정을 프로세스당 한 번만 생성하여 재사용
+"""
+from functools import lru_cache
+from typing import Dict
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, TableStyle
+
+from utils.font_manager import register_pdf_font
+
+
+KOREAN_FONT = register_pdf_font()
+
+# 성취도 색상 정의
+COLOR_PRIMARY = colors.HexColor('#9D4EDD') # 보라색 (Web UI 메인)
+COLOR_SECONDARY = colors.HexColor('#3F3D56') # 어두운 군청색
+COLOR_BG_LIGHT = colors.HexColor('#F8F4FF') # 연보라 배경 (Web UI 배경)
+COLOR_SUCCESS = colors.HexColor('#4CAF50')
+COLOR_WARNING = colors.HexColor('#FF9800')
+COLOR_DANGER = colors.HexColor('#F44336')
+COLOR_TEXT_MAIN = colors.HexColor('#2C3E50')
+COLOR_TEXT_SUB = colors.HexColor('#7F8C8D')
+
+# 문서 종류별 여백 (cm)
+DOC_MARGINS = {
+    "portfolio": 1.2,
+    "class_report": 1.5,
+}
+
+
+@lru_cache(maxsize=1)
+def _sample_styles():
+    """ReportLab 기본 스타일시트 (1회 생성)"""
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=1)
+def get_portfolio_styles() -> Dict[str, ParagraphStyle]:
+    """포트폴리오 PDF용 ParagraphStyle 모음"""
+    styles = _sample_styles()
+    return {
+        "header_title": ParagraphStyle(
+            'HeaderTitle',
+            parent=styles['Heading1'],
+            fontName=KOREAN_FONT,
+            fontSize=26,
+            textColor=colors.black,
+            alignment=TA_CENTER,
+            spaceAfter=5
+        ),
+        "header_subtitle": ParagraphStyle(
+            'HeaderSub',
+            parent=styles['Normal'],
+            fontName=KOREAN_FONT,
+            fontSize=11,
+            textColor=colors.grey,
+            alignment=TA_CENTER,
+            spaceAfter=5
+        ),
+        "section_title": ParagraphStyle(
+            'SectionTitle',
+            parent=styles['Heading2'],
+            fontName=KOREAN_FONT,
+            fontSize=14,
+            textColor=COLOR_SECONDARY,
+            spaceBefore=15,
+            spaceAfter=10,
+            leading=16
+        ),
+        "stat_val": ParagraphStyle(
+            'StatVal',
+            fontName=KOREAN_FONT,
+            fontSize=18,
+            textColor=COLOR_PRIMARY,
+            alignment=TA_CENTER,
+            bold=True,
+            leading=22
+        ),
+        "stat_label": ParagraphStyle(
+            'StatLabel',
+            fontName=KOREAN_FONT,
+            fontSize=9,
+            textColor=COLOR_TEXT_SUB,
+            alignment=TA_CENTER
+        ),
+        "card_header": ParagraphStyle(
+            'CardHeader',
+            fontName=KOREAN_FONT,
+            fontSize=12,
+            textColor=COLOR_TEXT_MAIN,
+            bold=True,
+            leading=14
+        ),
+        "normal": ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontName=KOREAN_FONT,
+            fontSize=10,
+            leading=15,
+            textColor=COLOR_TEXT_MAIN
+        ),
+        "small_text": ParagraphStyle(
+            'SmallText',
+            fontName=KOREAN_FONT,
+            fontSize=9,
+            textColor=COLOR_TEXT_SUB,
+            leading=12
+        ),
+    }
+
+
+@lru_cache(maxsize=1)
+def get_class_report_styles() -> Dict[str, ParagraphStyle]:
+    """학급 리포트 PDF용 ParagraphStyle 모음"""
+    styles = _sample_styles()
+    return {
+        "header_title": ParagraphStyle(
+            'HeaderTitle',
+            parent=styles['Heading1'],
+            fontName=KOREAN_FONT,
+            fontSize=24,
+            textColor=colors.black,
+            alignment=TA_CENTER,
+            spaceAfter=10
+        ),
+        "header_subtitle": ParagraphStyle(
+            'HeaderSub',
+            parent=styles['Normal'],
+            fontName=KOREAN_FONT,
+            fontSize=12,
+            textColor=colors.grey,
+            alignment=TA_CENTER,
+            spaceAfter=20
+        ),
+        "card_title": ParagraphStyle(
+            'CardTitle',
+            parent=styles['Heading3'],
+            fontName=KOREAN_FONT,
+            fontSize=14,
+            textColor=COLOR_SECONDARY,
+            spaceBefore=10,
+            spaceAfter=15
+        ),
+        "stat_val": ParagraphStyle(
+            'StatVal',
+            fontName=KOREAN_FONT,
+            fontSize=20,
+            textColor=COLOR_PRIMARY,
+            alignment=TA_CENTER,
+            bold=True
+        ),
+        "stat_label": ParagraphStyle(
+            'StatLabel',
+            fontName=KOREAN_FONT,
+            fontSize=10,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        ),
+        "normal": ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontName=KOREAN_FONT,
+            fontSize=10,
+            leading=15
+        ),
+    }
+
+
+@lru_cache(maxsize=1)
+def get_exam_styles() -> Dict[str, ParagraphStyle]:
+    """모의고사/정답지 PDF용 ParagraphStyle 모음"""
+    styles = _sample_styles()
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontName=KOREAN_FONT,
+            fontSize=20,
+            textColor=colors.HexColor('#2C3E50'),
+            spaceAfter=20,
+            alignment=TA_CENTER
+        ),
+        "question": ParagraphStyle(
+            'QuestionStyle',
+            parent=styles['Normal'],
+            fontName=KOREAN_FONT,
+            fontSize=12,
+            leading=18,
+            spaceAfter=10
+        ),
+        "normal": ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontName=KOREAN_FONT,
+            fontSize=11,
+            leading=16
+        ),
+    }
+
+
+# ==================== 공용 TableStyle ====================
+# Table.setStyle()은 명령 목록을 복사하므로 여러 표가 같은 객체를 공유해도 안전합니다.
+
+PORTFOLIO_HEADER_TABLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), COLOR_BG_LIGHT),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 25),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 25),
+    ('ROUNDEDCORNERS', [12, 12, 12, 12]), # ReportLab 최신 버전 지원 확인 필요, 안되면 무시됨
+])
+
+CENTERED_CONTAINER_TABLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+STAT_BOX_TABLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.white),
+    ('BOX', (0, 0), (-1, -1), 0.5, colors.lightgrey), # 테두리
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ROUNDEDCORNERS', [8, 8, 8, 8]),
+])
+
+CHART_ROW_TABLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BACKGROUND', (0, 0), (0, 0), colors.white),
+    ('BACKGROUND', (1, 0), (1, 0), colors.white),
+    ('BOX', (0, 0), (0, 0), 0.5, colors.lightgrey),
+    ('BOX', (1, 0), (1, 0), 0.5, colors.lightgrey),
+    ('LEFTPADDING', (0, 0), (-1, -1), 5),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 5),
+    ('TOPPADDING', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+])
+
+STRENGTH_WEAKNESS_TABLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('BACKGROUND', (0, 0), (0, 0), colors.white),
+    ('BACKGROUND', (1, 0), (1, 0), colors.white),
+    ('BOX', (0, 0), (0, 0), 0.5, colors.lightgrey),
+    ('BOX', (1, 0), (1, 0), 0.5, colors.lightgrey),
+    ('LEFTPADDING', (0, 0), (-1, -1), 15),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+    ('TOPPADDING', (0, 0), (-1, -1), 15),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+])
+
+PORTFOLIO_HISTORY_TABLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), COLOR_BG_LIGHT), # 헤더 배경
+    ('TEXTCOLOR', (0, 0), (-1, 0), COLOR_SECONDARY),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), KOREAN_FONT),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ('TOPPADDING', (0, 0), (-1, 0), 10),
+
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey), # 전체 그리드
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+    # 데이터 행 스타일
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke]), # 줄무늬
+])
+
+CLASS_HEADER_TABLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), COLOR_BG_LIGHT),
+    ('LEFTPADDING', (0, 0), (-1, -1), 20),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 20),
+    ('TOPPADDING', (0, 0), (-1, -1), 20),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+    ('ROUNDEDCORNERS', [15, 15, 15, 15]),
+])
+
+CLASS_STATS_TABLE = TableStyle([
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, COLOR_BG_LIGHT),
+    ('BOX', (0, 0), (-1, -1), 1, COLOR_BG_LIGHT),
+])
+
+CLASS_STUDENT_TABLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), COLOR_BG_LIGHT),
+    ('TEXTCOLOR', (0, 0), (-1, 0), COLOR_SECONDARY),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), KOREAN_FONT),
+    ('FONTSIZE', (0, 0), (-1, 0), 11),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+    ('TOPPADDING', (0, 0), (-1, 0), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+
+def new_document(output, kind: str = None) -> SimpleDocTemplate:
+    """
+    문서 종류에 맞는 여백이 적용된 A4 문서 템플릿 생성
+
+    Args:
+        output: 출력 파일 경로 또는 파일 객체 (BytesIO 등)
+        kind: 문서 종류 (portfolio, class_report / None이면 기본 여백)
+    """
+    if kind is None:
+        return SimpleDocTemplate(output, pagesize=A4)
+
+    margin = DOC_MARGINS[kind] * cm
+    return SimpleDocTemplate(
+        output,
+        pagesize=A4,
+        rightMargin=margin,
+        leftMargin=margin,
+        topMargin=margin,
+        bottomMargin=margin
+    )
@@ -2,30 +2,21 @@
 PDF 생성 유틸리티
 포트폴리오, 리포트, 모의고사 PDF 생성
 """
-from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.platypus import Table, Paragraph, Spacer, PageBreak
 from typing import Dict, Any
 import os
 from datetime import datetime
-
-
-# 한글 폰트 등록 (시스템에 설치된 폰트 사용)
-# Windows의 경우 맑은 고딕 사용
-try:
-    font_path = "C:/Windows/Fonts/malgun.ttf"
-    if os.path.exists(font_path):
-        pdfmetrics.registerFont(TTFont('Malgun', font_path))
-        KOREAN_FONT = 'Malgun'
-    else:
-        KOREAN_FONT = 'Helvetica'  # 폴백
-except:
-    KOREAN_FONT = 'Helvetica'
+from utils.font_manager import apply_plt_font
+from utils.pdf_styles import (
+    KOREAN_FONT,
+    COLOR_PRIMARY, COLOR_SECONDARY, COLOR_BG_LIGHT, COLOR_SUCCESS,
+    COLOR_WARNING, COLOR_DANGER, COLOR_TEXT_MAIN, COLOR_TEXT_SUB,
+    get_portfolio_styles, get_class_report_styles, get_exam_styles,
+    new_document,
+)
+from utils import pdf_styles
 
 
 # OpenMP 에러 방지 및 Matplotlib 백엔드 설정
@@ -37,43 +28,9 @@ import io
 import numpy as np
 from reportlab.platypus import Image as RLImage
 
-# 성취도 색상 정의
-COLOR_PRIMARY = colors.HexColor('#9D4EDD') # 보라색 (Web UI 메인)
-COLOR_SECONDARY = colors.HexColor('#3F3D56') # 어두운 군청색
-COLOR_BG_LIGHT = colors.HexColor('#F8F4FF') # 연보라 배경 (Web UI 배경)
-COLOR_SUCCESS = colors.HexColor('#4CAF50') 
-COLOR_WARNING = colors.HexColor('#FF9800') 
-COLOR_DANGER = colors.HexColor('#F44336') 
-COLOR_TEXT_MAIN = colors.HexColor('#2C3E50')
-COLOR_TEXT_SUB = colors.HexColor('#7F8C8D')
-
-def _get_plt_font():
-    """matplotlib을 위한 한글 폰트 설정 (맑은 고딕 우선)"""
-    from matplotlib import font_manager, rc
-    import platform
-    
-    font_name = None
-    system = platform.system()
-    
-    if system == 'Windows':
-        if os.path.exists("C:/Windows/Fonts/malgun.ttf"):
-            font_name = font_manager.FontProperties(fname="C:/Windows/Fonts/malgun.ttf").get_name()
-    elif system == 'Darwin': # Mac
-        font_name = 'AppleGothic'
-    elif system == 'Linux':
-        font_name = 'NanumGothic'
-        
-    if font_name:
-        rc('font', family=font_name)
-    else:
-        # 폰트 없을 경우 기본 설정 유지 (깨질 수 있음)
-        pass 
-        
-    rc('axes', unicode_minus=False)
-
 def create_trend_chart(trend_data):
     """성취도 추이 선 그래프 생성"""
-    _get_plt_font()
+    apply_plt_font()
     labels = [d['label'] for d in trend_data]
     scores = [d['score'] for d in trend_data]
     
@@ -104,7 +61,7 @@ def create_trend_chart(trend_data):
 
 def create_radar_chart(area_scores):
     """영역별 성취도 레이더 차트 생성"""
-    _get_plt_font()
+    apply_plt_font()
     if not area_scores:
         area_scores = {"데이터 없음": 0}
         
@@ -145,97 +102,26 @@ def create_radar_chart(area_scores):
     img_data.seek(0)
     return RLImage(img_data, width=7*cm, height=7*cm)
 
-def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path: str):
+def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path):
     """
     고급스러운 디자인의 포트폴리오 PDF 생성 (Web UI 매칭)
+
+    Args:
+        portfolio_data: 포트폴리오 데이터
+        output_path: 출력 파일 경로 또는 파일 객체
     """
-    doc = SimpleDocTemplate(
-        output_path, 
-        pagesize=A4,
-        rightMargin=1.2*cm,
-        leftMargin=1.2*cm,
-        topMargin=1.2*cm,
-        bottomMargin=1.2*cm
-    )
+    doc = new_document(output_path, "portfolio")
     story = []
-    
-    styles = getSampleStyleSheet()
-    
-    # 커스텀 스타일 정의
-    header_title_style = ParagraphStyle(
-        'HeaderTitle',
-        parent=styles['Heading1'],
-        fontName=KOREAN_FONT,
-        fontSize=26,
-        textColor=colors.black,
-        alignment=TA_CENTER,
-        spaceAfter=5
-    )
-    
-    header_subtitle_style = ParagraphStyle(
-        'HeaderSub',
-        parent=styles['Normal'],
-        fontName=KOREAN_FONT,
-        fontSize=11,
-        textColor=colors.grey,
-        alignment=TA_CENTER,
-        spaceAfter=5
-    )
-    
-    section_title_style = ParagraphStyle(
-        'SectionTitle',
-        parent=styles['Heading2'],
-        fontName=KOREAN_FONT,
-        fontSize=14,
-        textColor=COLOR_SECONDARY,
-        spaceBefore=15,
-        spaceAfter=10,
-        leading=16
-    )
-    
-    stat_val_style = ParagraphStyle(
-        'StatVal',
-        fontName=KOREAN_FONT,
-        fontSize=18,
-        textColor=COLOR_PRIMARY,
-        alignment=TA_CENTER,
-        bold=True,
-        leading=22
-    )
-    
-    stat_label_style = ParagraphStyle(
-        'StatLabel',
-        fontName=KOREAN_FONT,
-        fontSize=9,
-        textColor=COLOR_TEXT_SUB,
-        alignment=TA_CENTER
-    )
-    
-    card_header_style = ParagraphStyle(
-        'CardHeader',
-        fontName=KOREAN_FONT,
-        fontSize=12,
-        textColor=COLOR_TEXT_MAIN,
-        bold=True,
-        leading=14
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontName=KOREAN_FONT,
-        fontSize=10,
-        leading=15,
-        textColor=COLOR_TEXT_MAIN
-    )
-    
-    small_text_style = ParagraphStyle(
-        'SmallText',
-        fontName=KOREAN_FONT,
-        fontSize=9,
-        textColor=COLOR_TEXT_SUB,
-        leading=12
-    )
+
+    # 사전 생성된 스타일 사용 (utils.pdf_styles)
+    st = get_portfolio_styles()
+    header_title_style = st["header_title"]
+    header_subtitle_style = st["header_subtitle"]
+    section_title_style = st["section_title"]
+    stat_val_style = st["stat_val"]
+    stat_label_style = st["stat_label"]
+    normal_style = st["normal"]
+    small_text_style = st["small_text"]
 
     # ================= 1. 헤더 섹션 =================
     header_content = [
@@ -244,14 +130,7 @@ def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path: str):
     ]
     
     header_table = Table(header_content, colWidths=[18.5*cm])
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), COLOR_BG_LIGHT),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('TOPPADDING', (0, 0), (-1, -1), 25),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 25),
-        ('ROUNDEDCORNERS', [12, 12, 12, 12]), # ReportLab 최신 버전 지원 확인 필요, 안되면 무시됨
-    ]))
+    header_table.setStyle(pdf_styles.PORTFOLIO_HEADER_TABLE)
     story.append(header_table)
     story.append(Spacer(1, 0.8*cm))
 
@@ -272,21 +151,11 @@ def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path: str):
     ]]
     
     stats_container = Table(stats_content, colWidths=[6.2*cm, 6.2*cm, 6.2*cm])
-    stats_container.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
+    stats_container.setStyle(pdf_styles.CENTERED_CONTAINER_TABLE)
     
     # 내부 박스 스타일링 (각각의 Table에 대해)
-    for i in range(3):
-        inner_table = stats_content[0][i]
-        inner_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.white),
-            ('BOX', (0, 0), (-1, -1), 0.5, colors.lightgrey), # 테두리
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ROUNDEDCORNERS', [8, 8, 8, 8]),
-        ]))
+    for inner_table in stats_content[0]:
+        inner_table.setStyle(pdf_styles.STAT_BOX_TABLE)
         
     story.append(stats_container)
     story.append(Spacer(1, 0.8*cm))
@@ -306,18 +175,7 @@ def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path: str):
     charts_row = Table([
         [chart1, chart2]
     ], colWidths=[9.25*cm, 9.25*cm])
-    charts_row.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BACKGROUND', (0, 0), (0, 0), colors.white),
-        ('BACKGROUND', (1, 0), (1, 0), colors.white),
-        ('BOX', (0, 0), (0, 0), 0.5, colors.lightgrey),
-        ('BOX', (1, 0), (1, 0), 0.5, colors.lightgrey),
-        ('LEFTPADDING', (0, 0), (-1, -1), 5),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    charts_row.setStyle(pdf_styles.CHART_ROW_TABLE)
     story.append(charts_row)
     story.append(Spacer(1, 0.8*cm))
 
@@ -356,17 +214,7 @@ def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path: str):
         [strong_items, weak_items]
     ], colWidths=[9.25*cm, 9.25*cm])
     
-    sw_content.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('BACKGROUND', (0, 0), (0, 0), colors.white),
-        ('BACKGROUND', (1, 0), (1, 0), colors.white),
-        ('BOX', (0, 0), (0, 0), 0.5, colors.lightgrey),
-        ('BOX', (1, 0), (1, 0), 0.5, colors.lightgrey),
-        ('LEFTPADDING', (0, 0), (-1, -1), 15),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-        ('TOPPADDING', (0, 0), (-1, -1), 15),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-    ]))
+    sw_content.setStyle(pdf_styles.STRENGTH_WEAKNESS_TABLE)
     story.append(sw_content)
     story.append(Spacer(1, 0.8*cm))
 
@@ -394,24 +242,7 @@ def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path: str):
 
     # 테이블 너비 조정
     h_table = Table(history_data, colWidths=[3*cm, 2.5*cm, 10*cm, 3*cm])
-    
-    h_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), COLOR_BG_LIGHT), # 헤더 배경
-        ('TEXTCOLOR', (0, 0), (-1, 0), COLOR_SECONDARY),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), KOREAN_FONT),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey), # 전체 그리드
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        
-        # 데이터 행 스타일
-        ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.whitesmoke]), # 줄무늬
-    ]))
+    h_table.setStyle(pdf_styles.PORTFOLIO_HISTORY_TABLE)
     story.append(h_table)
     
     # PDF 생성
@@ -421,7 +252,7 @@ def create_portfolio_pdf(portfolio_data: Dict[str, Any], output_path: str):
 
 def create_distribution_chart(student_scores):
     """학급성취도 분포 차트 생성 (바 차트)"""
-    _get_plt_font()
+    apply_plt_font()
     if not student_scores:
         student_scores = [{"username": "데이터 없음", "average_score": 0}]
         
@@ -448,77 +279,25 @@ def create_distribution_chart(student_scores):
     img_data.seek(0)
     return RLImage(img_data, width=15*cm, height=7*cm)
 
-def create_class_report_pdf(report_data: Dict[str, Any], output_path: str):
+def create_class_report_pdf(report_data: Dict[str, Any], output_path):
     """
     고급스러운 디자인의 학급 성취도 리포트 PDF 생성
+
+    Args:
+        report_data: 리포트 데이터
+        output_path: 출력 파일 경로 또는 파일 객체
     """
-    doc = SimpleDocTemplate(
-        output_path, 
-        pagesize=A4,
-        rightMargin=1.5*cm,
-        leftMargin=1.5*cm,
-        topMargin=1.5*cm,
-        bottomMargin=1.5*cm
-    )
+    doc = new_document(output_path, "class_report")
     story = []
-    
-    styles = getSampleStyleSheet()
-    
-    # 커스텀 스타일 정의
-    header_title_style = ParagraphStyle(
-        'HeaderTitle',
-        parent=styles['Heading1'],
-        fontName=KOREAN_FONT,
-        fontSize=24,
-        textColor=colors.black,
-        alignment=TA_CENTER,
-        spaceAfter=10
-    )
-    
-    header_subtitle_style = ParagraphStyle(
-        'HeaderSub',
-        parent=styles['Normal'],
-        fontName=KOREAN_FONT,
-        fontSize=12,
-        textColor=colors.grey,
-        alignment=TA_CENTER,
-        spaceAfter=20
-    )
-    
-    card_title_style = ParagraphStyle(
-        'CardTitle',
-        parent=styles['Heading3'],
-        fontName=KOREAN_FONT,
-        fontSize=14,
-        textColor=COLOR_SECONDARY,
-        spaceBefore=10,
-        spaceAfter=15
-    )
-    
-    stat_val_style = ParagraphStyle(
-        'StatVal',
-        fontName=KOREAN_FONT,
-        fontSize=20,
-        textColor=COLOR_PRIMARY,
-        alignment=TA_CENTER,
-        bold=True
-    )
-    
-    stat_label_style = ParagraphStyle(
-        'StatLabel',
-        fontName=KOREAN_FONT,
-        fontSize=10,
-        textColor=colors.grey,
-        alignment=TA_CENTER
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontName=KOREAN_FONT,
-        fontSize=10,
-        leading=15
-    )
+
+    # 사전 생성된 스타일 사용 (utils.pdf_styles)
+    st = get_class_report_styles()
+    header_title_style = st["header_title"]
+    header_subtitle_style = st["header_subtitle"]
+    card_title_style = st["card_title"]
+    stat_val_style = st["stat_val"]
+    stat_label_style = st["stat_label"]
+    normal_style = st["normal"]
 
     # 1. 헤더 섹션
     header_table = Table([
@@ -526,14 +305,7 @@ def create_class_report_pdf(report_data: Dict[str, Any], output_path: str):
         [Paragraph(f"과목: {report_data['subject']} | 생성일: {datetime.now().strftime('%Y-%m-%d')}", header_subtitle_style)]
     ], colWidths=[18*cm])
     
-    header_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), COLOR_BG_LIGHT),
-        ('LEFTPADDING', (0, 0), (-1, -1), 20),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 20),
-        ('TOPPADDING', (0, 0), (-1, -1), 20),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('ROUNDEDCORNERS', [15, 15, 15, 15]),
-    ]))
+    header_table.setStyle(pdf_styles.CLASS_HEADER_TABLE)
     story.append(header_table)
     story.append(Spacer(1, 0.5*cm))
 
@@ -546,12 +318,7 @@ def create_class_report_pdf(report_data: Dict[str, Any], output_path: str):
     ]]
     
     stats_table = Table(stats_data, colWidths=[9*cm, 9*cm])
-    stats_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('GRID', (0, 0), (-1, -1), 0.5, COLOR_BG_LIGHT),
-        ('BOX', (0, 0), (-1, -1), 1, COLOR_BG_LIGHT),
-    ]))
+    stats_table.setStyle(pdf_styles.CLASS_STATS_TABLE)
     story.append(stats_table)
     story.append(Spacer(1, 1*cm))
 
@@ -569,8 +336,10 @@ def create_class_report_pdf(report_data: Dict[str, Any], output_path: str):
     # 5. 학생별 상세 성취도 테이블
     story.append(Paragraph("👥 학생별 성취도 상세", card_title_style))
     
+    # 성취 수준 셀은 Paragraph 대신 행 단위 TEXTCOLOR 명령으로 색상 지정 (학생 수가 많을 때 파싱 비용 절감)
     history_data = [["학생명", "주요 취약 영역", "평균 점수", "성취 수준"]]
-    for s in report_data.get('student_scores', []):
+    level_colors = []
+    for row_idx, s in enumerate(report_data.get('student_scores', []), start=1):
         score = s.get('average_score', 0)
         score_color = COLOR_SUCCESS if score >= 80 else (COLOR_WARNING if score >= 60 else COLOR_DANGER)
         level = "성취" if score >= 80 else ("보통" if score >= 60 else "노력요함")
@@ -579,21 +348,14 @@ def create_class_report_pdf(report_data: Dict[str, Any], output_path: str):
             s.get('username', ''),
             "분석 중...",
             f"{score}점",
-            Paragraph(f"<font color='{score_color.hexval()}'>{level}</font>", normal_style)
+            level
         ])
+        level_colors.append(('TEXTCOLOR', (3, row_idx), (3, row_idx), score_color))
     
     history_table = Table(history_data, colWidths=[4*cm, 7*cm, 4*cm, 3*cm])
-    history_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), COLOR_BG_LIGHT),
-        ('TEXTCOLOR', (0, 0), (-1, 0), COLOR_SECONDARY),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, -1), KOREAN_FONT),
-        ('FONTSIZE', (0, 0), (-1, 0), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
-        ('TOPPADDING', (0, 0), (-1, 0), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-    ]))
+    history_table.setStyle(pdf_styles.CLASS_STUDENT_TABLE)
+    if level_colors:
+        history_table.setStyle(level_colors)
     story.append(history_table)
 
     # PDF 생성
@@ -609,28 +371,12 @@ def create_mock_exam_pdf(exam_data: Dict[str, Any], output_path: str):
         exam_data: 모의고사 데이터
         output_path: 출력 파일 경로
     """
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
+    doc = new_document(output_path)
     story = []
     
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontName=KOREAN_FONT,
-        fontSize=20,
-        textColor=colors.HexColor('#2C3E50'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    
-    question_style = ParagraphStyle(
-        'QuestionStyle',
-        parent=styles['Normal'],
-        fontName=KOREAN_FONT,
-        fontSize=12,
-        leading=18,
-        spaceAfter=10
-    )
+    st = get_exam_styles()
+    title_style = st["title"]
+    question_style = st["question"]
     
     # 제목
     story.append(Paragraph(exam_data['exam_name'], title_style))
@@ -659,27 +405,12 @@ def create_answer_sheet_pdf(exam_data: Dict[str, Any], output_path: str):
         exam_data: 모의고사 데이터
         output_path: 출력 파일 경로
     """
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
+    doc = new_document(output_path)
     story = []
     
-    styles = getSampleStyleSheet()
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontName=KOREAN_FONT,
-        fontSize=20,
-        textColor=colors.HexColor('#2C3E50'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontName=KOREAN_FONT,
-        fontSize=11,
-        leading=16
-    )
+    st = get_exam_styles()
+    title_style = st["title"]
+    normal_style = st["normal"]
     
     # 제목
     story.append(Paragraph(f"{exam_data['exam_name']} - 정답 및 해설", title_style))
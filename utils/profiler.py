@@ -0,0 +1,324 @@
+"""
+샘플링 프로파일러
+
+sys._current_frames() 로 일정 간격마다 모든 스레드의 호출 스택을 수집해
+collapsed stack 형식("a;b;c 횟수", flamegraph.pl / speedscope 입력 형식)으로 저장합니다.
+외부 패키지 없이 동작하며, 프로파일링하지 않는 요청에는 헤더 확인 외의 비용이 없습니다.
+
+- 요청 단위: PROFILE_TOKEN 을 설정하고 X-Profile 헤더(또는 ?__profile= 쿼리)에 같은 값을 보내면
+  그 요청 동안만 PROFILE_INTERVAL_MS 간격으로 샘플링해 {LOG_DIR}/profiles/ 에 저장
+  (파일 경로는 응답 헤더 X-Profile-File)
+- 상시 모드: PROFILE_CONTINUOUS_HZ > 0 이면 낮은 빈도로 계속 샘플링해 모든 요청의 hot stack 을 누적,
+  PROFILE_FLUSH_SEC 마다 {LOG_DIR}/profiles/continuous.folded 에 덮어씀
+
+요청 처리가 이벤트 루프/스레드풀 스레드를 오가므로 스레드를 구분하지 않고 전체 스레드를 샘플링하며,
+대기 중(idle)인 스택은 제외합니다. 동시에 처리 중인 다른 요청의 스택이 섞일 수 있습니다.
+
+요약 보기:
+    python -m utils.profiler logs/profiles/continuous.folded --top 20
+"""
+import argparse
+import atexit
+import hmac
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from logging_config import get_request_id
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "__profile"
+OTHER_STACK = "[other]"
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+# 대기 상태로 보는 최상위 프레임 (파일명, 함수명)
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("selectors.py", "poll"),
+}
+
+# 프로파일러 샘플링 스레드 (자기 자신은 샘플링하지 않음)
+_sampler_threads: set = set()
+
+
+def _frame_label(code) -> str:
+    """함수 (파일:시작 줄) - 실행 중인 줄이 아니라 함수 시작 줄을 써서 같은 함수의 샘플을 합침"""
+    path = code.co_filename
+    if path.startswith(_ROOT):
+        path = path[len(_ROOT):]
+    elif "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[-1]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse(frame, max_depth: int = 128) -> Optional[str]:
+    """
+    프레임을 collapsed stack 문자열로 변환 (바깥 → 안쪽 순서)
+
+    Returns:
+        "main;handler;query" 형식, 대기 중인 스택이면 None
+    """
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES:
+        return None
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+class SamplingProfiler:
+    """
+    백그라운드 스레드에서 interval 초마다 스택을 수집하는 프로파일러
+
+    Args:
+        interval: 샘플링 간격(초)
+        max_stacks: 보관할 서로 다른 스택 수 (넘으면 [other] 로 집계)
+    """
+
+    def __init__(self, interval: float = 0.005, max_stacks: int = 20000):
+        self.interval = interval
+        self.max_stacks = max_stacks
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        ident = threading.get_ident()
+        _sampler_threads.add(ident)
+        try:
+            while not self._stop.wait(self.interval):
+                self.sample()
+        finally:
+            _sampler_threads.discard(ident)
+
+    def sample(self):
+        """모든 스레드의 현재 스택 1회 수집"""
+        frames = sys._current_frames()
+        with self._lock:
+            self.samples += 1
+            for thread_id, frame in frames.items():
+                if thread_id in _sampler_threads:
+                    continue
+                stack = collapse(frame)
+                if stack is None:
+                    continue
+                if stack not in self.stacks and len(self.stacks) >= self.max_stacks:
+                    stack = OTHER_STACK
+                self.stacks[stack] += 1
+
+    def collapsed(self) -> str:
+        """collapsed stack 텍스트 (많이 잡힌 스택부터)"""
+        with self._lock:
+            items = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def write(self, path: str) -> str:
+        """collapsed stack 파일 저장 (임시 파일에 쓴 뒤 교체)"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.collapsed())
+        os.replace(tmp, path)
+        return path
+
+
+def summarize(stacks: Dict[str, int], top: int = 20) -> List[Dict[str, object]]:
+    """
+    함수별 self / total 샘플 수 (self: 스택 최상위, total: 스택 어딘가에 포함)
+
+    Returns:
+        [{"frame", "self", "total"}] - self 내림차순
+    """
+    own: Counter = Counter()
+    total: Counter = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    return [{"frame": frame, "self": count, "total": total[frame]} for frame, count in own.most_common(top)]
+
+
+def read_collapsed(path: str) -> Dict[str, int]:
+    stacks: Counter = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+# ==================== 요청 단위 프로파일링 ====================
+
+def _profile_token_from(scope) -> Optional[bytes]:
+    """X-Profile 헤더 또는 ?__profile= 쿼리 값"""
+    for name, value in scope.get("headers") or ():
+        if name == PROFILE_HEADER:
+            return value
+    query = scope.get("query_string") or b""
+    if PROFILE_QUERY.encode() in query:
+        values = parse_qs(query.decode("latin-1")).get(PROFILE_QUERY)
+        if values:
+            return values[0].encode("latin-1")
+    return None
+
+
+class ProfilingMiddleware:
+    """
+    X-Profile 헤더가 PROFILE_TOKEN 과 일치하는 요청만 샘플링 프로파일러로 실행하는 ASGI 미들웨어
+
+    PROFILE_TOKEN 이 없으면 아무것도 하지 않습니다. 동시에 한 요청만 프로파일링합니다.
+
+    Args:
+        token: 프로파일링 토큰 (기본: PROFILE_TOKEN 환경 변수)
+        directory: 저장 디렉토리 (기본: {LOG_DIR}/profiles)
+        interval: 샘플링 간격(초) (기본: PROFILE_INTERVAL_MS 환경 변수, 없으면 5ms)
+    """
+
+    def __init__(self, app, token: str = None, directory: str = None, interval: float = None):
+        self.app = app
+        self.token = (token if token is not None else os.getenv("PROFILE_TOKEN", "")).encode()
+        self.directory = directory or os.path.join(os.getenv("LOG_DIR", "logs"), "profiles")
+        self.interval = interval or float(os.getenv("PROFILE_INTERVAL_MS", 5)) / 1000
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if not self.token or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = _profile_token_from(scope)
+        if requested is None or not hmac.compare_digest(requested, self.token):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            logger.warning("다른 요청을 프로파일링 중이라 건너뜀: %s", scope.get("path"))
+            await self.app(scope, receive, send)
+            return
+
+        # 요청 id 는 클라이언트가 보낸 값일 수 있으므로 파일명에 쓸 수 있는 문자만 남김
+        name = re.sub(r"[^A-Za-z0-9_-]+", "_", f"{get_request_id()}-{scope.get('path', '').strip('/')}")
+        path = os.path.join(self.directory, f"{datetime.now():%Y%m%d-%H%M%S}-{name}.folded")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-file", path.encode())]
+            await send(message)
+
+        profiler = SamplingProfiler(self.interval).start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            self._busy.release()
+            profiler.write(path)
+            logger.info("요청 프로파일 저장: %s (%d samples)", path, profiler.samples,
+                        extra={"profile_file": path, "samples": profiler.samples})
+
+
+# ==================== 상시 샘플링 ====================
+
+_continuous: Optional[SamplingProfiler] = None
+_continuous_path = ""
+_flusher: Optional[threading.Thread] = None
+_flush_stop = threading.Event()
+
+
+def start_continuous_profiler(log_dir: str = None, hz: float = None, flush_sec: float = None) -> Optional[SamplingProfiler]:
+    """
+    상시 저빈도 샘플링 시작 (hz 가 0 이면 시작하지 않음)
+
+    Args:
+        log_dir: 로그 디렉토리 (기본: LOG_DIR 환경 변수, 없으면 logs)
+        hz: 초당 샘플 수 (기본: PROFILE_CONTINUOUS_HZ 환경 변수, 없으면 0)
+        flush_sec: 파일 저장 주기(초) (기본: PROFILE_FLUSH_SEC 환경 변수, 없으면 60)
+
+    Returns:
+        프로파일러 (시작하지 않았으면 None)
+    """
+    global _continuous, _continuous_path, _flusher
+
+    hz = float(os.getenv("PROFILE_CONTINUOUS_HZ", 0)) if hz is None else hz
+    if hz <= 0 or _continuous is not None:
+        return _continuous
+    flush_sec = float(os.getenv("PROFILE_FLUSH_SEC", 60)) if flush_sec is None else flush_sec
+    _continuous_path = os.path.join(log_dir or os.getenv("LOG_DIR", "logs"), "profiles", "continuous.folded")
+    _continuous = SamplingProfiler(1.0 / hz).start()
+
+    def flush_loop():
+        while not _flush_stop.wait(flush_sec):
+            _continuous.write(_continuous_path)
+
+    _flush_stop.clear()
+    _flusher = threading.Thread(target=flush_loop, name="profile-flush", daemon=True)
+    _flusher.start()
+    logger.info("상시 프로파일링 시작: %.1fHz → %s", hz, _continuous_path)
+    return _continuous
+
+
+def stop_continuous_profiler():
+    """상시 샘플링 종료 (누적 결과 저장)"""
+    global _continuous, _flusher
+    if _continuous is None:
+        return
+    _flush_stop.set()
+    _flusher.join()
+    _continuous.stop()
+    _continuous.write(_continuous_path)
+    _continuous = _flusher = None
+
+
+atexit.register(stop_continuous_profiler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="collapsed stack 파일 요약 (함수별 self / total 샘플)")
+    parser.add_argument("path")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    stacks = read_collapsed(args.path)
+    samples = sum(stacks.values()) or 1
+    print(f"{'self%':>6} {'total%':>7}  frame")
+    for row in summarize(stacks, args.top):
+        print(f"{row['self'] / samples:>6.1%} {row['total'] / samples:>7.1%}  {row['frame']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+조회 API 응답 캐시
+프론트엔드가 주기적으로 호출하는 대시보드/리포트 조회 결과를 짧은 TTL로 재사용하고,
+관련 데이터가 커밋되면 태그 단위로 즉시 무효화
+
+- 기본 백엔드: 프로세스 내 LRU (RESPONSE_CACHE_BACKEND=memory)
+- 공유 백엔드: Redis (RESPONSE_CACHE_BACKEND=redis, REDIS_URL) - 여러 워커 간 무효화 공유
+- RESPONSE_CACHE_TTL (초, 기본값 30) 이 0 이하이면 캐시 비활성
+
+무효화는 태그 버전 방식입니다. 캐시 키에 관련 태그의 현재 버전이 포함되므로,
+쓰기가 커밋되어 버전이 올라가면 이전 항목은 더 이상 조회되지 않고 TTL/LRU로 정리됩니다.
+ORM Session 커밋만 감지하므로 text() 로 직접 쓰는 경우는 TTL 만큼 지연될 수 있습니다.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from utils.cache import TTLCache, get_ttl_from_env
+from utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_TTL = 30
+DEFAULT_MAXSIZE = 1024
+TEACHER_DASHBOARD_TAG = "teacher-dashboard"
+
+RESPONSE_CACHE_LOOKUPS = REGISTRY.counter(
+    "response_cache_lookups_total", "응답 캐시 조회 수 (result: hit/miss)", ("namespace", "result"))
+
+
+class MemoryBackend:
+    """프로세스 내 LRU 캐시 백엔드"""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        self._entries = TTLCache(ttl=DEFAULT_TTL, maxsize=maxsize)
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._entries.get(key)
+
+    def set(self, key: str, value: Any, ttl: float):
+        self._entries.set(key, value, ttl=ttl)
+
+    def tag_versions(self, tags: List[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def clear(self):
+        self._entries.invalidate()
+        with self._lock:
+            self._versions.clear()
+
+
+class RedisBackend:
+    """Redis 공유 캐시 백엔드 (redis 패키지 필요)"""
+
+    def __init__(self, url: str, prefix: str = "sungchibot:rc:"):
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        self._client.set(self._prefix + key, payload, px=int(ttl * 1000))
+
+    def tag_versions(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        raw = self._client.mget([self._prefix + "tag:" + tag for tag in tags])
+        return [int(v) if v is not None else 0 for v in raw]
+
+    def bump(self, tags: Iterable[str]):
+        pipe = self._client.pipeline()
+        for tag in tags:
+            pipe.incr(self._prefix + "tag:" + tag)
+        pipe.execute()
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """설정에 따른 캐시 백엔드 (최초 호출 시 생성)"""
+    global _backend
+    if _backend is not None:
+        return _backend
+
+    with _backend_lock:
+        if _backend is None:
+            maxsize = int(os.getenv("RESPONSE_CACHE_MAXSIZE", DEFAULT_MAXSIZE))
+            if os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower() == "redis":
+                try:
+                    _backend = RedisBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+                except Exception as e:
+                    logger.warning("Redis 캐시 백엔드 초기화 실패, 메모리 캐시 사용: %s", e)
+                    _backend = MemoryBackend(maxsize=maxsize)
+            else:
+                _backend = MemoryBackend(maxsize=maxsize)
+        return _backend
+
+
+def set_backend(backend):
+    """캐시 백엔드 교체 (get/set/tag_versions/bump/clear 를 구현한 객체)"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def get_default_ttl() -> float:
+    return get_ttl_from_env("RESPONSE_CACHE_TTL", DEFAULT_TTL)
+
+
+# ==================== 쓰기 이벤트 기반 무효화 ====================
+
+def _model_tags(obj) -> Set[str]:
+    """변경된 ORM 객체가 영향을 주는 캐시 태그"""
+    from models import (
+        Record, AchievementRecord, EssayGrading, Submission, Feedback,
+        Class, ClassMember, User, ClassReport
+    )
+
+    tags = set()
+    if isinstance(obj, (Record, AchievementRecord, EssayGrading)):
+        if obj.username:
+            tags.add(f"user:{obj.username}")
+    if isinstance(obj, (Record, AchievementRecord, Submission, Feedback, Class, ClassMember, User)):
+        tags.add(TEACHER_DASHBOARD_TAG)
+    if isinstance(obj, ClassReport):
+        tags.add(f"class-reports:{obj.teacher_username}")
+    return tags
+
+
+def _collect_tags(session, flush_context):
+    pending = session.info.setdefault("response_cache_tags", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        pending.update(_model_tags(obj))
+
+
+def _bump_committed_tags(session):
+    tags = session.info.pop("response_cache_tags", None)
+    if tags:
+        try:
+            get_backend().bump(tags)
+        except Exception as e:
+            logger.warning("응답 캐시 무효화 실패: %s", e)
+
+
+def _discard_tags(session, *args):
+    session.info.pop("response_cache_tags", None)
+
+
+_hooks_installed = False
+
+
+def install_invalidation_hooks():
+    """모든 Session 의 flush/commit 이벤트에 캐시 무효화 등록 (1회)"""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    event.listen(Session, "after_flush", _collect_tags)
+    event.listen(Session, "after_commit", _bump_committed_tags)
+    event.listen(Session, "after_rollback", _discard_tags)
+    _hooks_installed = True
+
+
+# ==================== 엔드포인트 데코레이터 ====================
+
+def _cache_params(signature: inspect.Signature, args, kwargs) -> Dict[str, Any]:
+    """엔드포인트 인자 중 캐시 키에 쓸 값 (DB 세션 제외, 요청 모델은 필드로 펼침)"""
+    bound = signature.bind_partial(*args, **kwargs)
+    bound.apply_defaults()
+
+    params = {}
+    for name, value in bound.arguments.items():
+        if isinstance(value, Session):
+            continue
+        if isinstance(value, BaseModel):
+            params.update(value.model_dump())
+        else:
+            params[name] = value
+    return params
+
+
+def cached_response(namespace: str, tags: Iterable[str] = (), ttl: float = None):
+    """
+    조회 엔드포인트 응답 캐시 데코레이터
+
+    Args:
+        namespace: 캐시 키 접두어 (엔드포인트 이름)
+        tags: 무효화 태그 템플릿 (예: "user:{username}", 엔드포인트 인자로 포맷)
+        ttl: 유지 시간(초), None이면 RESPONSE_CACHE_TTL
+
+    success 가 False 인 응답은 캐시하지 않습니다.
+    """
+    tag_templates = list(tags)
+    install_invalidation_hooks()
+
+    def decorator(func: Callable):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            effective_ttl = get_default_ttl() if ttl is None else ttl
+            if effective_ttl <= 0:
+                return func(*args, **kwargs)
+
+            try:
+                params = _cache_params(signature, args, kwargs)
+                entry_tags = [t.format(**params) for t in tag_templates]
+                backend = get_backend()
+                versions = backend.tag_versions(entry_tags)
+                raw_key = json.dumps([params, versions], sort_keys=True, ensure_ascii=False, default=str)
+                key = f"{namespace}:{hashlib.sha1(raw_key.encode('utf-8')).hexdigest()}"
+                cached = backend.get(key)
+            except Exception as e:
+                logger.warning("응답 캐시 조회 실패 (%s): %s", namespace, e)
+                return func(*args, **kwargs)
+
+            RESPONSE_CACHE_LOOKUPS.inc(namespace=namespace, result="miss" if cached is None else "hit")
+            if cached is not None:
+                return cached
+
+            result = func(*args, **kwargs)
+            if isinstance(result, dict) and result.get("success", True) is not False:
+                try:
+                    backend.set(key, result, effective_ttl)
+                except Exception as e:
+                    logger.warning("응답 캐시 저장 실패 (%s): %s", namespace, e)
+            return result
+
+        return wrapper
+
+    return decorator